@@ -0,0 +1,264 @@
+"""
+Monte Carlo planner of "hard" bots.
+
+Normal bots decide with fixed heuristics (a $300 cash reserve, a 30% chance
+to raise a bid, trades compared by list price). A hard bot instead tries
+every option of a decision (buy or decline, build or hold, raise or pass,
+accept or reject a trade) on clones of the game, plays each clone forward
+with the regular bots for HORIZON turns, and picks the option that leaves
+it the largest average share of the table's net worth. Rollouts go in
+rounds, one per option on the same dice, until the time budget is spent.
+The first option is what the heuristics would do; another option is only
+chosen when its paired advantage over it is significant (Z_SCORE), so a
+hard bot never trades the heuristics for rollout noise.
+
+Rollouts use GameState.clone() and a state class that skips logging and
+serialization, the two costs a rollout never needs. Live games plan in a
+process pool: the state is cloned on the game's actor, the clone is sent to
+a worker and only the chosen plan comes back. The plan is then passed to the
+journaled engine call, so replaying the journal reproduces the decision.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from game_engine import GameEngine
+from models import GameState
+from simulator import run_bot_step
+
+# Time spent on one decision (seconds)
+BUDGET = float(os.getenv("BOT_PLANNER_BUDGET_MS", "50")) / 1000
+
+# Planner worker processes
+WORKERS = int(os.getenv("BOT_PLANNER_WORKERS", "2"))
+
+# A plan not back after this long (e.g. pool still starting) falls back to the heuristics
+PLAN_TIMEOUT = 5.0
+
+HORIZON = 20  # Turns played by a rollout
+Z_SCORE = 1.64  # One-sided 95%: required paired advantage over the heuristic choice, in standard errors
+MAX_ROLLOUT_STEPS = HORIZON * 8  # Guard against games the regular bots cannot finish
+
+POST_ROLL, BID, TRADE = "post_roll", "bid", "trade"
+
+
+class RolloutState(GameState):
+    """Game state of a rollout: logs and snapshots are never read there."""
+    __slots__ = ()
+
+    def add_log(self, message: str):
+        pass
+
+    def to_dict(self) -> dict:
+        return {}
+
+
+_engine: Optional[GameEngine] = None
+
+
+def _rollout_engine() -> GameEngine:
+    """Engine of this process for rollouts (no journal)."""
+    global _engine
+    if _engine is None:
+        _engine = GameEngine()
+    return _engine
+
+
+def _can_build(engine: GameEngine, game: GameState, player, reserve: int = 0) -> bool:
+    for pid in player.properties:
+        tile = game.board[pid]
+        if tile.is_monopoly and tile.group not in ("Station", "Utility"):
+            group = engine._group_tiles(game, tile.group)
+            min_h = min(t.houses for t in group)
+            if tile.houses == min_h < 5 and player.money > (tile.price // 2) + 50 + reserve:
+                return True
+    return False
+
+
+def decision_options(engine: GameEngine, game: GameState, player_id: str, kind: str,
+                     target: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Plans worth comparing for a decision (empty when there is no real choice).
+    The first one is the heuristic choice, except for bids (a random raise).
+    """
+    player = game.players.get(player_id)
+    if not player:
+        return []
+    if kind == POST_ROLL:
+        # Mirrors the heuristics of run_bot_post_roll ($300 reserve, buying completes a street)
+        tile = game.board[player.position]
+        buy = [None]
+        if (not tile.owner_id and tile.id in engine._board_index(game).purchasable
+                and player.money >= tile.price):
+            index = engine._board_index(game)
+            completes = engine._owned_in_group(game, player_id, tile.group) == index.group_size(tile.group) - 1
+            buy = [True, False] if completes or player.money - tile.price > 300 else [False, True]
+        build = [None]
+        if _can_build(engine, game, player):
+            build = [True, False] if _can_build(engine, game, player, reserve=300) else [False, True]
+        options = [
+            {key: value for key, value in (("buy", b), ("build", c)) if value is not None}
+            for b in buy for c in build
+        ]
+        return options if len(options) > 1 else []
+    if kind == BID:
+        if player.money >= game.turn_state.get("auction_current_bid", 0) + 10:
+            return [{"raise": True}, {"raise": False}]
+        return []
+    if kind == TRADE:
+        trade = game.trades.get(target)
+        if not trade:
+            return []
+        accept = engine.bot_accepts_trade(game, trade)
+        return [{"accept": accept}, {"accept": not accept}]
+    return []
+
+
+def _apply(engine: GameEngine, game_id: str, player_id: str, kind: str, target: Optional[str], option: Dict[str, Any]):
+    if kind == POST_ROLL:
+        engine.run_bot_post_roll(game_id, player_id, plan=option)
+    elif kind == BID:
+        engine.run_bot_auction_decision(game_id, player_id, plan=option)
+    elif kind == TRADE:
+        engine.respond_to_trade(game_id, target, "accept" if option["accept"] else "reject")
+
+
+def net_worth(game: GameState, player) -> int:
+    """Cash plus what the player's tiles and houses cost (mortgaged tiles at their mortgage value)."""
+    if player.is_bankrupt:
+        return 0
+    worth = player.money
+    for pid in player.properties:
+        tile = game.board[pid]
+        worth += tile.price // 2 if tile.is_mortgaged else tile.price + tile.houses * ((tile.price // 2) + 50)
+    return worth
+
+
+def _share(game: GameState, player_id: str) -> float:
+    if game.game_status == "finished":
+        return 1.0 if game.winner_id == player_id else 0.0
+    worths = {pid: net_worth(game, p) for pid, p in game.players.items()}
+    total = sum(worths.values())
+    return worths.get(player_id, 0) / total if total else 0.0
+
+
+def _rollout(engine: GameEngine, snapshot: GameState, player_id: str, kind: str,
+             target: Optional[str], option: Dict[str, Any], seed: int) -> float:
+    game = snapshot.clone()
+    game.__class__ = RolloutState
+    game.rng.seed(seed)
+    game.rng.shuffle(game.chance_pile)  # The order of the pile is hidden: don't plan on it
+    game.turn_timer = 0
+    for player in game.players.values():
+        # Everyone plays the regular bot policy
+        player.is_bot = True
+        player.difficulty = "normal"
+    game_id = game.game_id
+    engine.games[game_id] = game
+    try:
+        _apply(engine, game_id, player_id, kind, target, option)
+        end = game.turn_number + HORIZON
+        steps = 0
+        turn = None
+        while game.game_status == "active" and game.turn_number < end and steps < MAX_ROLLOUT_STEPS:
+            if game.turn_number != turn:
+                # Same dice per turn for every option, however differently they used the RNG before
+                turn = game.turn_number
+                game.rng.seed(seed * 1009 + turn)
+            run_bot_step(engine, game_id)
+            steps += 1
+        return _share(game, player_id)
+    finally:
+        engine.games.pop(game_id, None)
+        engine.dirty.discard(game_id)
+        engine.deadlines.cancel((game_id, "auction"))
+
+
+def evaluate(snapshot: GameState, player_id: str, kind: str, target: Optional[str] = None,
+             budget: float = BUDGET, seed: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Plan for a decision of `player_id` in `snapshot` (left untouched), or None
+    to keep the heuristics: when there is nothing to choose, or no option did
+    significantly better than the heuristic one (for bids: than the runner-up).
+    """
+    engine = _rollout_engine()
+    options = decision_options(engine, snapshot, player_id, kind, target)
+    if len(options) < 2:
+        return None
+    if seed is None:
+        seed = zlib.crc32(f"{snapshot.game_id}:{snapshot.turn_number}:{kind}:{player_id}".encode())
+
+    started = time.perf_counter()
+    deadline = started + budget
+    scores: List[List[float]] = [[] for _ in options]
+    rounds = 0
+    while True:
+        for i, option in enumerate(options):
+            scores[i].append(_rollout(engine, snapshot, player_id, kind, target, option, seed + rounds))
+        rounds += 1
+        now = time.perf_counter()
+        # Stop unless another round still fits in the budget
+        if rounds >= 2 and now + (now - started) / rounds > deadline:
+            break
+
+    ranked = sorted(range(len(options)), key=lambda i: sum(scores[i]), reverse=True)
+    best = ranked[0]
+    baseline = ranked[1] if kind == BID else 0
+    if best == baseline:
+        return None
+    diffs = [a - b for a, b in zip(scores[best], scores[baseline])]
+    mean = sum(diffs) / rounds
+    variance = sum((d - mean) ** 2 for d in diffs) / (rounds - 1)
+    if mean <= 0 or mean * mean * rounds <= Z_SCORE * Z_SCORE * variance:
+        return None
+    return options[best]
+
+
+class BotPlanner:
+    """Runs hard bot decisions in a process pool, off the event loop."""
+
+    def __init__(self, workers: int = WORKERS, budget: float = BUDGET):
+        self.workers = workers
+        self.budget = budget
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.plans = 0
+        self.fallbacks = 0
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned, not forked: the server process runs threads and an event loop
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def plan(self, snapshot: GameState, player_id: str, kind: str,
+                   target: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Plan a decision on a clone taken on the game's actor. None (keep the
+        heuristics) if there is nothing to choose or the planner failed.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            plan = await asyncio.wait_for(
+                loop.run_in_executor(self.pool, evaluate, snapshot, player_id, kind, target, self.budget),
+                PLAN_TIMEOUT
+            )
+        except Exception as e:
+            self.fallbacks += 1
+            print(f"Bot planner error ({snapshot.game_id}, {kind}): {e!r}")
+            return None
+        self.plans += 1
+        return plan
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Global planner; the pool starts with the first hard bot decision
+bot_planner = BotPlanner()
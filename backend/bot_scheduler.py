@@ -0,0 +1,255 @@
+"""
+Central scheduler of bot turns.
+
+A bot turn is a short chain of steps with pauses in between so players can
+follow it (roll, let the dice animate, buy / pay, end the turn). Instead of
+one sleeping coroutine per bot turn, every game has at most one pending bot
+step, kept in a DeadlineScheduler heap, and a single dispatcher starts the
+steps that are due (at most MAX_RUNNING at a time). A step runs on the
+game's actor and returns the game's next step and its delay:
+
+    CHECK -> ROLL -> POST_ROLL -> CHECK -> END -> CHECK -> ... (next bot)
+    CHECK -> BID -> CHECK -> ...                                (auction)
+
+CHECK looks at whoever has to act: nothing is scheduled while that is a
+human. It also answers trades offered to hard bots (TRADE). Before a
+post-roll, bid or trade step of a hard bot, the game is cloned on its actor
+and the decision is planned off the loop (see bot_planner.py). Callers just `request(game_id)` whenever a game changed in a way that
+may hand the turn to a bot; duplicate requests collapse into one job.
+"""
+import asyncio
+import os
+import random
+import time
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from bot_planner import bot_planner
+from deadlines import DeadlineScheduler
+from game_actor import game_actors, breaking_news
+
+# Bot steps running at the same time (each waits on its game's actor)
+MAX_RUNNING = int(os.getenv("BOT_MAX_CONCURRENCY", "64"))
+
+# Pauses of a bot turn (seconds)
+ROLL_DELAY = 2.0       # Before rolling
+ANIMATION_DELAY = 3.0  # Dice animation before buying / paying
+END_DELAY = 2.0        # Before ending the turn (or rolling again on doubles)
+NEXT_DELAY = 1.0       # After the turn passed on
+BID_DELAY = (1.0, 2.0)  # Before an auction decision (random in range)
+TRADE_DELAY = 2.0      # Before a hard bot answers a trade offer
+
+CHECK, ROLL, POST_ROLL, END, BID, TRADE = "check", "roll", "post_roll", "end", "bid", "trade"
+PLANNED = (POST_ROLL, BID, TRADE)
+
+Step = Tuple[str, Optional[str], float]  # (phase, target, delay); target: acting bot, or trade id for TRADE
+
+
+def _acting_player_id(game) -> Optional[str]:
+    """Player who has to act now: the current bidder during an auction, else the current player."""
+    if game.turn_state.get("auction_active"):
+        eligible = game.turn_state.get("auction_eligible_players", [])
+        idx = game.turn_state.get("auction_current_player_index", 0)
+        return eligible[idx] if idx < len(eligible) else None
+    return game.player_order[game.current_turn_index] if game.player_order else None
+
+
+def _pending_hard_trade(game):
+    """Oldest pending trade offered to a hard bot (regular bots answer right away)."""
+    for trade in game.trades.values():
+        player = game.players.get(trade.to_player_id)
+        if trade.status == "pending" and player and player.is_bot and player.difficulty == "hard":
+            return trade
+    return None
+
+
+class BotScheduler:
+    """Queue of bot steps due at a given time, at most one per game."""
+
+    def __init__(self, max_running: int = MAX_RUNNING):
+        self.jobs = DeadlineScheduler()  # game_id -> when its next step is due
+        self.phases: Dict[str, Tuple[str, Optional[str], float]] = {}  # game_id -> (phase, target, due)
+        self.running: Set[str] = set()  # Dispatched, maybe still waiting for a slot
+        self.active = 0  # Steps holding a slot
+        self.recheck: Set[str] = set()  # Requested while a step was running
+        self.max_running = max_running
+        self._slots = asyncio.Semaphore(max_running)
+        self._wakeup = asyncio.Event()
+        self.steps_run = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    # ============== Queue ==============
+
+    def request(self, game_id: str):
+        """A game changed: check soon whether a bot has to act (no-op if a step is already queued)."""
+        if game_id in self.running:
+            self.recheck.add(game_id)
+        elif game_id not in self.jobs:
+            self._queue(game_id, (CHECK, None, 0.0))
+
+    def cancel(self, game_id: str):
+        self.jobs.cancel(game_id)
+        self.phases.pop(game_id, None)
+        self.recheck.discard(game_id)
+
+    def _queue(self, game_id: str, step: Step):
+        phase, target, delay = step
+        now = time.monotonic()
+        self.jobs.schedule(game_id, delay, now)
+        self.phases[game_id] = (phase, target, now + delay)
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue metrics (exposed on /health)."""
+        now = time.monotonic()
+        return {
+            "queued": len(self.jobs),
+            "due": sum(1 for _, _, due in self.phases.values() if due <= now) + len(self.running) - self.active,
+            "running": self.active,
+            "max_running": self.max_running,
+            "steps_run": self.steps_run,
+            "lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
+
+    # ============== Dispatch ==============
+
+    async def run(self):
+        """Dispatcher loop: start due steps, never more than max_running at once."""
+        while True:
+            self._wakeup.clear()
+            next_due = self.jobs.next_due()
+            delay = None if next_due is None else next_due - time.monotonic()
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            due = [(game_id, *self.phases.pop(game_id)) for game_id in self.jobs.pop_due(now)]
+            self.running.update(game_id for game_id, *_ in due)  # Claimed before waiting for slots
+            for game_id, phase, target, when in due:
+                self.last_lag = now - when
+                self.max_lag = max(self.max_lag, self.last_lag)
+                await self._slots.acquire()
+                self.active += 1
+                asyncio.create_task(self._run_step(game_id, phase, target))
+
+    async def _run_step(self, game_id: str, phase: str, target: Optional[str]):
+        step = None
+        try:
+            plan = None
+            if phase in PLANNED:
+                decision = await game_actors.submit(game_id, partial(self._snapshot, game_id, phase, target))
+                if decision:
+                    plan = await bot_planner.plan(*decision, phase, target)
+            step = await game_actors.submit(game_id, partial(self._step, game_id, phase, target, plan))
+        except Exception as e:
+            print(f"Bot step error ({game_id}, {phase}): {e}")
+        finally:
+            self.active -= 1
+            self._slots.release()
+            self.running.discard(game_id)
+            self.steps_run += 1
+        if step:
+            self.recheck.discard(game_id)
+            self._queue(game_id, step)
+        elif game_id in self.recheck:
+            # The game changed while this step ran
+            self.recheck.discard(game_id)
+            self._queue(game_id, (CHECK, None, 0.0))
+
+    # ============== Steps (run on the game's actor) ==============
+
+    def _snapshot(self, game_id: str, phase: str, target: Optional[str], out: List[dict]):
+        """(clone, player_id) to plan this step on, if it is a hard bot decision."""
+        from game_engine import engine
+
+        game = engine.games.get(game_id)
+        if not game or game.game_status != "active":
+            return None
+        if phase == TRADE:
+            trade = game.trades.get(target)
+            player_id = trade.to_player_id if trade and trade.status == "pending" else None
+        else:
+            player_id = target if _acting_player_id(game) == target else None
+        player = game.players.get(player_id)
+        if not player or player.difficulty != "hard":
+            return None
+        return game.clone(), player_id
+
+    def _step(self, game_id: str, phase: str, target: Optional[str], plan: Optional[dict],
+              out: List[dict]) -> Optional[Step]:
+        from game_engine import engine
+
+        game = engine.games.get(game_id)
+        if not game or game.game_status != "active":
+            return None
+
+        if phase == TRADE:
+            trade = game.trades.get(target)
+            if trade and trade.status == "pending":
+                accept = plan["accept"] if plan else engine.bot_accepts_trade(game, trade)
+                result = engine.respond_to_trade(game_id, trade.id, "accept" if accept else "reject")
+                if result.get("error") and trade.status == "pending":
+                    result = engine.respond_to_trade(game_id, trade.id, "reject")  # Assets changed meanwhile
+                if not result.get("error"):
+                    out.append({"type": "TRADE_UPDATED", **result})
+            return CHECK, None, 0.0
+        if phase == CHECK:
+            trade = _pending_hard_trade(game)
+            if trade:
+                return TRADE, trade.id, TRADE_DELAY
+
+        acting = _acting_player_id(game)
+        player = game.players.get(acting)
+        if not player or not player.is_bot:
+            return None  # A human has to act
+        if acting != target:
+            phase = CHECK  # The game moved on while this step was waiting
+
+        if game.turn_state.get("auction_active"):
+            if phase != BID:
+                return BID, acting, random.uniform(*BID_DELAY)
+            result = engine.run_bot_auction_decision(game_id, acting, plan)
+            if not result or result.get("error"):
+                return None
+            out.append({"type": "AUCTION_RESOLVED" if "winner" in result else "AUCTION_UPDATED", **result})
+            return CHECK, None, 0.0
+
+        if phase == CHECK:
+            # Rolls again on doubles (has_rolled is reset), otherwise ends the turn
+            if not game.turn_state.get("has_rolled"):
+                return ROLL, acting, ROLL_DELAY
+            return END, acting, END_DELAY
+
+        if phase == ROLL:
+            result = engine.run_bot_turn(game_id)
+            if not result or result.get("error"):
+                return None
+            out.append(result)
+            if result.get("chance_card"):
+                out.append(breaking_news(game, result["chance_card"]))
+            return POST_ROLL, acting, ANIMATION_DELAY
+
+        if phase == POST_ROLL:
+            result = engine.run_bot_post_roll(game_id, acting, plan)
+            if result and not result.get("error"):
+                out.append(result)
+            return CHECK, None, 0.0
+
+        if phase == END:
+            result = engine.end_turn(game_id, acting)
+            if result.get("error"):
+                return None  # Left to the turn timer
+            out.append({"type": "TURN_ENDED", **result})
+            return CHECK, None, NEXT_DELAY
+
+        return None
+
+
+# Global scheduler; its dispatcher is started by the app lifespan
+bot_scheduler = BotScheduler()
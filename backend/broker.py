@@ -0,0 +1,321 @@
+"""
+Pub/sub broker under ConnectionManager.
+
+Broadcasts are published to a topic per game (`game:<id>`) or user
+(`user:<id>`); every node subscribes to the topics of its own sockets and
+fans the messages it receives out to them, so a broadcast reaches a game's
+clients whichever process they are connected to.
+
+- LocalBroker (default): in-process delivery, messages are passed as they are
+  (not copied: subscribers must not modify them).
+- RespBroker (BROKER_URL=redis://[:password@]host:port): Redis pub/sub over
+  the RESP protocol, without a client library. Publishes made while the
+  previous batch is on the wire are sent together in one pipelined write.
+  Publishes not acknowledged when the connection drops are sent again, so
+  each one is tagged with its broker and a sequence number and receivers
+  drop the repeats.
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from wire_codec import dumps
+
+BROKER_URL = os.getenv("BROKER_URL", "")
+
+# Channel prefix, so several deployments can share one Redis
+BROKER_PREFIX = os.getenv("BROKER_PREFIX", "monopoly:")
+
+# Publishes a RespBroker keeps while the broker is unreachable (oldest are dropped beyond)
+BROKER_PENDING_LIMIT = int(os.getenv("BROKER_PENDING_LIMIT", "10000"))
+
+# Delay before reconnecting to a broker that dropped the connection
+RECONNECT_SECONDS = 1.0
+
+Deliver = Callable[[str, Any], Awaitable[None]]
+
+
+class LocalBroker:
+    """
+    In-process broker: a publish is delivered right away to every LocalBroker
+    of the process subscribed to the topic (one per ConnectionManager).
+    """
+    remote = False
+
+    def __init__(self, hub: Optional[Dict[str, Set["LocalBroker"]]] = None):
+        self.hub = _LOCAL_HUB if hub is None else hub  # topic -> subscribed brokers
+        self.topics: Set[str] = set()
+        self.deliver: Optional[Deliver] = None
+        self.published = 0
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+
+    async def close(self):
+        for topic in list(self.topics):
+            self.unsubscribe(topic)
+        self.deliver = None
+
+    async def publish(self, topic: str, payload: Any):
+        self.published += 1
+        for broker in list(self.hub.get(topic, ())):
+            if broker.deliver:
+                await broker.deliver(topic, payload)
+
+    def reaches_others(self, topic: str) -> bool:
+        """Whether a publish on `topic` would reach another subscriber than this one."""
+        return any(broker is not self for broker in self.hub.get(topic, ()))
+
+    def subscribe(self, topic: str):
+        self.topics.add(topic)
+        self.hub.setdefault(topic, set()).add(self)
+
+    def unsubscribe(self, topic: str):
+        self.topics.discard(topic)
+        subscribers = self.hub.get(topic)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.hub[topic]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": "local", "topics": len(self.topics), "published": self.published}
+
+
+_LOCAL_HUB: Dict[str, Set[LocalBroker]] = {}
+
+
+# ============== RESP ==============
+
+def encode_command(*args: Any) -> bytes:
+    """A command as a RESP array of bulk strings."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(out)
+
+
+class RespError(Exception):
+    pass
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Read one RESP reply (errors are returned as RespError, not raised)."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Broker closed the connection")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        return RespError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        data = await reader.readexactly(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(rest)
+        if size < 0:
+            return None
+        return [await read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"Unexpected broker reply: {line!r}")
+
+
+class RespBroker:
+    """
+    Redis pub/sub broker. Two connections: one publishes (pipelined batches,
+    replies read back in order), one holds the subscriptions and receives.
+    Payloads are JSON, sent as {"src": broker id, "seq": n, "data": payload};
+    topics are prefixed with BROKER_PREFIX.
+    """
+    remote = True
+
+    def __init__(self, url: str, prefix: str = BROKER_PREFIX):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.prefix = prefix
+        self.topics: Set[str] = set()
+        self.deliver: Optional[Deliver] = None
+        self.source = uuid.uuid4().hex
+        self.seq = 0
+        self.last_seq: Dict[str, int] = {}  # Source broker -> highest sequence received from it
+        self.pending: Deque[bytes] = deque(maxlen=BROKER_PENDING_LIMIT)
+        self.wake = asyncio.Event()
+        self.sub_writer: Optional[asyncio.StreamWriter] = None
+        self.tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.batches = 0
+        self.received = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(encode_command("AUTH", self.password))
+            reply = await read_reply(reader)
+            if isinstance(reply, RespError):
+                writer.close()
+                raise ConnectionError(f"Broker AUTH failed: {reply}")
+        return reader, writer
+
+    async def start(self, deliver: Deliver):
+        self.deliver = deliver
+        loop = asyncio.get_running_loop()
+        self.tasks = [loop.create_task(self._publisher()), loop.create_task(self._subscriber())]
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        for task in self.tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self.tasks = []
+
+    # ============== Publishing ==============
+
+    async def publish(self, topic: str, payload: Any):
+        """Queue a publish; it goes out with the next pipelined batch."""
+        self.seq += 1
+        message = dumps({"src": self.source, "seq": self.seq, "data": payload})
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1  # The oldest queued publish makes room
+        self.pending.append(encode_command("PUBLISH", self.prefix + topic, message))
+        self.published += 1
+        self.wake.set()
+
+    def reaches_others(self, topic: str) -> bool:
+        # Subscribers on other nodes are not known here
+        return True
+
+    async def _publisher(self):
+        while True:
+            try:
+                reader, writer = await self._open()
+            except (OSError, ConnectionError) as e:
+                print(f"Broker publisher connection failed: {e}")
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            try:
+                while True:
+                    if not self.pending:
+                        self.wake.clear()
+                        await self.wake.wait()
+                        continue
+                    batch = list(self.pending)
+                    self.pending.clear()
+                    acked = 0
+                    try:
+                        writer.write(b"".join(batch))
+                        await writer.drain()
+                        self.batches += 1
+                        for _ in batch:
+                            reply = await read_reply(reader)
+                            acked += 1
+                            if isinstance(reply, RespError):
+                                print(f"Broker publish failed: {reply}")
+                    finally:
+                        if acked < len(batch):
+                            self._requeue(batch[acked:])
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                print(f"Broker publisher disconnected: {e}")
+                await asyncio.sleep(RECONNECT_SECONDS)
+            finally:
+                writer.close()
+
+    def _requeue(self, unacked: List[bytes]):
+        """
+        Put unacknowledged publishes back in front of the queue, for the next
+        connection. Some may have been delivered already: receivers drop them.
+        """
+        queued = unacked + list(self.pending)
+        limit = self.pending.maxlen
+        self.dropped += max(0, len(queued) - limit)
+        self.pending = deque(queued, maxlen=limit)
+
+    # ============== Subscriptions ==============
+
+    def subscribe(self, topic: str):
+        if topic not in self.topics:
+            self.topics.add(topic)
+            self._send_sub("SUBSCRIBE", topic)
+
+    def unsubscribe(self, topic: str):
+        if topic in self.topics:
+            self.topics.discard(topic)
+            self._send_sub("UNSUBSCRIBE", topic)
+
+    def _send_sub(self, command: str, topic: str):
+        # Without a connection, the topic is (re)subscribed once connected
+        if self.sub_writer is not None:
+            self.sub_writer.write(encode_command(command, self.prefix + topic))
+
+    async def _subscriber(self):
+        while True:
+            try:
+                reader, writer = await self._open()
+            except (OSError, ConnectionError) as e:
+                print(f"Broker subscriber connection failed: {e}")
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            try:
+                self.sub_writer = writer
+                if self.topics:
+                    writer.write(encode_command("SUBSCRIBE", *(self.prefix + topic for topic in self.topics)))
+                while True:
+                    reply = await read_reply(reader)
+                    if not isinstance(reply, list) or len(reply) != 3 or reply[0] != b"message":
+                        continue  # (un)subscribe confirmations
+                    channel = reply[1].decode("utf-8")
+                    topic = channel[len(self.prefix):]
+                    if topic not in self.topics or self.deliver is None:
+                        continue
+                    message = json.loads(reply[2])
+                    source, seq = message["src"], message["seq"]
+                    if seq <= self.last_seq.get(source, 0):
+                        self.duplicates += 1  # Sent again after a reconnect
+                        continue
+                    self.last_seq[source] = seq
+                    self.received += 1
+                    try:
+                        await self.deliver(topic, message["data"])
+                    except Exception as e:
+                        print(f"Broker delivery error ({topic}): {e}")
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                print(f"Broker subscriber disconnected: {e}")
+                await asyncio.sleep(RECONNECT_SECONDS)
+            finally:
+                self.sub_writer = None
+                writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": "resp",
+            "connected": self.sub_writer is not None,
+            "topics": len(self.topics),
+            "published": self.published,
+            "batches": self.batches,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+        }
+
+
+def broker_from_env():
+    """Broker configured by BROKER_URL (in-process when unset)."""
+    if BROKER_URL.startswith(("redis://", "resp://")):
+        return RespBroker(BROKER_URL)
+    return LocalBroker()
@@ -0,0 +1,95 @@
+"""
+Run the backend as several sharded worker processes on one port.
+
+The public socket is bound once and shared by all workers (the kernel hands
+each new connection to one of them). Each worker additionally listens on its
+own internal port, which the others use to forward requests for the games
+it owns (see sharding.py). Workers that die are restarted; the ring
+rebalances around them while they are gone.
+
+Usage:
+    python cluster.py --workers 4 --port 8080
+"""
+import argparse
+import multiprocessing
+import os
+import secrets
+import signal
+import socket
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve(worker_id: str, public: socket.socket, internal_host: str, env: Dict[str, str]):
+    """Worker process: serve the app on the shared public socket and a private internal one."""
+    internal = _bind(internal_host, 0)
+    os.environ.update(env)
+    os.environ["SHARD_WORKER_ID"] = worker_id
+    os.environ["SHARD_URL"] = f"http://{internal_host}:{internal.getsockname()[1]}"
+    deflate = os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower() not in ("0", "false", "no")
+    config = uvicorn.Config("main:app", proxy_headers=True, forwarded_allow_ips="*", ws_per_message_deflate=deflate)
+    uvicorn.Server(config).run(sockets=[public, internal])
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run sharded backend workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8080")))
+    parser.add_argument("--internal-host", default=os.getenv("SHARD_INTERNAL_HOST", "127.0.0.1"),
+                        help="Address the workers use to reach each other")
+    args = parser.parse_args(argv)
+
+    env = {
+        "SHARD_DIR": os.getenv("SHARD_DIR") or tempfile.mkdtemp(prefix="shards-"),
+        "SHARD_SECRET": os.getenv("SHARD_SECRET") or secrets.token_hex(16),
+    }
+    public = _bind(args.host, args.port)
+    context = multiprocessing.get_context("spawn")
+    workers: Dict[str, multiprocessing.Process] = {}
+
+    def start(worker_id: str):
+        process = context.Process(target=_serve, args=(worker_id, public, args.internal_host, env), name=worker_id)
+        process.start()
+        workers[worker_id] = process
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"🚀 Starting {args.workers} worker(s) on {args.host}:{args.port}")
+    for i in range(args.workers):
+        start(f"w{i}")
+
+    while not stopping:
+        time.sleep(1)
+        for worker_id, process in list(workers.items()):
+            if not process.is_alive() and not stopping:
+                print(f"⚠ Worker {worker_id} exited with {process.exitcode}, restarting")
+                start(worker_id)
+
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        process.join(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
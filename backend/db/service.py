@@ -38,6 +38,14 @@ async def get_user(session: AsyncSession, user_id: str) -> Optional[UserDB]:
     return result.scalar_one_or_none()
 
 
+async def get_users_by_ids(session: AsyncSession, user_ids: List[str]) -> List[UserDB]:
+    """Get several users in one query (unknown ids are skipped)."""
+    if not user_ids:
+        return []
+    result = await session.execute(select(UserDB).where(UserDB.id.in_(user_ids)))
+    return list(result.scalars().all())
+
+
 async def get_user_by_telegram_id(session: AsyncSession, telegram_id: int) -> Optional[UserDB]:
     """Get user by Telegram ID."""
     result = await session.execute(
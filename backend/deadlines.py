@@ -0,0 +1,85 @@
+"""
+Deadline scheduler for game timers.
+
+Turn and auction expiries are registered here instead of being polled on
+every active game: the game loop only pops the deadlines that have passed,
+so the cost of a tick does not grow with the number of running games.
+
+Deadlines live in a heap ordered by time.monotonic(). Every key (e.g.
+("ABC123", "turn")) has at most one live deadline; rescheduling or
+cancelling a key just invalidates its old heap entry, which is skipped when
+it surfaces and dropped in bulk once stale entries dominate the heap.
+"""
+import heapq
+import itertools
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Rebuild the heap once it holds this many times more entries than live deadlines
+COMPACT_RATIO = 4
+COMPACT_MIN_SIZE = 64
+
+
+class DeadlineScheduler:
+    """Keyed one-shot deadlines on the monotonic clock."""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._live: Dict[Hashable, Tuple[float, int]] = {}  # key -> (when, seq) of its current entry
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._live
+
+    def schedule(self, key: Hashable, delay: float, now: Optional[float] = None):
+        """(Re)schedule `key` to fire `delay` seconds from now, replacing any previous deadline."""
+        when = (time.monotonic() if now is None else now) + delay
+        seq = next(self._seq)
+        self._live[key] = (when, seq)
+        heapq.heappush(self._heap, (when, seq, key))
+        self._maybe_compact()
+
+    def cancel(self, key: Hashable):
+        """Drop the deadline of `key`, if any."""
+        if self._live.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def remaining(self, key: Hashable, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until `key` fires, or None if it is not scheduled."""
+        entry = self._live.get(key)
+        if entry is None:
+            return None
+        return entry[0] - (time.monotonic() if now is None else now)
+
+    def next_due(self) -> Optional[float]:
+        """Monotonic time of the earliest live deadline."""
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Hashable]:
+        """Remove and return the keys whose deadline has passed, earliest first."""
+        now = time.monotonic() if now is None else now
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, seq, key = heapq.heappop(heap)
+            if self._live.get(key) == (when, seq):
+                del self._live[key]
+                due.append(key)
+        return due
+
+    def _drop_stale_head(self):
+        heap = self._heap
+        while heap:
+            when, seq, key = heap[0]
+            if self._live.get(key) == (when, seq):
+                return
+            heapq.heappop(heap)
+
+    def _maybe_compact(self):
+        if len(self._heap) > COMPACT_MIN_SIZE and len(self._heap) > COMPACT_RATIO * len(self._live):
+            self._heap = [(when, seq, key) for key, (when, seq) in self._live.items()]
+            heapq.heapify(self._heap)
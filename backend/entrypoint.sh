@@ -58,5 +58,8 @@ echo "=========================================="
 echo "🎮 Starting server on port ${PORT:-8080}"
 echo "=========================================="
 
-# Start the server
-exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8080} --proxy-headers --forwarded-allow-ips='*'
+# Start the server (sharded workers when WEB_CONCURRENCY > 1, see cluster.py)
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    exec python cluster.py --workers ${WEB_CONCURRENCY} --port ${PORT:-8080}
+fi
+exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8080} --proxy-headers --forwarded-allow-ips='*' --ws-per-message-deflate ${WS_PER_MESSAGE_DEFLATE:-true}
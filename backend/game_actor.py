@@ -0,0 +1,120 @@
+"""
+Per-game actors.
+
+Every change to a game goes through the game's mailbox and is applied by a
+single consumer task, one after the other, so a handler can no longer act on
+state another coroutine changed while it was awaiting. An action is a plain
+function run on the consumer:
+
+    def roll(out):
+        result = engine.roll_dice(game_id, player_id)
+        if not result.get("error"):
+            out.append({"type": "DICE_ROLLED", **result})
+        return result
+
+    result = await game_actors.submit(game_id, roll)
+
+Messages appended to `out` are broadcast once the consumer has drained its
+mailbox: a burst of actions becomes one batch, whose messages share a single
+committed state version (see ConnectionManager.broadcast_batch). Consumers
+exit after IDLE_SECONDS without mail and are restarted on the next submit.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List
+
+from game_engine import engine
+from socket_manager import manager
+
+# Most actions applied before their messages are flushed
+MAX_BATCH = 64
+
+# Consumers of quiet games stop after this long
+IDLE_SECONDS = 30.0
+
+Action = Callable[[List[dict]], Any]
+
+
+class GameActors:
+    """Mailboxes and consumer tasks of all games."""
+
+    def __init__(self):
+        self.mailboxes: Dict[str, asyncio.Queue] = {}
+        self.batches = 0
+        self.actions = 0
+
+    def submit(self, game_id: str, action: Action) -> "asyncio.Future[Any]":
+        """Queue `action(out)` on a game. The future resolves to its return value once applied."""
+        future = asyncio.get_running_loop().create_future()
+        self._mailbox(game_id).put_nowait((action, future))
+        return future
+
+    def publish(self, game_id: str, *messages: dict):
+        """Broadcast messages of changes already applied, in order with the game's queued actions."""
+        self._mailbox(game_id).put_nowait((None, list(messages)))
+
+    def depth(self, game_id: str) -> int:
+        mailbox = self.mailboxes.get(game_id)
+        return mailbox.qsize() if mailbox else 0
+
+    def _mailbox(self, game_id: str) -> asyncio.Queue:
+        mailbox = self.mailboxes.get(game_id)
+        if mailbox is None:
+            mailbox = self.mailboxes[game_id] = asyncio.Queue()
+            asyncio.get_running_loop().create_task(self._consume(game_id, mailbox))
+        return mailbox
+
+    async def _consume(self, game_id: str, mailbox: asyncio.Queue):
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(mailbox.get(), IDLE_SECONDS)
+                except asyncio.TimeoutError:
+                    if mailbox.empty():
+                        return
+                    continue
+
+                batch = [item]
+                while len(batch) < MAX_BATCH and not mailbox.empty():
+                    batch.append(mailbox.get_nowait())
+
+                out: List[dict] = []
+                for action, target in batch:
+                    if action is None:
+                        out.extend(target)
+                        continue
+                    self.actions += 1
+                    try:
+                        result = action(out)
+                    except Exception as e:
+                        if not target.done():
+                            target.set_exception(e)
+                        continue
+                    if not target.done():
+                        target.set_result(result)
+
+                self.batches += 1
+                if out:
+                    game = engine.games.get(game_id)
+                    try:
+                        await manager.broadcast_batch(game_id, out, game.stamp_version if game else None)
+                    except Exception as e:
+                        print(f"Broadcast error ({game_id}): {e}")
+        finally:
+            # No await between the empty check and here, so nothing can be left behind
+            if self.mailboxes.get(game_id) is mailbox:
+                del self.mailboxes[game_id]
+
+
+def breaking_news(game, card: str) -> dict:
+    """Chance card drawn, also sent as a system chat message."""
+    return {
+        "type": "CHAT_MESSAGE",
+        "player_id": "SYSTEM",
+        "player_name": "Breaking News",
+        "message": card,
+        "game_state": game.to_dict()
+    }
+
+
+# Global registry
+game_actors = GameActors()
@@ -2,15 +2,22 @@
 Game engine for MonopolyX.
 Handles all game logic: movement, buying, rent, abilities, etc.
 """
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Union, Sequence, Tuple, Set, Callable
 from datetime import datetime, timedelta
+import functools
+import os
 import random
 import uuid
 import asyncio  # Added for async tasks
 
-from models import Property, GameState, Player, TradeOffer
+from models import Property, TileTemplate, ChanceCard, GameState, Player, TradeOffer
 # Import global DB instance to update stats
 from database import db
+from state_sync import state_sync
+from log_store import log_store
+from deadlines import DeadlineScheduler
+from game_journal import GameJournal, SNAPSHOT
+from lobby_index import LobbyIndex, summarize
 
 # ============== Board Data ==============
 
@@ -188,8 +195,48 @@ CHARACTER_ABILITIES = {
 }
 
 
+# Tile groups that can never be bought, auctioned or owned
+NON_PURCHASABLE_GROUPS = frozenset(["Special", "Jail", "FreeParking", "GoToJail", "Chance", "Tax", "Negotiations", "RaiseTax", "Casino"])
+
+
+class BoardIndex:
+    """Static lookups for one map layout, built once per map in create_board."""
+
+    __slots__ = ("group_tiles", "type_tiles", "purchasable")
+
+    def __init__(self, board: Sequence[TileTemplate]):
+        self.group_tiles: Dict[str, List[int]] = {}  # group -> tile ids
+        self.type_tiles: Dict[str, List[int]] = {}   # tile type -> tile ids
+        for tile in board:
+            self.group_tiles.setdefault(tile.group, []).append(tile.id)
+            self.type_tiles.setdefault(tile.type, []).append(tile.id)
+        self.purchasable = frozenset(t.id for t in board if t.group not in NON_PURCHASABLE_GROUPS)
+
+    def group_size(self, group: str) -> int:
+        return len(self.group_tiles.get(group, ()))
+
+
+# map_type -> BoardIndex
+BOARD_INDEXES: Dict[str, BoardIndex] = {}
+
+
+def get_board_index(map_type: str, board: Sequence[Union[TileTemplate, Property]]) -> BoardIndex:
+    """Get the index of a map, building it from `board` on first use."""
+    index = BOARD_INDEXES.get(map_type)
+    if index is None:
+        index = BOARD_INDEXES[map_type] = BoardIndex(board)
+    return index
+
+
 def create_board(map_type: str = "World") -> List[Property]:
-    """Create the game board with 40 tiles."""
+    """Create the game board: per-game tile state over the shared map templates."""
+    templates = BOARD_TEMPLATES.get(map_type, ())
+    get_board_index(map_type, templates)
+    return [Property(template=template) for template in templates]
+
+
+def _compile_map(map_type: str) -> List[TileTemplate]:
+    """Build the static tile templates of a map layout."""
     properties = []
     
     if map_type == "Mukhosransk":
@@ -215,14 +262,14 @@ def create_board(map_type: str = "World") -> List[Property]:
             elif grp == "FreeParking": action = "parking"
             elif grp == "Casino": action = "casino"
             
-            properties.append(Property(
+            properties.append(TileTemplate(
                 id=i,
                 name=prop_data["name"],
                 group=prop_data["group"],
                 type=type_,
                 action=action,
                 price=prop_data["price"],
-                rent=prop_data.get("rent", [])
+                rent=tuple(prop_data.get("rent", []))
             ))
         return properties
 
@@ -261,37 +308,431 @@ def create_board(map_type: str = "World") -> List[Property]:
             elif grp == "RaiseTax":
                 action = "raise_tax"
                 
-            properties.append(Property(
+            properties.append(TileTemplate(
                 id=i,
                 name=prop_data["name"],
                 group=prop_data["group"],
                 type=type_,
                 action=action,
                 price=prop_data["price"],
-                rent=prop_data.get("rent", [])
+                rent=tuple(prop_data.get("rent", []))
             ))
         return properties
     
     return properties
 
 
+# Grace period after a turn / auction expires before the server enforces it,
+# so clients get the first chance to act on their own countdown
+TURN_GRACE_SECONDS = 5
+AUCTION_SECONDS = 30
+AUCTION_EXTEND_SECONDS = 5
+AUCTION_GRACE_SECONDS = 5
+
+
+# Static map data, compiled once at import and shared by all games
+BOARD_TEMPLATES: Dict[str, Tuple[TileTemplate, ...]] = {
+    map_type: tuple(_compile_map(map_type)) for map_type in ("World", "Ukraine", "Mukhosransk")
+}
+
+# Chance deck; "move_to" targets are tile ids, "go_to_jail" goes to the map's jail
+CHANCE_CARDS = [
+    {"type": "money", "amount": 200, "text": "Получил откат 200 долларов!"},
+    {"type": "money", "amount": 400, "text": "Украл налогов на 400!"},
+    {"type": "money", "amount": -200, "text": "Сбил пешехода, нужно заплатить жертве 200"},
+    {"type": "money", "amount": -300, "text": "Проиграл в казино 300!"},
+    {"type": "move_random", "min": 3, "max": 12, "text": "Скрываешься от преследования! Перемещение вперед..."},
+    {"type": "move_to", "position": 0, "text": "Срочный вызов в Штаб! Возвращайся на СТАРТ."},
+    {"type": "go_to_jail", "text": "Следственный комитет ждет тебя на Острове Эпштейна!"},
+    {"type": "money", "amount": 500, "text": "Нашел секретный офшор!"},
+    {"type": "money", "amount": 100, "text": "Выиграл тендер на поставку плитки!"},
+    {"type": "money", "amount": 150, "text": "Продал NFT с изображением лидера!"},
+    {"type": "money", "amount": -150, "text": "Оштрафован за дискредитацию валюты!"},
+    {"type": "money", "amount": -50, "text": "Купил 'синюю галочку' в соцсети!"},
+    {"type": "move_back", "steps": 3, "text": "Забыл выключить утюг. Вернись на 3 шага назад."},
+    {"type": "pay_all", "amount": 50, "text": "День рождения Лидера! Скиньтесь по 50 каждому игроку."},
+    {"type": "collect_all", "amount": 50, "text": "Вы - председатель колхоза. Соберите по 50 с каждого!"},
+    {"type": "collect_all", "amount": 100, "text": "Все тратят в твой стране на олимпийских играх по 100"},
+]
+
+
+def _compile_chance_deck(map_type: str) -> List[ChanceCard]:
+    """Build the chance cards of a map, checking their targets against its layout."""
+    templates = BOARD_TEMPLATES[map_type]
+    deck = []
+    for card in CHANCE_CARDS:
+        position = card.get("position", 0)
+        if not 0 <= position < len(templates):
+            raise ValueError(f"Chance card target {position} is off the {map_type} board")
+        deck.append(ChanceCard(
+            kind=card["type"],
+            text=card["text"],
+            amount=card.get("amount", 0),
+            position=position,
+            steps=card.get("steps", card.get("min", 0)),
+            max_steps=card.get("max", 0)
+        ))
+    return deck
+
+
+CHANCE_DECKS: Dict[str, Tuple[ChanceCard, ...]] = {
+    map_type: tuple(_compile_chance_deck(map_type)) for map_type in BOARD_TEMPLATES
+}
+
+
+def _rejected(result: Any) -> bool:
+    return result is False or (isinstance(result, dict) and bool(result.get("error")))
+
+
+def _encode_arg(value: Any) -> Any:
+    return {"__player__": value.to_dict()} if isinstance(value, Player) else value
+
+
+def _decode_arg(value: Any) -> Any:
+    if isinstance(value, dict) and "__player__" in value:
+        return Player.from_dict(value["__player__"])
+    return value
+
+
+def journaled(method):
+    """
+    Engine action recorded in the game's journal when accepted.
+    Only the outermost call is recorded: actions triggered by another action
+    (e.g. a bot bid inside raise_bid) are reproduced by replaying the outer one.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, game_id, *args, **kwargs):
+        record = self._action_depth == 0 and not self._replaying
+        if record:
+            self._action_time = datetime.utcnow()
+        self._action_depth += 1
+        try:
+            result = method(self, game_id, *args, **kwargs)
+        finally:
+            self._action_depth -= 1
+            if record:
+                action_time, self._action_time = self._action_time, None
+        if self._action_depth == 0 and not _rejected(result):
+            self.dirty.add(game_id)
+            if self.lobby is not None:
+                game = self.games.get(game_id)
+                if game is not None:
+                    self.lobby.update(game)
+            if record and self.journal.enabled:
+                self._record(game_id, action_time, name, args, kwargs)
+        return result
+
+    wrapper.journaled = True
+    return wrapper
+
+
+class GameTable(dict):
+    """
+    engine.games: games in memory, plus persisted snapshots (`pending`) that
+    are rehydrated by `hydrator(game_id, snapshot)` the first time the game
+    is looked up. Iterating only covers the games in memory; game_ids() also
+    lists the pending ones, without rehydrating them.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.pending: Dict[str, Any] = {}
+        self.hydrator: Optional[Callable[[str, Any], Optional[GameState]]] = None
+
+    def _hydrate(self, game_id: str) -> Optional[GameState]:
+        snapshot = self.pending.pop(game_id)
+        if self.hydrator:
+            self.hydrator(game_id, snapshot)
+        return dict.get(self, game_id)
+
+    def get(self, game_id, default=None):
+        if dict.__contains__(self, game_id):
+            return dict.__getitem__(self, game_id)
+        if game_id in self.pending:
+            game = self._hydrate(game_id)
+            if game is not None:
+                return game
+        return default
+
+    def __missing__(self, game_id):
+        game = self._hydrate(game_id) if game_id in self.pending else None
+        if game is None:
+            raise KeyError(game_id)
+        return game
+
+    def __contains__(self, game_id) -> bool:
+        return dict.__contains__(self, game_id) or game_id in self.pending
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self.pending)
+
+    def game_ids(self) -> List[str]:
+        """Ids of every game, in memory or pending."""
+        return list(dict.keys(self)) + list(self.pending)
+
+    def is_loaded(self, game_id: str) -> bool:
+        return dict.__contains__(self, game_id)
+
+    def __setitem__(self, game_id, game):
+        self.pending.pop(game_id, None)
+        dict.__setitem__(self, game_id, game)
+
+    def __delitem__(self, game_id):
+        if self.pending.pop(game_id, None) is not None and not dict.__contains__(self, game_id):
+            return
+        dict.__delitem__(self, game_id)
+
+    def pop(self, game_id, *default):
+        self.pending.pop(game_id, None)
+        return dict.pop(self, game_id, *default)
+
+
 class GameEngine:
     """Main game engine handling all game logic."""
     
-    def __init__(self):
-        self.games: Dict[str, GameState] = {}
+    def __init__(self, journal: Optional[GameJournal] = None, lobby: Optional[LobbyIndex] = None):
+        self.games: Dict[str, GameState] = GameTable()
+        self.dirty: Set[str] = set()  # Games changed since the persister last saved them
+        self.deadlines = DeadlineScheduler()  # (game_id, "turn" | "auction") -> expiry
+        self.user_games: Dict[str, Dict[str, str]] = {}  # user_id -> {game_id: player_id} of unfinished games
+        self.journal = journal or GameJournal(None)
+        self.lobby = lobby  # Lobby listing of the games, kept only by the server's engine
+        # Re-arms the timers of a restored game; the server runs it on the game's actor
+        self.timer_resumer: Optional[Callable[[str], Any]] = None
+        self._action_depth = 0
+        self._action_time: Optional[datetime] = None  # Pinned clock of the running action
+        self._replaying = False
+
+    def _utcnow(self) -> datetime:
+        """Engine clock: fixed for the duration of an action, so replaying it reproduces timestamps."""
+        return self._action_time or datetime.utcnow()
+
+    # ============== Journal / Recovery ==============
+
+    def _record(self, game_id: str, action_time: datetime, action: str, args: tuple, kwargs: dict):
+        game = self.games.get(game_id)
+        if not game:
+            return  # Deleted by the action itself
+        if game.game_status == "finished":
+            # Finished games are not recovered
+            self.journal.forget(game_id)
+            return
+        self.journal.append(game_id, action_time.isoformat(), action, [_encode_arg(a) for a in args], kwargs)
+        if self.journal.needs_snapshot(game_id):
+            self.journal.snapshot(game_id, self.snapshot(game))
+
+    # ============== User -> games index ==============
+
+    def _index_player(self, game: GameState, player: Player):
+        if player.user_id and not player.is_bankrupt and game.game_status != "finished":
+            self.user_games.setdefault(player.user_id, {})[game.game_id] = player.id
+
+    def _unindex_player(self, game_id: str, player: Player):
+        games = self.user_games.get(player.user_id) if player.user_id else None
+        if games is not None and games.get(game_id) == player.id:
+            del games[game_id]
+            if not games:
+                del self.user_games[player.user_id]
+
+    def _unindex_game(self, game: GameState):
+        for player in game.players.values():
+            self._unindex_player(game.game_id, player)
+
+    def user_game_ids(self, user_id: str) -> Dict[str, str]:
+        """{game_id: player_id} of the unfinished games where the user still plays (saved ones included)."""
+        return dict(self.user_games.get(user_id, {}))
+
+    # ============== Saved games awaiting rehydration ==============
+
+    def saved_meta(self, game: GameState) -> Dict[str, Any]:
+        """What is indexed for a saved game before it is rehydrated (stored uncompressed beside its snapshot)."""
+        return {
+            "players": {
+                player.user_id: player.id for player in game.players.values()
+                if player.user_id and not player.is_bankrupt and game.game_status != "finished"
+            },
+            "lobby": summarize(game),
+        }
+
+    def queue_saved(self, game_id: str, stored: Dict[str, Any]):
+        """Queue a saved game for rehydration on first lookup, indexing its players and lobby entry from the stored metadata."""
+        self.discard_saved(game_id)
+        self.games.pending[game_id] = stored
+        meta = stored.get("meta") if isinstance(stored, dict) else None
+        if meta is None or "lobby" not in meta:
+            # Saved without (complete) metadata: rehydrate now so it is indexed
+            self.games.get(game_id)
+            return
+        for user_id, player_id in meta.get("players", {}).items():
+            self.user_games.setdefault(user_id, {})[game_id] = player_id
+        if self.lobby is not None and meta.get("lobby"):
+            self.lobby.put(meta["lobby"])
+
+    def unindex_saved(self, game_id: str, stored: Dict[str, Any]):
+        """Drop the index entries a saved game got from its metadata."""
+        meta = stored.get("meta") if isinstance(stored, dict) else None
+        for user_id, player_id in (meta or {}).get("players", {}).items():
+            games = self.user_games.get(user_id)
+            if games is not None and games.get(game_id) == player_id:
+                del games[game_id]
+                if not games:
+                    del self.user_games[user_id]
+
+    def discard_saved(self, game_id: str):
+        """Forget a saved game that was not rehydrated."""
+        stored = self.games.pending.pop(game_id, None)
+        if stored is not None:
+            self.unindex_saved(game_id, stored)
+            if self.lobby is not None:
+                self.lobby.remove(game_id)
+
+    def _rebuild_group_owned(self, game: GameState):
+        """Recompute the derived ownership counters from the board."""
+        game._group_owned = {}
+        for prop in game.board:
+            if prop.owner_id:
+                owned = game._group_owned.setdefault(prop.owner_id, {})
+                owned[prop.group] = owned.get(prop.group, 0) + 1
+
+    def snapshot(self, game: GameState) -> Dict[str, Any]:
+        """
+        Everything needed to restore a game: its to_dict() state plus the hidden
+        RNG and chance pile, and the log history spilled out of the state.
+        """
+        return {
+            "state": game.to_dict(),
+            "rng": game.rng.getstate(),
+            "chance_pile": list(game.chance_pile),
+            "log_history": log_store.export(game.game_id),
+        }
+
+    def restore_game(self, state: Dict[str, Any], rng_state: Optional[Any] = None,
+                     chance_pile: Optional[List[int]] = None,
+                     log_history: Optional[Dict[str, Any]] = None) -> GameState:
+        """Rebuild a game from a to_dict() snapshot (and RNG state, chance pile, log history) and register it."""
+        game = GameState.from_dict(state, BOARD_TEMPLATES.get(state.get("map_type"), ()))
+        log_store.restore(game.game_id, log_history, game.log_offset)
+        if rng_state is not None:
+            version, internal, gauss_next = rng_state
+            game.rng.setstate((version, tuple(internal), gauss_next))
+        if chance_pile:
+            game.chance_pile = list(chance_pile)
+        self._rebuild_group_owned(game)
+        old = dict.get(self.games, game.game_id)
+        if old is not None:
+            self._unindex_game(old)
+        self.games[game.game_id] = game
+        for player in game.players.values():
+            self._index_player(game, player)
+        if self.lobby is not None:
+            self.lobby.update(game)
+        return game
+
+    def resume_game(self, state: Dict[str, Any], rng_state: Optional[Any] = None,
+                    chance_pile: Optional[List[int]] = None,
+                    log_history: Optional[Dict[str, Any]] = None) -> GameState:
+        """Bring a persisted game back to life: restore it, start its journal and re-arm its timers."""
+        game = self.restore_game(state, rng_state, chance_pile, log_history)
+        if self.journal.enabled and game.game_status != "finished":
+            self.journal.snapshot(game.game_id, self.snapshot(game))
+        self._resume(game.game_id)
+        return game
+
+    def _resume(self, game_id: str):
+        """Re-arm a restored game's timers (through `timer_resumer` when set)."""
+        if self.timer_resumer:
+            self.timer_resumer(game_id)
+        else:
+            self.resume_timers(game_id)
+
+    def replay_journal(self, game_id: str) -> Optional[GameState]:
+        """Rebuild a game from its journal: last snapshot (or creation) plus the actions after it."""
+        entries, _ = self.journal.load(game_id)
+        if not entries:
+            return None
+        self._replaying = True
+        try:
+            _, created, kind, data = entries[0][:4]
+            if kind == SNAPSHOT:
+                self.restore_game(data["state"], data["rng"], data.get("chance_pile"), data.get("log_history"))
+            else:
+                self._action_time = datetime.fromisoformat(created)
+                self.create_game(game_id, **data)
+            for entry in entries[1:]:
+                _, action_time, action, args = entry[:4]
+                kwargs = entry[4] if len(entry) > 4 else {}
+                method = getattr(self, action, None)
+                if not getattr(method, "journaled", False):
+                    raise ValueError(f"Unknown journal action {action!r}")
+                self._action_time = datetime.fromisoformat(action_time)
+                method(game_id, *[_decode_arg(a) for a in args], **kwargs)
+        finally:
+            self._replaying = False
+            self._action_time = None
+        return self.games.get(game_id)
+
+    def adopt_game(self, game_id: str) -> Optional[GameState]:
+        """Rebuild an unfinished game from its journal and re-arm its timers."""
+        try:
+            game = self.replay_journal(game_id)
+        except Exception as e:
+            print(f"Journal recovery failed for {game_id}: {e}")
+            self.games.pop(game_id, None)
+            return None
+        if not game or game.game_status == "finished":
+            self.games.pop(game_id, None)
+            self.journal.forget(game_id)
+            return None
+        self._resume(game_id)
+        return game
+
+    def recover_games(self, owns: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """Rebuild every unfinished game that has a journal (and that `owns` accepts). Returns their ids."""
+        return [
+            game_id for game_id in list(self.journal.game_ids())
+            if (owns is None or owns(game_id)) and self.adopt_game(game_id)
+        ]
+
+    def release_game(self, game_id: str):
+        """Hand a game over to another process: snapshot it into its journal and drop it from memory."""
+        game = dict.get(self.games, game_id)
+        if game is not None and self.journal.enabled and game.game_status != "finished":
+            self.journal.snapshot(game_id, self.snapshot(game))
+        if game is not None:
+            self._unindex_game(game)
+        if self.lobby is not None:
+            self.lobby.remove(game_id)
+        self.discard_saved(game_id)
+        self.games.pop(game_id, None)
+        self.dirty.discard(game_id)
+        self.deadlines.cancel((game_id, "turn"))
+        self.deadlines.cancel((game_id, "auction"))
+        self.journal.detach(game_id)
+        state_sync.forget(game_id)
+        log_store.forget(game_id)
+
+    def delete_game(self, game_id: str):
+        """Drop a game and everything kept for it."""
+        self.discard_saved(game_id)
+        game = self.games.pop(game_id, None)
+        if game is not None:
+            self._unindex_game(game)
+        if self.lobby is not None:
+            self.lobby.remove(game_id)
+        self.dirty.discard(game_id)
+        state_sync.forget(game_id)
+        log_store.forget(game_id)
+        self.journal.forget(game_id)
     
     def get_user_active_games(self, user_id: str) -> List[Dict[str, Any]]:
         """Get summary of active/waiting games for a specific user."""
         result = []
-        for game in self.games.values():
-            if game.game_status == "finished":
-                continue
-                
-            # Find if user is in this game
-            player_info = next((p for p in game.players.values() if p.user_id == user_id), None)
-            
-            if player_info and not player_info.is_bankrupt:
+        for game_id, player_id in self.user_game_ids(user_id).items():
+            game = self.games.get(game_id)
+            player_info = game.players.get(player_id) if game else None
+            if player_info:
                 result.append({
                     "game_id": game.game_id,
                     "status": game.game_status,
@@ -308,9 +749,16 @@ class GameEngine:
     def _reset_timer(self, game: GameState):
         """Reset turn timer based on game settings."""
         if game.turn_timer > 0:
-            game.turn_expiry = datetime.utcnow() + timedelta(seconds=game.turn_timer)
+            game.turn_expiry = self._utcnow() + timedelta(seconds=game.turn_timer)
+            self.deadlines.schedule((game.game_id, "turn"), game.turn_timer + TURN_GRACE_SECONDS)
         else:
             game.turn_expiry = None
+            self.deadlines.cancel((game.game_id, "turn"))
+
+    def _set_auction_expiry(self, game: GameState, seconds: float):
+        """(Re)start the global auction countdown."""
+        game.turn_state["auction_expiry"] = self._utcnow().timestamp() + seconds
+        self.deadlines.schedule((game.game_id, "auction"), seconds + AUCTION_GRACE_SECONDS)
 
     def create_game(
         self, 
@@ -320,9 +768,12 @@ class GameEngine:
         host_id: str = None,
         starting_money: int = 1500,
         max_players: int = 6,
-        turn_timer: int = 90
+        turn_timer: int = 90,
+        seed: Optional[int] = None
     ) -> GameState:
-        """Create a new game."""
+        """Create a new game. `seed` makes its dice, cards and bot choices reproducible."""
+        if seed is None:
+            seed = random.getrandbits(63)
         board = create_board(map_type)
         game = GameState(
             game_id=game_id,
@@ -335,11 +786,26 @@ class GameEngine:
             starting_money=starting_money,
             max_players=max_players,
             turn_timer=turn_timer,
-            created_at=datetime.utcnow()
+            created_at=self._utcnow(),
+            rng=random.Random(seed)
         )
         self.games[game_id] = game
+        self.dirty.add(game_id)
+        if self.lobby is not None:
+            self.lobby.update(game)
+        if self.journal.enabled and not self._replaying:
+            self.journal.start(game_id, game.created_at.isoformat(), {
+                "map_type": map_type,
+                "game_mode": game_mode,
+                "host_id": host_id,
+                "starting_money": starting_money,
+                "max_players": max_players,
+                "turn_timer": turn_timer,
+                "seed": seed
+            })
         return game
     
+    @journaled
     def add_player(self, game_id: str, player: Player) -> bool:
         """Add a player to a game."""
         if game_id not in self.games:
@@ -349,30 +815,117 @@ class GameEngine:
         if player.id not in game.players:
             game.players[player.id] = player
             game.player_order.append(player.id)
+            self._index_player(game, player)
             return True
         return False
+
+    @journaled
+    def remove_player(self, game_id: str, player_id: str) -> Dict[str, Any]:
+        """Remove a player who left the game or was kicked from the lobby."""
+        game = self.games.get(game_id)
+        if not game:
+            return {"error": "Game not found"}
+        if player_id not in game.players:
+            return {"error": "Player not found"}
+
+        self._unindex_player(game_id, game.players.pop(player_id))
+        if player_id in game.player_order:
+            game.player_order.remove(player_id)
+            # Fix turn index if it became out of bounds to maintain correct turn order
+            if game.player_order:
+                game.current_turn_index = game.current_turn_index % len(game.player_order)
+            else:
+                game.current_turn_index = 0
+
+        # Only 1 player (human or bot) left in an active game -> End game
+        game_over = False
+        if game.game_status == "active" and len(game.players) < 2:
+            game.game_status = "finished"
+            self._unindex_game(game)
+            game_over = True
+            if len(game.players) == 1:
+                winner = list(game.players.values())[0]
+                game.winner_id = winner.id
+                game.add_log(f"🏆 {winner.name} wins by default!")
+
+        return {"success": True, "game_over": game_over, "game_state": game.to_dict()}
+
+    @journaled
+    def start_game(self, game_id: str) -> Dict[str, Any]:
+        """Start a waiting game: shuffle the turn order and arm the first turn timer."""
+        game = self.games.get(game_id)
+        if not game:
+            return {"error": "Game not found"}
+        if game.game_status != "waiting":
+            return {"error": "Game already started"}
+        if len(game.players) < 2:
+            return {"error": "Need at least 2 players to start"}
+
+        game.game_status = "active"
+        game.started_at = self._utcnow()
+
+        # Randomize player order
+        game.rng.shuffle(game.player_order)
+        game.add_log(f"Game started! Turn order: {', '.join([game.players[p].name for p in game.player_order])}")
+
+        # Set initial turn expiry
+        self._reset_timer(game)
+        return {"success": True, "game_state": game.to_dict()}
+
+    @journaled
+    def resume_timers(self, game_id: str) -> Dict[str, Any]:
+        """Give the current turn (or auction) a fresh timer, e.g. after a server restart."""
+        game = self.games.get(game_id)
+        if not game or game.game_status != "active":
+            return {"error": "Game not active"}
+        if game.turn_state.get("auction_active"):
+            self._set_auction_expiry(game, AUCTION_SECONDS)
+        else:
+            self._reset_timer(game)
+        return {"success": True}
     
+    def _board_index(self, game: GameState) -> BoardIndex:
+        """Get the static index of a game's map."""
+        return get_board_index(game.map_type, game.board)
+
+    def _group_tiles(self, game: GameState, group: str) -> List[Property]:
+        """Get all tiles of a group without scanning the board."""
+        return [game.board[tid] for tid in self._board_index(game).group_tiles.get(group, ())]
+
+    def _owned_in_group(self, game: GameState, owner_id: Optional[str], group: str) -> int:
+        """Number of tiles of a group owned by a player."""
+        if not owner_id:
+            return 0
+        return game._group_owned.get(owner_id, {}).get(group, 0)
+
+    def _set_owner(self, game: GameState, prop: Property, owner_id: Optional[str]):
+        """Change a tile's owner, keeping the per-player group counters in sync."""
+        if prop.owner_id == owner_id:
+            return
+        counts = game._group_owned
+        if prop.owner_id and prop.owner_id in counts:
+            counts[prop.owner_id][prop.group] -= 1
+        if owner_id:
+            owned = counts.setdefault(owner_id, {})
+            owned[prop.group] = owned.get(prop.group, 0) + 1
+        prop.owner_id = owner_id
+
     def _update_group_monopoly(self, game: GameState, group: str):
         """Recalculate monopoly status for a color group."""
         special_groups = ["Special", "Utility", "Station", "Chance", "Tax", "Jail", "FreeParking", "GoToJail"]
         if not group or group in special_groups:
             return
 
-        props = [p for p in game.board if p.group == group]
+        props = self._group_tiles(game, group)
         if not props:
             return
 
-        # Check ownership
-        owners = set(p.owner_id for p in props)
-        
-        # Monopoly if exactly 1 owner for ALL properties and that owner is not None
+        # Monopoly if one owner (not the bank) holds ALL properties of the group
         # And none are mortgaged? (Strict rules say monopoly exists, but bonuses might not. We stick to ownership here for is_monopoly status)
-        if len(owners) == 1 and list(owners)[0] is not None:
-             for p in props:
-                 p.is_monopoly = True
-        else:
-             for p in props:
-                 p.is_monopoly = False
+        owner_id = props[0].owner_id
+        is_monopoly = self._owned_in_group(game, owner_id, group) == len(props)
+        for p in props:
+            p.is_monopoly = is_monopoly
 
     def get_current_player(self, game_id: str) -> Optional[Player]:
         """Get the player whose turn it is."""
@@ -392,6 +945,7 @@ class GameEngine:
         if game.turn_state.get("has_rolled"):
             self._next_turn(game)
             
+    @journaled
     def roll_dice(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Roll dice and move player."""
         game = self.games.get(game_id)
@@ -419,19 +973,19 @@ class GameEngine:
         # Handle Sanctions (Skip Turn)
         if player.skipped_turns > 0:
             player.skipped_turns -= 1
-            game.logs.append(f"🚫 {player.name} is sanctioned in this turn! Skipping...")
+            game.add_log(f"🚫 {player.name} is sanctioned in this turn! Skipping...")
             
             # Immediately end turn
             self._next_turn(game)
             return {
                 "dice": [0, 0],
                 "action": "skipped_turn",
-                "game_state": game.dict()
+                "game_state": game.to_dict()
             }
         
         # Roll dice
-        d1 = random.randint(1, 6)
-        d2 = random.randint(1, 6)
+        d1 = game.rng.randint(1, 6)
+        d2 = game.rng.randint(1, 6)
         game.dice = [d1, d2]
         is_doubles = d1 == d2
         
@@ -451,19 +1005,19 @@ class GameEngine:
             if is_doubles:
                 player.is_jailed = False
                 player.jail_turns = 0
-                game.logs.append(f"{player.name} rolled doubles and escaped jail!")
+                game.add_log(f"{player.name} rolled doubles and escaped jail!")
             else:
                 player.jail_turns += 1
                 if player.jail_turns >= 3:
                     player.is_jailed = False
                     player.jail_turns = 0
                     player.money -= 50
-                    game.logs.append(f"{player.name} paid $50 to leave jail")
+                    game.add_log(f"{player.name} paid $50 to leave jail")
                 else:
                     result["action"] = "still_jailed"
-                    game.logs.append(f"{player.name} is still in jail ({player.jail_turns}/3 turns)")
+                    game.add_log(f"{player.name} is still in jail ({player.jail_turns}/3 turns)")
                     game.turn_state["has_rolled"] = True
-                    result["game_state"] = game.dict()
+                    result["game_state"] = game.to_dict()
                     # Auto end turn in jail for humans, bots are handled by runner
                     if not player.is_bot:
                         self._maybe_end_turn(game)
@@ -475,9 +1029,9 @@ class GameEngine:
             if game.doubles_count >= 3:
                 self._send_to_jail(game, player)
                 result["action"] = "go_to_jail"
-                game.logs.append(f"{player.name} rolled 3 doubles in a row - sent to jail!")
+                game.add_log(f"{player.name} rolled 3 doubles in a row - sent to jail!")
                 game.turn_state["has_rolled"] = True
-                result["game_state"] = game.dict()
+                result["game_state"] = game.to_dict()
                 if not player.is_bot:
                     self._maybe_end_turn(game) # Auto end turn
                 return result
@@ -494,14 +1048,14 @@ class GameEngine:
         tile = game.board[new_position]
         
         # Log roll and move BEFORE side effects (Passed Go, Chance cards, etc)
-        game.logs.append(f"{player.name} rolled {d1}+{d2} and moved to {tile.name}")
+        game.add_log(f"{player.name} rolled {d1}+{d2} and moved to {tile.name}")
         
         # Check if passed GO
         if (new_position < old_position) or (new_position == 0 and old_position != 0):
             go_money = 200
             player.money += go_money
             result["passed_go"] = True
-            game.logs.append(f"🏧 {player.name} passed START and collected ${go_money}")
+            game.add_log(f"🏧 {player.name} passed START and collected ${go_money}")
         
         result["landed_on"] = tile.name
         result["tile_type"] = tile.group
@@ -511,7 +1065,7 @@ class GameEngine:
         
         # If doubles, remind to roll again
         if is_doubles:
-            game.logs.append(f"{player.name} rolled doubles - roll again!")
+            game.add_log(f"{player.name} rolled doubles - roll again!")
             game.turn_state["has_rolled"] = False
             # Reset build limit for doubles as requested
             game.turn_state.pop("build_counts", None)
@@ -544,7 +1098,7 @@ class GameEngine:
                  if not player.is_bot:
                      self._maybe_end_turn(game)
         
-        result["game_state"] = game.dict()
+        result["game_state"] = game.to_dict()
         return result
 
     def _handle_landing(self, game: GameState, player: Player, tile: Property) -> Dict[str, Any]:
@@ -554,18 +1108,18 @@ class GameEngine:
         if tile.group == "GoToJail":
             self._send_to_jail(game, player)
             result["action"] = "go_to_jail"
-            game.logs.append(f"⚖️ {player.name} was sent to Epstein Island! Conspiracy confirmed.")
+            game.add_log(f"⚖️ {player.name} was sent to Epstein Island! Conspiracy confirmed.")
             
         elif tile.group == "FreeParking":
             if game.pot > 0:
                 player.money += game.pot
                 result["action"] = "collect_pot"
                 result["amount"] = game.pot
-                game.logs.append(f"🕊️ {player.name} collected ${game.pot} from the Humanitarian Fund (Free Parking)!")
+                game.add_log(f"🕊️ {player.name} collected ${game.pot} from the Humanitarian Fund (Free Parking)!")
                 game.pot = 0
             else:
                 result["action"] = "safe"
-                game.logs.append(f"🏖️ {player.name} is on vacation. No funding available right now.")
+                game.add_log(f"🏖️ {player.name} is on vacation. No funding available right now.")
                 
         elif tile.group == "Chance" or tile.group == "Tax":
             # Charge tax if it's a tax tile
@@ -594,8 +1148,8 @@ class GameEngine:
                 chance_result = self._draw_chance_card(game, player)
                 result.update(chance_result)
                 
-                # If chance card moved player, handle landing on new tile
-                if "new_position" in chance_result:
+                # If chance card moved player, handle landing on new tile (the jail card already jailed them)
+                if "new_position" in chance_result and chance_result.get("action") != "go_to_jail":
                     new_tile = game.board[player.position]
                     landing_res = self._handle_landing(game, player, new_tile)
                     
@@ -612,32 +1166,32 @@ class GameEngine:
             result["action"] = "negotiations"
             # Logic: Skip NEXT turn.
             player.skipped_turns = 1
-            game.logs.append(f"🕊️ {player.name} sent to Negotiations. Will skip next turn.")
+            game.add_log(f"🕊️ {player.name} sent to Negotiations. Will skip next turn.")
             
         elif tile.group == "RaiseTax":
             result["action"] = "raise_tax"
             amount = 300
             player.money += amount
             result["amount"] = amount
-            game.logs.append(f"💰 {player.name} raised taxes and collected ${amount}!")
+            game.add_log(f"💰 {player.name} raised taxes and collected ${amount}!")
             
         elif tile.group == "Casino":
             # Just prompt, wait for user input
             result["action"] = "casino_prompt"
-            game.logs.append(f"🎰 {player.name} entered the Casino. Place your bets!")
+            game.add_log(f"🎰 {player.name} entered the Casino. Place your bets!")
             
         elif tile.group == "Jail": # Previously Tax block was here, now combined above
             result["action"] = "safe"
-            game.logs.append(f"🏝️ {player.name} is just visiting Epstein Island. No questions asked.")
+            game.add_log(f"🏝️ {player.name} is just visiting Epstein Island. No questions asked.")
             
         elif tile.group == "Special" or tile.id == 0:
             # Special tiles like START
-            game.logs.append(f"🏢 {player.name} is at {tile.name}.")
+            game.add_log(f"🏢 {player.name} is at {tile.name}.")
             
             # Additional bonus for landing on START as requested
             if tile.id == 0:
                 player.money += 200
-                game.logs.append(f"🎁 {player.name} landed on START and received a bonus $200!")
+                game.add_log(f"🎁 {player.name} landed on START and received a bonus $200!")
             
             if tile.owner_id and tile.owner_id != player.id and not tile.is_mortgaged:
                 rent = self._calculate_rent(game, tile, game.dice, player)
@@ -654,7 +1208,7 @@ class GameEngine:
             # Regular property
             if tile.is_destroyed:
                 result["action"] = "destroyed"
-                game.logs.append(f"🏚️ {tile.name} lies in ruins. No rent can be collected here.")
+                game.add_log(f"🏚️ {tile.name} lies in ruins. No rent can be collected here.")
             elif tile.owner_id and tile.owner_id != player.id and not tile.is_mortgaged:
                 rent = self._calculate_rent(game, tile, game.dice, player)
                 result["action"] = "pay_rent"
@@ -665,7 +1219,7 @@ class GameEngine:
                 result["price"] = tile.price
             else:
                 result["action"] = "safe"
-                game.logs.append(f"🏡 {player.name} has arrived at their own territory in {tile.name}.")
+                game.add_log(f"🏡 {player.name} has arrived at their own territory in {tile.name}.")
         
         return result
     
@@ -680,7 +1234,7 @@ class GameEngine:
         
         if tile.group == "Utility":
             # Count utilities owned by owner (Rosneft/Gazprom)
-            utilities_owned = sum(1 for t in game.board if t.group == "Utility" and t.owner_id == tile.owner_id and not t.is_mortgaged)
+            utilities_owned = sum(1 for t in self._group_tiles(game, "Utility") if t.owner_id == tile.owner_id and not t.is_mortgaged)
             
             # 10% or 20% of CURRENT PLAYER'S money
             # If player is not passed (should not happen for payment), default to 0
@@ -693,7 +1247,7 @@ class GameEngine:
             
         elif tile.group == "Station":
             # Count stations owned
-            stations_owned = sum(1 for t in game.board if t.group == "Station" and t.owner_id == tile.owner_id)
+            stations_owned = self._owned_in_group(game, tile.owner_id, "Station")
             rent_index = min(stations_owned - 1, len(tile.rent) - 1)
             return tile.rent[rent_index] if tile.rent else 25
             
@@ -712,109 +1266,77 @@ class GameEngine:
             return base_rent
     
     def _draw_chance_card(self, game: GameState, player: Player) -> Dict[str, Any]:
-        """Draw a random chance card effect."""
-        cards = [
-            {"type": "money", "amount": 200, "text": "Получил откат 200 долларов!"},
-            {"type": "money", "amount": 400, "text": "Украл налогов на 400!"},
-            {"type": "money", "amount": -200, "text": "Сбил пешехода, нужно заплатить жертве 200"},
-            {"type": "money", "amount": -300, "text": "Проиграл в казино 300!"},
-            {"type": "move_random", "min": 3, "max": 12, "text": "Скрываешься от преследования! Перемещение вперед..."},
-            {"type": "move_to", "position": 0, "text": "Срочный вызов в Штаб! Возвращайся на СТАРТ."},
-            {"type": "move_to", "position": 30, "text": "Следственный комитет ждет тебя на Острове Эпштейна!"},
-            {"type": "money", "amount": 500, "text": "Нашел секретный офшор!"},
-            {"type": "money", "amount": 100, "text": "Выиграл тендер на поставку плитки!"},
-            {"type": "money", "amount": 150, "text": "Продал NFT с изображением лидера!"},
-            {"type": "money", "amount": -150, "text": "Оштрафован за дискредитацию валюты!"},
-            {"type": "money", "amount": -50, "text": "Купил 'синюю галочку' в соцсети!"},
-            {"type": "move_back", "steps": 3, "text": "Забыл выключить утюг. Вернись на 3 шага назад."},
-            {"type": "pay_all", "amount": 50, "text": "День рождения Лидера! Скиньтесь по 50 каждому игроку."},
-            {"type": "collect_all", "amount": 50, "text": "Вы - председатель колхоза. Соберите по 50 с каждого!"},
-            {"type": "collect_all", "amount": 100, "text": "Все тратят в твой стране на олимпийских играх по 100"},
-
-        ]
-        
-        card = random.choice(cards)
-        log_text = f"{player.name}: {card['text']}"
-        game.logs.append(f"Breaking News: {log_text}")
-        
-        if card["type"] == "money":
-            # Apply money effect but prevent negative balance (floor at 0)
-            if card["amount"] < 0 and player.money < abs(card["amount"]):
-                 player.money = 0
-            else:
-                 player.money += card["amount"]
-            
-            return {"chance_card": log_text, "amount": card["amount"]}
-            
-        elif card["type"] == "move_random":
-            steps = random.randint(card["min"], card["max"])
-            board_size = len(game.board)
-            old_pos = player.position
-            new_pos = (player.position + steps) % board_size
-            player.position = new_pos
-            
-            if new_pos < old_pos and old_pos != 0:
-                 player.money += 200
-                 
-            return {"chance_card": f"{log_text} (на {steps} шагов)", "new_position": new_pos}
+        """Draw the next card of the game's shuffled chance pile and apply it."""
+        deck = CHANCE_DECKS[game.map_type]
+        if not game.chance_pile:
+            game.chance_pile = list(range(len(deck)))
+            game.rng.shuffle(game.chance_pile)
+        card = deck[game.chance_pile.pop()]
+        log_text = f"{player.name}: {card.text}"
+        game.add_log(f"Breaking News: {log_text}")
+        return _CHANCE_EFFECTS[card.kind](self, game, player, card, log_text)
+
+    def _card_money(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        # Apply money effect but prevent negative balance (floor at 0)
+        if card.amount < 0 and player.money < -card.amount:
+            player.money = 0
+        else:
+            player.money += card.amount
+        return {"chance_card": log_text, "amount": card.amount}
+
+    def _card_move_random(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        steps = game.rng.randint(card.steps, card.max_steps)
+        old_pos = player.position
+        new_pos = (old_pos + steps) % len(game.board)
+        player.position = new_pos
+        if new_pos < old_pos and old_pos != 0:
+            player.money += 200
+        return {"chance_card": f"{log_text} (на {steps} шагов)", "new_position": new_pos}
+
+    def _card_move_to(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        player.position = card.position
+        return {"chance_card": log_text, "new_position": card.position}
+
+    def _card_go_to_jail(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        self._send_to_jail(game, player)
+        return {"chance_card": log_text, "new_position": player.position, "action": "go_to_jail"}
+
+    def _card_move_back(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        player.position = (player.position - card.steps) % len(game.board)
+        # Handle new tile landing
+        new_tile = game.board[player.position]
+        landing_res = self._handle_landing(game, player, new_tile)
+        result = {"chance_card": f"{log_text} (на {card.steps} назад)", "new_position": player.position}
+        result.update({k: v for k, v in landing_res.items() if k != "chance_card"})
+        return result
 
-        elif card["type"] == "move_to":
-            player.position = card["position"]
-            if card["position"] == 30:  # Go to jail (Epstein Island)
-                player.is_jailed = True
-                player.jail_turns = 0
-                return {"chance_card": log_text, "new_position": card["position"], "action": "go_to_jail"}
-            return {"chance_card": log_text, "new_position": card["position"]}
-            
-        elif card["type"] == "repair":
-            total = 0
-            for prop in game.board:
-                if prop.owner_id == player.id:
-                    total += prop.houses * 25
-            player.money -= total
-            return {"chance_card": log_text, "amount": -total}
-        
-        elif card["type"] == "move_back":
-            steps = card["steps"]
-            player.position = (player.position - steps + len(game.board)) % len(game.board)
-            # Handle new tile landing
-            new_tile = game.board[player.position]
-            landing_res = self._handle_landing(game, player, new_tile)
-            result = {"chance_card": f"{log_text} (на {steps} назад)", "new_position": player.position}
-            result.update({k: v for k, v in landing_res.items() if k != "chance_card"})
-            return result
-
-        elif card["type"] == "pay_all":
-            amount = card["amount"]
-            count = 0
-            for pid, p in game.players.items():
-                if pid != player.id and not p.is_bankrupt:
-                    player.money -= amount
-                    p.money += amount
-                    count += 1
-            game.logs.append(f"💸 {player.name} paid ${amount} to everyone.")
-            return {"chance_card": log_text, "amount": -amount * count}
-
-        elif card["type"] == "collect_all":
-            amount = card["amount"]
-            count = 0
-            for pid, p in game.players.items():
-                if pid != player.id and not p.is_bankrupt:
-                    if p.money >= amount:
-                        p.money -= amount
-                        player.money += amount
-                    else:
-                        player.money += p.money
-                        p.money = 0
-                    count += 1
-            game.logs.append(f"💰 {player.name} collected ${amount} from everyone.")
-            return {"chance_card": log_text, "amount": amount * count}
-        
-        return {"chance_card": log_text}
+    def _card_pay_all(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        count = 0
+        for pid, p in game.players.items():
+            if pid != player.id and not p.is_bankrupt:
+                player.money -= card.amount
+                p.money += card.amount
+                count += 1
+        game.add_log(f"💸 {player.name} paid ${card.amount} to everyone.")
+        return {"chance_card": log_text, "amount": -card.amount * count}
+
+    def _card_collect_all(self, game: GameState, player: Player, card: ChanceCard, log_text: str) -> Dict[str, Any]:
+        count = 0
+        for pid, p in game.players.items():
+            if pid != player.id and not p.is_bankrupt:
+                if p.money >= card.amount:
+                    p.money -= card.amount
+                    player.money += card.amount
+                else:
+                    player.money += p.money
+                    p.money = 0
+                count += 1
+        game.add_log(f"💰 {player.name} collected ${card.amount} from everyone.")
+        return {"chance_card": log_text, "amount": card.amount * count}
     
     def _send_to_jail(self, game: GameState, player: Player):
         """Send player to jail."""
-        player.position = 10
+        player.position = self._board_index(game).group_tiles.get("Jail", (10,))[0]
         player.is_jailed = True
         player.jail_turns = 0
         game.doubles_count = 0
@@ -863,7 +1385,7 @@ class GameEngine:
                         old_owner.properties.remove(prop.id)
                     
                     # Reset property to unowned
-                    prop.owner_id = None
+                    self._set_owner(game, prop, None)
                     prop.is_mortgaged = False
                     prop.mortgage_turn = None
                     prop.houses = 0
@@ -872,39 +1394,65 @@ class GameEngine:
                     self._update_group_monopoly(game, prop.group)
                     
                     owner_name = old_owner.name if old_owner else "Unknown"
-                    game.logs.append(f"🏛️ {prop.name} seized by the bank from {owner_name} after 14 turns of mortgage!")
+                    game.add_log(f"🏛️ {prop.name} seized by the bank from {owner_name} after 14 turns of mortgage!")
     
 
-    def check_timeouts(self) -> List[Dict[str, Any]]:
-        """Check for expired turns and kick players. Returns updates to broadcast."""
-        updates = []
-        
-        # List to avoid iteration modification issues
-        active_games = [g for g in self.games.values() if g.game_status == "active"]
-        
-        for game in active_games:
-            # Skip timeout check if auction is active (Auction pauses turn timer)
-            if game.auction_active:
-                continue
-                
-            # Check timeout (with 5s grace period)
-            if game.turn_expiry and datetime.utcnow() > game.turn_expiry + timedelta(seconds=5):
-                current_pid = game.player_order[game.current_turn_index]
-                player = game.players.get(current_pid)
-                
-                if player:
-                    # Logic: Disqualify player for inactivity
-                    game.logs.append(f"⏰ {player.name} disqualified for inactivity (Timeout)!")
-                    self._handle_bankruptcy(game, player, None, 0)
-                    
-                    updates.append({
-                        "game_id": game.game_id,
-                        "type": "PLAYER_DISQUALIFIED",
-                        "game_state": game.dict(),
-                        "data": {"player_id": player.id}
-                    })
-        return updates
+    def due_timers(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Pop the (game_id, "turn" | "auction") deadlines that have passed.
+        Only games with a passed deadline are returned (see deadlines.py); each
+        is applied with expire_timer on the game's actor.
+        """
+        return self.deadlines.pop_due(now)
+
+    @journaled
+    def expire_timer(self, game_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Apply an expired "turn" or "auction" deadline. Returns the update to broadcast."""
+        game = self.games.get(game_id)
+        if not game or game.game_status != "active" or not game.player_order:
+            return {"error": "Game not active"}
+
+        if kind == "auction":
+            if not game.turn_state.get("auction_active"):
+                return {"error": "No active auction"}
+            # The deadline was queued before an action extended the auction
+            remaining = game.turn_state.get("auction_expiry", 0) + AUCTION_GRACE_SECONDS - self._utcnow().timestamp()
+            if remaining > 0:
+                self.deadlines.schedule((game_id, "auction"), remaining)
+                return {"error": "Auction timer not expired"}
+            # Global auction timer ran out: highest bid so far wins
+            game.add_log("⏰ Auction time is up!")
+            result = self.resolve_auction(game_id)
+            if result.get("error"):
+                return result
+            return {"game_id": game_id, "type": "AUCTION_RESOLVED", **result}
+
+        # Auction pauses the turn timer
+        if game.turn_state.get("auction_active") or not game.turn_expiry:
+            return {"error": "Turn timer not running"}
+        # The deadline was queued before an action restarted the timer (e.g. the turn ended)
+        remaining = (game.turn_expiry - self._utcnow()).total_seconds() + TURN_GRACE_SECONDS
+        if remaining > 0:
+            self.deadlines.schedule((game_id, "turn"), remaining)
+            return {"error": "Turn timer not expired"}
 
+        current_pid = game.player_order[game.current_turn_index]
+        player = game.players.get(current_pid)
+        if not player:
+            return {"error": "Player not found"}
+
+        # Logic: Disqualify player for inactivity
+        game.add_log(f"⏰ {player.name} disqualified for inactivity (Timeout)!")
+        self._handle_bankruptcy(game, player, None, 0)
+
+        return {
+            "game_id": game.game_id,
+            "type": "PLAYER_DISQUALIFIED",
+            "game_state": game.to_dict(),
+            "data": {"player_id": player.id}
+        }
+
+    @journaled
     def surrender_player(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Handle player surrender."""
         game = self.games.get(game_id)
@@ -918,6 +1466,7 @@ class GameEngine:
             
         return self._handle_bankruptcy(game, player, None, 0)
 
+    @journaled
     def play_casino(self, game_id: str, player_id: str, bet_numbers: List[int]) -> Dict[str, Any]:
         """Handle Casino/Totalizator bet logic based on map."""
         game = self.games.get(game_id)
@@ -933,7 +1482,7 @@ class GameEngine:
             cost = 100 if is_totalizator else 50
             player.money = max(0, player.money - cost)
             msg = f"🐎 {player.name} отказался ставить на тотализаторе. С горя выпил на $100." if is_totalizator else f"🎰 {player.name} отказался от игры в казино. Штраф $50."
-            game.logs.append(msg)
+            game.add_log(msg)
             
             # Auto-end turn after skipping
             if not player.is_bot:
@@ -943,7 +1492,7 @@ class GameEngine:
                 "player_id": player_id,
                 "action": "casino_result",
                 "skipped": True,
-                "game_state": game.dict()
+                "game_state": game.to_dict()
             }
 
         # Rules adjustment
@@ -964,7 +1513,7 @@ class GameEngine:
                  return {"error": "Числа должны быть от 1 до 6"}
         
         # Roll One Die (1-6)
-        roll = random.randint(1, 6)
+        roll = game.rng.randint(1, 6)
         won = roll in bet_numbers
         choices_str = ", ".join(map(str, sorted(bet_numbers)))
         
@@ -983,7 +1532,7 @@ class GameEngine:
             
             player.money += prize
             icon = "🐎 ТОТАЛИЗАТОР" if is_totalizator else "🎰 КАЗИНО"
-            game.logs.append(f"{icon}: {player.name} выиграл! Пришло число {roll}. Приз: ${prize}!")
+            game.add_log(f"{icon}: {player.name} выиграл! Пришло число {roll}. Приз: ${prize}!")
             
             # Auto-end turn after winning
             if not player.is_bot:
@@ -995,12 +1544,12 @@ class GameEngine:
                 "win": True,
                 "roll": roll,
                 "amount": prize,
-                "game_state": game.dict()
+                "game_state": game.to_dict()
             }
         else:
             icon = "🐎 ТОТАЛИЗАТОР" if is_totalizator else "🎰 КАЗИНО"
             if is_totalizator:
-                game.logs.append(f"{icon}: {player.name} проиграл. Первой пришла №{roll}. Ставка ${bet_amount} утеряна.")
+                game.add_log(f"{icon}: {player.name} проиграл. Первой пришла №{roll}. Ставка ${bet_amount} утеряна.")
                 
                 # Auto-end turn after losing in totalizator
                 if not player.is_bot:
@@ -1012,10 +1561,10 @@ class GameEngine:
                     "win": False,
                     "roll": roll,
                     "amount": -bet_amount,
-                    "game_state": game.dict()
+                    "game_state": game.to_dict()
                 }
             else:
-                game.logs.append(f"{icon}: {player.name} ПРОИГРАЛ ВСЁ! РЕВОЛЮЦИЯ! Выпало {roll}.")
+                game.add_log(f"{icon}: {player.name} ПРОИГРАЛ ВСЁ! РЕВОЛЮЦИЯ! Выпало {roll}.")
                 # Handle Bankruptcy/Elimination for Casino
                 bankrupt_res = self._handle_bankruptcy(game, player, None, 0)
                 game_over = bankrupt_res.get("game_over", False)
@@ -1027,7 +1576,7 @@ class GameEngine:
                     "roll": roll,
                     "eliminated": True,
                     "game_over": game_over,
-                    "game_state": game.dict()
+                    "game_state": game.to_dict()
                 }
 
             
@@ -1037,7 +1586,7 @@ class GameEngine:
         # 1. Bankrupt logic (return assets to bank)
         self._handle_bankruptcy(game, player, None, 0)
         
-        game.logs.append(f"🚫 {player.name} timed out and left the game!")
+        game.add_log(f"🚫 {player.name} timed out and left the game!")
 
         # 2. Check remaining state
         active_humans = [p for p in game.players.values() if not p.is_bot and not p.is_bankrupt]
@@ -1049,14 +1598,15 @@ class GameEngine:
         if len(active_players) < 2:
             # End game
             game.game_status = "finished"
+            self._unindex_game(game)
             if active_players:
                 game.winner_id = active_players[0].id
-                game.logs.append(f"🏆 {active_players[0].name} wins by default!")
+                game.add_log(f"🏆 {active_players[0].name} wins by default!")
             game_over = True
         elif not active_humans:
             # Only bots -> Kill game
             if game.game_id in self.games:
-                del self.games[game.game_id]
+                self.delete_game(game.game_id)
                 game_deleted = True
         
         # 3. Advance turn if needed (handled by bankruptcy removing from order, 
@@ -1073,11 +1623,12 @@ class GameEngine:
         return {
             "kicked_id": player.id, 
             "reason": reason, 
-            "game_state": game.dict(),
+            "game_state": game.to_dict(),
             "game_over": game_over,
             "game_deleted": game_deleted
         }
 
+    @journaled
     def pay_bail(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Pay $50 to get out of jail."""
         game = self.games.get(game_id)
@@ -1112,17 +1663,18 @@ class GameEngine:
         if game.turn_state:
             game.turn_state.pop("has_rolled", None)
         
-        game.logs.append(f"⚖️ {player.name} paid $50 bail and left Epstein Island.")
+        game.add_log(f"⚖️ {player.name} paid $50 bail and left Epstein Island.")
         self._reset_timer(game)
         
         return {
             "success": True,
             "player_id": player_id,
             "amount": bail_amount,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
 
     
+    @journaled
     def pay_tax(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Pay tax for the current tile (Manual after liquidation)."""
         game = self.games.get(game_id)
@@ -1146,7 +1698,7 @@ class GameEngine:
         game.pot += amount
         
         log_msg = f"💸 {player.name} paid ${amount} in UN Membership Fees (Taxes)"
-        game.logs.append(log_msg)
+        game.add_log(log_msg)
         
         # Clear payment requirement
         game.turn_state.pop("awaiting_payment", None)
@@ -1162,9 +1714,10 @@ class GameEngine:
             "success": True,
             "player_id": player_id,
             "amount": amount,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
 
+    @journaled
     def buy_property(self, game_id: str, player_id: str, property_id: int) -> Dict[str, Any]:
         """Buy a property."""
         game = self.games.get(game_id)
@@ -1196,7 +1749,7 @@ class GameEngine:
         if prop.isolation_turns > 0:
             return {"error": "Property is Isolated (Kim's Nuke Threat) - Cannot buy!"}
         
-        if prop.group in ["Special", "Jail", "FreeParking", "GoToJail", "Chance", "Tax", "Negotiations", "RaiseTax", "Casino"]:
+        if property_id not in self._board_index(game).purchasable:
             return {"error": "Cannot buy this tile"}
         
         if player.money < prop.price:
@@ -1204,15 +1757,15 @@ class GameEngine:
         
         # Buy it
         player.money -= prop.price
-        prop.owner_id = player_id
+        self._set_owner(game, prop, player_id)
         player.properties.append(property_id)
         
         # Check for Monopoly Completion (Trigger)
         self._update_group_monopoly(game, prop.group)
         if prop.is_monopoly:
-             game.logs.append(f"🎉 {player.name} completed the {prop.group} MONOPOLY!")
+             game.add_log(f"🎉 {player.name} completed the {prop.group} MONOPOLY!")
         
-        game.logs.append(f"{player.name} bought {prop.name} for ${prop.price}")
+        game.add_log(f"{player.name} bought {prop.name} for ${prop.price}")
         self._reset_timer(game)
         
         # Auto-end turn after purchase (Humans only)
@@ -1222,10 +1775,11 @@ class GameEngine:
         return {
             "success": True,
             "player_id": player_id,
-            "property": prop.dict(),
-            "game_state": game.dict()
+            "property": prop.to_dict(),
+            "game_state": game.to_dict()
         }
     
+    @journaled
     def decline_property(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Player declines property purchase, triggering auction."""
         game = self.games.get(game_id)
@@ -1249,14 +1803,15 @@ class GameEngine:
         if prop.owner_id:
             return {"error": "Property already owned"}
         
-        if prop.group in ["Special", "Jail", "FreeParking", "GoToJail", "Chance", "Tax", "Negotiations", "RaiseTax", "Casino"]:
+        if property_id not in self._board_index(game).purchasable:
             return {"error": "Cannot auction this tile"}
         
-        game.logs.append(f"❌ {player.name} declined {prop.name}")
+        game.add_log(f"❌ {player.name} declined {prop.name}")
         
         # Start auction, excluding the declining player
         return self.start_auction(game_id, property_id, declining_player_id=player_id)
     
+    @journaled
     def start_auction(self, game_id: str, property_id: int, declining_player_id: str = None) -> Dict[str, Any]:
         """Start sequential auction for a property."""
         game = self.games.get(game_id)
@@ -1276,8 +1831,8 @@ class GameEngine:
         
         if not eligible_players:
             # No one to auction to
-            game.logs.append(f"🔨 No eligible bidders for {prop.name}. Property remains unowned.")
-            return {"success": True, "winner": None, "game_state": game.dict()}
+            game.add_log(f"🔨 No eligible bidders for {prop.name}. Property remains unowned.")
+            return {"success": True, "winner": None, "game_state": game.to_dict()}
         
         # Initialize sequential auction state
         game.turn_state["auction_active"] = True
@@ -1289,16 +1844,17 @@ class GameEngine:
         
         # GLOBAL AUCTION TIMER
         # 30 seconds initial pool. Bidding adds time if low.
-        game.turn_state["auction_expiry"] = datetime.utcnow().timestamp() + 30
+        self._set_auction_expiry(game, AUCTION_SECONDS)
         
         current_player_id = eligible_players[0]
         current_player = game.players[current_player_id]
         
-        game.logs.append(f"🔨 Auction started for {prop.name}! Starting bid: ${prop.price}")
-        game.logs.append(f"⏰ {current_player.name}'s turn to bid (Global Timer!)")
+        game.add_log(f"🔨 Auction started for {prop.name}! Starting bid: ${prop.price}")
+        game.add_log(f"⏰ {current_player.name}'s turn to bid (Global Timer!)")
         
         # Disable standard turn timer during auction to prevent conflict
         game.turn_expiry = None
+        self.deadlines.cancel((game.game_id, "turn"))
         
         return {
             "success": True,
@@ -1306,9 +1862,10 @@ class GameEngine:
             "property_id": property_id,
             "current_bid": prop.price,
             "current_player": current_player_id,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
     
+    @journaled
     def raise_bid(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Raise bid by $10 in sequential auction."""
         game = self.games.get(game_id)
@@ -1347,18 +1904,18 @@ class GameEngine:
         # Update bid
         game.turn_state["auction_current_bid"] = new_bid
         game.turn_state["auction_current_bidder"] = player_id
-        game.logs.append(f"💰 {player.name} raised bid to ${new_bid}")
+        game.add_log(f"💰 {player.name} raised bid to ${new_bid}")
         
         # EXTEND TIMER IF < 5s
         current_expiry = game.turn_state.get("auction_expiry", 0)
-        now = datetime.utcnow().timestamp()
-        if current_expiry - now < 5:
-            game.turn_state["auction_expiry"] = now + 5
-            game.logs.append(f"⏱️ Auction timer extended! (+5s)")
+        if current_expiry - self._utcnow().timestamp() < AUCTION_EXTEND_SECONDS:
+            self._set_auction_expiry(game, AUCTION_EXTEND_SECONDS)
+            game.add_log(f"⏱️ Auction timer extended! (+{AUCTION_EXTEND_SECONDS}s)")
         
         # Move to next player
         return self._next_auction_player(game)
     
+    @journaled
     def pass_auction(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Player passes in sequential auction."""
         game = self.games.get(game_id)
@@ -1383,7 +1940,7 @@ class GameEngine:
         if player_id != current_player_id:
             return {"error": "Not your turn in auction"}
         
-        game.logs.append(f"🚫 {player.name} passed")
+        game.add_log(f"🚫 {player.name} passed")
         
         # Remove player from eligible list
         eligible_players.pop(current_index)
@@ -1418,7 +1975,7 @@ class GameEngine:
         next_player = game.players[next_player_id]
         current_bid = game.turn_state.get("auction_current_bid", 0)
         
-        game.logs.append(f"⏰ {next_player.name}'s turn (Current: ${current_bid}, Raise: ${current_bid + 10})")
+        game.add_log(f"⏰ {next_player.name}'s turn (Current: ${current_bid}, Raise: ${current_bid + 10})")
         # self._reset_timer(game) # Removed for global timer
         
         # Trigger bot logic if next player is bot
@@ -1440,9 +1997,10 @@ class GameEngine:
             "success": True,
             "next_player": next_player_id,
             "current_bid": current_bid,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
     
+    @journaled
     def resolve_auction(self, game_id: str) -> Dict[str, Any]:
         """Resolve auction and award property to highest bidder."""
         game = self.games.get(game_id)
@@ -1458,10 +2016,11 @@ class GameEngine:
         
         prop = game.board[property_id]
         winner_id = game.turn_state.get("auction_current_bidder")
+        self.deadlines.cancel((game_id, "auction"))
         
         if not winner_id:
             # No bids - property remains unowned
-            game.logs.append(f"🔨 No bids for {prop.name}. Property remains unowned.")
+            game.add_log(f"🔨 No bids for {prop.name}. Property remains unowned.")
             
             # Clear auction state
             game.turn_state["auction_active"] = False
@@ -1477,7 +2036,7 @@ class GameEngine:
             return {
                 "success": True,
                 "winner": None,
-                "game_state": game.dict()
+                "game_state": game.to_dict()
             }
         
         # Award property to winner
@@ -1485,15 +2044,15 @@ class GameEngine:
         winner = game.players[winner_id]
         
         winner.money -= winning_bid
-        prop.owner_id = winner_id
+        self._set_owner(game, prop, winner_id)
         winner.properties.append(property_id)
         
         # Update monopoly status
         self._update_group_monopoly(game, prop.group)
         if prop.is_monopoly:
-            game.logs.append(f"🎉 {winner.name} completed the {prop.group} MONOPOLY!")
+            game.add_log(f"🎉 {winner.name} completed the {prop.group} MONOPOLY!")
         
-        game.logs.append(f"🎉 {winner.name} won {prop.name} for ${winning_bid}!")
+        game.add_log(f"🎉 {winner.name} won {prop.name} for ${winning_bid}!")
         
         # Clear auction state
         game.turn_state["auction_active"] = False
@@ -1513,9 +2072,10 @@ class GameEngine:
             "winner_id": winner_id,
             "amount": winning_bid,
             "property": prop.name,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
     
+    @journaled
     def pay_rent(self, game_id: str, player_id: str, property_id: int) -> Dict[str, Any]:
         """Pay rent to property owner."""
         game = self.games.get(game_id)
@@ -1562,7 +2122,7 @@ class GameEngine:
                     "required_amount": rent,
                     "current_money": player.money,
                     "rent_paid": 0,
-                    "game_state": game.dict()
+                    "game_state": game.to_dict()
                 }
         
         # Payment path
@@ -1574,7 +2134,7 @@ class GameEngine:
         game.turn_state.pop("awaiting_payment_amount", None)
         game.turn_state.pop("awaiting_payment_owner", None)
         
-        game.logs.append(f"{player.name} paid ${rent} rent to {owner.name}")
+        game.add_log(f"{player.name} paid ${rent} rent to {owner.name}")
         self._reset_timer(game)
         
         # Humans auto-end turn, bots are handled by runner
@@ -1585,9 +2145,10 @@ class GameEngine:
             "success": True,
             "player_id": player_id,
             "rent_paid": rent,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
     
+    @journaled
     def mortgage_property(self, game_id: str, player_id: str, property_id: int) -> Dict[str, Any]:
         """Mortgage a property for 70% value."""
         game = self.games.get(game_id)
@@ -1611,10 +2172,11 @@ class GameEngine:
         prop.mortgage_turn = game.turn_number  # Track when mortgaged for expiration
         player.money += mortgage_value
         
-        game.logs.append(f"🏦 {player.name} mortgaged {prop.name} for ${mortgage_value}")
+        game.add_log(f"🏦 {player.name} mortgaged {prop.name} for ${mortgage_value}")
         
-        return {"success": True, "game_state": game.dict()}
+        return {"success": True, "game_state": game.to_dict()}
 
+    @journaled
     def unmortgage_property(self, game_id: str, player_id: str, property_id: int) -> Dict[str, Any]:
         """Unmortgage a property (pay 80% price)."""
         game = self.games.get(game_id)
@@ -1639,10 +2201,11 @@ class GameEngine:
         prop.is_mortgaged = False
         prop.mortgage_turn = None  # Clear mortgage timer
         
-        game.logs.append(f"🔓 {player.name} unmortgaged {prop.name} for ${cost}")
+        game.add_log(f"🔓 {player.name} unmortgaged {prop.name} for ${cost}")
         
-        return {"success": True, "game_state": game.dict()}
+        return {"success": True, "game_state": game.to_dict()}
     
+    @journaled
     def build_house(self, game_id: str, player_id: str, property_id: int) -> Dict[str, Any]:
         """Build a house on a property."""
         game = self.games.get(game_id)
@@ -1668,7 +2231,7 @@ class GameEngine:
             return {"error": "Property is mortgaged"}
             
         # Check monopoly
-        group_props = [t for t in game.board if t.group == prop.group]
+        group_props = self._group_tiles(game, prop.group)
         
         if not prop.is_monopoly:
             return {"error": "Must have MONOPOLY status to build"}
@@ -1704,14 +2267,15 @@ class GameEngine:
             game.turn_state["build_counts"] = {}
         game.turn_state["build_counts"][prop.group] = build_counts.get(prop.group, 0) + 1
         
-        game.logs.append(f"🏠 {player.name} built a {'hotel' if prop.houses == 5 else 'house'} on {prop.name} for ${house_price}")
+        game.add_log(f"🏠 {player.name} built a {'hotel' if prop.houses == 5 else 'house'} on {prop.name} for ${house_price}")
         
         return {
             "success": True,
-            "property": prop.dict(),
-            "game_state": game.dict()
+            "property": prop.to_dict(),
+            "game_state": game.to_dict()
         }
 
+    @journaled
     def sell_house(self, game_id: str, player_id: str, property_id: int) -> Dict[str, Any]:
         """Sell a house/hotel from a property (70% return)."""
         game = self.games.get(game_id)
@@ -1734,7 +2298,7 @@ class GameEngine:
             
         # Even Selling Constraints? 
         # Usually you must sell evenly too.
-        group_props = [t for t in game.board if t.group == prop.group]
+        group_props = self._group_tiles(game, prop.group)
         max_houses = max(t.houses for t in group_props)
         min_houses = min(t.houses for t in group_props)
         
@@ -1752,26 +2316,29 @@ class GameEngine:
         player.money += sell_value
         prop.houses -= 1
         
-        game.logs.append(f"🏚️ {player.name} sold a house on {prop.name} for ${sell_value}")
+        game.add_log(f"🏚️ {player.name} sold a house on {prop.name} for ${sell_value}")
         
         return {
             "success": True,
-            "property": prop.dict(),
-            "game_state": game.dict()
+            "property": prop.to_dict(),
+            "game_state": game.to_dict()
         }
 
     def _handle_bankruptcy(self, game: GameState, player: Player, creditor: Player, debt: int) -> Dict[str, Any]:
         """Handle player bankruptcy."""
         player.is_bankrupt = True
+        self._unindex_player(game.game_id, player)
         
         # Transfer all properties to creditor (or bank if no creditor)
+        affected_groups = set()
         for prop_id in player.properties:
             prop = game.board[prop_id]
+            affected_groups.add(prop.group)
             if creditor:
-                prop.owner_id = creditor.id
+                self._set_owner(game, prop, creditor.id)
                 creditor.properties.append(prop_id)
             else:
-                prop.owner_id = None
+                self._set_owner(game, prop, None)
                 prop.houses = 0
                 prop.is_mortgaged = False
                 prop.is_monopoly = False
@@ -1784,6 +2351,9 @@ class GameEngine:
         
         player.money = 0
         player.properties = []
+
+        for group in affected_groups:
+            self._update_group_monopoly(game, group)
         
         # Remove from turn order
         p_idx = -1
@@ -1791,7 +2361,7 @@ class GameEngine:
             p_idx = game.player_order.index(player.id)
             game.player_order.remove(player.id)
         
-        game.logs.append(f"💀 {player.name} went BANKRUPT!")
+        game.add_log(f"💀 {player.name} went BANKRUPT!")
 
         # Advance turn if it was this player's turn
         if p_idx == game.current_turn_index and game.game_status == "active":
@@ -1809,16 +2379,17 @@ class GameEngine:
         if len(active_players) <= 1 and len(game.players) > 1:
             winner = active_players[0] if active_players else None
             game.game_status = "finished"
+            self._unindex_game(game)
             if winner:
                 game.winner_id = winner.id
-                game.logs.append(f"🏆 {winner.name} WINS THE GAME! 🏆")
-            game.finished_at = datetime.utcnow()
+                game.add_log(f"🏆 {winner.name} WINS THE GAME! 🏆")
+            game.finished_at = self._utcnow()
             game_over = True
             
-            # --- UPDATE STATS ---
+            # --- UPDATE STATS --- (already counted when the journal is replayed)
             try:
                 loop = asyncio.get_event_loop()
-                if loop.is_running():
+                if loop.is_running() and not self._replaying:
                     # Update Winner
                     if winner and not winner.is_bot and winner.user_id:
                          loop.create_task(db.increment_user_stats_async(winner.user_id, is_winner=True))
@@ -1834,7 +2405,7 @@ class GameEngine:
             "bankrupt": True,
             "player_id": player.id,
             "game_over": game_over,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
     
     def _calculate_assets(self, game: GameState, player: Player) -> int:
@@ -1850,6 +2421,7 @@ class GameEngine:
                 value += int(prop.price * 0.7)
         return value
 
+    @journaled
     def execute_ability(self, game_id: str, player_id: str, ability_type: str, target_id: Union[int, str] = None) -> Dict[str, Any]:
         """Execute a character's special ability."""
         game = self.games.get(game_id)
@@ -1928,7 +2500,7 @@ class GameEngine:
             # Ability does NOT end turn automatically now (User request)
             # self._maybe_end_turn(game)
         
-        result["game_state"] = game.dict()
+        result["game_state"] = game.to_dict()
         return result
     
     def _ability_oreshnik(self, game: GameState, player: Player, target_id: int = None) -> Dict[str, Any]:
@@ -1938,7 +2510,7 @@ class GameEngine:
             targets = [p for p in game.board if p.owner_id and p.owner_id != player.id and not p.is_destroyed]
             if not targets:
                 return {"error": "No valid targets"}
-            target_id = random.choice(targets).id
+            target_id = game.rng.choice(targets).id
         
         target = game.board[target_id]
         
@@ -1950,10 +2522,9 @@ class GameEngine:
         
         # Destroy the property
         target.is_destroyed = True
-        target.rent = [0] * len(target.rent)
         target.destruction_turn = game.turn_number
         
-        game.logs.append(f"🚀 {player.name} launched ORESHNIK at {target.name}! The city is in ruins!")
+        game.add_log(f"🚀 {player.name} launched ORESHNIK at {target.name}! The city is in ruins!")
         
         return {
             "success": True,
@@ -1984,7 +2555,7 @@ class GameEngine:
         # Greenland discount
         if target.name == "Greenland":
             price = int(target.price * 0.5)
-            game.logs.append("🏝️ Special Greenland discount applied!")
+            game.add_log("🏝️ Special Greenland discount applied!")
         
         if player.money < price:
             return {"error": f"Need ${price} for hostile takeover"}
@@ -1997,9 +2568,10 @@ class GameEngine:
         # Transfer property
         old_owner.properties.remove(target_id)
         player.properties.append(target_id)
-        target.owner_id = player.id
+        self._set_owner(game, target, player.id)
+        self._update_group_monopoly(game, target.group)
         
-        game.logs.append(f"💰 {player.name} executed HOSTILE TAKEOVER of {target.name} from {old_owner.name} for ${price}!")
+        game.add_log(f"💰 {player.name} executed HOSTILE TAKEOVER of {target.name} from {old_owner.name} for ${price}!")
         
         return {
             "success": True,
@@ -2021,7 +2593,7 @@ class GameEngine:
         
         player.money += total_collected
         
-        game.logs.append(f"🤝 {player.name} collected FOREIGN AID Package: ${total_collected} from allies!")
+        game.add_log(f"🤝 {player.name} collected FOREIGN AID Package: ${total_collected} from allies!")
         
         return {
             "success": True,
@@ -2042,7 +2614,7 @@ class GameEngine:
         # Set isolation
         target.isolation_turns = 3
         
-        game.logs.append(f"🔒 {player.name} imposed ISOLATION on {target.name} for 3 turns!")
+        game.add_log(f"🔒 {player.name} imposed ISOLATION on {target.name} for 3 turns!")
         
         return {
             "success": True,
@@ -2058,7 +2630,7 @@ class GameEngine:
             opponents = [p for p in game.players.values() if p.id != player.id and not p.is_bankrupt]
             if not opponents:
                 return {"error": "No valid targets"}
-            target = random.choice(opponents)
+            target = game.rng.choice(opponents)
             target_player_id = target.id
         else:
             target = game.players.get(str(target_player_id))
@@ -2068,7 +2640,7 @@ class GameEngine:
         # Skip their turn
         target.skipped_turns = 1
         
-        game.logs.append(f"🚫 {player.name} imposed SANCTIONS on {target.name}! They will skip their next turn!")
+        game.add_log(f"🚫 {player.name} imposed SANCTIONS on {target.name}! They will skip their next turn!")
         
         return {
             "success": True,
@@ -2094,7 +2666,7 @@ class GameEngine:
         player.position = target_id
         tile = game.board[target_id]
         
-        game.logs.append(f"🔯 {player.name} used Strategic Move and teleported to {tile.name}!")
+        game.add_log(f"🔯 {player.name} used Strategic Move and teleported to {tile.name}!")
         
         # Handle landing
         landing_result = self._handle_landing(game, player, tile)
@@ -2125,7 +2697,7 @@ class GameEngine:
             # Recalculate Monopoly Status
             self._update_group_monopoly(game, tile.group)
             
-            game.logs.append(f"🏗️ {player.name} used CONSTRUCTION to rebuild {tile.name}!")
+            game.add_log(f"🏗️ {player.name} used CONSTRUCTION to rebuild {tile.name}!")
             
             return {
                 "success": True,
@@ -2146,7 +2718,7 @@ class GameEngine:
                 return {"error": "Cannot build houses on this type of property"}
             
             tile.houses += 1
-            game.logs.append(f"🏗️ {player.name} used CONSTRUCTION to build a house on {tile.name}!")
+            game.add_log(f"🏗️ {player.name} used CONSTRUCTION to build a house on {tile.name}!")
             
             return {
                 "success": True,
@@ -2189,9 +2761,9 @@ class GameEngine:
             destroyed_names.append(tile2.name)
         
         if destroyed_names:
-            game.logs.append(f"✈️💥 {player.name} used SEPTEMBER 11 attack! Destroyed: {', '.join(destroyed_names)} (Twin Towers)")
+            game.add_log(f"✈️💥 {player.name} used SEPTEMBER 11 attack! Destroyed: {', '.join(destroyed_names)} (Twin Towers)")
         else:
-            game.logs.append(f"✈️ {player.name} used SEPTEMBER 11 but targets were already destroyed")
+            game.add_log(f"✈️ {player.name} used SEPTEMBER 11 but targets were already destroyed")
         
         return {
             "success": True,
@@ -2205,6 +2777,7 @@ class GameEngine:
 
     # ============ Trading System ============
 
+    @journaled
     def create_trade(self, game_id: str, offer: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new trade offer."""
         game = self.games.get(game_id)
@@ -2230,10 +2803,12 @@ class GameEngine:
         if p_from.money < offer.get("offer_money", 0):
             return {"error": "Not enough money"}
             
-        trade_id = str(uuid.uuid4())
+        # Drawn from the game RNG so a replayed journal reproduces the id
+        trade_id = str(uuid.UUID(int=game.rng.getrandbits(128), version=4))
         trade = TradeOffer(
             id=trade_id,
             game_id=game_id,
+            created_at=self._utcnow(),
             from_player_id=p_from.id,
             to_player_id=p_to.id,
             offer_money=offer.get("offer_money", 0),
@@ -2243,41 +2818,26 @@ class GameEngine:
         )
         
         game.trades[trade_id] = trade
-        game.logs.append(f"🤝 {p_from.name} sent a trade offer to {p_to.name}")
+        game.add_log(f"🤝 {p_from.name} sent a trade offer to {p_to.name}")
         
-        # BOT AUTO-RESPONSE
-        if p_to.is_bot:
-            # Evaluate trade
-            # Value of received assets
-            val_receive = trade.offer_money
-            for pid in trade.offer_properties:
-                prop = game.board[pid]
-                val_receive += prop.price # Base value
-            
-            # Value of given assets
-            val_give = trade.request_money
-            for pid in trade.request_properties:
-                prop = game.board[pid]
-                # If completing monopoly for opponent, value it higher?
-                # For simplicity: just price
-                val_give += prop.price
-            
-            # Bot accepts if Profit > 0
-            # Or if desperate? No, "any contract that is plus"
-            if val_receive >= val_give:
-                self.respond_to_trade(game_id, trade_id, "accept")
-                # Reload trade to get status
-                trade = game.trades[trade_id] # Update ref
-            else:
-                self.respond_to_trade(game_id, trade_id, "reject")
-                trade = game.trades[trade_id]
+        # BOT AUTO-RESPONSE (hard bots answer through the bot scheduler, after planning)
+        if p_to.is_bot and p_to.difficulty != "hard":
+            self.respond_to_trade(game_id, trade_id, "accept" if self.bot_accepts_trade(game, trade) else "reject")
+            trade = game.trades[trade_id]  # Reload trade to get status
 
         return {
             "success": True,
-            "trade": trade.dict(),
-            "game_state": game.dict()
+            "trade": trade.to_dict(),
+            "game_state": game.to_dict()
         }
 
+    def bot_accepts_trade(self, game: GameState, trade: TradeOffer) -> bool:
+        """Regular bot trade policy: accept any contract that is plus, valuing tiles at their price."""
+        val_receive = trade.offer_money + sum(game.board[pid].price for pid in trade.offer_properties)
+        val_give = trade.request_money + sum(game.board[pid].price for pid in trade.request_properties)
+        return val_receive >= val_give
+
+    @journaled
     def respond_to_trade(self, game_id: str, trade_id: str, response: str) -> Dict[str, Any]:
         """Accept or Reject a trade."""
         game = self.games.get(game_id)
@@ -2324,21 +2884,21 @@ class GameEngine:
             given_str = _fmt_trade_items(trade.offer_money, trade.offer_properties)
             recv_str = _fmt_trade_items(trade.request_money, trade.request_properties)
             
-            game.logs.append(f"✅ TRADE: {p_from.name} gave [{given_str}] to {p_to.name} for [{recv_str}]")
+            game.add_log(f"✅ TRADE: {p_from.name} gave [{given_str}] to {p_to.name} for [{recv_str}]")
             
         elif response == "reject":
             trade.status = "rejected"
-            game.logs.append(f"❌ {p_to.name} rejected trade from {p_from.name}")
+            game.add_log(f"❌ {p_to.name} rejected trade from {p_from.name}")
             
         elif response == "cancel":
              trade.status = "cancelled"
-             game.logs.append(f"🚫 {p_from.name} cancelled trade")
+             game.add_log(f"🚫 {p_from.name} cancelled trade")
 
         return {
             "success": True,
             "trade_id": trade_id,
             "status": trade.status,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
 
     def _execute_trade(self, game: GameState, trade: TradeOffer, p1: Player, p2: Player):
@@ -2354,13 +2914,13 @@ class GameEngine:
         for pid in trade.offer_properties:
             p1.properties.remove(pid)
             p2.properties.append(pid)
-            game.board[pid].owner_id = p2.id
+            self._set_owner(game, game.board[pid], p2.id)
             
         # Properties P2 -> P1
         for pid in trade.request_properties:
             p2.properties.remove(pid)
             p1.properties.append(pid)
-            game.board[pid].owner_id = p1.id
+            self._set_owner(game, game.board[pid], p1.id)
             
         # Update Monopoly Status for affected groups
         affected_groups = set()
@@ -2372,6 +2932,7 @@ class GameEngine:
         for g in affected_groups:
             self._update_group_monopoly(game, g)
             
+    @journaled
     def run_bot_turn(self, game_id: str) -> Optional[Dict[str, Any]]:
         """Execute a bot's dice roll. Returns dice result for animation."""
         game = self.games.get(game_id)
@@ -2395,8 +2956,9 @@ class GameEngine:
             **roll_result
         }
     
-    def run_bot_auction_decision(self, game_id: str, player_id: str) -> Optional[Dict[str, Any]]:
-        """Make a decision for a bot in an auction."""
+    @journaled
+    def run_bot_auction_decision(self, game_id: str, player_id: str, plan: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Make a decision for a bot in an auction (`plan`: {"raise": bool} from the bot planner)."""
         game = self.games.get(game_id)
         if not game or not game.turn_state.get("auction_active"):
             return None
@@ -2411,9 +2973,11 @@ class GameEngine:
         
         should_raise = False
         
+        if plan and "raise" in plan:
+            should_raise = plan["raise"] and player.money >= new_bid
         # User requested: "bots let with 30% probability raise if they have money"
-        if player.money >= new_bid:
-             if random.random() < 0.3:
+        elif player.money >= new_bid:
+             if game.rng.random() < 0.3:
                  should_raise = True
              
              # Also, if bot is the ONLY one left besides decliner? No, logic handles multiple.
@@ -2467,8 +3031,12 @@ class GameEngine:
                 
         return player.money >= amount
 
-    def run_bot_post_roll(self, game_id: str, player_id: str) -> Optional[Dict[str, Any]]:
-        """Execute bot actions AFTER dice roll with Decision Tree Logic."""
+    @journaled
+    def run_bot_post_roll(self, game_id: str, player_id: str, plan: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Execute bot actions AFTER dice roll with Decision Tree Logic.
+        `plan` ({"buy": bool, "build": bool}, from the bot planner) overrides the heuristics it names.
+        """
         game = self.games.get(game_id)
         if not game:
             return None
@@ -2480,6 +3048,7 @@ class GameEngine:
         tile = game.board[player.position]
         actions = []
         reserve_cash = 300
+        plan = plan or {}
         
         # 1. TAX (Handle if on Tax tile)
         if tile.group == "Tax":
@@ -2508,23 +3077,22 @@ class GameEngine:
                         "type": "BOT_ACTIONS",
                         "player_id": player_id,
                         "actions": actions,
-                        "game_state": game.dict()
+                        "game_state": game.to_dict()
                     }
 
         # 3. PROPERTY (Free) - Logic
-        elif not tile.owner_id and tile.group not in ["Special", "Jail", "FreeParking", "GoToJail", "Chance", "Tax", "Negotiations", "RaiseTax", "Casino"]:
+        elif not tile.owner_id and tile.id in self._board_index(game).purchasable:
             should_buy = False
             
             # Check if buying completes a street (PRIORITY)
-            group_props = [t for t in game.board if t.group == tile.group]
-            others_in_group = [t for t in group_props if t.id != tile.id]
-            owned_count = sum(1 for t in others_in_group if t.owner_id == player.id)
+            owned_count = self._owned_in_group(game, player.id, tile.group)
+            completes_street = (owned_count == self._board_index(game).group_size(tile.group) - 1)
             
-            completes_street = (owned_count == len(others_in_group))
-            
-            if completes_street and player.money >= tile.price:
+            if "buy" in plan:
+                should_buy = plan["buy"] and player.money >= tile.price
+            elif completes_street and player.money >= tile.price:
                 should_buy = True
-                game.logs.append(f"🤖 Bot {player.name} sees a MONOPOLY opportunity on {tile.group}!")
+                game.add_log(f"🤖 Bot {player.name} sees a MONOPOLY opportunity on {tile.group}!")
             elif (player.money - tile.price) > reserve_cash:
                 should_buy = True
             
@@ -2537,17 +3105,19 @@ class GameEngine:
                 res = self.decline_property(game_id, player_id)
                 if not res.get("error"):
                     actions.append({"type": "PROPERTY_DECLINED", **res})
-                    game.logs.append(f"🤖 Bot {player.name} declined to buy {tile.name}. Auction started!")
+                    game.add_log(f"🤖 Bot {player.name} declined to buy {tile.name}. Auction started!")
 
         # 4. BUILD Logic (If owns monopoly)
+        if "build" in plan:
+            reserve_cash = 0  # The planner already weighed keeping cash
         owned_groups = set()
-        for pid in player.properties:
+        for pid in player.properties if plan.get("build", True) else ():
             pr = game.board[pid]
             if pr.is_monopoly and pr.group not in ["Station", "Utility"]:
                 owned_groups.add(pr.group)
         
         for grp in owned_groups:
-            grp_props = [t for t in game.board if t.group == grp]
+            grp_props = self._group_tiles(game, grp)
             min_h = min(t.houses for t in grp_props)
             candidates = [t for t in grp_props if t.houses == min_h and t.houses < 5]
             
@@ -2560,7 +3130,7 @@ class GameEngine:
                          break
 
         # 5. Abilities (Random)
-        if player.ability_cooldown == 0 and not player.ability_used_this_game and random.random() < 0.2:
+        if player.ability_cooldown == 0 and not player.ability_used_this_game and game.rng.random() < 0.2:
              ability = CHARACTER_ABILITIES.get(player.character)
              if ability:
                 ab_res = self.execute_ability(game_id, player_id, ability["name"])
@@ -2572,7 +3142,7 @@ class GameEngine:
                 "type": "BOT_ACTIONS",
                 "player_id": player_id,
                 "actions": actions,
-                "game_state": game.dict()
+                "game_state": game.to_dict()
             }
         
         return None
@@ -2590,7 +3160,7 @@ class GameEngine:
                 mortgage_val = prop.price // 2
                 prop.is_mortgaged = True
                 player.money += mortgage_val
-                game.logs.append(f"🤖 {player.name} mortgaged {prop.name} for ${mortgage_val}")
+                game.add_log(f"🤖 {player.name} mortgaged {prop.name} for ${mortgage_val}")
 
         # 2. Sell Houses (Evenly)
         if player.money < amount_needed:
@@ -2607,7 +3177,7 @@ class GameEngine:
                  sold_something = False
                  
                  for grp in groups_with_houses:
-                     grp_props = [t for t in game.board if t.group == grp]
+                     grp_props = self._group_tiles(game, grp)
                      max_h = max(t.houses for t in grp_props)
                      if max_h == 0: continue
                      
@@ -2617,7 +3187,7 @@ class GameEngine:
                          sell_val = ((target.price // 2) + 50) // 2
                          target.houses -= 1
                          player.money += sell_val
-                         game.logs.append(f"🤖 {player.name} sold house on {target.name} for ${sell_val}")
+                         game.add_log(f"🤖 {player.name} sold house on {target.name} for ${sell_val}")
                          sold_something = True
                          if player.money >= amount_needed: break
                  
@@ -2644,7 +3214,7 @@ class GameEngine:
                     # So essentially yes.
                     
                     player.money += mortgage_val
-                    game.logs.append(f"🤖 {player.name} mortgaged (Monopoly item) {prop.name} for ${mortgage_val}")
+                    game.add_log(f"🤖 {player.name} mortgaged (Monopoly item) {prop.name} for ${mortgage_val}")
                     
                     # Update monopoly status logic
                     # If we mortgage, we technically still "own" it, but monopoly effect (double rent) might correspond to checking 'mortgaged' status.
@@ -2660,6 +3230,7 @@ class GameEngine:
                     # However, strictly speaking, Liquidation is just "Get Money".
                     pass
 
+    @journaled
     def end_turn(self, game_id: str, player_id: str) -> Dict[str, Any]:
         """Manually end a player's turn."""
         game = self.games.get(game_id)
@@ -2686,22 +3257,41 @@ class GameEngine:
         
         return {
             "success": True,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         }
     
+    @journaled
     def add_chat_message(self, game_id: str, player_name: str, message: str):
         """Add a chat message to the game log."""
         game = self.games.get(game_id)
         if game:
-            game.logs.append(f"💬 {player_name}: {message}")
+            game.add_log(f"💬 {player_name}: {message}")
 
     def update_user_profile(self, user_id: str, name: str, avatar_url: str):
         """Update user name and avatar in all active games."""
-        for game in self.games.values():
+        for game_id in self.user_game_ids(user_id):
+            self.update_player_profile(game_id, user_id, name, avatar_url)
+
+    @journaled
+    def update_player_profile(self, game_id: str, user_id: str, name: str, avatar_url: str):
+        """Update the name and avatar of a user's player in one game."""
+        game = self.games.get(game_id)
+        if game:
             for player in game.players.values():
                 if player.user_id == user_id:
                     player.name = name
                     player.avatar_url = avatar_url
 
-# Global engine instance
-engine = GameEngine()
+# Chance card effects by card kind
+_CHANCE_EFFECTS = {
+    "money": GameEngine._card_money,
+    "move_random": GameEngine._card_move_random,
+    "move_to": GameEngine._card_move_to,
+    "go_to_jail": GameEngine._card_go_to_jail,
+    "move_back": GameEngine._card_move_back,
+    "pay_all": GameEngine._card_pay_all,
+    "collect_all": GameEngine._card_collect_all,
+}
+
+# Global engine instance; journals go to GAME_JOURNAL_DIR (empty = disabled)
+engine = GameEngine(journal=GameJournal(os.getenv("GAME_JOURNAL_DIR", "data/journal")), lobby=LobbyIndex())
@@ -0,0 +1,124 @@
+"""
+Append-only per-game action journal for crash recovery.
+
+Every accepted engine action (roll_dice, buy_property, respond_to_trade, ...)
+is appended to <directory>/<game_id>.jsonl as one compact JSON line:
+
+    [seq, time, action, args]           (kwargs, if any, as a fifth element)
+
+The first line of a game is its creation parameters (including the RNG
+seed), so a journal alone can rebuild the game. Every SNAPSHOT_INTERVAL
+actions the file is atomically replaced by a single snapshot line holding the
+full state and the RNG stream position; recovery loads the last snapshot and
+replays the (at most SNAPSHOT_INTERVAL) actions after it. Replay is exact
+because all game randomness comes from the per-game RNG and the engine clock
+is pinned to the recorded action time.
+"""
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Actions between two snapshots (bounds the replay work on recovery)
+SNAPSHOT_INTERVAL = 200
+
+CREATE = "create_game"
+SNAPSHOT = "snapshot"
+
+_SEPARATORS = (",", ":")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=_SEPARATORS)
+
+
+class GameJournal:
+    """Journal files of all running games, one append-only file per game."""
+
+    def __init__(self, directory: Optional[str]):
+        self.directory = directory
+        self.seq: Dict[str, int] = {}  # game_id -> sequence number of the last entry
+        self.pending: Dict[str, int] = {}  # game_id -> actions since the last snapshot
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def _path(self, game_id: str) -> str:
+        return os.path.join(self.directory, f"{game_id}.jsonl")
+
+    def start(self, game_id: str, time: str, params: Dict[str, Any]):
+        """Open the journal of a new game with its creation parameters."""
+        self.seq[game_id] = 0
+        self.pending[game_id] = 0
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(game_id), "w", encoding="utf-8") as f:
+            f.write(_dumps([0, time, CREATE, params]) + "\n")
+
+    def append(self, game_id: str, time: str, action: str, args: List[Any], kwargs: Optional[Dict[str, Any]] = None):
+        """Append one accepted action."""
+        seq = self.seq.get(game_id, 0) + 1
+        entry = [seq, time, action, args]
+        if kwargs:
+            entry.append(kwargs)
+        with open(self._path(game_id), "a", encoding="utf-8") as f:
+            f.write(_dumps(entry) + "\n")
+        self.seq[game_id] = seq
+        self.pending[game_id] = self.pending.get(game_id, 0) + 1
+
+    def needs_snapshot(self, game_id: str) -> bool:
+        return self.pending.get(game_id, 0) >= SNAPSHOT_INTERVAL
+
+    def snapshot(self, game_id: str, state: Dict[str, Any]):
+        """Replace the journal of a game by a single snapshot line."""
+        path = self._path(game_id)
+        tmp = path + ".tmp"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_dumps([self.seq.get(game_id, 0), None, SNAPSHOT, state]) + "\n")
+        os.replace(tmp, path)
+        self.pending[game_id] = 0
+
+    def load(self, game_id: str) -> Tuple[List[list], int]:
+        """
+        Entries of a game's journal: a create or snapshot entry followed by the
+        actions recorded after it. Also returns the last sequence number.
+        A torn last line (crash mid-write) is cut off so appends can resume.
+        """
+        entries = []
+        valid = 0
+        with open(self._path(game_id), "r+b") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    f.truncate(valid)
+                    break
+                valid += len(line)
+        last_seq = entries[-1][0] if entries else 0
+        self.seq[game_id] = last_seq
+        self.pending[game_id] = max(len(entries) - 1, 0)
+        return entries, last_seq
+
+    def exists(self, game_id: str) -> bool:
+        return bool(self.directory) and os.path.exists(self._path(game_id))
+
+    def detach(self, game_id: str):
+        """Stop tracking a game whose journal is taken over by another process (the file stays)."""
+        self.seq.pop(game_id, None)
+        self.pending.pop(game_id, None)
+
+    def game_ids(self) -> Iterator[str]:
+        """Games that have a journal on disk."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return iter(())
+        return (name[:-len(".jsonl")] for name in sorted(os.listdir(self.directory)) if name.endswith(".jsonl"))
+
+    def forget(self, game_id: str):
+        """Delete the journal of a game that was deleted or has finished."""
+        self.seq.pop(game_id, None)
+        self.pending.pop(game_id, None)
+        if self.directory:
+            try:
+                os.remove(self._path(game_id))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,170 @@
+"""
+Write-behind persistence of live games into GameDB.state_json.
+
+Engine actions only mark a game dirty (GameEngine.dirty); nothing touches
+the database on the hot path. Every PERSIST_INTERVAL seconds the persister
+snapshots the dirty games, compresses the snapshots off the event loop and
+writes all of them in a single transaction, so any number of actions on a
+game cost one row update per interval.
+
+On startup the snapshots of unfinished games are loaded (still compressed)
+into engine.games.pending and each game is rehydrated the first time it is
+looked up; the uncompressed metadata stored beside each snapshot keeps the
+user -> games index and the lobby listing complete meanwhile. Games already recovered from the
+local journal (newer) win.
+"""
+import asyncio
+import base64
+import json
+import os
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, select, update
+
+from db.models import GameDB, GameStatus
+from models import GameState
+
+# Seconds between two batched writes
+PERSIST_INTERVAL = float(os.getenv("GAME_PERSIST_INTERVAL", "5"))
+
+SNAPSHOT_FORMAT = "zlib+json/1"
+
+
+def encode_snapshot(snapshot: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Compress a GameEngine.snapshot() into the value stored in state_json.
+    `meta` (GameEngine.saved_meta) is kept uncompressed, readable without decoding.
+    """
+    raw = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    stored = {"format": SNAPSHOT_FORMAT, "data": base64.b64encode(zlib.compress(raw, 6)).decode("ascii")}
+    if meta is not None:
+        stored["meta"] = meta
+    return stored
+
+
+def decode_snapshot(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of encode_snapshot."""
+    if not isinstance(stored, dict) or stored.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError("Unsupported state_json format")
+    return json.loads(zlib.decompress(base64.b64decode(stored["data"])).decode("utf-8"))
+
+
+def _encode_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for row in rows:
+        row["state_json"] = encode_snapshot(row["state_json"], row.pop("meta"))
+    return rows
+
+
+# One Core statement for the whole batch (executemany); the SET clause comes
+# from the row keys. Rows already finished in the DB are never reopened.
+_games = GameDB.__table__
+_UPDATE_GAME = update(_games).where(_games.c.id == bindparam("b_id"), _games.c.status != GameStatus.FINISHED)
+
+
+class GamePersister:
+    """Periodically saves dirty games of an engine, batched into one transaction."""
+
+    def __init__(self, engine, session_factory, interval: float = PERSIST_INTERVAL):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.interval = interval
+        self.on_hydrate: Optional[Callable[[GameState], None]] = None  # e.g. restart the bot loop
+        self.engine.games.hydrator = self.hydrate
+
+    def _row(self, game: GameState) -> Dict[str, Any]:
+        return {
+            "b_id": game.game_id,
+            "state_json": self.engine.snapshot(game),
+            "meta": self.engine.saved_meta(game),  # Moved into state_json by _encode_rows
+            "status": GameStatus(game.game_status),
+            "winner_id": game.winner_id,
+            "started_at": game.started_at,
+            "finished_at": game.finished_at,
+        }
+
+    async def flush(self) -> int:
+        """Write every dirty game. Returns the number of games written."""
+        dirty, self.engine.dirty = self.engine.dirty, set()
+        games = self.engine.games
+        # Snapshot on the loop (to_dict copies the state), compress in a worker thread
+        rows = [self._row(games[game_id]) for game_id in dirty if games.is_loaded(game_id)]
+        if not rows:
+            return 0
+        try:
+            rows = await asyncio.get_running_loop().run_in_executor(None, _encode_rows, rows)
+            async with self.session_factory() as session:
+                await session.execute(_UPDATE_GAME, rows)
+                await session.commit()
+        except Exception:
+            # Retry with the next batch
+            self.engine.dirty |= {row["b_id"] for row in rows}
+            raise
+        return len(rows)
+
+    async def run(self):
+        """Background loop: flush dirty games every interval."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Game persister error: {e}")
+
+    async def load(self, owns: Optional[Callable[[str], bool]] = None) -> int:
+        """
+        Queue the snapshots of unfinished games (that `owns` accepts) for lazy
+        rehydration. Returns how many were queued.
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(GameDB.id, GameDB.state_json).where(
+                    GameDB.status.in_([GameStatus.WAITING, GameStatus.ACTIVE]),
+                    GameDB.state_json.isnot(None)
+                )
+            )
+            rows = result.all()
+
+        games = self.engine.games
+        journal = self.engine.journal
+        queued = 0
+        for game_id, stored in rows:
+            # A journal is newer than the saved snapshot; it is recovered from there instead
+            if game_id not in games and not journal.exists(game_id) and (owns is None or owns(game_id)):
+                self.engine.queue_saved(game_id, stored)
+                queued += 1
+        return queued
+
+    async def reload(self, game_id: str) -> bool:
+        """Queue the current saved snapshot of one game (taken over from another worker)."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(GameDB.state_json).where(
+                    GameDB.id == game_id,
+                    GameDB.status.in_([GameStatus.WAITING, GameStatus.ACTIVE]),
+                    GameDB.state_json.isnot(None)
+                )
+            )
+            stored = result.scalar_one_or_none()
+        if stored is None:
+            return False
+        self.engine.queue_saved(game_id, stored)
+        return True
+
+    def hydrate(self, game_id: str, stored: Dict[str, Any]) -> Optional[GameState]:
+        """Rebuild a queued game on first access (called by engine.games)."""
+        # Indexed again from the restored game
+        self.engine.unindex_saved(game_id, stored)
+        try:
+            snapshot = decode_snapshot(stored)
+            game = self.engine.resume_game(
+                snapshot["state"], snapshot.get("rng"), snapshot.get("chance_pile"), snapshot.get("log_history")
+            )
+        except Exception as e:
+            print(f"Failed to rehydrate game {game_id}: {e}")
+            if self.engine.lobby is not None:
+                self.engine.lobby.remove(game_id)
+            return None
+        if self.on_hydrate:
+            self.on_hydrate(game)
+        return game
@@ -0,0 +1,181 @@
+"""
+In-memory lobby index.
+
+GET /api/games used to scan every game in memory and load the host of each
+one from the database. Instead, the engine refreshes a game's lobby entry
+after every accepted action (see GameEngine.lobby); entries are kept in
+sorted buckets per (status, map, mode), so a page is a binary search plus
+`limit` items. Host names and avatars are cached here: filled when a game is
+created, kept fresh by profile updates, and loaded in one query for hosts
+not seen yet (games recovered after a restart). Saved games waiting for
+rehydration are listed from the summary stored with them. Finished games are
+dropped.
+
+Pages are ordered by creation time; the cursor of the next page is the key
+of the last entry returned, so merging the pages of several workers is just
+a sort of their keys.
+"""
+import bisect
+import heapq
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+LISTED_STATUSES = ("waiting", "active")
+MAX_PAGE_SIZE = 200
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+Key = Tuple[int, str]  # (created_at in microseconds, game_id)
+Bucket = Tuple[str, str, str]  # (status, map_type, game_mode)
+
+
+def encode_cursor(key: Key) -> str:
+    return f"{key[0]}-{key[1]}"
+
+
+def decode_cursor(cursor: str) -> Optional[Key]:
+    """Key of a cursor, None if malformed."""
+    micros, _, game_id = cursor.partition("-")
+    if not micros.isdigit() or not game_id:
+        return None
+    return int(micros), game_id
+
+
+def matches(summary: Dict[str, Any], status: Optional[str] = None, map_type: Optional[str] = None,
+            game_mode: Optional[str] = None, open_seats: bool = False) -> bool:
+    """Whether a lobby entry passes the listing filters (open_seats: waiting and not full)."""
+    return (
+        (not status or summary["status"] == status)
+        and (not map_type or summary["map_type"] == map_type)
+        and (not game_mode or summary["game_mode"] == game_mode)
+        and (not open_seats or (summary["status"] == "waiting" and summary["player_count"] < summary["max_players"]))
+    )
+
+
+def summarize(game) -> Optional[Dict[str, Any]]:
+    """Lobby entry of a game, None once it is no longer listed."""
+    if game.game_status not in LISTED_STATUSES:
+        return None
+    created = game.created_at or _EPOCH
+    key = ((created - _EPOCH) // _MICROSECOND, game.game_id)
+    return {
+        "game_id": game.game_id,
+        "map_type": game.map_type,
+        "game_mode": game.game_mode,
+        "status": game.game_status,
+        "player_count": len(game.players),
+        "max_players": game.max_players,
+        "host_id": game.host_id,
+        "created_at": game.created_at.isoformat() if game.created_at else None,
+        "taken_characters": [p.character for p in game.players.values() if p.character],
+        "cursor": encode_cursor(key)
+    }
+
+
+class LobbyIndex:
+    """Lobby entries of the unfinished games of this process, plus their hosts' display data."""
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[Key, Bucket, Dict[str, Any]]] = {}  # game_id -> (key, bucket, summary)
+        self.buckets: Dict[Bucket, List[Key]] = {}  # Sorted keys
+        self.hosts: Dict[str, Tuple[str, Optional[str]]] = {}  # user_id -> (name, avatar_url)
+        self.host_games: Dict[str, int] = {}  # user_id -> indexed games they host
+        # Called with (game_id, old summary, new summary) on every change; None when not listed
+        self.listeners: List[Callable[[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # ============== Maintenance ==============
+
+    def update(self, game):
+        """Refresh the entry of a game after a change (drops it once finished)."""
+        summary = summarize(game)
+        if summary is None:
+            self.remove(game.game_id)
+        else:
+            self.put(summary)
+
+    def put(self, summary: Dict[str, Any]):
+        """Add or refresh an entry from its summary (e.g. the one stored with a saved game)."""
+        game_id = summary["game_id"]
+        old = self.entries.get(game_id)
+        if old and old[2] == summary:
+            return
+        key = decode_cursor(summary["cursor"])
+        bucket = (summary["status"], summary["map_type"], summary["game_mode"])
+        self.host_games[summary["host_id"]] = self.host_games.get(summary["host_id"], 0) + 1
+        if old:
+            self._unlink(*old[:2])
+            self._release_host(old[2]["host_id"])
+        bisect.insort(self.buckets.setdefault(bucket, []), key)
+        self.entries[game_id] = (key, bucket, summary)
+        self._notify(game_id, old[2] if old else None, summary)
+
+    def remove(self, game_id: str):
+        old = self.entries.pop(game_id, None)
+        if not old:
+            return
+        self._unlink(*old[:2])
+        self._release_host(old[2]["host_id"])
+        self._notify(game_id, old[2], None)
+
+    def _release_host(self, host_id: str):
+        self.host_games[host_id] -= 1
+        if not self.host_games[host_id]:
+            del self.host_games[host_id]
+            self.hosts.pop(host_id, None)
+
+    def _unlink(self, key: Key, bucket: Bucket):
+        keys = self.buckets[bucket]
+        del keys[bisect.bisect_left(keys, key)]
+        if not keys:
+            del self.buckets[bucket]
+
+    def _notify(self, game_id: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        for listener in self.listeners:
+            listener(game_id, old, new)
+
+    # ============== Hosts ==============
+
+    def set_host(self, user_id: str, name: str, avatar_url: Optional[str]):
+        """Remember (or refresh) a host's display data."""
+        if user_id:
+            self.hosts[user_id] = (name, avatar_url)
+
+    def update_host(self, user_id: str, name: str, avatar_url: Optional[str]):
+        """Profile change: refresh the cached data if the user hosts a listed game."""
+        if user_id in self.host_games:
+            self.set_host(user_id, name, avatar_url)
+
+    def missing_hosts(self, games: Iterable[Dict[str, Any]]) -> List[str]:
+        return list({g["host_id"] for g in games if g["host_id"] and g["host_id"] not in self.hosts})
+
+    def with_host(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        name, avatar = self.hosts.get(summary["host_id"], ("Unknown Host", None))
+        return {**summary, "host_name": name, "host_avatar": avatar}
+
+    # ============== Listing ==============
+
+    def page(self, status: Optional[str] = None, map_type: Optional[str] = None, game_mode: Optional[str] = None,
+             after: Optional[Key] = None, limit: int = 50,
+             open_seats: bool = False) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Entries matching the filters after the cursor key, and the cursor of the next page (None at the end)."""
+        if open_seats:
+            status = "waiting"
+        runs = []
+        for (s, m, g), keys in self.buckets.items():
+            if (status and s != status) or (map_type and m != map_type) or (game_mode and g != game_mode):
+                continue
+            start = bisect.bisect_right(keys, after) if after else 0
+            runs.append(islice(keys, start, None))
+        summaries = (self.entries[game_id][2] for _, game_id in heapq.merge(*runs))
+        if open_seats:
+            summaries = (g for g in summaries if g["player_count"] < g["max_players"])
+        games = list(islice(summaries, limit + 1))
+        more = len(games) > limit
+        games = games[:limit]
+        return games, games[-1]["cursor"] if more else None
+
@@ -0,0 +1,1068 @@
+"""
+Lockstep bot-vs-bot simulator: K games advanced together as NumPy arrays.
+
+simulator.py plays GameEngine games one at a time, a few games per second
+per core. Balance tuning of the maps and CHARACTER_ABILITIES needs millions
+of games, so here the state of K games lives in arrays (positions, money,
+owners, houses, ...) with one row per game, and every step advances all of
+them at once: one batch of dice, rent from lookup tables compiled from the
+map templates, chance cards drawn from per-game shuffled piles. A finished game is replaced
+by a new one in its row, so batches stay full until every game has started.
+
+Rules and bot policy are those of GameEngine and simulator.run_bot_step:
+_handle_landing, _calculate_rent, _draw_chance_card, run_bot_post_roll
+(buy, auction, build, abilities), bot_resolve_debt, bankruptcy and mortgage
+expiry, including their quirks. Bots only use the abilities that work
+without a target (ORESHNIK, AID, SANCTIONS); the others fail for bots in
+GameEngine too. Known differences: debt liquidation breaks ties by board
+order rather than purchase order, and monopolies are built in board order
+(GameEngine iterates a set). `python lockstep_sim.py --check` compares the
+rules tile by tile with GameEngine on states of seeded games, and the game
+statistics with simulator.py.
+
+Requires numpy, which the server does not need (pip install numpy).
+
+Usage:
+    python lockstep_sim.py --games 1000000 --workers 8
+    python lockstep_sim.py --games 100000 --map Ukraine --mode classic --batch 8192
+    python lockstep_sim.py --check --map Mukhosransk    # conformance against GameEngine
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Only this tool needs it
+    np = None
+
+from game_engine import GameEngine, BOARD_TEMPLATES, CHANCE_DECKS, NON_PURCHASABLE_GROUPS, CHARACTER_ABILITIES
+from simulator import MAPS, MODES, CHARACTERS, SimConfig, ability_of, new_game, run_batch, print_report, run_bot_step
+
+# Rule constants of GameEngine
+GO_SALARY = 200
+START_BONUS = 200
+JAIL_FEE = 50
+RAISE_TAX = 300
+MORTGAGE_TURNS = 14
+RESERVE = 300  # Bot cash reserve (run_bot_post_roll)
+BID_STEP = 10
+RAISE_CHANCE = 0.3  # run_bot_auction_decision
+ABILITY_CHANCE = 0.2
+MAX_DEBT_STEPS = 50  # bot_resolve_debt
+
+# Tile kinds
+PROPERTY, STATION, UTILITY, GO, SPECIAL, VISIT, GO_TO_JAIL, PARKING, TAX, CHANCE, NEGOTIATIONS, RAISE, CASINO = range(13)
+_GROUP_KINDS = {
+    "Station": STATION, "Utility": UTILITY, "Special": SPECIAL, "Jail": VISIT, "GoToJail": GO_TO_JAIL,
+    "FreeParking": PARKING, "Tax": TAX, "Chance": CHANCE, "Negotiations": NEGOTIATIONS,
+    "RaiseTax": RAISE, "Casino": CASINO,
+}
+
+# Payment a landing leaves due (turn_state["awaiting_payment"])
+NONE_DUE, TAX_DUE, RENT_DUE = range(3)
+
+# Chance card kinds (ChanceCard.kind of CHANCE_DECKS)
+MONEY, MOVE_RANDOM, MOVE_TO, JAIL_CARD, MOVE_BACK, PAY_ALL, COLLECT_ALL = range(7)
+_CARD_KINDS = {
+    "money": MONEY, "move_random": MOVE_RANDOM, "move_to": MOVE_TO, "go_to_jail": JAIL_CARD,
+    "move_back": MOVE_BACK, "pay_all": PAY_ALL, "collect_all": COLLECT_ALL,
+}
+
+# Bot abilities with an effect
+ORESHNIK, AID, SANCTIONS = 1, 2, 3
+_ABILITY_CODES = {"ORESHNIK": ORESHNIK, "AID": AID, "SANCTIONS": SANCTIONS}
+ABILITY_NAMES = {code: name for name, code in _ABILITY_CODES.items()}
+
+ACTIVE, FINISHED, TURN_LIMIT, IDLE = range(4)
+OUTCOMES = {FINISHED: "finished", TURN_LIMIT: "turn_limit"}
+
+
+def _require_numpy():
+    if np is None:
+        raise SystemExit("lockstep_sim needs numpy: pip install numpy")
+
+
+def bot_ability(character: str, game_mode: str) -> int:
+    """Ability a bot of this character actually uses (run_bot_post_roll + execute_ability), 0 if none."""
+    ability = CHARACTER_ABILITIES.get(character)
+    if game_mode == "classic" or not ability:
+        return 0
+    if game_mode == "oreshnik_all" and ability["name"] != "ORESHNIK":
+        return 0  # Bots ask for their own ability, only ORESHNIK is allowed
+    return _ABILITY_CODES.get(ability["name"], 0)
+
+
+class MapTables:
+    """Lookup tables of a map layout, compiled from its tile templates."""
+
+    def __init__(self, map_type: str):
+        _require_numpy()
+        tiles = BOARD_TEMPLATES[map_type]
+        self.size = len(tiles)
+        self.kind = np.array([_GROUP_KINDS.get(t.group, PROPERTY) for t in tiles], np.int64)
+        self.kind[0] = GO if tiles[0].group == "Special" else self.kind[0]
+        self.price = np.array([t.price for t in tiles], np.int64)
+        self.cost = self.price // 2 + 50  # House price
+        self.buyable = np.array([t.group not in NON_PURCHASABLE_GROUPS for t in tiles])
+        self.tax = np.array([t.rent[0] if t.rent else 200 for t in tiles], np.int64)
+        self.jail = next((t.id for t in tiles if t.group == "Jail"), 10)  # _send_to_jail
+
+        # Chance deck of the map: kind, value (amount, target or steps) and the most random steps
+        deck = CHANCE_DECKS[map_type]
+        self.card_kind = np.array([_CARD_KINDS[c.kind] for c in deck], np.int64)
+        self.card_value = np.array([
+            c.position if c.kind == "move_to" else c.steps if c.kind in ("move_random", "move_back") else c.amount
+            for c in deck
+        ], np.int64)
+        self.card_max = np.array([c.max_steps for c in deck], np.int64)
+
+        # rent[t, i]: rent with i houses (stations: i + 1 stations owned), padded with the last value
+        width = max(len(t.rent) for t in tiles)
+        self.rent = np.zeros((self.size, width), np.int64)
+        self.has_rent = np.array([bool(t.rent) for t in tiles])
+        for t in tiles:
+            values = list(t.rent) or [25 if t.group == "Station" else 10]
+            self.rent[t.id] = values + values[-1:] * (width - len(values))
+
+        # Liquidation values (_calculate_assets, sell_house, mortgage_property)
+        self.sale = np.array([int(c * 0.7) for c in self.cost.tolist()], np.int64)
+        self.mortgage = np.array([int(p * 0.7) for p in self.price.tolist()], np.int64)
+        self.assets = np.array([
+            [int(h * c * 0.7) + int(p * 0.7) for h in range(6)] for c, p in zip(self.cost.tolist(), self.price.tolist())
+        ], np.int64)
+
+        groups: List[str] = []
+        for t in tiles:
+            if t.group not in NON_PURCHASABLE_GROUPS and t.group not in groups:
+                groups.append(t.group)
+        self.groups = groups
+        self.group = np.array([groups.index(t.group) if t.group in groups else -1 for t in tiles], np.int64)
+        self.group_tiles = [np.array([t.id for t in tiles if t.group == g], np.int64) for g in groups]
+        self.group_size = np.array([len(ids) for ids in self.group_tiles], np.int64)
+        # Group tile ids padded with the first one (for "all tiles have one owner" checks)
+        longest = max(self.group_size)
+        self.group_matrix = np.array([list(ids) + [ids[0]] * (longest - len(ids)) for ids in self.group_tiles], np.int64)
+        # Groups that form monopolies and get houses (_update_group_monopoly)
+        self.streets = [i for i, g in enumerate(groups) if g not in ("Station", "Utility")]
+        self.stations = np.nonzero(self.kind == STATION)[0]
+        self.utilities = np.nonzero(self.kind == UTILITY)[0]
+
+
+class LockstepBatch:
+    """State of K games, one row per game (a slot) and one column per seat or tile."""
+
+    def __init__(self, config: SimConfig, slots: int, seed: int = 0):
+        _require_numpy()
+        self.config = config
+        self.tables = MapTables(config.map_type)
+        self.rng = np.random.default_rng(seed)
+        K, P, T = slots, config.players, self.tables.size
+        self.K, self.P, self.T = K, P, T
+
+        # Seats follow the turn order; bankrupt seats stay (alive = False)
+        self.character = np.zeros((K, P), np.int64)  # Index into CHARACTERS
+        self.ability = np.zeros((K, P), np.int64)
+        self.money = np.zeros((K, P), np.int64)
+        self.pos = np.zeros((K, P), np.int64)
+        self.jailed = np.zeros((K, P), bool)
+        self.jail_turns = np.zeros((K, P), np.int64)
+        self.skipped = np.zeros((K, P), np.int64)
+        self.alive = np.zeros((K, P), bool)
+        self.used = np.zeros((K, P), bool)  # ability_used_this_game
+
+        self.owner = np.full((K, T), -1, np.int64)  # Seat, -1 = bank
+        self.houses = np.zeros((K, T), np.int64)
+        self.mortgaged = np.zeros((K, T), bool)
+        self.mortgage_turn = np.zeros((K, T), np.int64)
+        self.destroyed = np.zeros((K, T), bool)
+
+        self.cur = np.zeros(K, np.int64)  # Seat whose turn it is
+        self.turn = np.zeros(K, np.int64)
+        self.doubles = np.zeros(K, np.int64)
+        self.has_rolled = np.zeros(K, bool)
+        self.due = np.zeros(K, np.int64)
+        self.pot = np.zeros(K, np.int64)
+        # Shuffled chance pile (game.chance_pile): the next card is pile[row, left - 1]
+        self.pile = np.zeros((K, len(self.tables.card_kind)), np.int64)
+        self.pile_left = np.zeros(K, np.int64)
+        self.built = np.zeros((K, len(self.tables.groups)), bool)  # turn_state["build_counts"]
+        self.status = np.full(K, IDLE, np.int64)
+        self.winner = np.full(K, -1, np.int64)
+
+        self.auction_tile = np.full(K, -1, np.int64)
+        self.auction_bid = np.zeros(K, np.int64)
+        self.auction_bidder = np.full(K, -1, np.int64)
+        self.auction_seat = np.zeros(K, np.int64)
+        self.bidders = np.zeros((K, P), bool)  # auction_eligible_players
+
+        self.ability_uses = np.zeros(len(ABILITY_NAMES) + 1, np.int64)
+        self.steps = 0
+
+    # ============== Setup ==============
+
+    def start(self, rows: "np.ndarray"):
+        """Reset rows to new games (random lineup in random turn order)."""
+        n, P = len(rows), self.P
+        if self.config.characters:
+            lineup = np.array([CHARACTERS.index(c) for c in self.config.characters], np.int64)
+            chars = lineup[np.argsort(self.rng.random((n, P)), axis=1)]
+        else:
+            chars = np.argsort(self.rng.random((n, len(CHARACTERS))), axis=1)[:, :P]
+        codes = np.array([bot_ability(c, self.config.game_mode) for c in CHARACTERS], np.int64)
+        self.character[rows] = chars
+        self.ability[rows] = codes[chars]
+        self.money[rows] = self.config.starting_money
+        for seat_array in (self.pos, self.jail_turns, self.skipped):
+            seat_array[rows] = 0
+        self.jailed[rows] = False
+        self.alive[rows] = True
+        self.used[rows] = False
+        self.owner[rows] = -1
+        self.houses[rows] = 0
+        self.mortgaged[rows] = False
+        self.destroyed[rows] = False
+        for row_array in (self.cur, self.turn, self.doubles, self.due, self.pot, self.pile_left):
+            row_array[rows] = 0
+        self.has_rolled[rows] = False
+        self.built[rows] = False
+        self.status[rows] = ACTIVE
+        self.winner[rows] = -1
+        self.auction_tile[rows] = -1
+
+    def load(self, row: int, game) -> List[str]:
+        """Copy a GameEngine game into a row. Returns the player id of each seat."""
+        seats = list(game.player_order) + [pid for pid in game.players if pid not in game.player_order]
+        index = {pid: seat for seat, pid in enumerate(seats)}
+        for seat, pid in enumerate(seats):
+            p = game.players[pid]
+            self.character[row, seat] = CHARACTERS.index(p.character)
+            self.ability[row, seat] = bot_ability(p.character, game.game_mode)
+            self.money[row, seat] = p.money
+            self.pos[row, seat] = p.position
+            self.jailed[row, seat] = p.is_jailed
+            self.jail_turns[row, seat] = p.jail_turns
+            self.skipped[row, seat] = p.skipped_turns
+            self.alive[row, seat] = not p.is_bankrupt
+            self.used[row, seat] = p.ability_used_this_game
+        for tile in game.board:
+            self.owner[row, tile.id] = index[tile.owner_id] if tile.owner_id else -1
+            self.houses[row, tile.id] = tile.houses
+            self.mortgaged[row, tile.id] = tile.is_mortgaged
+            self.mortgage_turn[row, tile.id] = tile.mortgage_turn or 0
+            self.destroyed[row, tile.id] = tile.is_destroyed
+        self.cur[row] = game.current_turn_index
+        self.turn[row] = game.turn_number
+        self.doubles[row] = game.doubles_count
+        self.has_rolled[row] = bool(game.turn_state.get("has_rolled"))
+        self.due[row] = NONE_DUE
+        self.pot[row] = game.pot
+        self.pile[row, :len(game.chance_pile)] = game.chance_pile
+        self.pile_left[row] = len(game.chance_pile)
+        self.built[row] = [g in game.turn_state.get("build_counts", {}) for g in self.tables.groups]
+        self.status[row] = ACTIVE if game.game_status == "active" else FINISHED
+        self.auction_tile[row] = -1
+        return seats
+
+    # ============== Helpers ==============
+
+    def _nth_seat(self, seats: "np.ndarray", mask: "np.ndarray", n: int = 1) -> "np.ndarray":
+        """n-th seat after `seats` (circular, itself included last) whose `mask` is set."""
+        P = self.P
+        offsets = (seats[:, None] + np.arange(1, 2 * P + 1)) % P
+        ok = np.take_along_axis(mask, offsets, axis=1)
+        first = np.argmax(np.cumsum(ok, axis=1) >= n, axis=1)
+        return offsets[np.arange(len(seats)), first]
+
+    def _pick(self, mask: "np.ndarray") -> "np.ndarray":
+        """Uniformly random set column of each row of `mask` (rows must have one)."""
+        counts = mask.sum(axis=1)
+        k = (self.rng.random(len(mask)) * counts).astype(np.int64)
+        return (np.cumsum(mask, axis=1) <= k[:, None]).sum(axis=1)
+
+    def _monopoly(self, rows: "np.ndarray", tiles: "np.ndarray") -> "np.ndarray":
+        """Whether the owner of each tile holds its whole group."""
+        group = self.tables.group_matrix[self.tables.group[tiles]]
+        owners = self.owner[rows[:, None], group]
+        return (owners == self.owner[rows, tiles][:, None]).all(axis=1) & (self.owner[rows, tiles] >= 0)
+
+    def _assets(self, rows: "np.ndarray", seats: "np.ndarray") -> "np.ndarray":
+        """_calculate_assets: cash plus what selling houses and mortgaging would raise."""
+        values = self.tables.assets[np.arange(self.T), self.houses[rows]]
+        mine = (self.owner[rows] == seats[:, None]) & ~self.mortgaged[rows]
+        return self.money[rows, seats] + (values * mine).sum(axis=1)
+
+    def rent(self, rows: "np.ndarray", tiles: "np.ndarray", payers: "np.ndarray") -> "np.ndarray":
+        """_calculate_rent of tiles for the paying seats."""
+        tb = self.tables
+        owners = self.owner[rows, tiles]
+        kind = tb.kind[tiles]
+        valid = (owners >= 0) & ~self.destroyed[rows, tiles] & ~self.mortgaged[rows, tiles]
+        rent = np.zeros(len(rows), np.int64)
+
+        u = valid & (kind == UTILITY)
+        if u.any():
+            ur = rows[u]
+            count = ((self.owner[ur][:, tb.utilities] == owners[u][:, None]) & ~self.mortgaged[ur][:, tb.utilities]).sum(axis=1)
+            percent = np.where(count >= 2, 0.20, 0.10)
+            rent[u] = np.maximum(10, np.trunc(self.money[ur, payers[u]] * percent).astype(np.int64))
+
+        s = valid & (kind == STATION)
+        if s.any():
+            count = (self.owner[rows[s]][:, tb.stations] == owners[s][:, None]).sum(axis=1)
+            rent[s] = tb.rent[tiles[s], np.minimum(count - 1, tb.rent.shape[1] - 1)]
+
+        p = valid & (kind == PROPERTY)
+        if p.any():
+            pr, pt = rows[p], tiles[p]
+            houses = self.houses[pr, pt]
+            base = tb.rent[pt, houses]
+            double = tb.has_rent[pt] & (houses == 0) & self._monopoly(pr, pt)
+            rent[p] = np.where(double, base * 2, base)
+        return rent
+
+    # ============== Turn flow ==============
+
+    def _next_turn(self, rows: "np.ndarray"):
+        """_next_turn: pass the turn on, expire mortgages."""
+        if not len(rows):
+            return
+        self.cur[rows] = self._nth_seat(self.cur[rows], self.alive[rows])
+        self.turn[rows] += 1
+        self.doubles[rows] = 0
+        self.has_rolled[rows] = False
+        self.built[rows] = False
+        expired = self.mortgaged[rows] & (self.turn[rows][:, None] - self.mortgage_turn[rows] >= MORTGAGE_TURNS)
+        if expired.any():
+            r, t = np.nonzero(expired)
+            r = rows[r]
+            self.owner[r, t] = -1  # Seized by the bank
+            self.mortgaged[r, t] = False
+            self.houses[r, t] = 0
+
+    def _bankrupt(self, rows: "np.ndarray", seats: "np.ndarray", creditors: "np.ndarray"):
+        """_handle_bankruptcy of the current player: tiles and cash go to the creditor (-1: the bank)."""
+        if not len(rows):
+            return
+        r, t = np.nonzero(self.owner[rows] == seats[:, None])
+        to = creditors[r]
+        r = rows[r]
+        self.owner[r, t] = to
+        bank = to < 0
+        self.houses[r[bank], t[bank]] = 0
+        self.mortgaged[r[bank], t[bank]] = False
+        self.destroyed[r[bank], t[bank]] = False
+
+        paid = creditors >= 0
+        self.money[rows[paid], creditors[paid]] += self.money[rows[paid], seats[paid]]
+        self.money[rows, seats] = 0
+        self.alive[rows, seats] = False
+
+        # The next player takes over the turn (doubles_count is kept)
+        self.cur[rows] = self._nth_seat(seats, self.alive[rows])
+        self.turn[rows] += 1
+        self.has_rolled[rows] = False
+        self.built[rows] = False
+
+        over = self.alive[rows].sum(axis=1) <= 1
+        self.status[rows[over]] = FINISHED
+        self.winner[rows[over]] = np.argmax(self.alive[rows[over]], axis=1)
+
+    def _send_to_jail(self, rows: "np.ndarray", seats: "np.ndarray"):
+        self.pos[rows, seats] = self.tables.jail
+        self.jailed[rows, seats] = True
+        self.jail_turns[rows, seats] = 0
+        self.doubles[rows] = 0
+
+    def step(self):
+        """Advance every active game by one bot step (simulator.run_bot_step)."""
+        self.steps += 1
+        limit = (self.status == ACTIVE) & (self.turn >= self.config.max_turns)
+        self.status[limit] = TURN_LIMIT
+        active = self.status == ACTIVE
+
+        # Turn already played (e.g. taken over after a bankruptcy mid-roll): just end it
+        self._next_turn(np.nonzero(active & self.has_rolled)[0])
+
+        rows = np.nonzero(active & ~self.has_rolled)[0]
+        seats = self.cur[rows]
+        turns = self.turn[rows].copy()
+        self.due[rows] = NONE_DUE
+
+        # Sanctions / negotiations
+        skip = self.skipped[rows, seats] > 0
+        self.skipped[rows[skip], seats[skip]] -= 1
+        self._next_turn(rows[skip])
+        rows, seats, turns = rows[~skip], seats[~skip], turns[~skip]
+
+        dice = self.rng.integers(1, 7, size=(len(rows), 2))
+        doubles = dice[:, 0] == dice[:, 1]
+
+        # Jail: doubles free the player, the third failed roll costs the fee
+        jailed = self.jailed[rows, seats]
+        self.jailed[rows[jailed & doubles], seats[jailed & doubles]] = False
+        self.jail_turns[rows[jailed & doubles], seats[jailed & doubles]] = 0
+        stay = jailed & ~doubles
+        self.jail_turns[rows[stay], seats[stay]] += 1
+        out = stay & (self.jail_turns[rows, seats] >= 3)
+        self.jailed[rows[out], seats[out]] = False
+        self.jail_turns[rows[out], seats[out]] = 0
+        self.money[rows[out], seats[out]] -= JAIL_FEE
+        still = stay & ~out
+        self.has_rolled[rows[still]] = True
+
+        # Third doubles in a row: jail
+        moving = ~still
+        self.doubles[rows[moving & doubles]] += 1
+        self.doubles[rows[moving & ~doubles]] = 0
+        third = moving & doubles & (self.doubles[rows] >= 3)
+        self._send_to_jail(rows[third], seats[third])
+        self.has_rolled[rows[third]] = True
+
+        move = moving & ~third
+        mr, ms = rows[move], seats[move]
+        old = self.pos[mr, ms]
+        new = (old + dice[move].sum(axis=1)) % self.T
+        self.pos[mr, ms] = new
+        self.money[mr[new < old], ms[new < old]] += GO_SALARY
+        self.land(mr)
+        # Set on the turn of whoever plays now (another player after a bankruptcy)
+        self.has_rolled[mr] = ~doubles[move]
+        self.built[mr[doubles[move]]] = False
+
+        playing = self.alive[rows, seats] & (self.cur[rows] == seats) & (self.status[rows] == ACTIVE)
+        self._post_roll(rows[playing], seats[playing])
+        self._auctions()
+
+        # End the turn unless the player rolls again (doubles) or it moved on already
+        same = (self.status[rows] == ACTIVE) & (self.cur[rows] == seats) & (self.turn[rows] == turns) & (self.auction_tile[rows] < 0)
+        again = doubles & ~self.jailed[rows, seats]
+        end = same & ~again & self.has_rolled[rows]
+        self._next_turn(rows[end])
+
+    # ============== Landing ==============
+
+    def land(self, rows: "np.ndarray", cards: Optional["np.ndarray"] = None, steps: Optional["np.ndarray"] = None):
+        """
+        _handle_landing for the current player of each row, chance moves included.
+        `cards` / `steps` (per row) fix every chance draw, for conformance checks.
+        """
+        tb = self.tables
+        seats = self.cur[rows].copy()
+        todo = np.ones(len(rows), np.int64)  # Landings left at the current position
+        for _ in range(32):
+            i = np.nonzero(todo > 0)[0]
+            if not len(i):
+                break
+            todo[i] -= 1
+            r, s = rows[i], seats[i]
+            t = self.pos[r, s]
+            kind = tb.kind[t]
+            self.due[r] = NONE_DUE
+
+            m = kind == GO_TO_JAIL
+            self._send_to_jail(r[m], s[m])
+
+            m = kind == PARKING
+            self.money[r[m], s[m]] += self.pot[r[m]]
+            self.pot[r[m]] = 0
+
+            m = kind == TAX
+            if m.any():
+                tr, ts, amount = r[m], s[m], tb.tax[t[m]]
+                broke = (self.money[tr, ts] < amount) & (self._assets(tr, ts) < amount)
+                self._bankrupt(tr[broke], ts[broke], np.full(broke.sum(), -1))
+                todo[i[m][broke]] = 0
+                self.due[tr[~broke]] = TAX_DUE
+
+            m = kind == NEGOTIATIONS
+            self.skipped[r[m], s[m]] = 1
+            m = kind == RAISE
+            self.money[r[m], s[m]] += RAISE_TAX
+            m = kind == GO
+            self.money[r[m], s[m]] += START_BONUS
+
+            m = (kind == PROPERTY) | (kind == STATION) | (kind == UTILITY)
+            owners = self.owner[r, t]
+            m &= (owners >= 0) & (owners != s) & ~self.mortgaged[r, t] & ~self.destroyed[r, t]
+            self.due[r[m]] = RENT_DUE
+
+            m = kind == CHANCE
+            if m.any():
+                ci = i[m]
+                card = cards[ci] if cards is not None else self._draw(rows[ci])
+                todo[ci] += self._chance(rows[ci], seats[ci], card, steps[ci] if steps is not None else None)
+
+    def _draw(self, rows: "np.ndarray") -> "np.ndarray":
+        """Pop the next card of each row's pile, reshuffling the empty ones (rows must be distinct)."""
+        empty = rows[self.pile_left[rows] == 0]
+        if len(empty):
+            self.pile[empty] = np.argsort(self.rng.random((len(empty), self.pile.shape[1])), axis=1)
+            self.pile_left[empty] = self.pile.shape[1]
+        self.pile_left[rows] -= 1
+        return self.pile[rows, self.pile_left[rows]]
+
+    def _chance(self, rows: "np.ndarray", seats: "np.ndarray", card: "np.ndarray", steps: Optional["np.ndarray"]) -> "np.ndarray":
+        """_draw_chance_card with the drawn cards. Returns the landings each card causes."""
+        kind = self.tables.card_kind[card]
+        value = self.tables.card_value[card]
+        landings = np.zeros(len(rows), np.int64)
+
+        m = kind == MONEY
+        cash, amount = self.money[rows[m], seats[m]], value[m]
+        self.money[rows[m], seats[m]] = np.where((amount < 0) & (cash < -amount), 0, cash + amount)
+
+        m = kind == MOVE_RANDOM
+        if m.any():
+            mr, ms = rows[m], seats[m]
+            n = steps[m] if steps is not None else self.rng.integers(value[m], self.tables.card_max[card[m]] + 1)
+            old = self.pos[mr, ms]
+            new = (old + n) % self.T
+            self.pos[mr, ms] = new
+            wrapped = (new < old) & (old != 0)
+            self.money[mr[wrapped], ms[wrapped]] += GO_SALARY
+            landings[m] = 1
+
+        m = kind == MOVE_TO
+        self.pos[rows[m], seats[m]] = value[m]
+        landings[m] = 1
+
+        m = kind == JAIL_CARD  # No landing on the jail tile
+        self._send_to_jail(rows[m], seats[m])
+
+        # Moving back lands twice: once inside the card, once more in _handle_landing
+        m = kind == MOVE_BACK
+        self.pos[rows[m], seats[m]] = (self.pos[rows[m], seats[m]] - value[m]) % self.T
+        landings[m] = 2
+
+        m = (kind == PAY_ALL) | (kind == COLLECT_ALL)
+        if m.any():
+            mr, ms, amount = rows[m], seats[m], value[m][:, None]
+            money = self.money[mr]
+            others = self.alive[mr] & (np.arange(self.P) != ms[:, None])
+            collect = (kind[m] == COLLECT_ALL)[:, None]
+            # Payments to everyone have no floor; collections take at most what each one has
+            moved = np.where(collect, np.where(money >= amount, amount, money), -amount) * others
+            money -= moved
+            money[np.arange(len(mr)), ms] += moved.sum(axis=1)
+            self.money[mr] = money
+        return landings
+
+    # ============== Bot decisions ==============
+
+    def _post_roll(self, rows: "np.ndarray", seats: "np.ndarray"):
+        """run_bot_post_roll: pay, buy or auction, build, maybe use the ability."""
+        tb = self.tables
+        t = self.pos[rows, seats]
+        kind = tb.kind[t]
+        owners = self.owner[rows, t]
+
+        m = (kind == TAX) & (self.due[rows] == TAX_DUE)
+        self._pay(rows[m], seats[m], tb.tax[t[m]], np.full(m.sum(), -1))
+
+        m = (kind != TAX) & (owners >= 0) & (owners != seats) & ~self.mortgaged[rows, t] & (self.due[rows] == RENT_DUE)
+        if m.any():
+            self._pay(rows[m], seats[m], None, owners[m])
+        self.due[rows] = NONE_DUE
+
+        free = (kind != TAX) & (owners < 0) & tb.buyable[t]
+        if free.any():
+            fr, fs, ft = rows[free], seats[free], t[free]
+            money, price = self.money[fr, fs], tb.price[ft]
+            group = tb.group[ft]
+            owned = (self.owner[fr[:, None], tb.group_matrix[group]] == fs[:, None])
+            # group_matrix repeats the first tile as padding: count it once
+            owned_count = owned[:, 0] + owned[:, 1:].sum(axis=1) - (owned[:, 1:] & (tb.group_matrix[group][:, 1:] == tb.group_matrix[group][:, :1])).sum(axis=1)
+            completes = owned_count == tb.group_size[group] - 1
+            buy = (completes & (money >= price)) | (money - price > RESERVE)
+            ok = buy & ~self.destroyed[fr, ft]  # Ruins cannot be bought (and are not auctioned then)
+            self.money[fr[ok], fs[ok]] -= price[ok]
+            self.owner[fr[ok], ft[ok]] = fs[ok]
+            self._start_auction(fr[~buy], fs[~buy], ft[~buy])
+
+        playing = self.alive[rows, seats]
+        rows, seats = rows[playing], seats[playing]
+        self._build(rows, seats)
+        self._use_ability(rows, seats)
+
+    def _pay(self, rows: "np.ndarray", seats: "np.ndarray", amount: Optional["np.ndarray"], creditors: "np.ndarray"):
+        """Pay tax (creditor -1) or rent (amount None: recomputed, as pay_rent does), liquidating first if needed."""
+        if not len(rows):
+            return
+        tiles = self.pos[rows, seats]
+        due = amount if amount is not None else self.rent(rows, tiles, seats)
+        for k in np.nonzero(self.money[rows, seats] < due)[0]:
+            self._liquidate(rows[k], seats[k], due[k])
+        if amount is None:
+            due = self.rent(rows, tiles, seats)
+        ok = self.money[rows, seats] >= due
+        self.money[rows[ok], seats[ok]] -= due[ok]
+        paid = ok & (creditors >= 0)
+        self.money[rows[paid], creditors[paid]] += due[paid]
+        tax = ok & (creditors < 0)
+        self.pot[rows[tax]] += due[tax]
+        self._bankrupt(rows[~ok], seats[~ok], creditors[~ok])
+
+    def _liquidate(self, row: int, seat: int, amount: int):
+        """bot_resolve_debt for one game: sell houses evenly, then mortgage the cheapest tiles."""
+        tb = self.tables
+        owner, houses, mortgaged = self.owner[row], self.houses[row], self.mortgaged[row]
+        mine = np.nonzero(owner == seat)[0]
+        order = mine[np.argsort(-houses[mine], kind="stable")]  # Most developed first
+        for _ in range(MAX_DEBT_STEPS):
+            if self.money[row, seat] >= amount:
+                return
+            sold = False
+            for t in order:
+                if houses[t] > 0 and houses[t] >= houses[tb.group_tiles[tb.group[t]]].max():
+                    houses[t] -= 1
+                    self.money[row, seat] += tb.sale[t]
+                    sold = True
+                    break
+            if sold:
+                continue
+            free = [t for t in order if not mortgaged[t] and houses[t] == 0]
+            if not free:
+                return
+            t = min(free, key=lambda t: tb.price[t])
+            mortgaged[t] = True
+            self.mortgage_turn[row, t] = self.turn[row]
+            self.money[row, seat] += tb.mortgage[t]
+
+    def _start_auction(self, rows: "np.ndarray", seats: "np.ndarray", tiles: "np.ndarray"):
+        """start_auction: everyone but the decliner, in turn order, starting at the price."""
+        bidders = self.alive[rows] & (np.arange(self.P) != seats[:, None])
+        has = bidders.any(axis=1)
+        rows, tiles, bidders = rows[has], tiles[has], bidders[has]
+        self.auction_tile[rows] = tiles
+        self.auction_bid[rows] = self.tables.price[tiles]
+        self.auction_bidder[rows] = -1
+        self.bidders[rows] = bidders
+        self.auction_seat[rows] = np.argmax(bidders, axis=1)
+
+    def _auctions(self):
+        """Play every running auction to the end, one bot decision per game per round."""
+        while True:
+            rows = np.nonzero(self.auction_tile >= 0)[0]
+            if not len(rows):
+                return
+            seats = self.auction_seat[rows]
+            bid = self.auction_bid[rows] + BID_STEP
+            raises = (self.money[rows, seats] >= bid) & (self.rng.random(len(rows)) < RAISE_CHANCE)
+
+            r, s = rows[raises], seats[raises]
+            self.auction_bid[r] = bid[raises]
+            self.auction_bidder[r] = s
+            self.auction_seat[r] = self._nth_seat(s, self.bidders[r])
+
+            # A pass drops the bidder; the list shifts, so the next index skips one (pass_auction)
+            r, s = rows[~raises], seats[~raises]
+            self.bidders[r, s] = False
+            left = self.bidders[r].any(axis=1)
+            self.auction_seat[r[left]] = self._nth_seat(s[left], self.bidders[r[left]], 2)
+            self._resolve_auction(r[~left])
+
+    def _resolve_auction(self, rows: "np.ndarray"):
+        winner = self.auction_bidder[rows]
+        won = winner >= 0
+        wr, ws = rows[won], winner[won]
+        self.money[wr, ws] -= self.auction_bid[wr]
+        self.owner[wr, self.auction_tile[wr]] = ws
+        self.auction_tile[rows] = -1
+        self._next_turn(rows)
+
+    def _build(self, rows: "np.ndarray", seats: "np.ndarray"):
+        """One house per monopoly street per roll, on the least built tile, keeping the cash reserve."""
+        tb = self.tables
+        for g in tb.streets:
+            tiles = tb.group_tiles[g]
+            mono = (self.owner[rows][:, tiles] == seats[:, None]).all(axis=1) & ~self.built[rows, g]
+            if not mono.any():
+                continue
+            r, s = rows[mono], seats[mono]
+            houses = self.houses[r][:, tiles]
+            low = houses.min(axis=1)
+            done = np.zeros(len(r), bool)
+            for j, t in enumerate(tiles):
+                ok = (~done & (houses[:, j] == low) & (houses[:, j] < 5) & ~self.destroyed[r, t]
+                      & ~self.mortgaged[r, t] & (self.money[r, s] > tb.cost[t] + RESERVE))
+                self.money[r[ok], s[ok]] -= tb.cost[t]
+                self.houses[r[ok], t] += 1
+                done |= ok
+            self.built[r[done], g] = True
+
+    def _use_ability(self, rows: "np.ndarray", seats: "np.ndarray"):
+        """A bot tries its ability with 20% chance until it has worked once."""
+        code = self.ability[rows, seats]
+        tries = ~self.used[rows, seats] & (self.rng.random(len(rows)) < ABILITY_CHANCE)
+        others = self.alive[rows] & (np.arange(self.P) != seats[:, None])
+
+        m = tries & (code == ORESHNIK)
+        if m.any():
+            r, s = rows[m], seats[m]
+            targets = (self.owner[r] >= 0) & (self.owner[r] != s[:, None]) & ~self.destroyed[r]
+            ok = targets.any(axis=1)
+            self.destroyed[r[ok], self._pick(targets[ok])] = True
+            self._used(r[ok], s[ok], ORESHNIK)
+
+        m = tries & (code == AID)
+        if m.any():
+            r, s = rows[m], seats[m]
+            money = self.money[r]
+            take = np.trunc(money * 0.10).astype(np.int64) * others[m]
+            money -= take
+            money[np.arange(len(r)), s] += take.sum(axis=1)
+            self.money[r] = money
+            self._used(r, s, AID)
+
+        m = tries & (code == SANCTIONS) & others.any(axis=1)
+        if m.any():
+            r, s = rows[m], seats[m]
+            self.skipped[r, self._pick(others[m])] = 1
+            self._used(r, s, SANCTIONS)
+
+    def _used(self, rows: "np.ndarray", seats: "np.ndarray", code: int):
+        self.used[rows, seats] = True
+        self.ability_uses[code] += len(rows)
+
+
+# ============== Batches ==============
+
+def _empty_totals(config: SimConfig) -> Dict[str, Any]:
+    return {
+        "games": 0,
+        "outcomes": np.zeros(len(OUTCOMES) + 1, np.int64),
+        "turns": np.zeros(config.max_turns + 2 * config.players + 2, np.int64),  # Histogram of finished games
+        "appearances": np.zeros(len(CHARACTERS), np.int64),
+        "wins": np.zeros(len(CHARACTERS), np.int64),
+        "ability_uses": np.zeros(len(ABILITY_NAMES) + 1, np.int64),
+        "steps": 0,
+    }
+
+
+def run_lockstep(config: SimConfig, games: int, slots: int = 4096, seed: int = 0) -> Dict[str, Any]:
+    """Play `games` games in one process, `slots` at a time. Returns the totals to summarize."""
+    _require_numpy()
+    totals = _empty_totals(config)
+    batch = LockstepBatch(config, min(slots, games), seed)
+    batch.start(np.arange(batch.K))
+    started = batch.K
+    while True:
+        batch.step()
+        done = np.nonzero((batch.status == FINISHED) | (batch.status == TURN_LIMIT))[0]
+        if len(done):
+            status = batch.status[done]
+            totals["games"] += len(done)
+            totals["outcomes"] += np.bincount(status, minlength=len(totals["outcomes"]))
+            finished = done[status == FINISHED]
+            totals["turns"] += np.bincount(batch.turn[finished], minlength=len(totals["turns"]))[:len(totals["turns"])]
+            totals["appearances"] += np.bincount(batch.character[done].ravel(), minlength=len(CHARACTERS))
+            totals["wins"] += np.bincount(batch.character[finished, batch.winner[finished]], minlength=len(CHARACTERS))
+            restart = done[:max(0, games - started)]
+            batch.start(restart)
+            started += len(restart)
+            batch.status[done[len(restart):]] = IDLE
+        if totals["games"] >= games:
+            break
+    totals["ability_uses"] += batch.ability_uses
+    totals["steps"] = batch.steps
+    return totals
+
+
+def _run_part(args) -> Dict[str, Any]:
+    return run_lockstep(*args)
+
+
+def run_batches(config: SimConfig, games: int, workers: int = 1, slots: int = 4096, seed: int = 0) -> Dict[str, Any]:
+    """Split `games` over worker processes (one lockstep batch each) and summarize them."""
+    _require_numpy()
+    workers = max(1, min(workers, games))
+    parts = [games // workers + (i < games % workers) for i in range(workers)]
+    started = time.perf_counter()
+    if workers == 1:
+        results = [run_lockstep(config, games, slots, seed)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_part, [(config, n, slots, seed + i) for i, n in enumerate(parts)]))
+    elapsed = time.perf_counter() - started
+
+    totals = _empty_totals(config)
+    for part in results:
+        for key, value in part.items():
+            totals[key] = totals[key] + value
+    return summarize(totals, elapsed, workers, slots, config)
+
+
+def _rank(histogram: "np.ndarray", rank: int) -> int:
+    """Value at a 0-based rank of the sorted values counted in `histogram`."""
+    return int(np.searchsorted(np.cumsum(histogram), rank + 1))
+
+
+def summarize(totals: Dict[str, Any], elapsed: float, workers: int, slots: int, config: SimConfig) -> Dict[str, Any]:
+    """Report in the format of simulator.summarize, plus the throughput per core."""
+    hist = totals["turns"]
+    n = int(hist.sum())
+    turns = None
+    if n:
+        median = _rank(hist, n // 2) if n % 2 else (_rank(hist, n // 2 - 1) + _rank(hist, n // 2)) / 2
+        turns = {
+            "mean": round(float((hist * np.arange(len(hist))).sum() / n), 1),
+            "median": median,
+            "p95": _rank(hist, int(n * 0.95) - 1) if n >= 20 else _rank(hist, n - 1),
+            "max": _rank(hist, n - 1),
+        }
+
+    def rates(wins: Dict[str, int], seen: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"games": seen[name], "wins": wins.get(name, 0), "win_rate": round(wins.get(name, 0) / seen[name], 4)}
+            for name in sorted(seen) if seen[name]
+        }
+
+    appearances = {c: int(totals["appearances"][i]) for i, c in enumerate(CHARACTERS)}
+    wins = {c: int(totals["wins"][i]) for i, c in enumerate(CHARACTERS)}
+    ability_seen: Dict[str, int] = {}
+    ability_wins: Dict[str, int] = {}
+    for c in CHARACTERS:
+        name = ability_of(c, config.game_mode) or "NONE"
+        ability_seen[name] = ability_seen.get(name, 0) + appearances[c]
+        ability_wins[name] = ability_wins.get(name, 0) + wins[c]
+
+    games = totals["games"]
+    games_per_sec = games / elapsed if elapsed else None
+    return {
+        "config": asdict(config),
+        "games": games,
+        "workers": workers,
+        "slots": slots,
+        "steps": totals["steps"],
+        "elapsed_sec": round(elapsed, 3),
+        "games_per_sec": round(games_per_sec, 2) if games_per_sec else None,
+        "games_per_sec_per_core": round(games_per_sec / workers, 2) if games_per_sec else None,
+        "outcomes": {name: int(totals["outcomes"][code]) for code, name in OUTCOMES.items() if totals["outcomes"][code]},
+        "turns": turns,
+        "win_rate_by_character": rates(wins, appearances),
+        "win_rate_by_ability": rates(ability_wins, ability_seen),
+        "win_rate_by_difficulty": rates({"normal": sum(wins.values())}, {"normal": sum(appearances.values())}),
+        "ability_uses": {ABILITY_NAMES[code]: int(totals["ability_uses"][code]) for code in ABILITY_NAMES if totals["ability_uses"][code]},
+        "stalled_seeds": [],
+        "turn_limit_seeds": [],
+    }
+
+
+# ============== Conformance ==============
+
+class _FixedDraws:
+    """Stand-in for game.rng that keeps the chance pile as it is and moves a fixed number of steps."""
+
+    def __init__(self, steps: int):
+        self.steps = steps
+
+    def shuffle(self, seq):
+        pass
+
+    def randint(self, a, b):
+        return self.steps
+
+
+def _sample_states(config: SimConfig, count: int, seed: int) -> List[Any]:
+    """Mid-game states of seeded GameEngine games (between bot steps, no auction running)."""
+    import random
+    picker = random.Random(seed)
+    engine = GameEngine()
+    states = []
+    for s in range(seed, seed + count):
+        game = new_game(engine, s, config)
+        for _ in range(picker.randint(0, 600)):
+            run_bot_step(engine, game.game_id)
+            if game.game_status != "active":
+                break
+        while game.game_status == "active" and game.turn_state.get("auction_active"):
+            run_bot_step(engine, game.game_id)
+        if game.game_status == "active":
+            states.append(game)
+        engine.games.pop(game.game_id, None)
+    return states
+
+
+def _row_state(batch: LockstepBatch, row: int, seats: List[str]) -> Dict[str, Any]:
+    return {
+        "money": batch.money[row].tolist(), "position": batch.pos[row].tolist(), "jailed": batch.jailed[row].tolist(),
+        "jail_turns": batch.jail_turns[row].tolist(), "skipped": batch.skipped[row].tolist(),
+        "bankrupt": (~batch.alive[row]).tolist(), "owner": [seats[o] if o >= 0 else None for o in batch.owner[row].tolist()],
+        "houses": batch.houses[row].tolist(), "mortgaged": batch.mortgaged[row].tolist(),
+        "destroyed": batch.destroyed[row].tolist(), "pot": int(batch.pot[row]), "doubles": int(batch.doubles[row]),
+        "current": seats[batch.cur[row]], "turn": int(batch.turn[row]), "finished": bool(batch.status[row] == FINISHED),
+        "due": int(batch.due[row]),
+    }
+
+
+def _game_state(game, seats: List[str], action: Optional[str]) -> Dict[str, Any]:
+    players = [game.players[pid] for pid in seats]
+    due = {"tax": TAX_DUE, "pay_rent": RENT_DUE}.get(action, NONE_DUE)
+    return {
+        "money": [p.money for p in players], "position": [p.position for p in players],
+        "jailed": [p.is_jailed for p in players], "jail_turns": [p.jail_turns for p in players],
+        "skipped": [p.skipped_turns for p in players], "bankrupt": [p.is_bankrupt for p in players],
+        "owner": [t.owner_id for t in game.board], "houses": [t.houses for t in game.board],
+        "mortgaged": [t.is_mortgaged for t in game.board], "destroyed": [t.is_destroyed for t in game.board],
+        "pot": game.pot, "doubles": game.doubles_count,
+        "current": game.player_order[game.current_turn_index] if game.player_order else None,
+        "turn": game.turn_number, "finished": game.game_status == "finished", "due": due,
+    }
+
+
+def check_rules(config: SimConfig, states: int = 10, seed: int = 0) -> List[str]:
+    """
+    Compare rent and landing (every tile, every chance card) with GameEngine on
+    mid-game states of seeded games. Returns the mismatches.
+    """
+    _require_numpy()
+    engine = GameEngine()
+    tb = MapTables(config.map_type)
+    errors: List[str] = []
+    for game in _sample_states(config, states, seed):
+        alive = [pid for pid in game.player_order]
+
+        # Rent of every owned tile for every other player
+        cases = [(t, pid) for t in range(tb.size) for pid in alive if game.board[t].owner_id not in (None, pid)]
+        batch = LockstepBatch(config, max(1, len(cases)))
+        for row in range(len(cases)):
+            seats = batch.load(row, game)
+        if cases:
+            rows = np.arange(len(cases))
+            tiles = np.array([t for t, _ in cases])
+            payers = np.array([seats.index(pid) for _, pid in cases])
+            got = batch.rent(rows, tiles, payers)
+            for k, (t, pid) in enumerate(cases):
+                expected = engine._calculate_rent(game, game.board[t], game.dice, game.players[pid])
+                if got[k] != expected:
+                    errors.append(f"{game.game_id} rent of tile {t} for {pid}: {got[k]} != {expected}")
+
+        # Landing of every player on every tile (chance tiles: every card)
+        cases = []
+        for pid in alive:
+            for t in range(tb.size):
+                cards = range(len(tb.card_kind)) if tb.kind[t] == CHANCE else [0]
+                cases.extend((pid, t, c, 3 + (t + c) % 10) for c in cards)
+        batch = LockstepBatch(config, len(cases))
+        for row, (pid, t, c, steps) in enumerate(cases):
+            seats = batch.load(row, game)
+            batch.cur[row] = seats.index(pid)
+            batch.pos[row, seats.index(pid)] = t
+        batch.land(np.arange(len(cases)), np.array([c for *_, c, _ in cases]), np.array([s for *_, s in cases]))
+
+        for row, (pid, t, c, steps) in enumerate(cases):
+            clone = game.clone()
+            clone.rng = _FixedDraws(steps)
+            clone.chance_pile = [c] * 3  # Every draw (moving back can land on chance again) is card c
+            clone.current_turn_index = clone.player_order.index(pid)
+            player = clone.players[pid]
+            player.position = t
+            result = engine._handle_landing(clone, player, clone.board[t])
+            expected = _game_state(clone, seats, result.get("action"))
+            got = _row_state(batch, row, seats)
+            diff = [key for key in expected if expected[key] != got[key]]
+            if diff:
+                what = f"card {c}" if tb.kind[t] == CHANCE else "landing"
+                errors.append(f"{game.game_id} {pid} on tile {t} ({what}): {', '.join(f'{k} {got[k]} != {expected[k]}' for k in diff)}")
+    return errors
+
+
+def check_games(config: SimConfig, games: int = 200, workers: int = 1, seed: int = 0, z_limit: float = 4.0) -> List[str]:
+    """
+    Compare game statistics of lockstep games with simulator.py games:
+    finished share and win rate per character, within `z_limit` standard errors
+    (the median length of finished games is printed alongside).
+    """
+    engine_report = run_batch(config, games, workers=workers, seed=seed)
+    report = run_batches(config, games * 20, workers=workers, seed=seed)
+    errors = []
+
+    def compare(name: str, a: float, se_a: float, b: float, se_b: float):
+        se = (se_a ** 2 + se_b ** 2) ** 0.5
+        z = (a - b) / se if se else 0.0
+        line = f"{name}: lockstep {a:.4f} vs engine {b:.4f} (z {z:+.2f})"
+        print("  " + line)
+        if abs(z) > z_limit:
+            errors.append(line)
+
+    def share(r):
+        n = r["games"]
+        p = r["outcomes"].get("finished", 0) / n
+        return p, (p * (1 - p) / n) ** 0.5
+
+    compare("finished share", *share(report), *share(engine_report))
+    for name, seen in engine_report["win_rate_by_character"].items():
+        mine = report["win_rate_by_character"].get(name)
+        if not mine or not seen["games"]:
+            continue
+        p, q = mine["win_rate"], seen["win_rate"]
+        compare(f"win rate {name}", p, (p * (1 - p) / mine["games"]) ** 0.5, q, (q * (1 - q) / seen["games"]) ** 0.5)
+    if report["turns"] and engine_report["turns"]:
+        # Turn counts are compared by their median (the engine report has no spread)
+        print(f"  median turns (finished): lockstep {report['turns']['median']} vs engine {engine_report['turns']['median']}")
+    return errors
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="NumPy lockstep bot-vs-bot simulator")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch", type=int, default=4096, help="Games advanced together per worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--map", dest="map_type", choices=MAPS, default="World")
+    parser.add_argument("--mode", dest="game_mode", choices=MODES, default="abilities")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--characters", help="Comma-separated fixed lineup (default: random per game)")
+    parser.add_argument("--starting-money", type=int, default=1500)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--check", action="store_true", help="Check conformance against GameEngine instead")
+    parser.add_argument("--check-games", type=int, default=200, help="GameEngine games played by --check")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    _require_numpy()
+
+    characters = [c.strip() for c in args.characters.split(",")] if args.characters else None
+    if characters:
+        unknown = [c for c in characters if c not in CHARACTERS]
+        if unknown:
+            parser.error(f"Unknown characters: {', '.join(unknown)}")
+        args.players = len(characters)
+    if not 2 <= args.players <= len(CHARACTERS):
+        parser.error(f"--players must be between 2 and {len(CHARACTERS)}")
+
+    config = SimConfig(
+        map_type=args.map_type,
+        game_mode=args.game_mode,
+        characters=characters,
+        players=args.players,
+        starting_money=args.starting_money,
+        max_turns=args.max_turns
+    )
+
+    if args.check:
+        errors = check_rules(config, seed=args.seed)
+        print(f"Rules ({config.map_type}): {'OK' if not errors else f'{len(errors)} mismatches'}")
+        for line in errors[:20]:
+            print("  " + line)
+        print(f"Game statistics ({config.map_type}, {config.game_mode}, {args.check_games} engine games):")
+        game_errors = check_games(config, args.check_games, workers=args.workers, seed=args.seed)
+        print("Conformance: " + ("OK" if not errors and not game_errors else "FAILED"))
+        sys.exit(1 if errors or game_errors else 0)
+
+    report = run_batches(config, args.games, workers=args.workers, slots=args.batch, seed=args.seed)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+        print(f"\nThroughput: {report['games_per_sec_per_core']} games/sec per core "
+              f"({report['workers']} workers x {report['slots']} games in lockstep)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Game log history storage.
+
+GameState only keeps the last LOG_TAIL_SIZE log entries so broadcasts stay the
+same size no matter how long a game runs. Older entries are spilled here and
+packed into zlib-compressed chunks; the history endpoint pages through them
+using absolute log indexes (0 = first entry of the game) as cursors.
+
+The spilled history travels with game snapshots (see export / restore); a
+game restored without it only pages back to its restored tail.
+"""
+import base64
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# Number of most recent log entries kept inside GameState
+LOG_TAIL_SIZE = 50
+
+# Spilled entries are compressed in chunks of this many entries
+CHUNK_SIZE = 128
+
+
+def _pack(entries: List[str]) -> bytes:
+    return zlib.compress(json.dumps(entries, ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> List[str]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class GameLogHistory:
+    """Spilled log entries of a single game."""
+
+    __slots__ = ("base", "chunks", "pending")
+
+    def __init__(self, base: int = 0):
+        self.base = base               # Absolute index of the first entry held (older ones were lost)
+        self.chunks: List[bytes] = []  # Full, compressed chunks of CHUNK_SIZE entries
+        self.pending: List[str] = []   # Newest spilled entries not yet packed
+
+    def __len__(self) -> int:
+        return len(self.chunks) * CHUNK_SIZE + len(self.pending)
+
+    def extend(self, entries: List[str]):
+        self.pending.extend(entries)
+        while len(self.pending) >= CHUNK_SIZE:
+            self.chunks.append(_pack(self.pending[:CHUNK_SIZE]))
+            del self.pending[:CHUNK_SIZE]
+
+    def slice(self, start: int, end: int) -> List[str]:
+        """Entries [start, end) (absolute indexes) of the spilled history."""
+        start = max(start - self.base, 0)
+        end = min(end - self.base, len(self))
+        result: List[str] = []
+        index = start
+        while index < end:
+            chunk_index, offset = divmod(index, CHUNK_SIZE)
+            if chunk_index < len(self.chunks):
+                entries = _unpack(self.chunks[chunk_index])
+            else:
+                entries = self.pending
+            take = entries[offset:offset + (end - index)]
+            result.extend(take)
+            index += len(take)
+        return result
+
+
+class GameLogStore:
+    """Per-game log history beyond the in-state tail."""
+
+    def __init__(self):
+        self.games: Dict[str, GameLogHistory] = {}
+
+    def spill(self, game_id: str, entries: List[str], log_offset: int = 0):
+        """Move entries trimmed from the head of a game's log tail (starting at `log_offset`) into history."""
+        if not entries:
+            return
+        history = self.games.get(game_id)
+        if history is None:
+            history = self.games[game_id] = GameLogHistory(log_offset)
+        history.extend(entries)
+
+    def count(self, game_id: str) -> int:
+        """Number of spilled entries of a game."""
+        history = self.games.get(game_id)
+        return len(history) if history else 0
+
+    def first(self, game_id: str, log_offset: int) -> int:
+        """Absolute index of the oldest entry still available."""
+        history = self.games.get(game_id)
+        return history.base if history is not None else log_offset
+
+    def export(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """The spilled history of a game for a snapshot (chunks stay compressed)."""
+        history = self.games.get(game_id)
+        if history is None:
+            return None
+        return {
+            "base": history.base,
+            "chunks": [base64.b64encode(chunk).decode("ascii") for chunk in history.chunks],
+            "pending": list(history.pending),
+        }
+
+    def restore(self, game_id: str, data: Optional[Dict[str, Any]], log_offset: int):
+        """
+        Reinstate the history exported with a snapshot whose tail starts at
+        `log_offset`. Without it (or if it does not end there), only the tail
+        remains and paging stops at `log_offset`.
+        """
+        history = None
+        if data:
+            history = GameLogHistory(data.get("base", 0))
+            history.chunks = [base64.b64decode(chunk) for chunk in data.get("chunks", ())]
+            history.pending = list(data.get("pending", ()))
+            if history.base + len(history) != log_offset:
+                history = None
+        if history is None and log_offset > 0:
+            history = GameLogHistory(log_offset)
+        if history is None:
+            self.games.pop(game_id, None)
+        else:
+            self.games[game_id] = history
+
+    def read(self, game_id: str, start: int, end: int) -> List[str]:
+        """Spilled entries [start, end) of a game."""
+        history = self.games.get(game_id)
+        return history.slice(start, end) if history else []
+
+    def page(
+        self,
+        game_id: str,
+        tail: List[str],
+        log_offset: int,
+        before: Optional[int] = None,
+        limit: int = LOG_TAIL_SIZE
+    ) -> Tuple[List[str], int, Optional[int]]:
+        """
+        Page backwards through the full log of a game.
+
+        `tail` and `log_offset` describe the in-state tail. Returns the entries
+        [start, before), the absolute index of the first returned entry and the
+        cursor for the next (older) page, or None if the oldest available entry
+        was reached.
+        """
+        first = self.first(game_id, log_offset)
+        total = log_offset + len(tail)
+        end = total if before is None else max(first, min(before, total))
+        start = max(first, end - limit)
+
+        entries = self.read(game_id, start, min(end, log_offset))
+        if end > log_offset:
+            entries.extend(tail[max(start - log_offset, 0):end - log_offset])
+
+        return entries, start, (start if start > first else None)
+
+    def forget(self, game_id: str):
+        """Drop the history of a deleted game."""
+        self.games.pop(game_id, None)
+
+
+# Global store instance
+log_store = GameLogStore()
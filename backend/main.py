@@ -7,21 +7,29 @@ import os
 import asyncio
 import random
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, Query, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from typing import Optional, Union
+from functools import partial
 import httpx
 
-from socket_manager import manager
+from socket_manager import manager, LOBBY_FEED_INTERVAL
+from wire_codec import codec_for
+from broker import broker_from_env
 from game_engine import engine
 from auth import get_current_user, set_bot_token
 from models import User, WSAction
 from database import db
 from db.base import engine as db_engine, async_session, close_db
 from db import service as db_service
-from poker_engine import poker_engine
-from sqlalchemy import text
+from poker_engine import poker_engine, set_timer_handler as set_poker_timer_handler
+from game_persister import GamePersister
+from game_actor import game_actors, breaking_news
+from bot_scheduler import bot_scheduler
+from bot_planner import bot_planner
+from sharding import shard_router, ShardMiddleware, INTERNAL_PREFIX
+from sqlalchemy import func, select, text
 
 # Routes
 from routes.users import router as users_router
@@ -31,78 +39,170 @@ from routes.games import router as games_router
 from routes.shop import router as shop_router
 
 
+def _expire_timer(game_id: str, kind: str, out: list):
+    """Actor action: apply an expired turn / auction deadline and broadcast the kick / auction result."""
+    update = engine.expire_timer(game_id, kind)
+    if update and not update.get("error"):
+        out.append(update)
+        # The turn may have passed to a bot
+        bot_scheduler.request(game_id)
+    return update
+
+
+def expire_due_timers(now: Optional[float] = None) -> int:
+    """Queue every passed deadline on its game's actor. Returns how many were queued."""
+    due = engine.due_timers(now)
+    for game_id, kind in due:
+        game_actors.submit(game_id, partial(_expire_timer, game_id, kind))
+    return len(due)
+
+
+def resume_timers_on_actor(game_id: str):
+    """Re-arm a restored game's timers in order with its queued actions (engine.timer_resumer)."""
+    game_actors.submit(game_id, lambda out: engine.resume_timers(game_id))
+
+
 async def game_loop():
     """Background loop for game maintenance."""
     while True:
         try:
-            # Check timeouts
-            updates = engine.check_timeouts()
-            for update in updates:
-                game_id = update["game_id"]
-                # Broadcast kick
-                await manager.broadcast(game_id, update)
-            
+            # Expired turn / auction deadlines only (no per-game polling)
+            expire_due_timers()
             await asyncio.sleep(1)
         except Exception as e:
             print(f"Game loop error: {e}")
             await asyncio.sleep(5)
 
-async def poker_timer_loop():
-    """Background loop for poker timers."""
+async def lobby_feed_loop():
+    """Push lobby changes to /ws/lobby subscribers (and to the other workers' subscribers)."""
     while True:
+        await asyncio.sleep(LOBBY_FEED_INTERVAL)
         try:
-            for table_id, table in poker_engine["tables"].items():
-                result = table.check_timers()
-                if result:
-                    poker_scope = f"poker_{table_id}"
-                    
-                    # Refund handling if kicked
-                    if result.get("type") == "KICKED":
-                         refund = result.get("refund", 0)
-                         uid = result.get("user_id")
-                         if refund > 0 and uid and not uid.startswith("bot_"): # Bots don't need refund
-                             async with async_session() as session:
-                                 await session.execute(text("UPDATE users SET balance = balance + :amt WHERE id = :uid"), {"amt": refund, "uid": uid})
-                                 await session.commit()
-                    
-                    # Broadcast Update
-                    await manager.broadcast(poker_scope, {
-                        "type": "GAME_UPDATE",
-                        "state": result["state"]
-                    })
-                    
-                    # Broadcast Private Hands (CRITICAL FIX)
-                    # When auto-start happens in timer loop, we must send private cards
-                    if table.state != "WAITING":
-                        for seat_num, player in table.seats.items():
-                             if player.hand and not player.is_folded and not player.is_bot:
-                                 # Evaluate Hand for Real-Time Feedback
-                                 rank_val, score_val, best_cards = table.evaluate_hand(player.hand, table.community_cards)
-                                 hand_name = table.get_hand_name(rank_val)
-                                 
-                                 my_cards_strs = [c.to_dict()["rank"] + c.to_dict()["suit"] for c in player.hand]
-                                 best_cards_strs = [c.to_dict()["rank"] + c.to_dict()["suit"] for c in best_cards] if best_cards else []
-                                 uses_my_cards = any(c in best_cards_strs for c in my_cards_strs)
-
-                                 await manager.send_to_user(player.user_id, {
-                                     "type": "HAND_UPDATE",
-                                     "hand": [c.to_dict() for c in player.hand],
-                                     "evaluation": {
-                                         "rank": rank_val,
-                                         "name": hand_name,
-                                         "best_cards": [c.to_dict() for c in best_cards],
-                                         "uses_my_cards": uses_my_cards
-                                     }
-                                 })
-                    
-                    # Check if next is bot
-                    if result.get("next_is_bot"):
-                         asyncio.create_task(run_poker_bot_turn(table_id))
-            
-            await asyncio.sleep(1)
+            changes = manager.take_lobby_changes(engine.lobby.with_host)
+            if changes:
+                await manager.push_lobby(changes)
+                await shard_router.broadcast(INTERNAL_PREFIX + "lobby-changes", {"changes": changes})
         except Exception as e:
-            print(f"Poker timer loop error: {e}")
-            await asyncio.sleep(5)
+            print(f"Lobby feed error: {e}")
+
+
+async def on_poker_timer(table, result: dict):
+    """Broadcast the outcome of an expired poker table timer (see PokerTable._on_timer)."""
+    try:
+        table_id = table.id
+        poker_scope = f"poker_{table_id}"
+
+        # Refund handling if kicked
+        if result.get("type") == "KICKED":
+             refund = result.get("refund", 0)
+             uid = result.get("user_id")
+             if refund > 0 and uid and not uid.startswith("bot_"): # Bots don't need refund
+                 async with async_session() as session:
+                     await session.execute(text("UPDATE users SET balance = balance + :amt WHERE id = :uid"), {"amt": refund, "uid": uid})
+                     await session.commit()
+
+        # Broadcast Update
+        await manager.broadcast(poker_scope, {
+            "type": "GAME_UPDATE",
+            "state": result["state"]
+        })
+
+        # Broadcast Private Hands (CRITICAL FIX)
+        # When auto-start happens on a timer, we must send private cards
+        if table.state != "WAITING":
+            for seat_num, player in table.seats.items():
+                 if player.hand and not player.is_folded and not player.is_bot:
+                     # Evaluate Hand for Real-Time Feedback
+                     rank_val, score_val, best_cards = table.evaluate_hand(player.hand, table.community_cards)
+                     hand_name = table.get_hand_name(rank_val)
+
+                     my_cards_strs = [c.to_dict()["rank"] + c.to_dict()["suit"] for c in player.hand]
+                     best_cards_strs = [c.to_dict()["rank"] + c.to_dict()["suit"] for c in best_cards] if best_cards else []
+                     uses_my_cards = any(c in best_cards_strs for c in my_cards_strs)
+
+                     await manager.send_to_user(player.user_id, {
+                         "type": "HAND_UPDATE",
+                         "hand": [c.to_dict() for c in player.hand],
+                         "evaluation": {
+                             "rank": rank_val,
+                             "name": hand_name,
+                             "best_cards": [c.to_dict() for c in best_cards],
+                             "uses_my_cards": uses_my_cards
+                         }
+                     })
+
+        # Check if next is bot
+        if result.get("next_is_bot"):
+             asyncio.create_task(run_poker_bot_turn(table_id))
+    except Exception as e:
+        print(f"Poker timer broadcast error: {e}")
+
+
+async def _refund_poker_chips(user_id: str, amount: int):
+    if amount > 0 and user_id and not user_id.startswith("bot_"):
+        async with async_session() as session:
+            await session.execute(text("UPDATE users SET balance = balance + :amt WHERE id = :uid"), {"amt": amount, "uid": user_id})
+            await session.commit()
+
+
+def _wire_sharding(persister: GamePersister):
+    """Tell the shard router which games live here and how they move between workers."""
+    def holds(key: str) -> bool:
+        # Poker tables exist in every worker; games only where they were created or taken over
+        return key.startswith("poker:") or engine.games.is_loaded(key)
+
+    def adoptable(key: str) -> bool:
+        return engine.journal.exists(key) or key in engine.games.pending
+
+    async def adopt(key: str):
+        if engine.journal.exists(key):
+            engine.discard_saved(key)
+            if engine.adopt_game(key):
+                bot_scheduler.request(key)
+        elif await persister.reload(key):
+            engine.games.get(key)  # Hydrates (and restarts bots through on_hydrate)
+
+    async def release(key: str):
+        if key.startswith("poker:"):
+            # Table state is not persisted: cash everyone out, they rejoin on the new owner
+            table = poker_engine["tables"].get(key[len("poker:"):])
+            if not table:
+                return
+            for kind in list(table._timers):
+                table._cancel_timer(kind)
+            for player in list(table.seats.values()):
+                result = table.remove_player(player.user_id)
+                await _refund_poker_chips(player.user_id, result.get("refund", 0))
+            await manager.close_game(f"poker_{table.id}", code=4012, reason="Table moved")
+            return
+        if key not in engine.games:
+            return
+        try:
+            await persister.flush()
+        except Exception as e:
+            print(f"⚠ Failed to save games before handoff: {e}")
+        await game_actors.submit(key, lambda out: engine.release_game(key))
+        bot_scheduler.cancel(key)
+        await manager.close_game(key, code=4012, reason="Game moved")
+
+    async def rebalance():
+        moved = [game_id for game_id in engine.games.game_ids() if not shard_router.is_local(game_id)]
+        moved += [f"poker:{table_id}" for table_id, table in poker_engine["tables"].items()
+                  if table.seats and not shard_router.is_local(f"poker:{table_id}")]
+        for key in moved:
+            await release(key)
+        if moved:
+            print(f"Handed off {len(moved)} game(s) / table(s)")
+        try:
+            await persister.load(owns=shard_router.is_local)
+        except Exception as e:
+            print(f"⚠ Failed to load saved games: {e}")
+
+    shard_router.holds = holds
+    shard_router.adoptable = adoptable
+    shard_router.adopt = adopt
+    shard_router.release = release
+    shard_router.on_rebalance = rebalance
 
 
 @asynccontextmanager
@@ -119,9 +219,23 @@ async def lifespan(app: FastAPI):
     else:
         print("⚠ Warning: BOT_TOKEN not set, Telegram auth will run in dev mode")
     
-    # Start Game Loop
-    asyncio.create_task(game_loop())
-    asyncio.create_task(poker_timer_loop())
+    # Join the other workers first, so only games owned here are recovered
+    if shard_router.enabled:
+        shard_router.register()
+        shard_router.refresh()
+        print(f"✓ Shard worker {shard_router.worker_id} of {len(shard_router.members)}")
+
+    # Timers of recovered / rehydrated games are re-armed on their actors
+    engine.timer_resumer = resume_timers_on_actor
+
+    # Rebuild games that were running before a restart from their journals
+    recovered = engine.recover_games(owns=shard_router.is_local)
+    if recovered:
+        print(f"✓ Recovered {len(recovered)} game(s) from journal")
+        for game_id in recovered:
+            bot_scheduler.request(game_id)
+
+    set_poker_timer_handler(on_poker_timer)
     
     # Database info
     db_url = os.getenv("DATABASE_URL", "not set")
@@ -183,20 +297,51 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠ Database connection failed checking columns: {e}")
 
+    # Games saved before the last deploy: rehydrated on first access
+    persister = GamePersister(engine, async_session)
+    persister.on_hydrate = lambda game: bot_scheduler.request(game.game_id)
+    _wire_sharding(persister)
+    try:
+        queued = await persister.load(owns=shard_router.is_local)
+        if queued:
+            print(f"✓ {queued} saved game(s) queued for rehydration")
+    except Exception as e:
+        print(f"⚠ Failed to load saved games: {e}")
+
     # Start background tasks
     task = asyncio.create_task(game_loop())
+    persist_task = asyncio.create_task(persister.run())
+    bot_task = asyncio.create_task(bot_scheduler.run())
+    engine.lobby.listeners.append(manager.lobby_changed)
+    await manager.start_broker(broker_from_env())
+    lobby_task = asyncio.create_task(lobby_feed_loop())
+    background_tasks = [task, persist_task, bot_task, lobby_task]
+    if shard_router.enabled:
+        background_tasks.append(asyncio.create_task(shard_router.run()))
     print("🎮 MonopolyX Backend started!")
     
     yield
     
     # Shutdown
     print("Shutting down...")
-    task.cancel()
+    shard_router.leave()
+    for background in background_tasks:
+        background.cancel()
+        try:
+            await background
+        except asyncio.CancelledError:
+            pass
+
+    # Final write of everything changed since the last interval
     try:
-        await task
-    except asyncio.CancelledError:
-        pass
+        saved = await persister.flush()
+        print(f"Saved {saved} game(s)")
+    except Exception as e:
+        print(f"⚠ Failed to save games: {e}")
         
+    await shard_router.close()
+    await manager.close_broker()
+    bot_planner.shutdown()
     await close_db()
     print("Database connection closed")
 
@@ -218,6 +363,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Send game requests to the worker that owns the game (no-op without SHARD_DIR)
+app.add_middleware(ShardMiddleware, router=shard_router)
+
 # Include routers
 app.include_router(users_router)
 app.include_router(friends_router)
@@ -226,7 +374,25 @@ app.include_router(shop_router)
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    """Detailed health check."""
+    # Count users in the database (a single COUNT, this runs on every health probe)
+    user_count = 0
+    try:
+        from db.models import UserDB
+        async with async_session() as session:
+            user_count = (await session.execute(select(func.count()).select_from(UserDB))).scalar_one()
+    except Exception as e:
+        print(f"Health check DB error: {e}")
+    
+    return {
+        "status": "healthy",
+        "games_active": len(engine.games) - len(engine.games.pending),
+        "games_pending": len(engine.games.pending),  # Saved games not rehydrated yet
+        "users_registered": user_count,
+        "websocket_connections": sum(len(conns) for conns in manager.game_connections.values()),
+        "websocket_send": manager.send_stats(),
+        "bot_scheduler": bot_scheduler.stats()
+    }
 
 @app.post("/api/users/bonus")
 async def get_bonus(current_user: User = Depends(get_current_user)):
@@ -248,10 +414,12 @@ async def get_bonus(current_user: User = Depends(get_current_user)):
     return {"error": "User not found"}
 
 @app.get("/api/poker/tables")
-async def get_poker_tables():
+async def get_poker_tables(request: Request):
     """Get list of poker tables."""
     tables = []
     for tid, table in poker_engine["tables"].items():
+        if not shard_router.is_local(f"poker:{tid}"):
+            continue  # Listed by the worker that runs it
         tables.append({
             "id": tid,
             "name": table.name,
@@ -262,13 +430,48 @@ async def get_poker_tables():
             "min_buy": getattr(table, 'min_buy_in', table.big_blind * 20),
             "max_buy": getattr(table, 'max_buy_in', 1000000)
         })
+    if shard_router.fans_out(request):
+        for peer_tables in await shard_router.gather(request):
+            tables.extend(peer_tables)
+        tables.sort(key=lambda t: t["big_blind"])
     return tables
 
+
+# ============== Shard handoff (worker to worker, see sharding.py) ==============
+
+@app.post(INTERNAL_PREFIX + "release/{key}", include_in_schema=False)
+async def shard_release(key: str):
+    """Another worker took over `key`: save it and let go of it."""
+    if not shard_router.enabled:
+        raise HTTPException(status_code=404, detail="Not found")
+    await shard_router.release(key)
+    return {"success": True}
+
+
+@app.post(INTERNAL_PREFIX + "lobby-changes", include_in_schema=False)
+async def shard_lobby_changes(payload: dict):
+    """Lobby changes of another worker, for the lobby subscribers connected here."""
+    if not shard_router.enabled:
+        raise HTTPException(status_code=404, detail="Not found")
+    await manager.push_lobby([tuple(change) for change in payload["changes"]])
+    return {"success": True}
+
+
+@app.post(INTERNAL_PREFIX + "user-profile", include_in_schema=False)
+async def shard_user_profile(update: dict):
+    """A user changed their profile on another worker."""
+    if not shard_router.enabled:
+        raise HTTPException(status_code=404, detail="Not found")
+    from routes.users import update_profile_in_games
+    update_profile_in_games(update["user_id"], update["name"], update["avatar_url"])
+    return {"success": True}
+
 @app.websocket("/ws/poker/{table_id}")
 async def websocket_poker(
     websocket: WebSocket,
     table_id: str,
-    token: Optional[str] = Query(None)
+    token: Optional[str] = Query(None),
+    fmt: str = Query("json", alias="format")
 ):
     table = poker_engine["tables"].get(table_id)
     if not table:
@@ -289,10 +492,10 @@ async def websocket_poker(
 
     # Use poker_{table_id} scope for manager
     poker_scope = f"poker_{table_id}"
-    await manager.connect(websocket, poker_scope, user.id)
+    await manager.connect(websocket, poker_scope, user.id, codec=codec_for(fmt))
     
     # Send initial state (with private hand)
-    await websocket.send_json({
+    manager.send(websocket, {
         "type": "CONNECTED",
         "state": table.get_player_state(user.id),
         "your_id": user.id
@@ -315,7 +518,7 @@ async def websocket_poker(
                         # Get fresh user to check real balance
                         db_user = await db_service.get_user(session, user.id)
                         if not db_user:
-                            await websocket.send_json({"type": "ERROR", "message": "User not found"})
+                            manager.send(websocket, {"type": "ERROR", "message": "User not found"})
                             continue
                         
                         await session.execute(text("UPDATE users SET balance = balance - :amt WHERE id = :uid"), {"amt": buy_in, "uid": user.id})
@@ -451,7 +654,7 @@ async def websocket_poker(
             
             # Error handling
             if resp and resp.get("error"):
-                 await websocket.send_json({"type": "ERROR", "message": resp["message"] if "message" in resp else resp["error"]})
+                 manager.send(websocket, {"type": "ERROR", "message": resp["message"] if "message" in resp else resp["error"]})
                  continue
             
             # Broadcast State logic
@@ -665,26 +868,262 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health():
-    """Detailed health check."""
-    # Get user count from database
-    user_count = 0
-    try:
-        async with async_session() as session:
-            users = await db_service.get_all_users(session)
-            user_count = len(users)
-    except Exception as e:
-        print(f"Health check DB error: {e}")
-    
+# ============== Game Actions ==============
+
+def _current_position(game, player_id: str, property_id: Optional[int]) -> Optional[int]:
+    if property_id is None:
+        player = game.players.get(player_id)
+        if player:
+            return player.position
+    return property_id
+
+
+def _apply_game_action(game_id: str, player_id: str, action: str, action_data: dict, out: list) -> dict:
+    """
+    Apply one player action to a game and queue the messages it broadcasts.
+    Runs on the game's actor (see game_actor.py).
+    """
+    game = engine.games.get(game_id)
+    if not game:
+        return {"error": "Game not found"}
+
+    if action == "ROLL":
+        result = engine.roll_dice(game_id, player_id)
+        if not result.get("error"):
+            out.append({"type": "DICE_ROLLED", **result})
+            if result.get("chance_card"):
+                out.append(breaking_news(game, result["chance_card"]))
+        return result
+
+    if action == "CHAT":
+        message = action_data.get("message", "")
+        player = game.players.get(player_id)
+        if player and message:
+            # Save to game logs
+            engine.add_chat_message(game_id, player.name, message)
+            out.append({
+                "type": "CHAT_MESSAGE",
+                "player_id": player_id,
+                "player_name": player.name,
+                "message": message[:200],  # Limit message length
+                "game_state": game.to_dict()  # Send updated state so logs persist on reload
+            })
+        return {}
+
+    if action == "BUY":
+        result = engine.buy_property(game_id, player_id, _current_position(game, player_id, action_data.get("property_id")))
+        msg_type = "PROPERTY_BOUGHT"
+    elif action == "PAY_RENT":
+        result = engine.pay_rent(game_id, player_id, _current_position(game, player_id, action_data.get("property_id")))
+        msg_type = "RENT_PAID"
+    elif action == "PAY_TAX":
+        result = engine.pay_tax(game_id, player_id)
+        msg_type = "TAX_PAID"
+    elif action == "PAY_BAIL":
+        result = engine.pay_bail(game_id, player_id)
+        msg_type = "BAIL_PAID"
+    elif action == "END_TURN":
+        result = engine.end_turn(game_id, player_id)
+        msg_type = "TURN_ENDED"
+    elif action == "USE_ABILITY":
+        result = engine.execute_ability(game_id, player_id, action_data.get("ability_type"), action_data.get("target_id"))
+        msg_type = "ABILITY_USED"
+    elif action == "BUILD":
+        result = engine.build_house(game_id, player_id, action_data.get("property_id"))
+        msg_type = "HOUSE_BUILT"
+    elif action == "SELL_HOUSE":
+        result = engine.sell_house(game_id, player_id, action_data.get("property_id"))
+        msg_type = "HOUSE_SOLD"
+    elif action == "MORTGAGE":
+        result = engine.mortgage_property(game_id, player_id, action_data.get("property_id"))
+        msg_type = "PROPERTY_MORTGAGED"
+    elif action == "UNMORTGAGE":
+        result = engine.unmortgage_property(game_id, player_id, action_data.get("property_id"))
+        msg_type = "PROPERTY_UNMORTGAGED"
+    elif action == "TRADE_OFFER":
+        result = engine.create_trade(game_id, {
+            "from_player_id": player_id,
+            "to_player_id": action_data.get("to_player_id"),
+            "offer_money": action_data.get("offer_money", 0),
+            "offer_properties": action_data.get("offer_properties", []),
+            "request_money": action_data.get("request_money", 0),
+            "request_properties": action_data.get("request_properties", [])
+        })
+        msg_type = "TRADE_OFFERED"
+    elif action == "TRADE_RESPONSE":
+        # response: accept / reject / cancel
+        result = engine.respond_to_trade(game_id, action_data.get("trade_id"), action_data.get("response"))
+        msg_type = "TRADE_UPDATED"
+    elif action == "CASINO_BET":
+        result = engine.play_casino(game_id, player_id, action_data.get("bet_numbers", []))
+        msg_type = "CASINO_RESULT"
+    elif action == "SURRENDER":
+        result = engine.surrender_player(game_id, player_id)
+        msg_type = "PLAYER_SURRENDERED"
+    elif action == "DECLINE_PROPERTY":
+        result = engine.decline_property(game_id, player_id)
+        msg_type = "AUCTION_STARTED"
+    elif action == "RAISE_BID":
+        result = engine.raise_bid(game_id, player_id)
+        msg_type = "AUCTION_UPDATED"
+    elif action == "PASS_AUCTION":
+        result = engine.pass_auction(game_id, player_id)
+        # Resolved when a winner is determined or nobody bid
+        msg_type = "AUCTION_RESOLVED" if "winner" in result else "AUCTION_UPDATED"
+    elif action == "RESOLVE_AUCTION":
+        result = engine.resolve_auction(game_id)
+        msg_type = "AUCTION_RESOLVED"
+    else:
+        return {"error": f"Unknown action: {action}"}
+
+    if result.get("error"):
+        return result
+    out.append({"type": msg_type, **result})
+
+    if action in ("CASINO_BET", "SURRENDER") and result.get("game_over"):
+        out.append({"type": "GAME_OVER", "game_state": result["game_state"]})
+    elif action == "CASINO_BET":
+        # Turn is already advanced by engine._maybe_end_turn or _handle_bankruptcy,
+        # so we just need to notify users
+        out.append({"type": "TURN_ENDED", "game_state": result["game_state"], "player_id": player_id})
+    return result
+
+
+GAME_ACTIONS = {
+    "ROLL", "BUY", "PAY_RENT", "PAY_TAX", "PAY_BAIL", "END_TURN", "USE_ABILITY", "BUILD", "SELL_HOUSE",
+    "MORTGAGE", "UNMORTGAGE", "CHAT", "TRADE_OFFER", "TRADE_RESPONSE", "CASINO_BET", "SURRENDER",
+    "DECLINE_PROPERTY", "RAISE_BID", "PASS_AUCTION", "RESOLVE_AUCTION"
+}
+
+# Actions after which the turn (or auction) may have passed to a bot, or a hard bot has a trade to answer
+_BOT_FOLLOW_UP = {
+    "ROLL", "BUY", "PAY_RENT", "PAY_TAX", "END_TURN", "CASINO_BET", "SURRENDER",
+    "DECLINE_PROPERTY", "RAISE_BID", "PASS_AUCTION", "RESOLVE_AUCTION", "TRADE_OFFER"
+}
+
+
+async def _run_game_action(game_id: str, player_id: str, action: str, action_data: dict) -> dict:
+    """Apply a player action on the game's actor, then run its follow-ups."""
+    result = await game_actors.submit(game_id, partial(_apply_game_action, game_id, player_id, action, action_data))
+    if not result.get("error"):
+        await _after_game_action(game_id, player_id, action, result)
+    return result
+
+
+async def _after_game_action(game_id: str, player_id: str, action: str, result: dict):
+    """Side effects of an applied player action that involve I/O."""
+    if action == "SURRENDER":
+        game = engine.games.get(game_id)
+        players = game.players if game else {}
+
+        # Update stats for the player who surrendered (LOSS)
+        surrendered_p = players.get(player_id)
+        if surrendered_p and surrendered_p.user_id:
+            async with async_session() as session:
+                await db_service.increment_user_stats(session, surrendered_p.user_id, is_winner=False)
+
+        if result.get("game_over"):
+            # Update stats for the winner
+            winner_p = players.get(result["game_state"].get("winner_id"))
+            if winner_p and winner_p.user_id:
+                async with async_session() as session:
+                    await db_service.increment_user_stats(session, winner_p.user_id, is_winner=True)
+            return
+
+    if action in _BOT_FOLLOW_UP and not result.get("game_over"):
+        bot_scheduler.request(game_id)
+
+
+# ============== WebSocket Lobby Feed ==============
+
+async def _lobby_snapshot(websocket: WebSocket, token: str, filters: dict, limit: int):
+    """First page of the lobby for a subscriber's filters, from every worker."""
+    from urllib.parse import urlencode
+    from routes.games import lobby_page, merge_lobby_pages
+
+    async with async_session() as session:
+        games, next_cursor = await lobby_page(session, after=None, limit=limit, **filters)
+    if shard_router.enabled:
+        query = urlencode({**{k: v for k, v in filters.items() if v}, "limit": limit})
+        results = await shard_router.gather_path(f"/api/games?{query}", {"authorization": f"Bearer {token}"})
+        games, next_cursor = merge_lobby_pages(games, next_cursor, results, limit)
+    manager.send(websocket, {"type": "LOBBY_SNAPSHOT", "filters": filters, "games": games, "next_cursor": next_cursor})
+
+
+def _lobby_filters(data: dict) -> dict:
+    """Subscription filters from query / FILTER parameters (raises HTTPException if invalid)."""
+    from routes.games import check_lobby_filters
+
+    status = data.get("status") or None
+    check_lobby_filters(status, 1, None)
+    open_seats = data.get("open_seats")
     return {
-        "status": "healthy",
-        "games_active": len(engine.games),
-        "users_registered": user_count,
-        "websocket_connections": sum(len(conns) for conns in manager.game_connections.values())
+        "status": status,
+        "map_type": data.get("map_type") or None,
+        "game_mode": data.get("game_mode") or None,
+        "open_seats": open_seats in (True, "1", "true", "True")
     }
 
 
+@app.websocket("/ws/lobby")
+async def websocket_lobby(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    map_type: Optional[str] = Query(None),
+    game_mode: Optional[str] = Query(None),
+    open_seats: bool = Query(False),
+    limit: int = Query(50)
+):
+    """
+    Lobby change feed: a LOBBY_SNAPSHOT (first page for the filters), then
+    LOBBY_EVENTS batches of add / update / remove events instead of polling
+    GET /api/games. Send {"action": "FILTER", "data": {...}} to change the
+    filters (answered with a new snapshot), {"action": "PING"} for a PONG.
+    """
+    user_id = None
+    if token:
+        try:
+            async with async_session() as session:
+                user_id = await db_service.get_session(session, token)
+        except Exception as e:
+            print(f"Token lookup error: {e}")
+    if not user_id:
+        await websocket.close(code=4001, reason="Not authenticated")
+        return
+    try:
+        filters = _lobby_filters({"status": status, "map_type": map_type, "game_mode": game_mode, "open_seats": open_seats})
+        if not 1 <= limit <= 200:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+    except HTTPException as e:
+        await websocket.close(code=4000, reason=e.detail)
+        return
+
+    # Subscribed before the snapshot is taken: events racing it are applied on top (add = upsert)
+    await manager.connect_lobby(websocket, filters)
+    try:
+        await _lobby_snapshot(websocket, token, filters, limit)
+        while True:
+            data = await websocket.receive_json()
+            action = data.get("action")
+            if action == "PING":
+                manager.send(websocket, {"type": "PONG"})
+            elif action == "FILTER":
+                try:
+                    filters = _lobby_filters(data.get("data") or {})
+                except HTTPException as e:
+                    manager.send(websocket, {"type": "ERROR", "message": e.detail})
+                    continue
+                manager.set_lobby_filters(websocket, filters)
+                await _lobby_snapshot(websocket, token, filters, limit)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"Lobby WebSocket error: {e}")
+    finally:
+        manager.disconnect_lobby(websocket)
+
+
 # ============== WebSocket Game Endpoint ==============
 
 @app.websocket("/ws/{game_id}")
@@ -692,7 +1131,9 @@ async def websocket_game(
     websocket: WebSocket, 
     game_id: str,
     token: Optional[str] = Query(None),
-    player_id: Optional[str] = Query(None)
+    player_id: Optional[str] = Query(None),
+    delta: bool = Query(False),
+    fmt: str = Query("json", alias="format")
 ):
     """
     WebSocket endpoint for real-time game communication.
@@ -700,6 +1141,8 @@ async def websocket_game(
     Query params:
     - token: Auth token for user identification
     - player_id: Player ID in the game
+    - delta: Receive versioned state patches instead of the full game_state
+    - format: "json" (text frames, default) or "msgpack" (binary frames, see wire_codec)
     """
     game_id = game_id.upper()
     
@@ -719,16 +1162,11 @@ async def websocket_game(
         return
     
     # Connect
-    await manager.connect(websocket, game_id, user_id)
-    
-    from fastapi.encoders import jsonable_encoder
+    await manager.connect(websocket, game_id, user_id, delta=delta, codec=codec_for(fmt))
     
     try:
         # Send initial game state
-        await websocket.send_json({
-            "type": "CONNECTED",
-            "game_state": jsonable_encoder(game)
-        })
+        await manager.send_snapshot(websocket, game_id, game.to_dict(), "CONNECTED", game.stamp_version)
         
         while True:
             data = await websocket.receive_json()
@@ -744,276 +1182,26 @@ async def websocket_game(
                         break
             
             if not player_id:
-                await websocket.send_json({
+                manager.send(websocket, {
                     "type": "ERROR",
                     "message": "Player not identified"
                 })
                 continue
             
-            # Handle actions
-            result = None
-            
-            if action == "ROLL":
-                result = engine.roll_dice(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "DICE_ROLLED", **result})
-                    
-                    # If chance card drawn, also send as a system chat message
-                    if result.get("chance_card"):
-                        await manager.broadcast(game_id, {
-                            "type": "CHAT_MESSAGE",
-                            "player_id": "SYSTEM",
-                            "player_name": "Breaking News",
-                            "message": result["chance_card"],
-                            "game_state": game.dict()
-                        })
-
-                    # Check if next player is bot
-                    await _check_and_run_bot_turn(game_id)
-            
-            elif action == "BUY":
-                property_id = action_data.get("property_id")
-                if property_id is None:
-                    # Buy current position
-                    player = game.players.get(player_id)
-                    if player:
-                        property_id = player.position
-                
-                result = engine.buy_property(game_id, player_id, property_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "PROPERTY_BOUGHT", **result})
-                    # Check if turn ended (auto-end after buy) and next is bot
-                    await _check_and_run_bot_turn(game_id)
-            
-            elif action == "PAY_RENT":
-                property_id = action_data.get("property_id")
-                if property_id is None:
-                    player = game.players.get(player_id)
-                    if player:
-                        property_id = player.position
-                
-                result = engine.pay_rent(game_id, player_id, property_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "RENT_PAID", **result})
-                    # Turn auto-ended after rent
-                    await _check_and_run_bot_turn(game_id)
-
-            elif action == "PAY_TAX":
-                result = engine.pay_tax(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "TAX_PAID", **result})
-                    # Turn auto-ended after tax
-                    await _check_and_run_bot_turn(game_id)
-
-            elif action == "PAY_BAIL":
-                result = engine.pay_bail(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "BAIL_PAID", **result})
-            
-            elif action == "END_TURN":
-                result = engine.end_turn(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "TURN_ENDED", **result})
-                    
-                    # Check if next player is bot
-                    await _check_and_run_bot_turn(game_id)
-            
-            elif action == "USE_ABILITY":
-                ability_type = action_data.get("ability_type")
-                target_id = action_data.get("target_id")
-                
-                result = engine.execute_ability(game_id, player_id, ability_type, target_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "ABILITY_USED", **result})
-            
-            elif action == "BUILD":
-                property_id = action_data.get("property_id")
-                result = engine.build_house(game_id, player_id, property_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "HOUSE_BUILT", **result})
-
-            elif action == "SELL_HOUSE":
-                property_id = action_data.get("property_id")
-                result = engine.sell_house(game_id, player_id, property_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "HOUSE_SOLD", **result})
-            
-            elif action == "MORTGAGE":
-                property_id = action_data.get("property_id")
-                result = engine.mortgage_property(game_id, player_id, property_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "PROPERTY_MORTGAGED", **result})
-
-            elif action == "UNMORTGAGE":
-                property_id = action_data.get("property_id")
-                result = engine.unmortgage_property(game_id, player_id, property_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "PROPERTY_UNMORTGAGED", **result})
-
-            elif action == "CHAT":
-                # Simple chat broadcast
-                message = action_data.get("message", "")
-                player = game.players.get(player_id)
-                if player and message:
-                    # Save to game logs
-                    engine.add_chat_message(game_id, player.name, message)
-                    
-                    await manager.broadcast(game_id, {
-                        "type": "CHAT_MESSAGE",
-                        "player_id": player_id,
-                        "player_name": player.name,
-                        "message": message[:200],  # Limit message length
-                        "game_state": game.dict() # Send updated state so logs persist on reload
-                    })
-            
-            elif action == "TRADE_OFFER":
-                offer = {
-                    "from_player_id": player_id,
-                    "to_player_id": action_data.get("to_player_id"),
-                    "offer_money": action_data.get("offer_money", 0),
-                    "offer_properties": action_data.get("offer_properties", []),
-                    "request_money": action_data.get("request_money", 0),
-                    "request_properties": action_data.get("request_properties", [])
-                }
-                result = engine.create_trade(game_id, offer)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "TRADE_OFFERED", **result})
-            
-            elif action == "TRADE_RESPONSE":
-                trade_id = action_data.get("trade_id")
-                response = action_data.get("response") # accept / reject / cancel
-                result = engine.respond_to_trade(game_id, trade_id, response)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "TRADE_UPDATED", **result})
-            
-            elif action == "CASINO_BET":
-                bet_numbers = action_data.get("bet_numbers", [])
-                result = engine.play_casino(game_id, player_id, bet_numbers)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "CASINO_RESULT", **result})
-                    
-                    if result.get("game_over"):
-                         await manager.broadcast(game_id, {
-                            "type": "GAME_OVER",
-                            "game_state": result["game_state"]
-                        })
-                    else:
-                        # Turn is already advanced by engine._maybe_end_turn or _handle_bankruptcy
-                        # so we just need to notify users and check if NEXT player is bot
-                        await manager.broadcast(game_id, {
-                            "type": "TURN_ENDED", 
-                            "game_state": result["game_state"],
-                            "player_id": player_id
-                        })
-                        await _check_and_run_bot_turn(game_id)
-            
-            elif action == "SURRENDER":
-                result = engine.surrender_player(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "PLAYER_SURRENDERED", **result})
-                    
-                    # Update stats for the player who surrendered (LOSS)
-                    surrendered_p = game.players.get(player_id)
-                    if surrendered_p and surrendered_p.user_id:
-                        async with async_session() as session:
-                            await db_service.increment_user_stats(session, surrendered_p.user_id, is_winner=False)
-                    
-                    if result.get("game_over"):
-                         await manager.broadcast(game_id, {
-                            "type": "GAME_OVER",
-                            "game_state": result["game_state"]
-                        })
-                         
-                         # Update stats for the winner
-                         winner_id = result["game_state"].get("winner_id")
-                         winner_p = game.players.get(winner_id)
-                         if winner_p and winner_p.user_id:
-                             async with async_session() as session:
-                                 await db_service.increment_user_stats(session, winner_p.user_id, is_winner=True)
-                    else:
-                        await _check_and_run_bot_turn(game_id)
-            
-            elif action == "DECLINE_PROPERTY":
-                result = engine.decline_property(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "AUCTION_STARTED", **result})
-                    await _check_and_run_bot_turn(game_id)
-            
-            elif action == "RAISE_BID":
-                result = engine.raise_bid(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "AUCTION_UPDATED", **result})
-                    await _check_and_run_bot_turn(game_id)
-            
-            elif action == "PASS_AUCTION":
-                result = engine.pass_auction(game_id, player_id)
-                if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    # Check if auction was resolved (winner determined or no bids)
-                    if "winner" in result:
-                        await manager.broadcast(game_id, {"type": "AUCTION_RESOLVED", **result})
-                        await _check_and_run_bot_turn(game_id)
-                    else:
-                        await manager.broadcast(game_id, {"type": "AUCTION_UPDATED", **result})
-                        await _check_and_run_bot_turn(game_id)
-            
-            elif action == "RESOLVE_AUCTION":
-                result = engine.resolve_auction(game_id)
+            if action in GAME_ACTIONS:
+                result = await _run_game_action(game_id, player_id, action, action_data)
                 if result.get("error"):
-                    await websocket.send_json({"type": "ERROR", "message": result["error"]})
-                else:
-                    await manager.broadcast(game_id, {"type": "AUCTION_RESOLVED", **result})
-                    
-                    # Check if next player is bot after auction
-                    await _check_and_run_bot_turn(game_id)
-            
+                    manager.send(websocket, {"type": "ERROR", "message": result["error"]})
             
             elif action == "SYNC":
-                await websocket.send_json({
-                    "type": "SYNC_RESPONSE",
-                    "game_state": jsonable_encoder(game)
-                })
+                # Full snapshot on demand (also used by delta clients to recover from a version gap)
+                await manager.send_snapshot(websocket, game_id, game.to_dict(), "SYNC_RESPONSE", game.stamp_version)
 
             elif action == "PING":
-                await websocket.send_json({"type": "PONG"})
+                manager.send(websocket, {"type": "PONG"})
             
             else:
-                await websocket.send_json({
+                manager.send(websocket, {
                     "type": "ERROR",
                     "message": f"Unknown action: {action}"
                 })
@@ -1026,7 +1214,7 @@ async def websocket_game(
         if game and player_id and player_id in game.players:
             player = game.players[player_id]
             if not player.is_bot:
-                await manager.broadcast(game_id, {
+                game_actors.publish(game_id, {
                     "type": "PLAYER_DISCONNECTED",
                     "player_id": player_id,
                     "player_name": player.name
@@ -1121,96 +1309,6 @@ async def run_poker_bot_turn(table_id: str):
     except Exception as e:
         print(f"Bot loop error: {e}")
         
-async def _check_and_run_bot_turn(game_id: str):
-    """Check if it's a bot's turn and run it with dice animation timing."""
-    game = engine.games.get(game_id)
-    if not game or game.game_status != "active":
-        return
-    
-    
-    # 1. Check Auction Turn
-    if game.turn_state.get("auction_active"):
-        eligible = game.turn_state.get("auction_eligible_players", [])
-        idx = game.turn_state.get("auction_current_player_index", 0)
-        
-        if eligible and idx < len(eligible):
-            current_id = eligible[idx]
-            player = game.players.get(current_id)
-            
-            # Additional check: verify it really IS a bot
-            if player and player.is_bot:
-                print(f"DEBUG: Running bot AUCTION turn for {player.name}")
-                await asyncio.sleep(1.0 + random.random()) # Delay for realism
-                
-                result = engine.run_bot_auction_decision(game_id, current_id)
-                if result:
-                    msg_type = "AUCTION_RESOLVED" if "winner" in result else "AUCTION_UPDATED"
-                    await manager.broadcast(game_id, {"type": msg_type, **result})
-                    
-                    # Recursively check next (if auction still active or just ended and next is bot)
-                    await _check_and_run_bot_turn(game_id)
-        return
-
-    # 2. Check Standard Turn
-    current_id = game.player_order[game.current_turn_index]
-    player = game.players.get(current_id)
-    
-    # DEBUG LOG
-    if player:
-         pass # print(f"DEBUG: Checking turn: {player.name} (Bot: {player.is_bot})")
-    
-    # CRITICAL FIX: Ensure we only run if it is explicitly a BOT
-    if player and player.is_bot:
-        print(f"DEBUG: Running bot turn for {player.name}")
-        # Wait a bit for realism - increased pause
-        await asyncio.sleep(2.0)
-        
-        # Step 1: Roll dice
-        dice_result = engine.run_bot_turn(game_id)
-        if dice_result:
-            await manager.broadcast(game_id, dice_result)
-            
-            # If chance card drawn by bot, also send as a system chat message
-            if dice_result.get("chance_card"):
-                await manager.broadcast(game_id, {
-                    "type": "CHAT_MESSAGE",
-                    "player_id": "SYSTEM",
-                    "player_name": "Breaking News",
-                    "message": dice_result["chance_card"],
-                    "game_state": game.dict()
-                })
-            
-            # Wait for dice animation to complete - increased pause
-            await asyncio.sleep(3.0)
-            
-            # Step 2: Perform actions (buy, rent, ability)
-            actions_result = engine.run_bot_post_roll(game_id, current_id)
-            if actions_result:
-                await manager.broadcast(game_id, actions_result)
-            
-            await asyncio.sleep(2.0)
-            
-            # Step 3: Check doubles or End Turn
-            # dice_result was returned by roll_dice
-            if dice_result.get("doubles"):
-                 # Doubles! Roll again.
-                 await _check_and_run_bot_turn(game_id)
-            else:
-                 # Not doubles. End turn.
-                 end_result = engine.end_turn(game_id, current_id)
-                 if not end_result.get("error"):
-                     await manager.broadcast(game_id, {"type": "TURN_ENDED", **end_result})
-                     
-                     # Check if NEXT player is bot
-                     await asyncio.sleep(1.0)
-                     game = engine.games.get(game_id)
-                     if game and game.game_status == "active":
-                         # Re-fetch order
-                         next_id = game.player_order[game.current_turn_index]
-                         next_player = game.players.get(next_id)
-                         if next_player and next_player.is_bot:
-                             await _check_and_run_bot_turn(game_id)
-
 
 # ============== Game Action REST Endpoints (Alternative to WebSocket) ==============
 
@@ -1236,25 +1334,7 @@ async def roll_dice(
     if not player_id:
         return {"error": "Not in this game"}
     
-    result = engine.roll_dice(game_id, player_id)
-    
-    # Broadcast via WebSocket
-    if not result.get("error"):
-        await manager.broadcast(game_id, {"type": "DICE_ROLLED", **result})
-        
-        # If chance card drawn, also send as a system chat message
-        if result.get("chance_card"):
-            await manager.broadcast(game_id, {
-                "type": "CHAT_MESSAGE",
-                "player_id": "SYSTEM",
-                "player_name": "Breaking News",
-                "message": result["chance_card"],
-                "game_state": game.dict() # Re-verify 'game' exists here. Yes it does from line 512 context.
-            })
-            
-        await _check_and_run_bot_turn(game_id)
-    
-    return result
+    return await _run_game_action(game_id, player_id, "ROLL", {})
 
 
 @app.post("/api/games/{game_id}/buy/{property_id}")
@@ -1279,12 +1359,7 @@ async def buy_property(
     if not player_id:
         return {"error": "Not in this game"}
     
-    result = engine.buy_property(game_id, player_id, property_id)
-    
-    if not result.get("error"):
-        await manager.broadcast(game_id, {"type": "PROPERTY_BOUGHT", **result})
-    
-    return result
+    return await _run_game_action(game_id, player_id, "BUY", {"property_id": property_id})
 
 
 @app.post("/api/games/{game_id}/ability")
@@ -1310,12 +1385,7 @@ async def use_ability(
     if not player_id:
         return {"error": "Not in this game"}
     
-    result = engine.execute_ability(game_id, player_id, ability_type, target_id)
-    
-    if not result.get("error"):
-        await manager.broadcast(game_id, {"type": "ABILITY_USED", **result})
-    
-    return result
+    return await _run_game_action(game_id, player_id, "USE_ABILITY", {"ability_type": ability_type, "target_id": target_id})
 
 
 @app.post("/api/games/{game_id}/end-turn")
@@ -1339,13 +1409,7 @@ async def end_turn(
     if not player_id:
         return {"error": "Not in this game"}
     
-    result = engine.end_turn(game_id, player_id)
-    
-    if not result.get("error"):
-        await manager.broadcast(game_id, {"type": "TURN_ENDED", **result})
-        await _check_and_run_bot_turn(game_id)
-    
-    return result
+    return await _run_game_action(game_id, player_id, "END_TURN", {})
 
 
 
@@ -1368,7 +1432,8 @@ if os.getenv("DEBUG", "false").lower() == "true":
                     "turn": g.current_turn_index
                 }
                 for gid, g in engine.games.items()
-            }
+            },
+            "pending": list(engine.games.pending)
         }
     
     @app.get("/debug/users")
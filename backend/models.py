@@ -1,10 +1,16 @@
 """
-Pydantic models for Political Monopoly.
+Data models for Political Monopoly.
+API models are Pydantic; the game engine state uses slotted dataclasses.
 """
+import copy
+import random
+from dataclasses import dataclass, field, fields
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Literal, Any
+from typing import List, Optional, Dict, Literal, Any, Tuple, Sequence
 from datetime import datetime
 
+from log_store import log_store, LOG_TAIL_SIZE
+
 
 # ============== User Models ==============
 
@@ -82,8 +88,35 @@ class GameInviteCreate(BaseModel):
 
 
 # ============== Game Models ==============
+# The engine runs on slotted dataclasses; to_dict() produces the plain
+# JSON-ready representation used by the API and WebSocket messages.
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _parse_iso(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _init_fields(cls, data: dict, skip: Tuple[str, ...] = ()) -> dict:
+    """Constructor kwargs for a dataclass from its to_dict() output."""
+    return {f.name: data[f.name] for f in fields(cls) if f.init and f.name in data and f.name not in skip}
 
-class Player(BaseModel):
+
+def _plain(value: Any) -> Any:
+    """Copy nested containers so a serialized state never aliases live engine state."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+@dataclass(slots=True, kw_only=True)
+class Player:
     """In-game player state."""
     id: str
     user_id: Optional[str] = None  # Link to User account
@@ -91,12 +124,13 @@ class Player(BaseModel):
     character: Literal["Putin", "Trump", "Zelensky", "Kim", "Biden", "Xi", "Netanyahu", "BinLaden"]
     money: int = 1500
     position: int = 0  # 0-39
-    properties: List[int] = Field(default_factory=list)
+    properties: List[int] = field(default_factory=list)
     is_jailed: bool = False
     jail_turns: int = 0
     color: str  # Hex code for UI
     avatar_url: Optional[str] = None
     is_bot: bool = False
+    difficulty: Literal["normal", "hard"] = "normal"  # Bot decision making (hard = Monte Carlo lookahead)
     is_bankrupt: bool = False
     
     # Ability cooldowns
@@ -105,17 +139,65 @@ class Player(BaseModel):
     ability_cooldown: int = 0  # Turns until ability can be used again
     skipped_turns: int = 0  # For Biden's Sanctions
 
-
-class Property(BaseModel):
-    """Property tile on the board."""
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "name": self.name,
+            "character": self.character,
+            "money": self.money,
+            "position": self.position,
+            "properties": list(self.properties),
+            "is_jailed": self.is_jailed,
+            "jail_turns": self.jail_turns,
+            "color": self.color,
+            "avatar_url": self.avatar_url,
+            "is_bot": self.is_bot,
+            "difficulty": self.difficulty,
+            "is_bankrupt": self.is_bankrupt,
+            "ability_used_this_game": self.ability_used_this_game,
+            "ability_cooldown": self.ability_cooldown,
+            "skipped_turns": self.skipped_turns,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Player":
+        return cls(**_init_fields(cls, data))
+
+    def clone(self) -> "Player":
+        twin = copy.copy(self)
+        twin.properties = list(self.properties)
+        return twin
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class TileTemplate:
+    """Static tile data of a map, compiled once and shared by every game on that map."""
     id: int  # 0-39 index on board
     name: str
     type: str = "property"  # property, transport, utility, service
     group: str  # Color group or Special (groupId)
     price: int
-    rent: List[int] = Field(default_factory=list)  # Rent values
+    rent: Tuple[int, ...] = ()  # Rent values
     action: Optional[str] = None  # For service tiles (e.g. collect_200)
-    
+
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ChanceCard:
+    """Static chance card of a map's deck, compiled once and shared by every game on that map."""
+    kind: str  # money, move_random, move_to, go_to_jail, move_back, pay_all, collect_all
+    text: str
+    amount: int = 0  # money / pay_all / collect_all
+    position: int = 0  # move_to target tile
+    steps: int = 0  # move_back distance, move_random minimum
+    max_steps: int = 0  # move_random maximum
+
+
+@dataclass(slots=True, kw_only=True)
+class Property:
+    """Property tile on the board: per-game state over a shared TileTemplate."""
+    template: TileTemplate
+
     owner_id: Optional[str] = None
     houses: int = 0
     is_mortgaged: bool = False
@@ -127,6 +209,68 @@ class Property(BaseModel):
     isolation_turns: int = 0  # For Kim's Isolation
     mortgage_turn: Optional[int] = None  # When it was mortgaged (for 14-turn expiration)
 
+    # Static fields, read from the template
+    @property
+    def id(self) -> int:
+        return self.template.id
+
+    @property
+    def name(self) -> str:
+        return self.template.name
+
+    @property
+    def type(self) -> str:
+        return self.template.type
+
+    @property
+    def group(self) -> str:
+        return self.template.group
+
+    @property
+    def price(self) -> int:
+        return self.template.price
+
+    @property
+    def rent(self) -> Tuple[int, ...]:
+        # A destroyed tile collects nothing until it is rebuilt
+        if self.is_destroyed:
+            return (0,) * len(self.template.rent)
+        return self.template.rent
+
+    @property
+    def action(self) -> Optional[str]:
+        return self.template.action
+
+    def to_dict(self) -> dict:
+        """Merge the template and the per-game state."""
+        template = self.template
+        return {
+            "id": template.id,
+            "name": template.name,
+            "type": template.type,
+            "group": template.group,
+            "price": template.price,
+            "rent": list(self.rent),
+            "action": template.action,
+            "owner_id": self.owner_id,
+            "houses": self.houses,
+            "is_mortgaged": self.is_mortgaged,
+            "is_destroyed": self.is_destroyed,
+            "is_monopoly": self.is_monopoly,
+            "destruction_turn": self.destruction_turn,
+            "isolation_turns": self.isolation_turns,
+            "mortgage_turn": self.mortgage_turn,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, template: TileTemplate) -> "Property":
+        """Rebuild a tile from its to_dict() output; static fields come from the template."""
+        return cls(template=template, **_init_fields(cls, data, skip=("template",)))
+
+    def clone(self) -> "Property":
+        """Copy of the per-game state, still sharing the template."""
+        return copy.copy(self)
+
 
 class TileType(BaseModel):
     """Non-property tile types."""
@@ -134,7 +278,8 @@ class TileType(BaseModel):
     effect_value: int = 0  # For tax tiles
 
 
-class TradeOffer(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class TradeOffer:
     """Trade offer between players."""
     id: str
     game_id: str
@@ -143,31 +288,60 @@ class TradeOffer(BaseModel):
     
     # Offer details
     offer_money: int = 0
-    offer_properties: List[int] = Field(default_factory=list)
+    offer_properties: List[int] = field(default_factory=list)
     
     request_money: int = 0
-    request_properties: List[int] = Field(default_factory=list)
+    request_properties: List[int] = field(default_factory=list)
     
     status: Literal["pending", "accepted", "rejected", "cancelled"] = "pending"
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-
-class GameState(BaseModel):
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "game_id": self.game_id,
+            "from_player_id": self.from_player_id,
+            "to_player_id": self.to_player_id,
+            "offer_money": self.offer_money,
+            "offer_properties": list(self.offer_properties),
+            "request_money": self.request_money,
+            "request_properties": list(self.request_properties),
+            "status": self.status,
+            "created_at": _iso(self.created_at),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TradeOffer":
+        kwargs = _init_fields(cls, data)
+        kwargs["created_at"] = _parse_iso(data.get("created_at")) or datetime.utcnow()
+        return cls(**kwargs)
+
+    def clone(self) -> "TradeOffer":
+        twin = copy.copy(self)
+        twin.offer_properties = list(self.offer_properties)
+        twin.request_properties = list(self.request_properties)
+        return twin
+
+
+@dataclass(slots=True, kw_only=True)
+class GameState:
     """Full game state."""
     game_id: str
     host_id: str  # Player ID of the host
-    players: Dict[str, Player] = Field(default_factory=dict)
-    player_order: List[str] = Field(default_factory=list)
-    trades: Dict[str, TradeOffer] = Field(default_factory=dict)
+    players: Dict[str, Player] = field(default_factory=dict)
+    player_order: List[str] = field(default_factory=list)
+    trades: Dict[str, TradeOffer] = field(default_factory=dict)
     current_turn_index: int = 0
-    board: List[Property] = Field(default_factory=list)
+    board: List[Property] = field(default_factory=list)
     pot: int = 0  # Free Parking pot
-    dice: List[int] = Field(default_factory=lambda: [1, 1])
+    dice: List[int] = field(default_factory=lambda: [1, 1])
     doubles_count: int = 0  # For jail on 3 doubles
     game_status: Literal["waiting", "active", "finished"] = "waiting"
     winner_id: Optional[str] = None
-    logs: List[str] = Field(default_factory=list)
+    logs: List[str] = field(default_factory=list)  # Last LOG_TAIL_SIZE entries only
+    log_offset: int = 0  # Absolute index of logs[0]; older entries live in log_store
     turn_number: int = 0
+    version: int = 0  # Monotonic state version, bumped on every broadcast that changes state
     
     # Settings
     map_type: str = "World"
@@ -178,12 +352,105 @@ class GameState(BaseModel):
     
     # Timestamps
     turn_expiry: Optional[datetime] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=datetime.utcnow)
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     
     # Per-turn dynamic state (reset on turn change)
-    turn_state: Dict[str, Any] = Field(default_factory=dict)
+    turn_state: Dict[str, Any] = field(default_factory=dict)
+
+    # Per-game RNG for dice, cards and bot decisions (seedable for simulations), not serialized
+    rng: random.Random = field(default_factory=random.Random, repr=False, compare=False)
+
+    # Undrawn chance cards (indexes into the map's deck, next one last), reshuffled with rng when empty.
+    # Hidden from players: not in to_dict(), saved with the RNG in snapshots.
+    chance_pile: List[int] = field(default_factory=list, repr=False)
+
+    # Derived ownership counters (player_id -> group -> tiles owned), not serialized.
+    # Maintained by GameEngine._set_owner on every ownership change.
+    _group_owned: Dict[str, Dict[str, int]] = field(default_factory=dict, init=False, repr=False)
+
+    def add_log(self, message: str):
+        """Append a log entry, spilling the oldest ones out of the in-state tail."""
+        self.logs.append(message)
+        overflow = len(self.logs) - LOG_TAIL_SIZE
+        if overflow > 0:
+            log_store.spill(self.game_id, self.logs[:overflow], self.log_offset)
+            del self.logs[:overflow]
+            self.log_offset += overflow
+
+    def to_dict(self) -> dict:
+        """Full API / WebSocket representation of the game."""
+        return {
+            "game_id": self.game_id,
+            "host_id": self.host_id,
+            "players": {pid: p.to_dict() for pid, p in self.players.items()},
+            "player_order": list(self.player_order),
+            "trades": {tid: t.to_dict() for tid, t in self.trades.items()},
+            "current_turn_index": self.current_turn_index,
+            "board": [tile.to_dict() for tile in self.board],
+            "pot": self.pot,
+            "dice": list(self.dice),
+            "doubles_count": self.doubles_count,
+            "game_status": self.game_status,
+            "winner_id": self.winner_id,
+            "logs": list(self.logs),
+            "log_offset": self.log_offset,
+            "turn_number": self.turn_number,
+            "version": self.version,
+            "map_type": self.map_type,
+            "game_mode": self.game_mode,
+            "starting_money": self.starting_money,
+            "max_players": self.max_players,
+            "turn_timer": self.turn_timer,
+            "turn_expiry": _iso(self.turn_expiry),
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "turn_state": _plain(self.turn_state),
+        }
+
+    def stamp_version(self, version: int):
+        """Mirror a version committed by StateSync (never goes back)."""
+        if self.version < version:
+            self.version = version
+
+    @classmethod
+    def from_dict(cls, data: dict, templates: Sequence[TileTemplate]) -> "GameState":
+        """
+        Rebuild a game from its to_dict() output on the given map templates.
+        The RNG, chance pile and derived ownership counters are left for the caller to restore.
+        """
+        kwargs = _init_fields(cls, data, skip=("players", "trades", "board", "rng", "chance_pile"))
+        for name in ("turn_expiry", "created_at", "started_at", "finished_at"):
+            kwargs[name] = _parse_iso(data.get(name))
+        kwargs["created_at"] = kwargs["created_at"] or datetime.utcnow()
+        return cls(
+            players={pid: Player.from_dict(p) for pid, p in data["players"].items()},
+            trades={tid: TradeOffer.from_dict(t) for tid, t in data["trades"].items()},
+            board=[Property.from_dict(tile, templates[tile["id"]]) for tile in data["board"]],
+            **kwargs
+        )
+
+    def clone(self) -> "GameState":
+        """
+        Independent copy of the state, RNG and ownership counters included
+        (bot lookahead). Much cheaper than a to_dict() round trip or deepcopy:
+        tile templates stay shared and only mutable containers are copied.
+        """
+        twin = copy.copy(self)
+        twin.players = {pid: p.clone() for pid, p in self.players.items()}
+        twin.player_order = list(self.player_order)
+        twin.trades = {tid: t.clone() for tid, t in self.trades.items()}
+        twin.board = [tile.clone() for tile in self.board]
+        twin.dice = list(self.dice)
+        twin.logs = list(self.logs)
+        twin.turn_state = copy.deepcopy(self.turn_state)
+        twin.rng = random.Random()
+        twin.rng.setstate(self.rng.getstate())
+        twin.chance_pile = list(self.chance_pile)
+        twin._group_owned = {pid: dict(groups) for pid, groups in self._group_owned.items()}
+        return twin
 
 
 class GameSummary(BaseModel):
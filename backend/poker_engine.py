@@ -1,9 +1,24 @@
 import random
 import asyncio
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable, Awaitable
 from datetime import datetime, timedelta
 from models import User
 
+# Seconds a player has to act / results stay on screen / a dealer message is shown
+TURN_SECONDS = 30
+SHOWDOWN_SECONDS = 10
+DEALER_MESSAGE_SECONDS = 5
+
+# Async callback receiving (table, result) when a table timer changes state; set by main.py
+_timer_handler: Optional[Callable[["PokerTable", Dict], Awaitable[None]]] = None
+
+
+def set_timer_handler(handler: Callable[["PokerTable", Dict], Awaitable[None]]):
+    """Register the coroutine that broadcasts results of expired table timers."""
+    global _timer_handler
+    _timer_handler = handler
+
+
 # Card constants
 SUITS = ['♠', '♥', '♦', '♣']
 RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
@@ -106,6 +121,7 @@ class PokerTable:
         
         # Turn Management
         self.turn_deadline = None # Datetime when turn expires
+        self._timers: Dict[str, asyncio.TimerHandle] = {}  # "turn" | "dealer_message" -> armed callback
         
         # Logs
         self.last_activity = datetime.utcnow()
@@ -115,6 +131,34 @@ class PokerTable:
         self.dealer_message = None
         self.dealer_message_expires = None
 
+    def _arm_timer(self, kind: str, seconds: float):
+        """Call _on_timer(kind) in `seconds`, replacing the previous timer of that kind."""
+        self._cancel_timer(kind)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (scripts): deadlines are informational only
+        self._timers[kind] = loop.call_later(seconds, self._on_timer, kind)
+
+    def _cancel_timer(self, kind: str):
+        handle = self._timers.pop(kind, None)
+        if handle:
+            handle.cancel()
+
+    def _set_turn_deadline(self, seconds: float):
+        self.turn_deadline = datetime.utcnow() + timedelta(seconds=seconds)
+        self._arm_timer("turn", seconds)
+
+    def _on_timer(self, kind: str):
+        # Runs on the event loop, so the state change cannot interleave with a player action
+        self._timers.pop(kind, None)
+        try:
+            result = self.handle_timer(kind)
+            if result and _timer_handler:
+                asyncio.get_running_loop().create_task(_timer_handler(self, result))
+        except Exception as e:
+            print(f"Poker timer error ({self.id}, {kind}): {e}")
+
     def get_empty_seat(self) -> int:
         for i in range(self.max_seats):
             if i == 4: continue # Reserve Top Center for Dealer (matches Frontend visual)
@@ -220,6 +264,7 @@ class PokerTable:
     def start_hand(self):
         if len(self.seats) < 2:
              self.state = "WAITING"
+             self._cancel_timer("turn")
              return
 
         self.state = "PREFLOP"
@@ -280,77 +325,76 @@ class PokerTable:
         self.current_player_seat = active_seats[utg_idx]
         
         # Set timer for first player
-        self.turn_deadline = datetime.utcnow() + timedelta(seconds=30)
+        self._set_turn_deadline(TURN_SECONDS)
         
         self.add_log("New hand started.")
 
-    def check_timers(self) -> Optional[Dict]:
-        """Check for timed out players."""
+    def handle_timer(self, kind: str) -> Optional[Dict]:
+        """Apply an expired table timer ("turn" or "dealer_message"). Returns the update to broadcast."""
+        if kind == "dealer_message":
+             if not self.dealer_message:
+                 return None
+             self.dealer_message = None
+             self.dealer_message_expires = None
+             # We return update to clear it
+             return {"type": "GAME_UPDATE", "state": self.to_dict()}
+
         if self.state == "WAITING" or not self.turn_deadline:
             return None
             
         # New: Auto-restart after Showdown
         if self.state == "SHOWDOWN":
-             if self.turn_deadline and datetime.utcnow() > self.turn_deadline:
-                 if len(self.seats) >= 2:
-                     self.start_hand()
-                     next_is_bot = self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False
-                     return {"type": "GAME_UPDATE", "state": self.to_dict(), "message": "Next hand starting...", "next_is_bot": next_is_bot}
-                 else:
-                     self.state = "WAITING"
-                     return {"type": "GAME_UPDATE", "state": self.to_dict(), "message": "Waiting for players..."}
-             return None
-
-        if self.dealer_message_expires and datetime.utcnow() > self.dealer_message_expires:
-             self.dealer_message = None
-             self.dealer_message_expires = None
-             # We return update to clear it
-             return {"type": "GAME_UPDATE", "state": self.to_dict()}
+             if len(self.seats) >= 2:
+                 self.start_hand()
+                 next_is_bot = self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False
+                 return {"type": "GAME_UPDATE", "state": self.to_dict(), "message": "Next hand starting...", "next_is_bot": next_is_bot}
+             else:
+                 self.state = "WAITING"
+                 return {"type": "GAME_UPDATE", "state": self.to_dict(), "message": "Waiting for players..."}
 
-        if datetime.utcnow() > self.turn_deadline:
-             # Timeout!
-             seat = self.current_player_seat
-             player = self.seats.get(seat)
-             if player:
-                 player.consecutive_timeouts += 1
-                 self.add_log(f"{player.name} timed out ({player.consecutive_timeouts}/3).")
-                 
-                 if player.consecutive_timeouts >= 3:
-                     # Kick
-                     refund = player.chips if not player.is_bot else 0
-                     del self.seats[seat]
-                     self.add_log(f"{player.name} kicked for inactivity.")
-                     
-                     # Check if game should end
-                     if len(self.seats) < 2:
-                         self.end_hand(winner_by_fold=True)
-                         return {"type": "KICKED", "user_id": player.user_id, "refund": refund, "state": self.to_dict()}
-                     
-                     self.next_turn()
-                     return {
-                        "type": "KICKED", 
-                        "user_id": player.user_id, 
-                        "refund": refund, 
-                        "state": self.to_dict(), 
-                        "next_is_bot": self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False
-                     }
-                 
-                 else:
-                     # Auto Fold
-                     player.is_folded = True
-                     player.last_action = "TIMEOUT FOLD"
-                     
-                     active_counts = len([p for p in self.seats.values() if not p.is_folded])
-                     if active_counts == 1:
-                         self.end_hand(winner_by_fold=True)
-                     else:
-                         self.next_turn()
-                         
-                     return {
-                        "type": "TIMEOUT", 
-                        "state": self.to_dict(), 
-                        "next_is_bot": self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False
-                     }
+        # Timeout!
+        seat = self.current_player_seat
+        player = self.seats.get(seat)
+        if player:
+            player.consecutive_timeouts += 1
+            self.add_log(f"{player.name} timed out ({player.consecutive_timeouts}/3).")
+
+            if player.consecutive_timeouts >= 3:
+                # Kick
+                refund = player.chips if not player.is_bot else 0
+                del self.seats[seat]
+                self.add_log(f"{player.name} kicked for inactivity.")
+
+                # Check if game should end
+                if len(self.seats) < 2:
+                    self.end_hand(winner_by_fold=True)
+                    return {"type": "KICKED", "user_id": player.user_id, "refund": refund, "state": self.to_dict()}
+
+                self.next_turn()
+                return {
+                   "type": "KICKED", 
+                   "user_id": player.user_id, 
+                   "refund": refund, 
+                   "state": self.to_dict(), 
+                   "next_is_bot": self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False
+                }
+
+            else:
+                # Auto Fold
+                player.is_folded = True
+                player.last_action = "TIMEOUT FOLD"
+
+                active_counts = len([p for p in self.seats.values() if not p.is_folded])
+                if active_counts == 1:
+                    self.end_hand(winner_by_fold=True)
+                else:
+                    self.next_turn()
+
+                return {
+                   "type": "TIMEOUT", 
+                   "state": self.to_dict(), 
+                   "next_is_bot": self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False
+                }
 
         return None
 
@@ -444,7 +488,8 @@ class PokerTable:
                 f"{player.name}, ты лучший! Удачи в раздаче!"
             ]
             self.dealer_message = random.choice(phrases)
-            self.dealer_message_expires = datetime.utcnow() + timedelta(seconds=5)
+            self.dealer_message_expires = datetime.utcnow() + timedelta(seconds=DEALER_MESSAGE_SECONDS)
+            self._arm_timer("dealer_message", DEALER_MESSAGE_SECONDS)
             self.add_log(f"{player.name} оставил чаевые дилеру $10.")
             return {"success": True, "game_state": self.to_dict()}
             
@@ -517,7 +562,7 @@ class PokerTable:
                  return {"next_is_bot": self.seats[self.current_player_seat].is_bot if self.current_player_seat in self.seats else False}
         
         self.current_player_seat = next_seat
-        self.turn_deadline = datetime.utcnow() + timedelta(seconds=30)
+        self._set_turn_deadline(TURN_SECONDS)
         
         return {"next_is_bot": self.seats[self.current_player_seat].is_bot}
 
@@ -564,7 +609,7 @@ class PokerTable:
                  break
              next_idx = (next_idx + 1) % len(active_seats)
         
-         self.turn_deadline = datetime.utcnow() + timedelta(seconds=30)
+         self._set_turn_deadline(TURN_SECONDS)
          return False
 
     def end_hand(self, winner_by_fold=False):
@@ -675,7 +720,7 @@ class PokerTable:
         
         self.state = "SHOWDOWN" # Ensure state is designated as finished/showdown
         
-        self.turn_deadline = datetime.utcnow() + timedelta(seconds=10) # 10s to see results
+        self._set_turn_deadline(SHOWDOWN_SECONDS) # 10s to see results
 
     def evaluate_hand(self, hole_cards: List[Card], community_cards: List[Card]) -> Tuple[int, Tuple, List[Card]]:
         # Returns (RankCategory, ScoreTuple, BestCards)
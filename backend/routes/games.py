@@ -6,8 +6,8 @@ Game state is kept in-memory for real-time performance.
 import uuid
 import random
 from datetime import datetime, timedelta
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import List, Literal, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import db
@@ -19,6 +19,11 @@ from models import (
     GameInvite, GameInviteCreate, GameActionResponse
 )
 from auth import get_current_user
+from log_store import log_store, LOG_TAIL_SIZE
+from lobby_index import LISTED_STATUSES, MAX_PAGE_SIZE, decode_cursor
+from sharding import shard_router
+from game_actor import game_actors
+from bot_scheduler import bot_scheduler
 
 router = APIRouter(prefix="/api/games", tags=["games"])
 
@@ -59,16 +64,19 @@ def get_game_engine():
 # ============== Game Management ==============
 
 @router.get("/my-active")
-async def get_my_active_games(current_user: User = Depends(get_current_user)):
+async def get_my_active_games(request: Request, current_user: User = Depends(get_current_user)):
     """Get active games for current user."""
     engine = get_game_engine()
     games = engine.get_user_active_games(current_user.id)
+    if shard_router.fans_out(request):
+        for result in await shard_router.gather(request):
+            games.extend(result["games"])
     return {"games": games}
 
 @router.get("/my")
-async def get_my_active_games_alias(current_user: User = Depends(get_current_user)):
+async def get_my_active_games_alias(request: Request, current_user: User = Depends(get_current_user)):
     """Alias for legacy clients."""
-    return await get_my_active_games(current_user)
+    return await get_my_active_games(request, current_user)
 
 @router.post("", response_model=dict)
 async def create_game(
@@ -79,9 +87,11 @@ async def create_game(
     """Create a new game. The creator becomes the host."""
     engine = get_game_engine()
     
-    game_id = str(uuid.uuid4())[:8].upper()
+    # Ids are picked so that the game is owned by this worker
+    game_id = shard_router.local_id(lambda: str(uuid.uuid4())[:8].upper())
     starting_money = request.starting_money
         
+    engine.lobby.set_host(current_user.id, current_user.name, current_user.avatar_url)
     game = engine.create_game(
         game_id=game_id, 
         map_type=request.map_type,
@@ -109,7 +119,7 @@ async def create_game(
     
     return {
         "game_id": game_id,
-        "game_state": game.dict()
+        "game_state": game.to_dict()
     }
 
 
@@ -125,46 +135,102 @@ async def get_game(
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    return {"game_state": game.dict()}
+    return {"game_state": game.to_dict()}
+
+
+@router.get("/{game_id}/logs")
+async def get_game_logs(
+    game_id: str,
+    before: Optional[int] = None,
+    limit: int = LOG_TAIL_SIZE,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Page backwards through the full game log.
+    `before` is an absolute log index (exclusive); omit it to start from the newest entry.
+    Pass the returned `next_cursor` as `before` to get the previous page.
+    """
+    engine = get_game_engine()
+    game = engine.games.get(game_id.upper())
+
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    if limit < 1 or limit > 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+
+    entries, start, next_cursor = log_store.page(
+        game.game_id, game.logs, game.log_offset, before=before, limit=limit
+    )
+    return {
+        "logs": entries,
+        "start": start,
+        "total": game.log_offset + len(game.logs),
+        "next_cursor": next_cursor
+    }
+
+
+async def lobby_page(session: AsyncSession, status: Optional[str] = None, map_type: Optional[str] = None,
+                     game_mode: Optional[str] = None, after=None, limit: int = 50, open_seats: bool = False):
+    """A page of this worker's lobby index with host names and avatars, and the next cursor."""
+    lobby = get_game_engine().lobby
+    games, next_cursor = lobby.page(status, map_type, game_mode, after, limit, open_seats)
+
+    # Hosts not cached yet (games recovered after a restart): one query for the whole page
+    missing = lobby.missing_hosts(games)
+    if missing:
+        for user in await db_service.get_users_by_ids(session, missing):
+            lobby.set_host(user.id, user.name, user.avatar_url)
+    return [lobby.with_host(g) for g in games], next_cursor
+
+
+def merge_lobby_pages(games: List[dict], next_cursor: Optional[str], results: List[dict], limit: int):
+    """
+    Merge the pages of other workers into this one. Every worker returned its
+    next `limit` games after the same cursor: the first `limit` overall are kept.
+    """
+    if not results:
+        return games, next_cursor
+    for result in results:
+        games.extend(result["games"])
+    games.sort(key=lambda g: decode_cursor(g["cursor"]))
+    more = len(games) > limit or next_cursor or any(r.get("next_cursor") for r in results)
+    games = games[:limit]
+    return games, games[-1]["cursor"] if more and games else None
+
+
+def check_lobby_filters(status: Optional[str], limit: int, cursor: Optional[str]):
+    """Validate listing parameters. Returns the cursor key."""
+    if status and status not in LISTED_STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(LISTED_STATUSES)}")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    after = decode_cursor(cursor) if cursor else None
+    if cursor and not after:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
 
 
 @router.get("")
 async def list_games(
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     status: Optional[str] = None,
+    map_type: Optional[str] = None,
+    game_mode: Optional[str] = None,
+    open_seats: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 50,
     session: AsyncSession = Depends(get_db)
 ):
-    """List available games."""
-    engine = get_game_engine()
-    
-    games = []
-    for game in engine.games.values():
-        if status and game.game_status != status:
-            continue
-        
-        host_name = "Unknown Host"
-        host_avatar = None
-        if game.host_id:
-            host_user = await db_service.get_user(session, game.host_id)
-            if host_user:
-                host_name = host_user.name
-                host_avatar = host_user.avatar_url
-        
-        games.append({
-            "game_id": game.game_id,
-            "map_type": game.map_type,
-            "game_mode": game.game_mode,
-            "status": game.game_status,
-            "player_count": len(game.players),
-            "max_players": game.max_players,
-            "host_id": game.host_id,
-            "host_name": host_name,
-            "host_avatar": host_avatar,
-            "created_at": game.created_at.isoformat() if game.created_at else None,
-            "taken_characters": [p.character for p in game.players.values() if p.character]
-        })
-    
-    return {"games": games}
+    """
+    List unfinished games, oldest first, from the lobby index.
+    Pass the returned `next_cursor` as `cursor` to get the next page.
+    """
+    after = check_lobby_filters(status, limit, cursor)
+    games, next_cursor = await lobby_page(session, status, map_type, game_mode, after, limit, open_seats)
+    if shard_router.fans_out(http_request):
+        games, next_cursor = merge_lobby_pages(games, next_cursor, await shard_router.gather(http_request), limit)
+    return {"games": games, "next_cursor": next_cursor}
 
 
 @router.post("/{game_id}/join")
@@ -193,55 +259,55 @@ async def join_game(
             "game_status": game.game_status
         })
     
-    if game.game_status != "waiting":
-        raise HTTPException(status_code=400, detail="Game already started")
-    
-    if len(game.players) >= game.max_players:
-        raise HTTPException(status_code=400, detail="Game is full")
-    
-    # Check if already in game
-    for pid, player in game.players.items():
-        if player.user_id == current_user.id:
-            return {
-                "player_id": pid,
-                "game_state": game.dict(),
-                "message": "Already in this game"
-            }
-    
-    # Check if character is taken
-    used_chars = [p.character for p in game.players.values()]
-    if request.character in used_chars:
-        raise HTTPException(status_code=400, detail="Character already taken")
-    
-    # Create player
-    player_id = str(uuid.uuid4())
-    player = Player(
-        id=player_id,
-        user_id=current_user.id,
-        name=current_user.name,
-        character=request.character,
-        color=CHARACTER_COLORS.get(request.character, "#888888"),
-        avatar_url=current_user.avatar_url,
-        money=game.starting_money
-    )
-    
-    engine.add_player(game_id.upper(), player)
-    
-    # Broadcast to other players
-    from socket_manager import manager
-    import asyncio
-    asyncio.create_task(
-        manager.broadcast(game_id.upper(), {
+    def join(out):
+        if game.game_status != "waiting":
+            raise HTTPException(status_code=400, detail="Game already started")
+        
+        if len(game.players) >= game.max_players:
+            raise HTTPException(status_code=400, detail="Game is full")
+        
+        # Check if already in game
+        for pid, player in game.players.items():
+            if player.user_id == current_user.id:
+                return {
+                    "player_id": pid,
+                    "game_state": game.to_dict(),
+                    "message": "Already in this game"
+                }
+        
+        # Check if character is taken
+        used_chars = [p.character for p in game.players.values()]
+        if request.character in used_chars:
+            raise HTTPException(status_code=400, detail="Character already taken")
+        
+        # Create player
+        player_id = str(uuid.uuid4())
+        player = Player(
+            id=player_id,
+            user_id=current_user.id,
+            name=current_user.name,
+            character=request.character,
+            color=CHARACTER_COLORS.get(request.character, "#888888"),
+            avatar_url=current_user.avatar_url,
+            money=game.starting_money
+        )
+        
+        engine.add_player(game_id.upper(), player)
+        
+        # Broadcast to other players
+        out.append({
             "type": "PLAYER_JOINED",
-            "player": player.dict(),
-            "game_state": game.dict()
+            "player": player.to_dict(),
+            "game_state": game.to_dict()
         })
-    )
+        
+        return {
+            "player_id": player_id,
+            "game_state": game.to_dict()
+        }
     
-    return {
-        "player_id": player_id,
-        "game_state": game.dict()
-    }
+    # Checked and applied in order with the game's other actions
+    return await game_actors.submit(game_id.upper(), join)
 
 
 @router.post("/{game_id}/leave")
@@ -257,66 +323,46 @@ async def leave_game(
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Find player
-    player_id = None
-    for pid, player in game.players.items():
-        if player.user_id == current_user.id:
-            player_id = pid
-            break
-    
-    if not player_id:
-        raise HTTPException(status_code=400, detail="Not in this game")
-    
-    # Remove player
-    del game.players[player_id]
-    if player_id in game.player_order:
-        game.player_order.remove(player_id)
-        # Fix turn index if it became out of bounds to maintain correct turn order
-        if game.player_order:
-            game.current_turn_index = game.current_turn_index % len(game.player_order)
-        else:
-            game.current_turn_index = 0
-            
-    # If game is active, mark player as bankrupt
-    if game.game_status == "active":
-        # Handle mid-game leave as bankruptcy
-        pass
-    
-    # Broadcast
-    from socket_manager import manager
-    import asyncio
-    asyncio.create_task(
-        manager.broadcast(game_id.upper(), {
+    def leave(out):
+        # Find player
+        player_id = None
+        for pid, player in game.players.items():
+            if player.user_id == current_user.id:
+                player_id = pid
+                break
+        
+        if not player_id:
+            raise HTTPException(status_code=400, detail="Not in this game")
+        
+        # Remove player (ends an active game left with a single player)
+        result = engine.remove_player(game_id.upper(), player_id)
+        
+        # Broadcast
+        out.append({
             "type": "PLAYER_LEFT",
             "player_id": player_id,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         })
-    )
+        
+        # Only 1 player (human or bot) left in active game -> game ended
+        if any(not p.is_bot for p in game.players.values()) and result.get("game_over") and game.winner_id:
+            out.append({
+                "type": "GAME_OVER",
+                "game_state": game.to_dict()
+            })
+    
+    await game_actors.submit(game_id.upper(), leave)
 
     # Check if no humans left -> Delete game
     active_humans = [p for p in game.players.values() if not p.is_bot]
     if not active_humans:
         if game_id.upper() in engine.games:
-            del engine.games[game_id.upper()]
+            # Queued behind the PLAYER_LEFT broadcast
+            await game_actors.submit(game_id.upper(), lambda out: engine.delete_game(game_id.upper()))
             print(f"Game {game_id} deleted because no humans left.")
         # Also remove/archive from DB
         await db_service.update_game(session, game_id.upper(), {"status": "finished"})
     
-    # Check if only 1 player (human or bot) left in active game -> End game
-    elif game.game_status == "active" and len(game.players) < 2:
-         game.game_status = "finished"
-         if len(game.players) == 1:
-             winner = list(game.players.values())[0]
-             game.winner_id = winner.id
-             game.logs.append(f"🏆 {winner.name} wins by default!")
-             # Broadcast finish
-             asyncio.create_task(
-                manager.broadcast(game_id.upper(), {
-                    "type": "GAME_OVER",
-                    "game_state": game.dict()
-                })
-             )
-    
     return {"success": True, "message": "Left the game"}
 
 
@@ -333,26 +379,36 @@ async def start_game(
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     
-    # Check if host
-    is_host = False
-    for player in game.players.values():
-        if player.user_id == current_user.id:
-            if game.host_id == current_user.id:
-                is_host = True
-            break
-    
-    if not is_host:
-        raise HTTPException(status_code=403, detail="Only the host can start the game")
-    
-    if len(game.players) < 2:
-        raise HTTPException(status_code=400, detail="Need at least 2 players to start")
-    
-    if game.game_status != "waiting":
-        raise HTTPException(status_code=400, detail="Game already started")
+    def start(out):
+        # Check if host
+        is_host = False
+        for player in game.players.values():
+            if player.user_id == current_user.id:
+                if game.host_id == current_user.id:
+                    is_host = True
+                break
+        
+        if not is_host:
+            raise HTTPException(status_code=403, detail="Only the host can start the game")
+        
+        if len(game.players) < 2:
+            raise HTTPException(status_code=400, detail="Need at least 2 players to start")
+        
+        if game.game_status != "waiting":
+            raise HTTPException(status_code=400, detail="Game already started")
+        
+        # Start the game (shuffles turn order, arms the first turn timer)
+        result = engine.start_game(game_id.upper())
+        if result.get("error"):
+            raise HTTPException(status_code=400, detail=result["error"])
+        
+        # Broadcast
+        out.append({
+            "type": "GAME_STARTED",
+            "game_state": game.to_dict()
+        })
     
-    # Start the game
-    game.game_status = "active"
-    game.started_at = datetime.utcnow()
+    await game_actors.submit(game_id.upper(), start)
     
     # Update DB
     await db_service.update_game(session, game_id.upper(), {
@@ -360,100 +416,19 @@ async def start_game(
         "started_at": game.started_at
     })
     
-    # Randomize player order
-    random.shuffle(game.player_order)
-    
-    # Add to logs
-    game.logs.append(f"Game started! Turn order: {', '.join([game.players[p].name for p in game.player_order])}")
-    
-    # Set initial turn expiry
-    engine._reset_timer(game)
-    
-    # Broadcast
-    from socket_manager import manager
-    import asyncio
-    asyncio.create_task(
-        manager.broadcast(game_id.upper(), {
-            "type": "GAME_STARTED",
-            "game_state": game.dict()
-        })
-    )
-    
-    # Check if first player is a bot and start their turn
-    first_player_id = game.player_order[0] if game.player_order else None
-    first_player = game.players.get(first_player_id)
-    if first_player and first_player.is_bot:
-        asyncio.create_task(_run_bot_after_delay(game_id.upper()))
-    
-    return {"success": True, "game_state": game.dict()}
-
-
-async def _run_bot_after_delay(game_id: str):
-    """Helper to run bot turn with realistic dice animation timing."""
-    import asyncio
-    from socket_manager import manager
-    
-    await asyncio.sleep(0.5)  # Brief pause before bot acts
-    
-    engine = get_game_engine()
-    game = engine.games.get(game_id)
-    if not game or game.game_status != "active":
-        return
-    
-    current_id = game.player_order[game.current_turn_index]
-    current_player = game.players.get(current_id)
-    
-    if not current_player or not current_player.is_bot:
-        return
+    # Start the first player's turn if it is a bot
+    bot_scheduler.request(game_id.upper())
     
-    # Step 1: Roll dice (this broadcasts DICE_ROLLED)
-    dice_result = engine.run_bot_turn(game_id)
-    if dice_result:
-        await manager.broadcast(game_id, dice_result)
-        
-        # Wait for dice animation to complete (match frontend timing)
-        await asyncio.sleep(2.0)
-        
-        # Step 2: Perform post-roll actions (buy, pay rent, etc.)
-        game = engine.games.get(game_id)
-        if not game or game.game_status != "active": 
-            return
-
-        actions_result = engine.run_bot_post_roll(game_id, current_id)
-        if actions_result:
-            await manager.broadcast(game_id, actions_result)
-        
-        await asyncio.sleep(0.5) # Pause before ending turn
-
-        # Step 3: Check doubles or End Turn
-        current_player = game.players.get(current_id) # Refresh state
-        is_jailed = current_player and current_player.is_jailed
-        
-        # Only roll again if doubles AND not jailed (standard rule)
-        if dice_result.get("doubles") and not is_jailed:
-             await _run_bot_after_delay(game_id) # Recursive call for doubles
-        else:
-             # End current turn
-             end_result = engine.end_turn(game_id, current_id)
-             if not end_result.get("error"):
-                 await manager.broadcast(game_id, {"type": "TURN_ENDED", **end_result})
-                 
-                 # Check if NEXT player is also a bot
-                 await asyncio.sleep(0.5)
-                 game = engine.games.get(game_id)
-                 if game and game.game_status == "active":
-                     next_id = game.player_order[game.current_turn_index]
-                     next_player = game.players.get(next_id)
-                     if next_player and next_player.is_bot:
-                         await _run_bot_after_delay(game_id)
+    return {"success": True, "game_state": game.to_dict()}
 
 
 @router.post("/{game_id}/bots")
 async def add_bot(
     game_id: str,
+    difficulty: Literal["normal", "hard"] = "normal",
     current_user: User = Depends(get_current_user)
 ):
-    """Add a bot to the game (host only)."""
+    """Add a bot to the game (host only). Hard bots plan their decisions with Monte Carlo rollouts."""
     engine = get_game_engine()
     game = engine.games.get(game_id.upper())
     
@@ -465,51 +440,51 @@ async def add_bot(
     if not is_host:
         raise HTTPException(status_code=403, detail="Only the host can add bots")
     
-    if game.game_status != "waiting":
-        raise HTTPException(status_code=400, detail="Cannot add bots after game started")
-    
-    if len(game.players) >= game.max_players:
-        raise HTTPException(status_code=400, detail="Game is full")
-    
-    # Find available character
-    used_chars = [p.character for p in game.players.values()]
-    all_chars = ["Putin", "Trump", "Zelensky", "Kim", "Biden", "Xi"]
-    available = [c for c in all_chars if c not in used_chars]
-    
-    if not available:
-        raise HTTPException(status_code=400, detail="No characters available")
-    
-    character = random.choice(available)
-    
-    # Create bot
-    bot_id = str(uuid.uuid4())
-    bot = Player(
-        id=bot_id,
-        name=f"Bot {character}",
-        character=character,
-        color=CHARACTER_COLORS.get(character, "#555555"),
-        is_bot=True,
-        money=game.starting_money
-    )
-    
-    engine.add_player(game_id.upper(), bot)
-    
-    # Broadcast
-    from socket_manager import manager
-    import asyncio
-    asyncio.create_task(
-        manager.broadcast(game_id.upper(), {
+    def add(out):
+        if game.game_status != "waiting":
+            raise HTTPException(status_code=400, detail="Cannot add bots after game started")
+        
+        if len(game.players) >= game.max_players:
+            raise HTTPException(status_code=400, detail="Game is full")
+        
+        # Find available character
+        used_chars = [p.character for p in game.players.values()]
+        all_chars = ["Putin", "Trump", "Zelensky", "Kim", "Biden", "Xi"]
+        available = [c for c in all_chars if c not in used_chars]
+        
+        if not available:
+            raise HTTPException(status_code=400, detail="No characters available")
+        
+        character = random.choice(available)
+        
+        # Create bot
+        bot_id = str(uuid.uuid4())
+        bot = Player(
+            id=bot_id,
+            name=f"Bot {character}",
+            character=character,
+            color=CHARACTER_COLORS.get(character, "#555555"),
+            is_bot=True,
+            difficulty=difficulty,
+            money=game.starting_money
+        )
+        
+        engine.add_player(game_id.upper(), bot)
+        
+        # Broadcast
+        out.append({
             "type": "PLAYER_JOINED",
-            "player": bot.dict(),
-            "game_state": game.dict()
+            "player": bot.to_dict(),
+            "game_state": game.to_dict()
         })
-    )
+        
+        return {
+            "bot_id": bot_id,
+            "character": character,
+            "game_state": game.to_dict()
+        }
     
-    return {
-        "bot_id": bot_id,
-        "character": character,
-        "game_state": game.dict()
-    }
+    return await game_actors.submit(game_id.upper(), add)
 
 
 @router.delete("/{game_id}/players/{player_id}")
@@ -528,32 +503,29 @@ async def kick_player(
     if game.host_id != current_user.id:
         raise HTTPException(status_code=403, detail="Only the host can kick players")
     
-    if game.game_status != "waiting":
-        raise HTTPException(status_code=400, detail="Cannot kick players after game started")
-    
-    if player_id not in game.players:
-        raise HTTPException(status_code=404, detail="Player not found")
-    
-    # Preventing host from kicking themselves accidentally
-    if game.players[player_id].user_id == current_user.id:
-         raise HTTPException(status_code=400, detail="Host cannot kick themselves")
+    def kick(out):
+        if game.game_status != "waiting":
+            raise HTTPException(status_code=400, detail="Cannot kick players after game started")
+        
+        if player_id not in game.players:
+            raise HTTPException(status_code=404, detail="Player not found")
+        
+        # Preventing host from kicking themselves accidentally
+        if game.players[player_id].user_id == current_user.id:
+             raise HTTPException(status_code=400, detail="Host cannot kick themselves")
 
-    del game.players[player_id]
-    if player_id in game.player_order:
-        game.player_order.remove(player_id)
-    
-    # Broadcast removal
-    from socket_manager import manager
-    import asyncio
-    asyncio.create_task(
-        manager.broadcast(game_id.upper(), {
+        engine.remove_player(game_id.upper(), player_id)
+        
+        # Broadcast removal
+        out.append({
             "type": "PLAYER_LEFT",
             "player_id": player_id,
-            "game_state": game.dict()
+            "game_state": game.to_dict()
         })
-    )
+        
+        return {"success": True, "game_state": game.to_dict()}
     
-    return {"success": True, "game_state": game.dict()}
+    return await game_actors.submit(game_id.upper(), kick)
 
 
 @router.delete("/{game_id}/bots/{bot_id}")
@@ -670,6 +642,7 @@ async def get_pending_invites(
 async def accept_game_invite(
     invite_id: str,
     request: JoinGameRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_db)
 ):
@@ -688,8 +661,15 @@ async def accept_game_invite(
     # Update invite status
     await db_service.update_game_invite(session, invite_id, {"status": "accepted"})
     
-    # Join the game
-    return await join_game(invite.game_id, request, current_user)
+    # Join the game (on the worker that runs it)
+    if not shard_router.is_local(invite.game_id):
+        response = await shard_router.relay(
+            invite.game_id, http_request, "POST", f"/api/games/{invite.game_id}/join", json=request.model_dump()
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.json().get("detail"))
+        return response.json()
+    return await join_game(invite.game_id, request, current_user, session)
 
 
 @router.post("/invites/{invite_id}/decline")
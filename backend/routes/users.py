@@ -24,12 +24,39 @@ from auth import (
     validate_telegram_init_data,
     validate_telegram_widget_data
 )
-from socket_manager import manager
-import asyncio
+from game_actor import game_actors
+from sharding import shard_router, INTERNAL_PREFIX
+from functools import partial
 
 router = APIRouter(prefix="/api", tags=["users"])
 
 
+def update_profile_in_games(user_id: str, name: str, avatar_url: str):
+    """Update a user's player in the active games of this worker and notify them."""
+    def update(game_id, player_id, out):
+        game = engine.games.get(game_id)
+        if not game or player_id not in game.players:
+            return
+        engine.update_player_profile(game_id, user_id, name, avatar_url)
+        out.append({
+            "type": "PLAYER_UPDATED",
+            "player_id": player_id,
+            "game_state": game.to_dict()
+        })
+    
+    engine.lobby.update_host(user_id, name, avatar_url)
+    for game_id, player_id in engine.user_game_ids(user_id).items():
+        game_actors.submit(game_id, partial(update, game_id, player_id))
+
+
+async def propagate_profile(user_id: str, name: str, avatar_url: str):
+    """Propagate a profile change to the user's active games on every worker."""
+    update_profile_in_games(user_id, name, avatar_url)
+    await shard_router.broadcast(INTERNAL_PREFIX + "user-profile", {
+        "user_id": user_id, "name": name, "avatar_url": avatar_url
+    })
+
+
 # ============== Authentication ==============
 
 
@@ -191,17 +218,7 @@ async def update_me(
     if updates:
         updated = await db_service.update_user(session, current_user.id, updates)
         
-        # Propagate to active games
-        engine.update_user_profile(updated.id, updated.name, updated.avatar_url)
-        
-        # Broadcast to all active games of this user
-        for game_id, game in engine.games.items():
-            if any(p.user_id == updated.id for p in game.players.values()):
-                asyncio.create_task(manager.broadcast(game_id, {
-                    "type": "PLAYER_UPDATED",
-                    "player_id": next(pid for pid, p in game.players.items() if p.user_id == updated.id),
-                    "game_state": game.dict()
-                }))
+        await propagate_profile(updated.id, updated.name, updated.avatar_url)
         
         return User(
             id=updated.id,
@@ -256,17 +273,7 @@ async def upload_avatar(
     avatar_url = f"/uploads/{filename}"
     updated = await db_service.update_user(session, current_user.id, {"avatar_url": avatar_url})
     
-    # Propagate to active games
-    engine.update_user_profile(updated.id, updated.name, updated.avatar_url)
-    
-    # Broadcast to all active games of this user
-    for game_id, game in engine.games.items():
-        if any(p.user_id == updated.id for p in game.players.values()):
-            asyncio.create_task(manager.broadcast(game_id, {
-                "type": "PLAYER_UPDATED",
-                "player_id": next(pid for pid, p in game.players.items() if p.user_id == updated.id),
-                "game_state": game.dict()
-            }))
+    await propagate_profile(updated.id, updated.name, updated.avatar_url)
     
     return User(
         id=updated.id,
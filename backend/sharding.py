@@ -0,0 +1,437 @@
+"""
+Game sharding across worker processes.
+
+Game state (engine.games, socket connections, poker tables) lives in the
+memory of one process, so with several workers every game (or poker table)
+is owned by exactly one of them: the owner of its key on a consistent-hash
+ring of the live workers.
+
+Workers find each other through a registry directory (SHARD_DIR): each one
+heartbeats a small file holding its internal URL, and every worker rebuilds
+its ring from the files that are still fresh. When a worker joins or leaves,
+only the keys on its arcs of the ring move. Games are handed over through
+the shared game journal: the previous owner writes a snapshot and drops the
+game, the new owner rebuilds it from that snapshot on first access.
+
+Requests for a key owned by another worker are forwarded to it by
+ShardMiddleware (HTTP requests are proxied, WebSockets are relayed frame by
+frame), so clients keep talking to one public address. Without SHARD_DIR
+sharding is disabled and the app behaves as a single process.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from bisect import bisect
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+# Points per worker on the ring (evens out the share of keys)
+VNODES = 64
+
+# Registry heartbeat period and the age after which a worker is considered gone
+HEARTBEAT_SECONDS = 2.0
+MEMBER_TTL = 3 * HEARTBEAT_SECONDS
+
+# Timeout of worker-to-worker HTTP calls
+FORWARD_TIMEOUT = 30.0
+
+FORWARDED_HEADER = "x-shard-forwarded"  # Set on forwarded requests: always served by the receiver
+SCOPE_HEADER = "x-shard-scope"  # "local" on fan-out requests: answer from this worker only
+TOKEN_HEADER = "x-shard-token"  # Shared secret of the cluster, required on /internal/shard/*
+
+# Headers only workers of the cluster may set; stripped from requests without a valid token
+_INTERNAL_HEADERS = frozenset((FORWARDED_HEADER, SCOPE_HEADER, TOKEN_HEADER))
+
+INTERNAL_PREFIX = "/internal/shard/"
+
+# Hop-by-hop headers are not relayed by the proxy
+_HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "upgrade", "te", "trailer",
+                "proxy-authorization", "proxy-authenticate", "host", "content-length"}
+
+_GAME_PATH = re.compile(r"^/api/games/(?!(?:my|my-active|invites)(?:/|$))([^/]+)")
+_GAME_WS_PATH = re.compile(r"^/ws/(?!(?:poker|lobby)(?:/|$))([^/]+)/?$")
+_POKER_WS_PATH = re.compile(r"^/ws/poker/([^/]+)/?$")
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shard_key(path: str) -> Optional[str]:
+    """Key of the game / poker table a request path belongs to (None = not game specific)."""
+    match = _GAME_PATH.match(path) or _GAME_WS_PATH.match(path)
+    if match:
+        return match.group(1).upper()
+    match = _POKER_WS_PATH.match(path)
+    if match:
+        return f"poker:{match.group(1)}"
+    return None
+
+
+class HashRing:
+    """Consistent-hash ring of worker ids."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = VNODES):
+        self.nodes = frozenset(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        index = bisect(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
+
+
+class ShardRouter:
+    """This worker's view of the cluster: membership, key ownership and calls to other workers."""
+
+    def __init__(self, worker_id: str, url: Optional[str], directory: Optional[str], secret: str = ""):
+        self.worker_id = worker_id
+        self.url = url
+        self.directory = directory
+        self.secret = secret
+        self.members: Dict[str, str] = {worker_id: url or ""}  # worker_id -> internal URL
+        self.ring = HashRing(self.members)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._acquiring: Dict[str, asyncio.Lock] = {}
+
+        # Hooks wired by the app (see main.py)
+        self.holds: Callable[[str], bool] = lambda key: True  # Key state is in memory here
+        self.adoptable: Callable[[str], bool] = lambda key: False  # Key state can be taken over here
+        self.adopt: Callable[[str], Awaitable[None]] = None
+        self.release: Callable[[str], Awaitable[None]] = None
+        self.on_rebalance: Optional[Callable[[], Awaitable[None]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory and self.url)
+
+    # ============== Ownership ==============
+
+    def owner(self, key: str) -> str:
+        return self.ring.owner(key) or self.worker_id
+
+    def is_local(self, key: str) -> bool:
+        return not self.enabled or self.owner(key) == self.worker_id
+
+    def peers(self) -> Dict[str, str]:
+        return {worker: url for worker, url in self.members.items() if worker != self.worker_id}
+
+    def local_id(self, factory: Callable[[], str]) -> str:
+        """New id (e.g. of a game) from `factory` that this worker owns, so it can be created here."""
+        while True:
+            new_id = factory()
+            if self.is_local(new_id):
+                return new_id
+
+    # ============== Membership ==============
+
+    def _member_path(self, worker_id: str) -> str:
+        return os.path.join(self.directory, f"{worker_id}.json")
+
+    def register(self):
+        """Announce (or refresh) this worker in the registry."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._member_path(self.worker_id)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"url": self.url, "pid": os.getpid()}, f)
+        os.replace(tmp, path)
+
+    def leave(self):
+        """Remove this worker from the registry (graceful shutdown)."""
+        if not self.enabled:
+            return
+        try:
+            os.remove(self._member_path(self.worker_id))
+        except FileNotFoundError:
+            pass
+
+    def refresh(self, now: Optional[float] = None) -> bool:
+        """Rebuild the ring from the live registry entries. Returns True if membership changed."""
+        now = time.time() if now is None else now
+        members = {self.worker_id: self.url}
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > MEMBER_TTL:
+                    continue
+                with open(path, "r", encoding="utf-8") as f:
+                    members[name[:-len(".json")]] = json.load(f)["url"]
+            except (OSError, ValueError, KeyError):
+                continue  # Vanished or half written: picked up on the next refresh
+        if members == self.members:
+            return False
+        self.members = members
+        self.ring = HashRing(members)
+        return True
+
+    async def run(self):
+        """Background loop: heartbeat, follow membership and rebalance on changes."""
+        while True:
+            try:
+                self.register()
+                if self.refresh() and self.on_rebalance:
+                    print(f"Shard ring changed: {sorted(self.members)}")
+                    await self.on_rebalance()
+            except Exception as e:
+                print(f"Shard registry error: {e}")
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+
+    # ============== Handoff ==============
+
+    async def acquire(self, key: str):
+        """Make sure the state of a key owned here is in memory, taking it over from its previous holder."""
+        if self.holds(key) or not self.adoptable(key):
+            return
+        lock = self._acquiring.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                if self.holds(key):
+                    return
+                # Whoever held it before (ring change) writes it back and lets go
+                await asyncio.gather(*(
+                    self.call(url, "POST", f"{INTERNAL_PREFIX}release/{key}") for url in self.peers().values()
+                ), return_exceptions=True)
+                await self.adopt(key)
+        finally:
+            if not lock.locked():
+                self._acquiring.pop(key, None)
+
+    # ============== Worker-to-worker calls ==============
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=FORWARD_TIMEOUT)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def trusted(self, headers: Dict[str, str]) -> bool:
+        """Whether a request comes from a worker of the cluster (carries its secret)."""
+        return bool(self.secret) and hmac.compare_digest(headers.get(TOKEN_HEADER, ""), self.secret)
+
+    def internal_headers(self) -> Dict[str, str]:
+        return {TOKEN_HEADER: self.secret, FORWARDED_HEADER: self.worker_id}
+
+    async def call(self, url: str, method: str, path: str, headers: Optional[Dict[str, str]] = None,
+                   **kwargs) -> httpx.Response:
+        """Request another worker."""
+        return await self.client.request(
+            method, url + path, headers={**(headers or {}), **self.internal_headers()}, **kwargs
+        )
+
+    async def broadcast(self, path: str, payload: Dict[str, Any]):
+        """POST an internal notification to every other worker."""
+        if not self.enabled:
+            return
+        await asyncio.gather(*(
+            self.call(url, "POST", path, json=payload) for url in self.peers().values()
+        ), return_exceptions=True)
+
+    async def relay(self, key: str, request, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request to the owner of `key` on behalf of the client of `request` (same credentials)."""
+        headers = {k: v for k, v in request.headers.items()
+                   if k.lower() not in _HOP_HEADERS and k.lower() != "content-type"}
+        return await self.call(self.members[self.owner(key)], method, path, headers=headers, **kwargs)
+
+    def fans_out(self, request) -> bool:
+        """Whether a request for cluster-wide data must also ask the other workers."""
+        return self.enabled and request.headers.get(SCOPE_HEADER) != "local"
+
+    async def gather(self, request) -> List[Any]:
+        """
+        Repeat a GET request on every other worker (local scope only) and
+        return their JSON answers, used to merge lists such as the lobby.
+        """
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in _HOP_HEADERS}
+        path = request.url.path + (f"?{request.url.query}" if request.url.query else "")
+        return await self.gather_path(path, headers)
+
+    async def gather_path(self, path: str, headers: Dict[str, str]) -> List[Any]:
+        """GET `path` (with the client's `headers`) on every other worker, local scope only."""
+        headers = {**headers, SCOPE_HEADER: "local"}
+        responses = await asyncio.gather(*(
+            self.call(url, "GET", path, headers=headers) for url in self.peers().values()
+        ), return_exceptions=True)
+        results = []
+        for response in responses:
+            if isinstance(response, Exception):
+                print(f"Shard gather error: {response}")
+            elif response.status_code == 200:
+                results.append(response.json())
+        return results
+
+
+class ShardMiddleware:
+    """ASGI middleware sending every game request to the worker that owns the game."""
+
+    def __init__(self, app, router: ShardRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        router = self.router
+        if scope["type"] not in ("http", "websocket") or not router.enabled:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+
+        if not router.trusted(headers):
+            if path.startswith(INTERNAL_PREFIX):
+                return await self._reject(scope, send)
+            if not _INTERNAL_HEADERS.isdisjoint(headers):
+                # A client cannot pass for a worker (e.g. make this one take over a game it does not own)
+                headers = {k: v for k, v in headers.items() if k not in _INTERNAL_HEADERS}
+                scope = {**scope, "headers": [
+                    (k, v) for k, v in scope["headers"] if k.decode("latin-1").lower() not in _INTERNAL_HEADERS
+                ]}
+
+        key = shard_key(path)
+        if key is None:
+            return await self.app(scope, receive, send)
+
+        owner = router.owner(key)
+        if owner == router.worker_id or FORWARDED_HEADER in headers:
+            # Forwarded requests are served even while the rings of the two workers disagree
+            await router.acquire(key)
+            return await self.app(scope, receive, send)
+
+        url = router.members[owner]
+        if scope["type"] == "http":
+            await self._forward_http(scope, receive, send, url, headers)
+        else:
+            await self._forward_websocket(scope, receive, send, url, headers)
+
+    async def _reject(self, scope, send):
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 4003})
+            return
+        await send({"type": "http.response.start", "status": 403, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"detail":"Forbidden"}'})
+
+    def _target(self, scope, url: str) -> str:
+        query = scope.get("query_string", b"").decode("latin-1")
+        return url + scope.get("root_path", "") + scope["path"] + (f"?{query}" if query else "")
+
+    def _upstream_headers(self, scope, headers: Dict[str, str]) -> Dict[str, str]:
+        upstream = {k: v for k, v in headers.items() if k not in _HOP_HEADERS and not k.startswith("sec-websocket")}
+        client = scope.get("client")
+        if client and "x-forwarded-for" not in upstream:
+            upstream["x-forwarded-for"] = client[0]
+        upstream.update(self.router.internal_headers())
+        return upstream
+
+    async def _forward_http(self, scope, receive, send, url: str, headers: Dict[str, str]):
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        client = self.router.client
+        request = client.build_request(
+            scope["method"], self._target(scope, url), headers=self._upstream_headers(scope, headers), content=body
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            print(f"Shard forward to {url} failed: {e}")
+            await send({"type": "http.response.start", "status": 503, "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": b'{"detail":"Game server unavailable"}'})
+            return
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (k.encode("latin-1"), v.encode("latin-1"))
+                    for k, v in response.headers.multi_items() if k.lower() not in _HOP_HEADERS - {"content-length"}
+                ],
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+    async def _forward_websocket(self, scope, receive, send, url: str, headers: Dict[str, str]):
+        import websockets
+        from websockets.exceptions import ConnectionClosed, InvalidStatusCode
+
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+
+        target = "ws" + self._target(scope, url)[len("http"):]
+        try:
+            upstream = await websockets.connect(
+                target, extra_headers=self._upstream_headers(scope, headers),
+                max_size=None, compression=None, ping_interval=None
+            )
+        except (OSError, InvalidStatusCode, asyncio.TimeoutError) as e:
+            # Same outcome as a direct connection refused before accept
+            print(f"Shard websocket forward to {url} failed: {e}")
+            await send({"type": "websocket.close", "code": 4004 if isinstance(e, InvalidStatusCode) else 1013})
+            return
+
+        await send({"type": "websocket.accept"})
+
+        async def client_to_upstream():
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    await upstream.close(message.get("code", 1000))
+                    return
+                data = message.get("text") if message.get("text") is not None else message.get("bytes")
+                if data is not None:
+                    await upstream.send(data)
+
+        async def upstream_to_client():
+            try:
+                async for data in upstream:
+                    key = "text" if isinstance(data, str) else "bytes"
+                    await send({"type": "websocket.send", key: data})
+            except ConnectionClosed:
+                pass
+            # Pass the owner's close code on (e.g. 4004 game not found)
+            await send({"type": "websocket.close", "code": upstream.close_code or 1000,
+                        "reason": upstream.close_reason or ""})
+
+        tasks = [asyncio.create_task(client_to_upstream()), asyncio.create_task(upstream_to_client())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() and not isinstance(task.exception(), ConnectionClosed):
+                    print(f"Shard websocket relay error: {task.exception()}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await upstream.close()
+
+
+# Process-wide router; configured by cluster.py through the environment
+shard_router = ShardRouter(
+    worker_id=os.getenv("SHARD_WORKER_ID", str(os.getpid())),
+    url=os.getenv("SHARD_URL") or None,
+    directory=os.getenv("SHARD_DIR") or None,
+    secret=os.getenv("SHARD_SECRET", "")
+)
@@ -0,0 +1,376 @@
+"""
+Headless bot-vs-bot simulator.
+
+Plays GameEngine games to completion with bots only: no sockets, no sleeps.
+Every game is seeded, so any result (including a stall) can be replayed from
+its seed. Batches fan out across a ProcessPoolExecutor.
+
+Usage:
+    python simulator.py --games 2000 --workers 8
+    python simulator.py --games 200 --map Mukhosransk --mode classic --characters Putin,Trump,Kim
+    python simulator.py --games 1 --seed 1234 --json    # replay a single game
+    python simulator.py --games 100 --hard 1 --planner-budget-ms 10    # one hard bot vs regular ones
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from game_engine import GameEngine, CHARACTER_ABILITIES
+from models import GameState, Player
+from log_store import log_store
+
+MAPS = ["World", "Ukraine", "Mukhosransk"]
+MODES = ["abilities", "classic", "oreshnik_all"]
+CHARACTERS = list(CHARACTER_ABILITIES.keys())
+ABILITIES = {ability["name"] for ability in CHARACTER_ABILITIES.values()}
+
+
+@dataclass
+class SimConfig:
+    """Settings shared by every game of a batch."""
+    map_type: str = "World"
+    game_mode: str = "abilities"
+    characters: Optional[List[str]] = None  # None = random pick per game
+    players: int = 4
+    starting_money: int = 1500
+    max_turns: int = 1000  # Game is reported as endless past this turn number
+    stall_steps: int = 50  # Steps without any progress before a game is reported as stalled
+    hard_players: int = 0  # Players (first in the lineup) using the Monte Carlo planner
+    planner_budget_ms: float = 50.0
+
+
+@dataclass
+class GameResult:
+    """Outcome of one simulated game."""
+    seed: int
+    outcome: str  # finished | turn_limit | stalled
+    turns: int
+    steps: int
+    characters: List[str]
+    winner_character: Optional[str] = None
+    winner_difficulty: Optional[str] = None
+    ability_uses: Dict[str, int] = field(default_factory=dict)
+    stall_state: Optional[Dict[str, Any]] = None
+
+
+def ability_of(character: str, game_mode: str) -> Optional[str]:
+    """Ability a character plays with in a game mode."""
+    if game_mode == "classic":
+        return None
+    if game_mode == "oreshnik_all":
+        return "ORESHNIK"
+    ability = CHARACTER_ABILITIES.get(character)
+    return ability["name"] if ability else None
+
+
+Planner = Callable[[GameState, str, str], Optional[Dict[str, Any]]]
+
+
+def run_bot_step(engine: GameEngine, game_id: str, planner: Optional[Planner] = None) -> List[Dict[str, Any]]:
+    """
+    Perform the next bot action of a game, like the live bot loop but without delays.
+    Returns the messages the live server would broadcast for it.
+    `planner(game, player_id, decision)` makes the decisions of hard bots.
+    """
+    game = engine.games.get(game_id)
+    if not game or game.game_status != "active" or not game.player_order:
+        return []
+
+    # 1. Auction turn
+    if game.turn_state.get("auction_active"):
+        eligible = game.turn_state.get("auction_eligible_players", [])
+        idx = game.turn_state.get("auction_current_player_index", 0)
+        if not eligible or idx >= len(eligible):
+            return []
+        player = game.players.get(eligible[idx])
+        if not player or not player.is_bot:
+            return []
+        plan = planner(game, player.id, "bid") if planner and player.difficulty == "hard" else None
+        result = engine.run_bot_auction_decision(game_id, player.id, plan)
+        if not result:
+            return []
+        msg_type = "AUCTION_RESOLVED" if "winner" in result else "AUCTION_UPDATED"
+        return [{"type": msg_type, **result}]
+
+    # 2. Standard turn
+    current_id = game.player_order[game.current_turn_index]
+    player = game.players.get(current_id)
+    if not player or not player.is_bot:
+        return []
+
+    messages = []
+    if not game.turn_state.get("has_rolled"):
+        dice_result = engine.run_bot_turn(game_id)
+        if not dice_result:
+            return messages
+        messages.append(dice_result)
+
+        plan = planner(game, current_id, "post_roll") if planner and player.difficulty == "hard" else None
+        actions_result = engine.run_bot_post_roll(game_id, current_id, plan)
+        if actions_result:
+            messages.append(actions_result)
+
+        # Doubles: the same bot rolls again on the next step
+        if dice_result.get("doubles") and not player.is_jailed:
+            return messages
+
+    # Turn may already have moved on (sanctions skip, bankruptcy, game over)
+    if (game.game_status == "active" and game.player_order
+            and game.player_order[game.current_turn_index] == current_id):
+        end_result = engine.end_turn(game_id, current_id)
+        if not end_result.get("error"):
+            messages.append({"type": "TURN_ENDED", **end_result})
+    return messages
+
+
+def _count_abilities(messages: List[Dict[str, Any]], counter: Counter):
+    # Bot ability results are spread into BOT_ACTIONS entries, so "type" is the ability name
+    for msg in messages:
+        for action in msg.get("actions", ()):
+            if action.get("type") in ABILITIES:
+                counter[action["type"]] += 1
+
+
+def new_game(engine: GameEngine, seed: int, config: SimConfig) -> GameState:
+    """Create and start a seeded bot-only game."""
+    game_id = f"SIM{seed}"
+    game = engine.create_game(
+        game_id,
+        map_type=config.map_type,
+        game_mode=config.game_mode,
+        starting_money=config.starting_money,
+        max_players=max(config.players, 2),
+        turn_timer=0,
+        seed=seed
+    )
+
+    characters = list(config.characters) if config.characters else game.rng.sample(CHARACTERS, config.players)
+    for i, character in enumerate(characters):
+        engine.add_player(game_id, Player(
+            id=f"bot{i}",
+            name=f"Bot {character}",
+            character=character,
+            color="#555555",
+            is_bot=True,
+            difficulty="hard" if i < config.hard_players else "normal",
+            money=config.starting_money
+        ))
+
+    engine.start_game(game_id)
+    return game
+
+
+def play_game(seed: int, config: SimConfig) -> GameResult:
+    """Play one seeded bot-only game to completion."""
+    engine = GameEngine()
+    game = new_game(engine, seed, config)
+    game_id = game.game_id
+    characters = [player.character for player in game.players.values()]
+
+    planner = None
+    if config.hard_players:
+        from bot_planner import evaluate
+        budget = config.planner_budget_ms / 1000
+
+        def planner(game: GameState, player_id: str, decision: str) -> Optional[Dict[str, Any]]:
+            return evaluate(game, player_id, decision, budget=budget)
+
+    abilities = Counter()
+    steps = 0
+    idle_steps = 0
+    outcome = "finished"
+    last_progress = None
+
+    try:
+        while game.game_status == "active":
+            if game.turn_number >= config.max_turns:
+                outcome = "turn_limit"
+                break
+
+            messages = run_bot_step(engine, game_id, planner)
+            steps += 1
+            _count_abilities(messages, abilities)
+
+            progress = (
+                game.turn_number,
+                game.current_turn_index,
+                game.log_offset + len(game.logs),
+                game.turn_state.get("auction_current_player_index"),
+            )
+            idle_steps = idle_steps + 1 if progress == last_progress else 0
+            last_progress = progress
+            if idle_steps >= config.stall_steps:
+                outcome = "stalled"
+                break
+
+        winner = game.players.get(game.winner_id) if game.winner_id else None
+        return GameResult(
+            seed=seed,
+            outcome=outcome,
+            turns=game.turn_number,
+            steps=steps,
+            characters=characters,
+            winner_character=winner.character if winner and outcome == "finished" else None,
+            winner_difficulty=winner.difficulty if winner and outcome == "finished" else None,
+            ability_uses=dict(abilities),
+            stall_state={
+                "current_player": game.player_order[game.current_turn_index] if game.player_order else None,
+                "turn_state": game.to_dict()["turn_state"],
+                "last_logs": game.logs[-5:],
+            } if outcome == "stalled" else None
+        )
+    finally:
+        engine.games.pop(game_id, None)
+        log_store.forget(game_id)
+
+
+def _play_seed(args) -> GameResult:
+    seed, config = args
+    return play_game(seed, config)
+
+
+def run_batch(config: SimConfig, games: int, workers: int = 1, seed: int = 0) -> Dict[str, Any]:
+    """Play `games` games with consecutive seeds and summarize them."""
+    seeds = range(seed, seed + games)
+    started = time.perf_counter()
+
+    if workers <= 1:
+        results = [play_game(s, config) for s in seeds]
+    else:
+        chunksize = max(1, games // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_play_seed, ((s, config) for s in seeds), chunksize=chunksize))
+
+    elapsed = time.perf_counter() - started
+    return summarize(results, elapsed, workers, config)
+
+
+def summarize(results: List[GameResult], elapsed: float, workers: int, config: SimConfig) -> Dict[str, Any]:
+    """Aggregate per-game results into a report."""
+    outcomes = Counter(r.outcome for r in results)
+    finished = [r for r in results if r.outcome == "finished"]
+    turns = sorted(r.turns for r in finished)
+
+    appearances = Counter(c for r in results for c in r.characters)
+    wins = Counter(r.winner_character for r in finished if r.winner_character)
+    ability_appearances = Counter()
+    ability_wins = Counter()
+    ability_uses = Counter()
+    for r in results:
+        for c in r.characters:
+            ability_appearances[ability_of(c, config.game_mode) or "NONE"] += 1
+        if r.winner_character:
+            ability_wins[ability_of(r.winner_character, config.game_mode) or "NONE"] += 1
+        ability_uses.update(r.ability_uses)
+
+    def rates(wins_counter: Counter, seen: Counter) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"games": seen[name], "wins": wins_counter[name], "win_rate": round(wins_counter[name] / seen[name], 4)}
+            for name in sorted(seen)
+        }
+
+    difficulties = Counter()
+    for r in results:
+        hard = min(config.hard_players, len(r.characters))
+        difficulties.update({"hard": hard, "normal": len(r.characters) - hard})
+    difficulty_wins = Counter(r.winner_difficulty for r in finished if r.winner_difficulty)
+
+    return {
+        "config": asdict(config),
+        "games": len(results),
+        "workers": workers,
+        "elapsed_sec": round(elapsed, 3),
+        "games_per_sec": round(len(results) / elapsed, 2) if elapsed else None,
+        "outcomes": dict(outcomes),
+        "turns": {
+            "mean": round(statistics.mean(turns), 1),
+            "median": statistics.median(turns),
+            "p95": turns[int(len(turns) * 0.95) - 1] if len(turns) >= 20 else turns[-1],
+            "max": turns[-1],
+        } if turns else None,
+        "win_rate_by_character": rates(wins, appearances),
+        "win_rate_by_ability": rates(ability_wins, ability_appearances),
+        "win_rate_by_difficulty": rates(difficulty_wins, +difficulties),
+        "ability_uses": dict(ability_uses),
+        "stalled_seeds": [r.seed for r in results if r.outcome == "stalled"],
+        "turn_limit_seeds": [r.seed for r in results if r.outcome == "turn_limit"],
+        "stalls": [{"seed": r.seed, **r.stall_state} for r in results if r.stall_state][:10],
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Games: {report['games']}  workers: {report['workers']}  "
+          f"time: {report['elapsed_sec']}s  games/sec: {report['games_per_sec']}")
+    print(f"Outcomes: {report['outcomes']}")
+    if report["turns"]:
+        t = report["turns"]
+        print(f"Turns (finished games): mean {t['mean']}  median {t['median']}  p95 {t['p95']}  max {t['max']}")
+    print("\nWin rate by character:")
+    for name, r in report["win_rate_by_character"].items():
+        print(f"  {name:<12} {r['win_rate']:>7.1%}  ({r['wins']}/{r['games']})")
+    print("\nWin rate by ability:")
+    for name, r in report["win_rate_by_ability"].items():
+        print(f"  {name:<14} {r['win_rate']:>7.1%}  ({r['wins']}/{r['games']})")
+    if len(report["win_rate_by_difficulty"]) > 1:
+        print("\nWin rate by difficulty:")
+        for name, r in report["win_rate_by_difficulty"].items():
+            print(f"  {name:<14} {r['win_rate']:>7.1%}  ({r['wins']}/{r['games']})")
+    if report["ability_uses"]:
+        print(f"\nAbility uses: {report['ability_uses']}")
+    if report["stalled_seeds"]:
+        print(f"\nStalled seeds: {report['stalled_seeds'][:20]}")
+    if report["turn_limit_seeds"]:
+        print(f"Turn-limit seeds: {report['turn_limit_seeds'][:20]}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Headless bot-vs-bot game simulator")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game; game i uses seed + i")
+    parser.add_argument("--map", dest="map_type", choices=MAPS, default="World")
+    parser.add_argument("--mode", dest="game_mode", choices=MODES, default="abilities")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--characters", help="Comma-separated fixed lineup (default: random per game)")
+    parser.add_argument("--starting-money", type=int, default=1500)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--hard", type=int, default=0, help="Number of hard (Monte Carlo) bots, first in the lineup")
+    parser.add_argument("--planner-budget-ms", type=float, default=50.0, help="Time budget of a hard bot decision")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    characters = [c.strip() for c in args.characters.split(",")] if args.characters else None
+    if characters:
+        unknown = [c for c in characters if c not in CHARACTERS]
+        if unknown:
+            parser.error(f"Unknown characters: {', '.join(unknown)}")
+        args.players = len(characters)
+    if not 2 <= args.players <= len(CHARACTERS):
+        parser.error(f"--players must be between 2 and {len(CHARACTERS)}")
+
+    config = SimConfig(
+        map_type=args.map_type,
+        game_mode=args.game_mode,
+        characters=characters,
+        players=args.players,
+        starting_money=args.starting_money,
+        max_turns=args.max_turns,
+        hard_players=args.hard,
+        planner_budget_ms=args.planner_budget_ms
+    )
+    report = run_batch(config, args.games, workers=args.workers, seed=args.seed)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
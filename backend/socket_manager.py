@@ -1,10 +1,107 @@
 """
 WebSocket connection manager for real-time game updates.
+
+Sends never block the sender: every connection has a bounded outbox of
+encoded frames written by its own task, so a slow client only delays itself.
+A game client whose outbox stays over SOCKET_QUEUE_LIMIT for longer than
+SOCKET_SLOW_SECONDS is downgraded to snapshot-only (its backlog is replaced
+by the latest full state until it catches up); one whose send hangs for
+SOCKET_SEND_TIMEOUT, or that has no snapshot to fall back on, is dropped.
+
+Queued messages are classed: discrete events (dice, abilities, chat, ...)
+are always delivered, pure state syncs (STATE_ONLY_TYPES) are superseded by
+newer ones still in the queue. Messages queued for full-state clients are
+bound to the game's latest state only when written, so a client that lags
+behind a burst receives the current state with each event instead of a
+backlog of stale ones.
+
+Broadcasts are also published on the broker (see broker.py), under the topic
+of their game (`game:<id>`, direct messages under `user:<id>`). A manager fans
+its own broadcasts out to its sockets directly, and the ones published by
+other nodes to the sockets it holds for their topics.
 """
+from collections import deque
 from fastapi import WebSocket
-from typing import Dict, List, Optional, Set
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
 import json
 import asyncio
+import os
+import time
+import uuid
+
+from broker import LocalBroker
+from lobby_index import matches
+from state_sync import state_sync
+from wire_codec import JSON_CODEC, Payload
+
+# Seconds between two pushes of lobby changes (changes in between are merged)
+LOBBY_FEED_INTERVAL = float(os.getenv("LOBBY_FEED_INTERVAL", "0.5"))
+
+# Frames a connection may have queued before it counts as lagging
+SOCKET_QUEUE_LIMIT = int(os.getenv("SOCKET_QUEUE_LIMIT", "64"))
+
+# How long a connection may stay over the limit before it is downgraded
+SOCKET_SLOW_SECONDS = float(os.getenv("SOCKET_SLOW_SECONDS", "5"))
+
+# A single send taking longer than this drops the connection
+SOCKET_SEND_TIMEOUT = float(os.getenv("SOCKET_SEND_TIMEOUT", "10"))
+
+# Close code of dropped connections (clients reconnect and resync)
+SLOW_CLIENT_CLOSE_CODE = 4008
+
+# Messages that only carry state: a newer one replaces those still queued
+STATE_ONLY_TYPES = {"SYNC_RESPONSE"}
+
+# Queued frame: (payload, game_id, state_only). With a game_id, the payload is a head
+# (see wire_codec.encode_head) completed with the game's latest state when written.
+Frame = Tuple[Payload, Optional[str], bool]
+
+# Lobby change: (game_id, summary before, summary after); None when not listed
+LobbyChange = Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+
+def lobby_events(changes: List[LobbyChange], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Events of a batch of lobby changes as seen by a subscriber: a game that
+    starts matching its filters is added, one that stops matching is removed,
+    an update only carries the fields that changed.
+    """
+    events = []
+    for game_id, old, new in changes:
+        was = old is not None and matches(old, **filters)
+        now = new is not None and matches(new, **filters)
+        if now and not was:
+            events.append({"op": "add", "game": new})
+        elif was and not now:
+            events.append({"op": "remove", "game_id": game_id})
+        elif was and now:
+            changed = {k: v for k, v in new.items() if old.get(k) != v}
+            if changed:
+                events.append({"op": "update", "game_id": game_id, "changes": changed})
+    return events
+
+
+def _detach(messages: List[dict]) -> List[dict]:
+    """Messages to publish, their game_state replaced by a marker (the state is published once)."""
+    return [{**m, "game_state": True} if isinstance(m.get("game_state"), dict) else m for m in messages]
+
+
+def _attach(messages: List[dict], state: Optional[dict]) -> List[dict]:
+    """Published messages with the state put back in place of the marker."""
+    return [{**m, "game_state": state} if m.get("game_state") is True else m for m in messages]
+
+
+class Outbox:
+    """Encoded frames waiting for one connection, and the task writing them."""
+    __slots__ = ("codec", "frames", "wake", "task", "over_since", "snapshot_only")
+
+    def __init__(self, codec=JSON_CODEC):
+        self.codec = codec  # See wire_codec.CODECS
+        self.frames: Deque[Frame] = deque()
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.over_since: Optional[float] = None  # Since when the queue is over the limit
+        self.snapshot_only = False
 
 
 class ConnectionManager:
@@ -19,27 +116,205 @@ class ConnectionManager:
         
         # websocket -> (game_id, user_id) for cleanup
         self.connection_info: Dict[WebSocket, tuple] = {}
+        
+        # Connections that receive state patches instead of full game_state
+        self.delta_connections: Set[WebSocket] = set()
+        
+        # Lobby subscribers -> their filters (see lobby_index.matches)
+        self.lobby_connections: Dict[WebSocket, Dict[str, Any]] = {}
+        
+        # Lobby changes since the last push: game_id -> [summary before, latest summary]
+        self.lobby_changes: Dict[str, list] = {}
+        
+        # Outgoing frames of every open connection (game and lobby)
+        self.outboxes: Dict[WebSocket, Outbox] = {}
+        self.downgraded = 0
+        self.dropped = 0
+        self.superseded = 0
+        
+        # Pub/sub between nodes; replaced by the configured broker on startup (see start_broker)
+        self.node = uuid.uuid4().hex
+        self.broker = LocalBroker()
+    
+    # ============== Broker ==============
+    
+    async def start_broker(self, broker):
+        """Switch to `broker` (keeping the subscriptions) and start receiving from it."""
+        previous, self.broker = self.broker, broker
+        for topic in list(previous.topics):
+            broker.subscribe(topic)
+        await previous.close()
+        await broker.start(self._deliver)
+    
+    async def close_broker(self):
+        await self.broker.close()
+    
+    async def _publish(self, topic: str, payload: Dict[str, Any]):
+        payload["node"] = self.node
+        await self.broker.publish(topic, payload)
+    
+    async def _deliver(self, topic: str, payload: Dict[str, Any]):
+        """Broker callback: fan a message published by another node out to the local sockets."""
+        if payload.get("node") == self.node:
+            return  # Fanned out when published
+        scope, _, key = topic.partition(":")
+        if scope == "user":
+            connection = self.user_connections.get(key)
+            if connection:
+                self.send(connection, payload["message"])
+            return
+        if payload.get("state") is not None:
+            state_sync.observe(key, payload["version"], payload["state"])
+        kind = payload.get("kind")
+        if kind == "batch":
+            state = state_sync.snapshot(key)
+            self._fan_out_batch(key, _attach(payload["full"], state), _attach(payload["delta"], state))
+        elif kind == "patch":
+            self._fan_out_patch(key, payload["message"])
+        elif kind == "except":
+            self._fan_out_except(key, payload["message"], payload["exclude"])
+    
+    def _state_fields(self, game_id: str) -> Dict[str, Any]:
+        """Committed state of a game for a publish (sent once, not in every message)."""
+        return {"version": state_sync.version(game_id), "state": state_sync.snapshot(game_id)}
+    
+    # ============== Outboxes ==============
+    
+    def _open(self, websocket: WebSocket, codec=JSON_CODEC):
+        outbox = self.outboxes[websocket] = Outbox(codec)
+        outbox.task = asyncio.get_running_loop().create_task(self._write(websocket, outbox))
+    
+    def _close(self, websocket: WebSocket):
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox and outbox.task is not asyncio.current_task():
+            outbox.task.cancel()
+    
+    async def _write(self, websocket: WebSocket, outbox: Outbox):
+        """Writer task of a connection: sends its frames in order."""
+        try:
+            while True:
+                if not outbox.frames:
+                    outbox.snapshot_only = False  # Caught up
+                    outbox.wake.clear()
+                    await outbox.wake.wait()
+                    continue
+                payload, game_id, _ = outbox.frames.popleft()
+                if len(outbox.frames) <= SOCKET_QUEUE_LIMIT:
+                    outbox.over_since = None
+                codec = outbox.codec
+                if game_id is not None:
+                    if state_sync.snapshot(game_id) is None:
+                        continue  # Game forgotten meanwhile
+                    payload = codec.bind(payload, state_sync.version(game_id), state_sync.encoded(game_id, codec))
+                send = websocket.send_bytes(payload) if codec.binary else websocket.send_text(payload)
+                await asyncio.wait_for(send, SOCKET_SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            await self._drop(websocket, f"send took over {SOCKET_SEND_TIMEOUT}s")
+        except Exception as e:
+            print(f"Failed to send to connection: {e}")
+            self.disconnect(websocket)
+            self.disconnect_lobby(websocket)
+    
+    async def _drop(self, websocket: WebSocket, reason: str):
+        """Disconnect a client that cannot keep up; it reconnects and gets a fresh snapshot."""
+        print(f"Dropping slow WebSocket client: {reason}")
+        self.dropped += 1
+        self.disconnect(websocket)
+        self.disconnect_lobby(websocket)
+        try:
+            await asyncio.wait_for(websocket.close(code=SLOW_CLIENT_CLOSE_CODE, reason="Too slow"), SOCKET_SEND_TIMEOUT)
+        except Exception:
+            pass
+    
+    def _enqueue(self, websocket: WebSocket, frames: List[Frame], snapshot: Optional[Frame] = None):
+        """
+        Queue frames for a connection without waiting. `snapshot` is a full
+        state frame that can stand in for the backlog of a lagging game client.
+        """
+        outbox = self.outboxes.get(websocket)
+        if outbox is None or not frames:
+            return
+        if outbox.snapshot_only:
+            if snapshot:
+                outbox.frames.clear()
+                outbox.frames.append(snapshot)
+                outbox.wake.set()
+            return
+        if any(state_only for _, _, state_only in frames) and any(queued[2] for queued in outbox.frames):
+            kept = deque(queued for queued in outbox.frames if not queued[2])
+            self.superseded += len(outbox.frames) - len(kept)
+            outbox.frames = kept
+        outbox.frames.extend(frames)
+        outbox.wake.set()
+        if len(outbox.frames) <= SOCKET_QUEUE_LIMIT:
+            return
+        now = time.monotonic()
+        if outbox.over_since is None:
+            outbox.over_since = now
+        if now - outbox.over_since < SOCKET_SLOW_SECONDS and len(outbox.frames) <= 4 * SOCKET_QUEUE_LIMIT:
+            return
+        if snapshot is None:
+            asyncio.get_running_loop().create_task(self._drop(websocket, f"{len(outbox.frames)} frames behind"))
+            return
+        self.downgraded += 1
+        outbox.snapshot_only = True
+        outbox.over_since = None
+        outbox.frames.clear()
+        outbox.frames.append(snapshot)
+    
+    def codec(self, websocket: WebSocket):
+        outbox = self.outboxes.get(websocket)
+        return outbox.codec if outbox else JSON_CODEC
+    
+    def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one connection (in order with its broadcasts)."""
+        self._enqueue(websocket, [(self.codec(websocket).frame(message), None, False)])
+    
+    def send_stats(self) -> Dict[str, Any]:
+        """Outbox metrics (exposed on /health)."""
+        lengths = [len(outbox.frames) for outbox in self.outboxes.values()]
+        return {
+            "connections": len(lengths),
+            "queued_frames": sum(lengths),
+            "max_queued": max(lengths, default=0),
+            "snapshot_only": sum(1 for outbox in self.outboxes.values() if outbox.snapshot_only),
+            "downgraded": self.downgraded,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "broker": self.broker.stats(),
+        }
     
     async def connect(
         self, 
         websocket: WebSocket, 
         game_id: str, 
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        delta: bool = False,
+        codec=JSON_CODEC
     ):
-        """Accept a new WebSocket connection."""
+        """Accept a new WebSocket connection (`codec`: frame format, see wire_codec.codec_for)."""
         await websocket.accept()
         
         # Add to game connections
         if game_id not in self.game_connections:
             self.game_connections[game_id] = set()
+            self.broker.subscribe(f"game:{game_id}")
         self.game_connections[game_id].add(websocket)
         
         # Add to user connections if provided
         if user_id:
             self.user_connections[user_id] = websocket
+            self.broker.subscribe(f"user:{user_id}")
         
         # Track for cleanup
         self.connection_info[websocket] = (game_id, user_id)
+        if delta:
+            self.delta_connections.add(websocket)
+        self._open(websocket, codec)
+        if codec.binary:
+            self._enqueue(websocket, [(codec.protocol(), None, False)])
         
         print(f"WebSocket connected: game={game_id}, user={user_id}")
     
@@ -56,61 +331,255 @@ class ConnectionManager:
             self.game_connections[game_id].discard(websocket)
             if not self.game_connections[game_id]:
                 del self.game_connections[game_id]
+                self.broker.unsubscribe(f"game:{game_id}")
         
         # Remove from user connections
         if user_id and user_id in self.user_connections:
             if self.user_connections[user_id] == websocket:
                 del self.user_connections[user_id]
+                self.broker.unsubscribe(f"user:{user_id}")
         
         # Remove tracking
         del self.connection_info[websocket]
+        self.delta_connections.discard(websocket)
+        self._close(websocket)
         
         print(f"WebSocket disconnected: game={game_id}, user={user_id}")
     
+    def _wants_patches(self, game_id: str) -> bool:
+        """Whether a game has delta clients here, or maybe on other nodes."""
+        connections = self.game_connections.get(game_id, ())
+        return any(c in self.delta_connections for c in connections) or self.broker.reaches_others(f"game:{game_id}")
+    
+    def _versioned(
+        self, game_id: str, messages: List[dict], stamp: Optional[Callable[[int], None]] = None
+    ) -> Tuple[List[dict], List[dict]]:
+        """
+        Commit the newest game_state carried by a batch of messages (if any).
+        
+        Returns (full_messages, delta_messages): in the first every stateful
+        message carries the whole committed state; in the second only the first
+        one carries the patch against the previous version and the rest just
+        reference the new version. The state is committed once per batch, and
+        only diffed when some client takes patches.
+        """
+        states = [m["game_state"] for m in messages if isinstance(m.get("game_state"), dict)]
+        if not states:
+            return messages, messages
+        
+        state = states[-1]
+        envelope = state_sync.commit(game_id, state, stamp, diff=self._wants_patches(game_id))
+        version = state["version"]
+        full_messages = [
+            {**m, "game_state": state, "version": version} if isinstance(m.get("game_state"), dict) else m
+            for m in messages
+        ]
+        if envelope is None or envelope["patch"] is None:
+            # Nothing to diff against yet (or no delta client) - everyone gets the full state
+            return full_messages, full_messages
+        
+        delta_messages = []
+        patched = False
+        for m in messages:
+            if not isinstance(m.get("game_state"), dict):
+                delta_messages.append(m)
+                continue
+            delta_message = {k: v for k, v in m.items() if k != "game_state"}
+            delta_message["version"] = version
+            if envelope["patch"] and not patched:
+                delta_message["base_version"] = envelope["base_version"]
+                delta_message["patch"] = envelope["patch"]
+                patched = True
+            delta_messages.append(delta_message)
+        return full_messages, delta_messages
+    
     async def broadcast(self, game_id: str, message: dict):
         """Broadcast a message to all connections in a game."""
+        await self.broadcast_batch(game_id, [message])
+    
+    async def broadcast_batch(
+        self, game_id: str, messages: List[dict], stamp: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Broadcast messages to all connections in a game, in order, sharing one state version
+        (`stamp` receives the committed version, see StateSync.commit).
+        """
+        topic = f"game:{game_id}"
+        if game_id not in self.game_connections and not self.broker.reaches_others(topic):
+            return
+        
+        full_messages, delta_messages = self._versioned(game_id, messages, stamp)
+        self._fan_out_batch(game_id, full_messages, delta_messages)
+        if self.broker.reaches_others(topic):
+            payload = {"kind": "batch", "full": _detach(full_messages), "delta": _detach(delta_messages)}
+            if any(isinstance(m.get("game_state"), dict) for m in messages):
+                payload.update(self._state_fields(game_id))
+            await self._publish(topic, payload)
+    
+    def _fan_out_batch(self, game_id: str, full_messages: List[dict], delta_messages: List[dict]):
+        """Queue a versioned batch (see _versioned) for the local connections of a game."""
         if game_id not in self.game_connections:
             return
         
-        from fastapi.encoders import jsonable_encoder
-        json_message = jsonable_encoder(message)
+        # Every frame is encoded once per format for all connections, the committed state once
+        # per version. Full-state clients get heads bound to the latest state when written;
+        # delta clients need every patch in order, so theirs are final.
+        def full_frames(codec) -> List[Frame]:
+            return [
+                (codec.head(m), game_id, m.get("type") in STATE_ONLY_TYPES) if isinstance(m.get("game_state"), dict)
+                else (codec.frame(m), None, False)
+                for m in full_messages
+            ]
         
-        # Create tasks for all sends
-        dead_connections = []
+        def delta_frames(codec) -> List[Frame]:
+            return [
+                (codec.frame(m, state_sync.encoded(game_id, codec) if isinstance(m.get("game_state"), dict) else None), None, False)
+                for m in delta_messages
+            ]
         
-        for connection in self.game_connections[game_id]:
-            try:
-                await connection.send_json(json_message)
-            except Exception as e:
-                print(f"Failed to send to connection: {e}")
-                dead_connections.append(connection)
+        encoded: Dict[Tuple[str, bool], List[Frame]] = {}
+        for connection in list(self.game_connections[game_id]):
+            codec = self.codec(connection)
+            delta = connection in self.delta_connections
+            key = (codec.name, delta)
+            if key not in encoded:
+                encoded[key] = delta_frames(codec) if delta else full_frames(codec)
+            self._enqueue(connection, encoded[key], self._snapshot_frame(game_id, codec))
+    
+    def _snapshot_frame(self, game_id: str, codec) -> Optional[Frame]:
+        """Latest-state frame of a game, for clients downgraded to snapshots (None if untracked)."""
+        if state_sync.snapshot(game_id) is None:
+            return None
+        return codec.head({"type": "SYNC_RESPONSE"}), game_id, True
+    
+    async def send_snapshot(
+        self,
+        websocket: WebSocket,
+        game_id: str,
+        game_state: dict,
+        message_type: str,
+        stamp: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Send a full state snapshot to one connection.
+        
+        If the live state moved past the last broadcast version, the change is
+        committed and pushed to the other delta clients first, so that every
+        subscriber stays on the same version line.
+        """
+        envelope = state_sync.commit(game_id, game_state, stamp, diff=self._wants_patches(game_id))
         
-        # Clean up dead connections
-        for conn in dead_connections:
-            self.disconnect(conn)
+        if envelope and envelope["patch"]:
+            patch_message = {
+                "type": "STATE_PATCH",
+                "version": envelope["version"],
+                "base_version": envelope["base_version"],
+                "patch": envelope["patch"]
+            }
+            self._fan_out_patch(game_id, patch_message, websocket)
+            topic = f"game:{game_id}"
+            if self.broker.reaches_others(topic):
+                await self._publish(topic, {"kind": "patch", "message": patch_message, **self._state_fields(game_id)})
+        
+        # An unchanged state reuses the frame encoded for its version
+        codec = self.codec(websocket)
+        head = codec.head({"type": message_type})
+        if websocket in self.delta_connections:
+            frame = codec.bind(head, game_state["version"], state_sync.encoded(game_id, codec))
+            self._enqueue(websocket, [(frame, None, False)])
+        else:
+            self._enqueue(websocket, [(head, game_id, message_type in STATE_ONLY_TYPES)])
+    
+    def _fan_out_patch(self, game_id: str, patch_message: dict, skip: Optional[WebSocket] = None):
+        """Queue a STATE_PATCH for the local delta connections of a game (but `skip`)."""
+        patch_frames: Dict[str, List[Frame]] = {}  # Per format
+        for connection in list(self.game_connections.get(game_id, set())):
+            if connection is skip or connection not in self.delta_connections:
+                continue
+            codec = self.codec(connection)
+            if codec.name not in patch_frames:
+                patch_frames[codec.name] = [(codec.frame(patch_message), None, False)]
+            self._enqueue(connection, patch_frames[codec.name], self._snapshot_frame(game_id, codec))
     
     async def send_to_user(self, user_id: str, message: dict):
-        """Send a message to a specific user."""
+        """Send a message to a specific user (on whichever node they are connected)."""
         connection = self.user_connections.get(user_id)
         if connection:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                print(f"Failed to send to user {user_id}: {e}")
-                self.disconnect(connection)
+            self.send(connection, message)
+        topic = f"user:{user_id}"
+        if self.broker.reaches_others(topic):
+            await self._publish(topic, {"kind": "user", "message": message})
     
     async def broadcast_except(self, game_id: str, message: dict, exclude_user_id: str):
         """Broadcast to all except one user."""
+        self._fan_out_except(game_id, message, exclude_user_id)
+        topic = f"game:{game_id}"
+        if self.broker.reaches_others(topic):
+            await self._publish(topic, {"kind": "except", "message": message, "exclude": exclude_user_id})
+    
+    def _fan_out_except(self, game_id: str, message: dict, exclude_user_id: str):
         if game_id not in self.game_connections:
             return
         
-        for connection in self.game_connections[game_id]:
+        frames: Dict[str, List[Frame]] = {}  # Per format
+        for connection in list(self.game_connections[game_id]):
             info = self.connection_info.get(connection)
             if info and info[1] == exclude_user_id:
                 continue
-            
+            codec = self.codec(connection)
+            if codec.name not in frames:
+                frames[codec.name] = [(codec.frame(message), None, False)]
+            self._enqueue(connection, frames[codec.name])
+    
+    # ============== Lobby feed ==============
+    
+    async def connect_lobby(self, websocket: WebSocket, filters: Dict[str, Any]):
+        """Accept a lobby subscriber."""
+        await websocket.accept()
+        self.lobby_connections[websocket] = filters
+        self._open(websocket)
+    
+    def set_lobby_filters(self, websocket: WebSocket, filters: Dict[str, Any]):
+        if websocket in self.lobby_connections:
+            self.lobby_connections[websocket] = filters
+    
+    def disconnect_lobby(self, websocket: WebSocket):
+        if self.lobby_connections.pop(websocket, None) is not None:
+            self._close(websocket)
+    
+    def lobby_changed(self, game_id: str, old: Optional[dict], new: Optional[dict]):
+        """Listener of the lobby index: remember the change until the next push."""
+        pending = self.lobby_changes.get(game_id)
+        if pending:
+            pending[1] = new
+        else:
+            self.lobby_changes[game_id] = [old, new]
+    
+    def take_lobby_changes(self, with_host) -> List[LobbyChange]:
+        """Net changes since the last call, summaries completed by `with_host` (host name and avatar)."""
+        changes, self.lobby_changes = self.lobby_changes, {}
+        return [
+            (game_id, old and with_host(old), new and with_host(new))
+            for game_id, (old, new) in changes.items()
+            if old != new
+        ]
+    
+    async def push_lobby(self, changes: List[LobbyChange]):
+        """Send a batch of lobby changes to the subscribers it concerns, one message each."""
+        encoded: Dict[str, List[Frame]] = {}  # One frame per distinct filter set
+        for connection, filters in list(self.lobby_connections.items()):
+            key = json.dumps(filters, sort_keys=True)
+            if key not in encoded:
+                events = lobby_events(changes, filters)
+                encoded[key] = [(JSON_CODEC.encode({"type": "LOBBY_EVENTS", "events": events}), None, False)] if events else []
+            self._enqueue(connection, encoded[key])
+    
+    async def close_game(self, game_id: str, code: int = 1000, reason: str = ""):
+        """Close every connection of a game (e.g. the game moved to another worker)."""
+        for connection in list(self.game_connections.get(game_id, set())):
+            self.disconnect(connection)
             try:
-                await connection.send_json(message)
+                await connection.close(code=code, reason=reason)
             except Exception:
                 pass
     
@@ -0,0 +1,161 @@
+"""
+Versioned game state sync for WebSocket clients.
+
+Instead of shipping the full GameState on every broadcast, the last broadcast
+snapshot of each game is kept here and every new state is diffed against it
+(only compared, for games without delta clients).
+Clients that connect with `?delta=1` receive JSON-Patch style operations
+(RFC 6902 subset: add / remove / replace) plus the version pair they apply to.
+Legacy clients keep receiving the full state.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Max number of leading items a list may lose between two versions and still be
+# diffed item-by-item (e.g. a log tail that drops old entries as new ones arrive)
+MAX_LIST_SHIFT = 16
+
+
+def _escape(key: Any) -> str:
+    """Escape a key for use in a JSON pointer."""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def diff_state(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """Build patch operations that turn `old` into `new`."""
+    if old is new:
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, old_value in old.items():
+            key_path = f"{path}/{_escape(key)}"
+            if key not in new:
+                ops.append({"op": "remove", "path": key_path})
+            else:
+                ops.extend(diff_state(old_value, new[key], key_path))
+        for key, new_value in new.items():
+            if key not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(key)}", "value": new_value})
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_list(old, new, path)
+
+    if type(old) is type(new) and old == new:
+        return []
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_list(old: list, new: list, path: str) -> List[Dict[str, Any]]:
+    """Diff two lists, recognising appends and head trimming."""
+    if len(old) == len(new):
+        ops = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            ops.extend(diff_state(old_item, new_item, f"{path}/{i}"))
+        # A list where most items changed is cheaper to send whole
+        if len(ops) > len(new):
+            return [{"op": "replace", "path": path, "value": new}]
+        return ops
+
+    # Append-only growth, optionally after dropping a few items from the head
+    for shift in range(min(len(old), MAX_LIST_SHIFT) + 1):
+        kept = len(old) - shift
+        if kept > len(new):
+            continue
+        if old[shift:] == new[:kept]:
+            ops = [{"op": "remove", "path": f"{path}/0"} for _ in range(shift)]
+            ops.extend({"op": "add", "path": f"{path}/-", "value": item} for item in new[kept:])
+            if len(ops) <= len(new):
+                return ops
+            break
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+class StateSync:
+    """Tracks the last broadcast state and version of every game."""
+
+    def __init__(self):
+        # game_id -> (version, state dict as last sent to clients)
+        self.snapshots: Dict[str, Tuple[int, dict]] = {}
+        # game_id -> (version, {codec name: encoded state}), shared by broadcasts and snapshots
+        self.frames: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def commit(
+        self,
+        game_id: str,
+        state: dict,
+        stamp: Optional[Callable[[int], None]] = None,
+        diff: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Record `state` as the newest version of a game.
+
+        Returns a delta envelope (base_version, version, patch) relative to the
+        previous snapshot, or None if there is nothing to diff against yet.
+        Without `diff` (no client takes patches) the states are only compared
+        and the patch is None. The version is stamped on the state dict and
+        passed to `stamp` (e.g. GameState.stamp_version).
+        """
+        previous = self.snapshots.get(game_id)
+        body = {k: v for k, v in state.items() if k != "version"}
+
+        if previous is None:
+            version = max(state.get("version", 0), 1)
+            patch = None
+        else:
+            base_version, base_state = previous
+            base_body = {k: v for k, v in base_state.items() if k != "version"}
+            if diff:
+                patch = diff_state(base_body, body)
+                changed = bool(patch)
+            else:
+                patch = None
+                changed = base_body != body
+            version = base_version + 1 if changed else base_version
+
+        state["version"] = version
+        self.snapshots[game_id] = (version, state)
+        if stamp is not None:
+            stamp(version)
+
+        if previous is None:
+            return None
+        return {"base_version": previous[0], "version": version, "patch": patch}
+
+    def observe(self, game_id: str, version: int, state: dict):
+        """Record a state committed by another node (kept only if newer, nothing is diffed)."""
+        if version > self.version(game_id):
+            self.snapshots[game_id] = (version, state)
+
+    def snapshot(self, game_id: str) -> Optional[dict]:
+        """Get the last committed state of a game."""
+        entry = self.snapshots.get(game_id)
+        return entry[1] if entry else None
+
+    def encoded(self, game_id: str, codec=None) -> Any:
+        """The last committed state of a game, encoded once per version and codec (JSON by default)."""
+        from wire_codec import JSON_CODEC
+        codec = codec or JSON_CODEC
+        version, state = self.snapshots[game_id]
+        cached = self.frames.get(game_id)
+        if not cached or cached[0] != version:
+            cached = self.frames[game_id] = (version, {})
+        if codec.name not in cached[1]:
+            cached[1][codec.name] = codec.encode(state)
+        return cached[1][codec.name]
+
+    def version(self, game_id: str) -> int:
+        """Get the last committed version of a game (0 if never broadcast)."""
+        entry = self.snapshots.get(game_id)
+        return entry[0] if entry else 0
+
+    def forget(self, game_id: str):
+        """Drop tracking for a game (deleted or finished)."""
+        self.snapshots.pop(game_id, None)
+        self.frames.pop(game_id, None)
+
+
+# Global tracker instance
+state_sync = StateSync()
@@ -74,11 +74,12 @@ def run_test():
             
         game_state = resp.json()["game_state"]
         logs = game_state.get("logs", [])
+        log_offset = game_state.get("log_offset", 0)  # logs only holds the newest entries
         
-        if len(logs) > last_log_count:
-            for log in logs[last_log_count:]:
+        if log_offset + len(logs) > last_log_count:
+            for log in logs[max(0, last_log_count - log_offset):]:
                 print(f"   LOG: {log}")
-            last_log_count = len(logs)
+            last_log_count = log_offset + len(logs)
         
         # Check whose turn it is
         current_idx = game_state.get("current_turn_index", 0)
@@ -0,0 +1,36 @@
+"""Shared helpers of the backend tests (run from backend/: python -m pytest tests)."""
+import asyncio
+import json
+import os
+import sys
+
+# No journal files from games created by tests
+os.environ.setdefault("GAME_JOURNAL_DIR", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeSocket:
+    """Stand-in for a Starlette WebSocket: records what is sent to it."""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = code
+
+
+async def settle():
+    """Let writer tasks flush their outboxes (and be idle when the loop is closed)."""
+    for _ in range(3):
+        await asyncio.sleep(0.01)
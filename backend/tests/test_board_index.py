@@ -0,0 +1,47 @@
+import pytest
+
+from game_engine import BOARD_TEMPLATES, NON_PURCHASABLE_GROUPS, GameEngine, create_board, get_board_index
+from log_store import log_store
+from simulator import SimConfig, new_game, run_bot_step
+
+
+@pytest.mark.parametrize("map_type", sorted(BOARD_TEMPLATES))
+def test_board_index_matches_a_board_scan(map_type):
+    board = create_board(map_type)
+    index = get_board_index(map_type, board)
+    for group in {tile.group for tile in board}:
+        assert index.group_tiles[group] == [tile.id for tile in board if tile.group == group]
+        assert index.group_size(group) == len(index.group_tiles[group])
+    assert index.purchasable == {tile.id for tile in board if tile.group not in NON_PURCHASABLE_GROUPS}
+
+
+def _scanned_counts(game):
+    counts = {}
+    for prop in game.board:
+        if prop.owner_id:
+            owned = counts.setdefault(prop.owner_id, {})
+            owned[prop.group] = owned.get(prop.group, 0) + 1
+    return counts
+
+
+@pytest.mark.parametrize("seed", [5, 12])  # Games with monopolies, trades and bankruptcies
+def test_group_counters_follow_every_ownership_change(seed):
+    engine = GameEngine()
+    game = new_game(engine, seed, SimConfig(players=4))
+    index = get_board_index(game.map_type, game.board)
+    monopolies = 0
+    try:
+        for _ in range(1500):
+            if game.game_status != "active":
+                break
+            run_bot_step(engine, game.game_id)
+            counted = {owner: {g: n for g, n in groups.items() if n} for owner, groups in game._group_owned.items()}
+            assert {owner: groups for owner, groups in counted.items() if groups} == _scanned_counts(game)
+            for prop in game.board:
+                if prop.owner_id and prop.group not in NON_PURCHASABLE_GROUPS | {"Station", "Utility"}:
+                    full = counted.get(prop.owner_id, {}).get(prop.group, 0) == index.group_size(prop.group)
+                    assert prop.is_monopoly == full, (prop.name, prop.group)
+                    monopolies += full
+        assert monopolies and game.game_status == "finished"
+    finally:
+        log_store.forget(game.game_id)
@@ -0,0 +1,162 @@
+"""Broadcasts between managers over the brokers (RespBroker against an in-process RESP server)."""
+import asyncio
+
+import broker as broker_module
+from broker import LocalBroker, RespBroker, encode_command, read_reply
+from conftest import FakeSocket, settle
+from socket_manager import ConnectionManager
+from state_sync import state_sync
+
+
+class RespServer:
+    """Minimal Redis pub/sub stand-in: PUBLISH, SUBSCRIBE and UNSUBSCRIBE."""
+
+    def __init__(self):
+        self.subscribers = {}  # channel -> writers
+        self.lose_next_ack = False  # Deliver the next publish, then drop the connection before replying
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return f"redis://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    def close(self):
+        self.server.close()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                command = await read_reply(reader)
+                name, args = command[0].decode().upper(), command[1:]
+                if name == "PUBLISH":
+                    channel, data = args[0].decode(), args[1]
+                    targets = list(self.subscribers.get(channel, ()))
+                    for target in targets:
+                        target.write(encode_command("message", channel, data))
+                    if self.lose_next_ack:
+                        self.lose_next_ack = False
+                        writer.close()
+                        return
+                    writer.write(b":%d\r\n" % len(targets))
+                elif name == "SUBSCRIBE":
+                    for i, channel in enumerate(args, 1):
+                        self.subscribers.setdefault(channel.decode(), set()).add(writer)
+                        writer.write(encode_command("subscribe", channel, i))
+                elif name == "UNSUBSCRIBE":
+                    for channel in args:
+                        self.subscribers.get(channel.decode(), set()).discard(writer)
+                        writer.write(encode_command("unsubscribe", channel, 0))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for writers in self.subscribers.values():
+                writers.discard(writer)
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def _pair(url):
+    """Two managers on the broker, `b` holding a full-state and a delta client of game BRK."""
+    a, b = ConnectionManager(), ConnectionManager()
+    await a.start_broker(RespBroker(url))
+    await b.start_broker(RespBroker(url))
+    full, delta = FakeSocket(), FakeSocket()
+    await b.connect(full, "BRK", "u1")
+    await b.connect(delta, "BRK", "u2", delta=True)
+    await _until(lambda: b.broker.stats()["connected"] and a.broker.stats()["connected"])
+    await settle()
+    return a, b, full, delta
+
+
+def test_resp_round_trip_in_order_and_pipelined():
+    async def run():
+        server = RespServer()
+        a, b, full, delta = await _pair(await server.start())
+        try:
+            for i in range(50):
+                await a.broadcast_batch("BRK", [{"type": "DICE_ROLLED", "n": i}, {"type": "S", "game_state": {"money": i}}])
+            await a.send_to_user("u1", {"type": "DM"})
+            await _until(lambda: len(full.sent) == 101)
+            await settle()
+
+            assert [m["n"] for m in full.sent if m["type"] == "DICE_ROLLED"] == list(range(50))
+            assert full.sent[-2]["game_state"]["money"] == 49 and full.sent[-1] == {"type": "DM"}
+            versions = [m["version"] for m in delta.sent if m["type"] == "S"]
+            assert versions == sorted(versions) and delta.sent[-1]["patch"]
+            stats = a.broker.stats()
+            assert stats["published"] == 51 and stats["batches"] < stats["published"]
+        finally:
+            await a.close_broker()
+            await b.close_broker()
+            server.close()
+            await settle()
+
+    try:
+        asyncio.run(run())
+    finally:
+        state_sync.forget("BRK")
+
+
+def test_resp_republish_after_reconnect_is_delivered_once(monkeypatch):
+    monkeypatch.setattr(broker_module, "RECONNECT_SECONDS", 0.01)
+
+    async def run():
+        server = RespServer()
+        a, b, full, _ = await _pair(await server.start())
+        try:
+            server.lose_next_ack = True
+            await a.broadcast("BRK", {"type": "CHAT_MESSAGE", "message": "once"})
+            await _until(lambda: b.broker.stats()["duplicates"] == 1)
+            await a.broadcast("BRK", {"type": "CHAT_MESSAGE", "message": "next"})
+            await _until(lambda: len(full.sent) == 2)
+            await settle()
+            assert [m["message"] for m in full.sent] == ["once", "next"]
+        finally:
+            await a.close_broker()
+            await b.close_broker()
+            server.close()
+            await settle()
+
+    asyncio.run(run())
+
+
+def test_resp_pending_queue_drops_the_oldest(monkeypatch):
+    monkeypatch.setattr(broker_module, "BROKER_PENDING_LIMIT", 3)
+
+    async def run():
+        resp = RespBroker("redis://127.0.0.1:1")  # Never started
+        for i in range(5):
+            await resp.publish("game:BRK", {"n": i})
+        assert len(resp.pending) == 3 and resp.stats()["dropped"] == 2
+        assert b'"n":4' in resp.pending[-1]
+
+        resp.pending.popleft()  # Sent, not acknowledged
+        resp._requeue([b"unacked"])
+        assert resp.pending[0] == b"unacked" and len(resp.pending) == 3
+        resp._requeue([b"older"])  # Full: the oldest goes
+        assert resp.pending[0] == b"unacked" and resp.stats()["dropped"] == 3
+
+    asyncio.run(run())
+
+
+def test_local_broker_between_managers_of_one_process():
+    async def run():
+        a, b = ConnectionManager(), ConnectionManager()
+        await a.start_broker(LocalBroker(hub={}))
+        await b.start_broker(LocalBroker(hub=a.broker.hub))
+        client = FakeSocket()
+        await b.connect(client, "BRK2", "u9")
+        await a.broadcast("BRK2", {"type": "HELLO"})
+        await a.send_to_user("u9", {"type": "DM"})
+        await settle()
+        assert client.sent == [{"type": "HELLO"}, {"type": "DM"}]
+        b.disconnect(client)
+        assert not a.broker.hub
+
+    asyncio.run(run())
@@ -0,0 +1,86 @@
+"""Chance decks compiled per map, drawn from seeded per-game piles."""
+import dataclasses
+import json
+
+import pytest
+
+import game_engine
+from game_engine import BOARD_TEMPLATES, CHANCE_CARDS, CHANCE_DECKS, GameEngine, get_board_index
+from log_store import log_store
+from models import Player
+
+
+def _game(engine, game_id, map_type="World", seed=7):
+    game = engine.create_game(game_id, map_type=map_type, seed=seed)
+    engine.add_player(game_id, Player(id="p1", name="P1", character="Putin", color="#fff"))
+    engine.add_player(game_id, Player(id="p2", name="P2", character="Trump", color="#fff"))
+    return game
+
+
+@pytest.fixture
+def drawn(monkeypatch):
+    """Replace every card effect with one recording the card, so a draw is just a pop."""
+    cards = []
+    for kind in game_engine._CHANCE_EFFECTS:
+        monkeypatch.setitem(game_engine._CHANCE_EFFECTS, kind, lambda engine, game, player, card, text: cards.append(card))
+    return cards
+
+
+@pytest.mark.parametrize("map_type", sorted(BOARD_TEMPLATES))
+def test_decks_are_compiled_once_per_map(map_type):
+    deck = CHANCE_DECKS[map_type]
+    assert isinstance(deck, tuple) and len(deck) == len(CHANCE_CARDS)
+    assert {card.kind for card in deck} <= set(game_engine._CHANCE_EFFECTS)
+    assert all(0 <= card.position < len(BOARD_TEMPLATES[map_type]) for card in deck)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        deck[0].amount = 0
+
+
+def test_pile_draws_every_card_before_reshuffling(drawn):
+    engine = GameEngine()
+    game = _game(engine, "DECK1")
+    try:
+        deck = CHANCE_DECKS["World"]
+        for _ in range(2 * len(deck)):
+            engine._draw_chance_card(game, game.players["p1"])
+        first, second = drawn[:len(deck)], drawn[len(deck):]
+        assert sorted(map(id, first)) == sorted(map(id, deck)) == sorted(map(id, second))
+        assert first != second  # Reshuffled, not replayed
+    finally:
+        log_store.forget("DECK1")
+
+
+def test_draws_are_reproducible_from_the_seed_and_a_snapshot(drawn):
+    engine = GameEngine()
+    a, b = _game(engine, "DECK2"), _game(engine, "DECK3")
+    try:
+        for _ in range(5):
+            engine._draw_chance_card(a, a.players["p1"])
+            engine._draw_chance_card(b, b.players["p1"])
+        assert drawn[0::2] == drawn[1::2]
+
+        snapshot = json.loads(json.dumps(engine.snapshot(a)))
+        expected = [CHANCE_DECKS["World"][i] for i in reversed(a.chance_pile)]
+        restored = GameEngine().restore_game(snapshot["state"], snapshot["rng"], snapshot["chance_pile"])
+        del drawn[:]
+        for _ in range(len(expected)):
+            engine._draw_chance_card(restored, restored.players["p1"])
+        assert drawn == expected
+    finally:
+        for game_id in ("DECK2", "DECK3"):
+            log_store.forget(game_id)
+
+
+@pytest.mark.parametrize("map_type", sorted(BOARD_TEMPLATES))
+def test_jail_card_uses_the_maps_jail(map_type):
+    engine = GameEngine()
+    game = _game(engine, "DECK4", map_type)
+    try:
+        jail_card = next(i for i, card in enumerate(CHANCE_DECKS[map_type]) if card.kind == "go_to_jail")
+        game.chance_pile = [jail_card]
+        player = game.players["p1"]
+        result = engine._draw_chance_card(game, player)
+        assert player.is_jailed and result["action"] == "go_to_jail"
+        assert player.position == get_board_index(map_type, game.board).group_tiles["Jail"][0]
+    finally:
+        log_store.forget("DECK4")
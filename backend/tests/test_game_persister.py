@@ -0,0 +1,100 @@
+"""Saved games are indexed from their stored metadata and rehydrated only when looked up."""
+import asyncio
+
+from game_engine import GameEngine
+from game_persister import GamePersister, _encode_rows
+from lobby_index import LobbyIndex
+from log_store import log_store
+from models import Player
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class _Session:
+    """Answers the persister's load query with fixed (game_id, state_json) rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        return _Result(self.rows)
+
+
+def _saved_row(game_id, with_meta=True):
+    source = GameEngine()
+    source.create_game(game_id, host_id="u1", seed=1)
+    for i, character in enumerate(("Putin", "Trump"), 1):
+        source.add_player(game_id, Player(id=f"p{i}", user_id=f"u{i}", name=f"P{i}", character=character, color="#fff"))
+    row = GamePersister(source, None)._row(source.games[game_id])
+    stored = _encode_rows([row])[0]["state_json"]
+    log_store.forget(game_id)
+    if not with_meta:
+        del stored["meta"]
+    return game_id, stored
+
+
+def _load(rows):
+    engine = GameEngine(lobby=LobbyIndex())
+    persister = GamePersister(engine, lambda: _Session(rows))
+    assert asyncio.run(persister.load()) == len(rows)
+    return engine
+
+
+def test_saved_games_are_indexed_without_hydrating():
+    engine = _load([_saved_row("SAVE1"), _saved_row("SAVE2")])
+    try:
+        assert engine.user_game_ids("u2") == {"SAVE1": "p2", "SAVE2": "p2"}
+        assert not engine.games.is_loaded("SAVE1") and not engine.games.is_loaded("SAVE2")
+
+        engine.delete_game("SAVE2")
+        active = engine.get_user_active_games("u1")
+        assert [g["game_id"] for g in active] == ["SAVE1"]
+        assert engine.games.is_loaded("SAVE1")
+        assert engine.user_game_ids("u1") == {"SAVE1": "p1"}
+    finally:
+        log_store.forget("SAVE1")
+
+
+def test_rows_without_metadata_are_hydrated_at_load():
+    engine = _load([_saved_row("SAVE3", with_meta=False)])
+    try:
+        assert engine.games.is_loaded("SAVE3")
+        assert engine.user_game_ids("u1") == {"SAVE3": "p1"}
+    finally:
+        log_store.forget("SAVE3")
+
+
+def test_released_saved_game_leaves_the_index():
+    engine = _load([_saved_row("SAVE4")])
+    engine.release_game("SAVE4")
+    assert "SAVE4" not in engine.games
+    assert engine.user_game_ids("u1") == {}
+
+
+def test_saved_games_are_listed_without_hydrating():
+    engine = _load([_saved_row("SAVE5"), _saved_row("SAVE6")])
+    try:
+        games, _ = engine.lobby.page()
+        assert [g["game_id"] for g in games] == ["SAVE5", "SAVE6"]
+        assert games[0]["player_count"] == 2 and games[0]["taken_characters"] == ["Putin", "Trump"]
+        assert not engine.games.is_loaded("SAVE5")
+
+        engine.games.get("SAVE5")
+        assert engine.lobby.page()[0] == games
+        engine.delete_game("SAVE6")
+        assert [g["game_id"] for g in engine.lobby.page()[0]] == ["SAVE5"]
+        assert engine.lobby.host_games == {"u1": 1}
+    finally:
+        log_store.forget("SAVE5")
@@ -0,0 +1,43 @@
+from game_engine import GameTable
+from models import GameState
+
+
+def _table():
+    table = GameTable()
+    hydrated = []
+
+    def hydrator(game_id, snapshot):
+        hydrated.append(game_id)
+        table[game_id] = GameState(game_id=game_id, host_id=snapshot["host"])
+
+    table.hydrator = hydrator
+    table["LIVE"] = GameState(game_id="LIVE", host_id="h0")
+    table.pending.update({"P1": {"host": "h1"}, "P2": {"host": "h2"}})
+    return table, hydrated
+
+
+def test_enumeration_does_not_hydrate():
+    table, hydrated = _table()
+    assert list(table) == ["LIVE"]
+    assert list(table.keys()) == ["LIVE"] and [g.game_id for g in table.values()] == ["LIVE"]
+    assert dict(table.items()).keys() == {"LIVE"}
+    assert sorted(table.game_ids()) == ["LIVE", "P1", "P2"]
+    assert "P1" in table and len(table) == 3
+    assert not table.is_loaded("P1")
+    assert hydrated == []
+
+
+def test_lookup_hydrates_one_game():
+    table, hydrated = _table()
+    assert table.get("P1").host_id == "h1"
+    assert hydrated == ["P1"] and table.is_loaded("P1") and "P1" not in table.pending
+    assert table["P2"].host_id == "h2"
+    assert hydrated == ["P1", "P2"]
+    assert table.get("NOPE") is None
+
+
+def test_pop_drops_a_pending_game_unhydrated():
+    table, hydrated = _table()
+    table.pop("P1", None)
+    del table["P2"]
+    assert table.game_ids() == ["LIVE"] and hydrated == []
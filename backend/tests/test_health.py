@@ -0,0 +1,41 @@
+"""/health is served by a single, cheap handler carrying every component's stats."""
+from fastapi.testclient import TestClient
+
+import main
+from game_engine import engine
+
+
+class _CountSession:
+    """Answers the user count query, recording the statements it gets."""
+
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(str(statement).lower())
+        return self
+
+    def scalar_one(self):
+        return 7
+
+
+def test_single_health_route_with_stats(monkeypatch):
+    statements = []
+    monkeypatch.setattr(main, "async_session", lambda: _CountSession(statements))
+    monkeypatch.setitem(engine.games.pending, "HEALTH1", {})
+    routes = [route for route in main.app.routes if getattr(route, "path", None) == "/health"]
+    assert len(routes) == 1
+
+    body = TestClient(main.app).get("/health").json()
+    assert body["status"] == "healthy"
+    assert body["users_registered"] == 7 and len(statements) == 1 and "count(" in statements[0]
+    assert body["games_pending"] == 1
+    assert body["games_active"] == len(engine.games) - 1
+    assert "queued_frames" in body["websocket_send"]
+    assert "bot_scheduler" in body
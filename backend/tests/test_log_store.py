@@ -0,0 +1,77 @@
+import json
+
+from game_engine import GameEngine
+from log_store import CHUNK_SIZE, LOG_TAIL_SIZE, GameLogStore, log_store
+from models import GameState
+
+
+def _game_with_logs(count: int) -> GameState:
+    game = GameState(game_id="LOGS1", host_id="")
+    for i in range(count):
+        game.add_log(f"entry {i}")
+    return game
+
+
+def _all_pages(store, game):
+    entries, cursor = [], None
+    while True:
+        page, _, cursor = store.page(game.game_id, game.logs, game.log_offset, before=cursor, limit=37)
+        entries[:0] = page
+        if cursor is None:
+            return entries
+
+
+def test_spilled_history_pages_back_to_the_first_entry():
+    game = _game_with_logs(3 * CHUNK_SIZE + 10)
+    try:
+        assert len(game.logs) == LOG_TAIL_SIZE
+        assert _all_pages(log_store, game) == [f"entry {i}" for i in range(3 * CHUNK_SIZE + 10)]
+    finally:
+        log_store.forget(game.game_id)
+
+
+def test_export_restore_round_trip():
+    game = _game_with_logs(2 * CHUNK_SIZE + 77)
+    try:
+        exported = json.loads(json.dumps(log_store.export(game.game_id)))
+        restored = GameLogStore()
+        restored.restore(game.game_id, exported, game.log_offset)
+        assert _all_pages(restored, game) == _all_pages(log_store, game)
+    finally:
+        log_store.forget(game.game_id)
+
+
+def test_restore_without_history_stops_at_the_tail():
+    game = _game_with_logs(300)
+    try:
+        restored = GameLogStore()
+        restored.restore(game.game_id, None, game.log_offset)
+        entries, start, cursor = restored.page(game.game_id, game.logs, game.log_offset, limit=200)
+        assert entries == game.logs and start == game.log_offset and cursor is None
+        # A stale cursor from before the restore does not point into the lost history
+        assert restored.page(game.game_id, game.logs, game.log_offset, before=10) == ([], game.log_offset, None)
+
+        # A history that does not end where the tail starts is not trusted
+        mismatched = {"base": 0, "chunks": [], "pending": ["x"]}
+        restored.restore(game.game_id, mismatched, game.log_offset)
+        assert restored.first(game.game_id, game.log_offset) == game.log_offset
+    finally:
+        log_store.forget(game.game_id)
+
+
+def test_engine_snapshot_carries_log_history():
+    source = GameEngine()
+    game = source.create_game("LOGS2", seed=1)
+    try:
+        for i in range(400):
+            game.add_log(f"entry {i}")
+        expected = _all_pages(log_store, game)
+        snapshot = json.loads(json.dumps(source.snapshot(game)))
+        log_store.forget(game.game_id)
+
+        restored = GameEngine().restore_game(
+            snapshot["state"], snapshot["rng"], snapshot["chance_pile"], snapshot["log_history"]
+        )
+        assert _all_pages(log_store, restored) == expected
+    finally:
+        log_store.forget("LOGS2")
@@ -0,0 +1,143 @@
+"""Per-connection outboxes: a slow client only delays itself."""
+import asyncio
+
+import socket_manager
+from conftest import FakeSocket, settle
+from socket_manager import SLOW_CLIENT_CLOSE_CODE, ConnectionManager
+from state_sync import state_sync
+
+
+class StalledSocket(FakeSocket):
+    """A client whose sends hang until `release()`."""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    def release(self):
+        self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        await super().send_text(text)
+
+
+def _event(kind, money):
+    return {"type": kind, "game_state": {"money": money}}
+
+
+def _run(game_id, scenario):
+    async def run():
+        manager = ConnectionManager()
+        try:
+            await scenario(manager)
+        finally:
+            for websocket in list(manager.connection_info):
+                if isinstance(websocket, StalledSocket):
+                    websocket.release()
+            await settle()
+            for websocket in list(manager.connection_info):
+                manager.disconnect(websocket)
+            await settle()
+
+    try:
+        asyncio.run(run())
+    finally:
+        state_sync.forget(game_id)
+
+
+def test_stalled_client_does_not_hold_up_the_room():
+    async def scenario(manager):
+        fast, slow = FakeSocket(), StalledSocket()
+        await manager.connect(fast, "OUT1", "u1")
+        await manager.connect(slow, "OUT1", "u2")
+        for money in (1, 2, 3):
+            await asyncio.wait_for(manager.broadcast("OUT1", _event("S", money)), 0.1)
+            await settle()
+        assert [m["game_state"]["money"] for m in fast.sent] == [1, 2, 3]
+        assert slow.sent == []
+        assert manager.send_stats()["queued_frames"] == 2  # The third is on the wire
+
+        slow.release()
+        await settle()
+        assert [m["type"] for m in slow.sent] == ["S", "S", "S"]
+
+    _run("OUT1", scenario)
+
+
+def test_lagging_client_is_downgraded_to_the_latest_snapshot(monkeypatch):
+    monkeypatch.setattr(socket_manager, "SOCKET_QUEUE_LIMIT", 2)
+    monkeypatch.setattr(socket_manager, "SOCKET_SLOW_SECONDS", 0)
+
+    async def scenario(manager):
+        slow = StalledSocket()
+        await manager.connect(slow, "OUT2", "u1")
+        for money in range(1, 6):
+            await manager.broadcast("OUT2", _event("DICE_ROLLED", money))
+            await settle()
+        stats = manager.send_stats()
+        assert stats["snapshot_only"] == 1 and stats["downgraded"] == 1
+        assert stats["queued_frames"] == 1
+
+        slow.release()
+        await settle()
+        # The frame already on the wire, then one snapshot of the latest state
+        assert [(m["type"], m["game_state"]["money"]) for m in slow.sent] == [("DICE_ROLLED", 1), ("SYNC_RESPONSE", 5)]
+        assert manager.send_stats()["snapshot_only"] == 0
+
+    _run("OUT2", scenario)
+
+
+def test_lagging_client_without_snapshot_is_dropped(monkeypatch):
+    monkeypatch.setattr(socket_manager, "SOCKET_QUEUE_LIMIT", 2)
+    monkeypatch.setattr(socket_manager, "SOCKET_SLOW_SECONDS", 0)
+
+    async def scenario(manager):
+        slow = StalledSocket()
+        await manager.connect(slow, "OUT3", "u1")
+        for i in range(5):
+            manager.send(slow, {"type": "NOTICE", "n": i})
+            await settle()
+        assert slow.closed == SLOW_CLIENT_CLOSE_CODE
+        assert slow not in manager.connection_info and slow not in manager.outboxes
+        assert manager.send_stats()["dropped"] == 1
+
+    _run("OUT3", scenario)
+
+
+def test_state_syncs_are_superseded_and_events_kept():
+    async def scenario(manager):
+        slow = StalledSocket()
+        await manager.connect(slow, "OUT4", "u1")
+        await manager.broadcast("OUT4", _event("TURN_ENDED", 1))  # On the wire
+        await settle()
+        await manager.send_snapshot(slow, "OUT4", {"money": 2}, "SYNC_RESPONSE")
+        await manager.broadcast("OUT4", _event("DICE_ROLLED", 3))
+        await manager.send_snapshot(slow, "OUT4", {"money": 4}, "SYNC_RESPONSE")
+        assert manager.send_stats()["superseded"] == 1
+
+        slow.release()
+        await settle()
+        assert [m["type"] for m in slow.sent] == ["TURN_ENDED", "DICE_ROLLED", "SYNC_RESPONSE"]
+
+    _run("OUT4", scenario)
+
+
+def test_queued_events_carry_the_latest_state():
+    async def scenario(manager):
+        slow = StalledSocket()
+        await manager.connect(slow, "OUT5", "u1")
+        await manager.broadcast("OUT5", _event("DICE_ROLLED", 1))  # Bound when it went on the wire
+        await settle()
+        await manager.broadcast("OUT5", _event("BOT_ACTIONS", 2))
+        await manager.broadcast("OUT5", {"type": "CHAT_MESSAGE", "message": "hi"})
+        await manager.broadcast("OUT5", _event("TURN_ENDED", 3))
+
+        slow.release()
+        await settle()
+        assert [(m["type"], m.get("game_state", {}).get("money")) for m in slow.sent] == [
+            ("DICE_ROLLED", 1), ("BOT_ACTIONS", 3), ("CHAT_MESSAGE", None), ("TURN_ENDED", 3)
+        ]
+        assert slow.sent[1]["version"] == slow.sent[3]["version"] == state_sync.version("OUT5")
+
+    _run("OUT5", scenario)
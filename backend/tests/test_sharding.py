@@ -0,0 +1,87 @@
+import asyncio
+
+from sharding import FORWARDED_HEADER, INTERNAL_PREFIX, SCOPE_HEADER, TOKEN_HEADER, HashRing, ShardMiddleware, ShardRouter
+
+SECRET = "cluster-secret"
+
+
+def _setup():
+    router = ShardRouter("w1", "http://w1", "/nonexistent", secret=SECRET)
+    router.members = {"w1": "http://w1", "w2": "http://w2"}
+    router.ring = HashRing(router.members)
+    acquired, served, forwarded = [], [], []
+
+    async def acquire(key):
+        acquired.append(key)
+
+    async def app(scope, receive, send):
+        served.append(scope)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    router.acquire = acquire
+    middleware = ShardMiddleware(app, router)
+
+    async def forward(scope, receive, send, url, headers):
+        forwarded.append((url, headers))
+
+    middleware._forward_http = forward
+    return router, middleware, acquired, served, forwarded
+
+
+def _game_owned_by(router, worker):
+    return next(f"G{i}" for i in range(1000) if router.owner(f"G{i}") == worker)
+
+
+def _request(middleware, path, headers):
+    sent = []
+    scope = {
+        "type": "http", "method": "GET", "path": path, "query_string": b"",
+        "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def test_client_cannot_claim_a_forwarded_request():
+    router, middleware, acquired, served, forwarded = _setup()
+    game_id = _game_owned_by(router, "w2")
+    _request(middleware, f"/api/games/{game_id}", {FORWARDED_HEADER: "w2", "authorization": "Bearer t"})
+    assert acquired == [] and served == []
+    url, headers = forwarded[0]
+    assert url == "http://w2"
+    assert headers["authorization"] == "Bearer t"
+
+
+def test_worker_forwarded_request_is_served_here():
+    router, middleware, acquired, served, forwarded = _setup()
+    game_id = _game_owned_by(router, "w2")
+    _request(middleware, f"/api/games/{game_id}", {FORWARDED_HEADER: "w2", TOKEN_HEADER: SECRET})
+    assert acquired == [game_id] and len(served) == 1 and forwarded == []
+
+
+def test_internal_headers_are_stripped_from_client_requests():
+    router, middleware, acquired, served, forwarded = _setup()
+    game_id = _game_owned_by(router, "w1")
+    _request(middleware, f"/api/games/{game_id}", {SCOPE_HEADER: "local", TOKEN_HEADER: "guess", "x-other": "1"})
+    names = {k.decode("latin-1") for k, _ in served[0]["headers"]}
+    assert names == {"x-other"}
+
+
+def test_internal_endpoints_need_the_secret():
+    router, middleware, acquired, served, forwarded = _setup()
+    denied = _request(middleware, f"{INTERNAL_PREFIX}release/G1", {TOKEN_HEADER: "guess"})
+    assert denied[0]["status"] == 403 and served == []
+    _request(middleware, f"{INTERNAL_PREFIX}release/G1", {TOKEN_HEADER: SECRET})
+    assert len(served) == 1
+
+    router.secret = ""  # An unset secret never matches
+    denied = _request(middleware, f"{INTERNAL_PREFIX}release/G1", {TOKEN_HEADER: ""})
+    assert denied[0]["status"] == 403
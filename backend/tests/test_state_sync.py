@@ -0,0 +1,106 @@
+import asyncio
+import copy
+
+import state_sync as state_sync_module
+from conftest import FakeSocket, settle
+from socket_manager import ConnectionManager
+from state_sync import StateSync, diff_state, state_sync
+
+
+def apply_patch(doc, patch):
+    """Client side of a STATE_PATCH (the add / remove / replace subset)."""
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        keys = [k.replace("~1", "/").replace("~0", "~") for k in op["path"].split("/")[1:]]
+        if not keys:
+            doc = copy.deepcopy(op["value"])
+            continue
+        parent = doc
+        for key in keys[:-1]:
+            parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+        last = keys[-1]
+        if isinstance(parent, list):
+            if op["op"] == "remove":
+                parent.pop(int(last))
+            elif last == "-":
+                parent.append(op["value"])
+            elif op["op"] == "add":
+                parent.insert(int(last), op["value"])
+            else:
+                parent[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del parent[last]
+        else:
+            parent[last] = op["value"]
+    return doc
+
+
+def test_patch_round_trip():
+    old = {
+        "players": {"p1": {"money": 1500, "position": 0}, "p/2": {"money": 1500, "position": 5}},
+        "logs": [f"entry {i}" for i in range(50)],
+        "dice": [1, 2],
+        "winner_id": None,
+    }
+    new = copy.deepcopy(old)
+    new["players"]["p1"]["money"] = 1300
+    new["players"]["p/2"]["position"] = 11
+    new["players"]["p3"] = {"money": 1500, "position": 0}
+    new["logs"] = new["logs"][3:] + ["a", "b", "c"]
+    new["dice"] = [6, 6]
+    del new["winner_id"]
+    assert apply_patch(old, diff_state(old, new)) == new
+    assert diff_state(new, copy.deepcopy(new)) == []
+
+
+def test_commit_versions_and_stamp():
+    sync = StateSync()
+    stamped = []
+    assert sync.commit("G", {"money": 1, "version": 0}, stamped.append) is None
+    envelope = sync.commit("G", {"money": 2, "version": 0}, stamped.append)
+    assert envelope == {"base_version": 1, "version": 2, "patch": [{"op": "replace", "path": "/money", "value": 2}]}
+    # Unchanged state keeps its version
+    assert sync.commit("G", {"money": 2, "version": 0}, stamped.append)["version"] == 2
+    assert stamped == [1, 2, 2]
+
+
+def _no_diff(*args):
+    raise AssertionError("diffed without delta clients")
+
+
+def test_commit_without_diff_only_compares(monkeypatch):
+    sync = StateSync()
+    sync.commit("G", {"money": 1})
+    monkeypatch.setattr(state_sync_module, "diff_state", _no_diff)
+    envelope = sync.commit("G", {"money": 2}, diff=False)
+    assert envelope == {"base_version": 1, "version": 2, "patch": None}
+    assert sync.commit("G", {"money": 2}, diff=False)["version"] == 2
+    assert sync.snapshot("G") == {"money": 2, "version": 2}
+
+
+def test_broadcast_diffs_only_for_delta_clients(monkeypatch):
+    calls = []
+    real_diff = state_sync_module.diff_state
+    monkeypatch.setattr(state_sync_module, "diff_state", lambda *args: calls.append(1) or real_diff(*args))
+
+    async def run():
+        manager = ConnectionManager()
+        full, delta = FakeSocket(), FakeSocket()
+        await manager.connect(full, "SYNC1", "u1")
+        for money in (1, 2):
+            await manager.broadcast("SYNC1", {"type": "S", "game_state": {"money": money}})
+            await settle()
+        assert calls == []
+
+        await manager.connect(delta, "SYNC1", "u2", delta=True)
+        await manager.broadcast("SYNC1", {"type": "S", "game_state": {"money": 3}})
+        await settle()
+        assert calls
+        assert [m["game_state"]["money"] for m in full.sent] == [1, 2, 3]
+        assert delta.sent[-1]["patch"] == [{"op": "replace", "path": "/money", "value": 3}]
+        assert delta.sent[-1]["base_version"] == 2 and delta.sent[-1]["version"] == 3
+
+    try:
+        asyncio.run(run())
+    finally:
+        state_sync.forget("SYNC1")
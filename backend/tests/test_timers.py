@@ -0,0 +1,97 @@
+"""Turn timers expire and re-arm on the game's actor, not from the game loop."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from conftest import settle
+from models import Player
+
+import main
+from bot_scheduler import bot_scheduler
+from game_engine import TURN_GRACE_SECONDS, engine
+from log_store import log_store
+from state_sync import state_sync
+
+
+def _start(game_id):
+    engine.create_game(game_id, host_id="u1", turn_timer=30, seed=1)
+    for i, character in enumerate(("Putin", "Trump", "Kim"), 1):
+        engine.add_player(game_id, Player(id=f"p{i}", user_id=f"u{i}", name=f"P{i}", character=character, color="#fff"))
+    assert engine.start_game(game_id).get("success")
+    return engine.games[game_id]
+
+
+def _time_out(game):
+    """Move the turn expiry (wall clock) past its grace period."""
+    game.turn_expiry = datetime.utcnow() - timedelta(seconds=TURN_GRACE_SECONDS + 1)
+
+
+def _cleanup(game_id):
+    engine.delete_game(game_id)
+    for kind in ("turn", "auction"):
+        engine.deadlines.cancel((game_id, kind))
+    bot_scheduler.cancel(game_id)
+    state_sync.forget(game_id)
+    log_store.forget(game_id)
+
+
+def test_expiry_is_applied_by_the_actor():
+    async def run():
+        game = _start("TIME1")
+        current = game.players[game.player_order[game.current_turn_index]]
+        try:
+            _time_out(game)
+            assert main.expire_due_timers(time.monotonic() + 3600) == 1
+            # Queued, not applied from the loop
+            assert not current.is_bankrupt
+            await settle()
+            assert current.is_bankrupt
+            # The next player's turn got a timer of its own
+            assert engine.deadlines.remaining(("TIME1", "turn")) > 0
+        finally:
+            _cleanup("TIME1")
+            await settle()
+
+    asyncio.run(run())
+
+
+def test_expiry_queued_behind_an_ended_turn_is_stale():
+    async def run():
+        game = _start("TIME3")
+        current = game.players[game.player_order[game.current_turn_index]]
+        following = game.players[game.player_order[(game.current_turn_index + 1) % len(game.player_order)]]
+        try:
+            _time_out(game)
+            game.turn_state["has_rolled"] = True
+            ended = main.game_actors.submit("TIME3", lambda out: engine.end_turn("TIME3", current.id))
+            assert main.expire_due_timers(time.monotonic() + 3600) == 1
+            await settle()
+            assert (await ended).get("success")
+            assert game.players[game.player_order[game.current_turn_index]] is following
+            assert not any(player.is_bankrupt for player in game.players.values())
+            # Re-armed for the following player's own timer
+            assert 0 < engine.deadlines.remaining(("TIME3", "turn")) <= game.turn_timer + TURN_GRACE_SECONDS
+        finally:
+            _cleanup("TIME3")
+            await settle()
+
+    asyncio.run(run())
+
+
+def test_restored_timers_are_rearmed_on_the_actor():
+    async def run():
+        game = _start("TIME2")
+        snapshot = engine.snapshot(game)
+        engine.deadlines.cancel(("TIME2", "turn"))
+        engine.timer_resumer = main.resume_timers_on_actor
+        try:
+            engine.resume_game(snapshot["state"], snapshot["rng"], snapshot["chance_pile"])
+            assert engine.deadlines.remaining(("TIME2", "turn")) is None
+            await settle()
+            assert engine.deadlines.remaining(("TIME2", "turn")) > 0
+        finally:
+            engine.timer_resumer = None
+            _cleanup("TIME2")
+            await settle()
+
+    asyncio.run(run())
@@ -0,0 +1,189 @@
+"""
+Encoding of outgoing WebSocket frames.
+
+Messages are encoded once into text and the same frame is sent to every
+recipient (Starlette's send_json would re-serialize it per connection).
+orjson is used when installed; the standard json module is the fallback.
+A game state that is already encoded (see StateSync.encoded) is spliced into
+its message as is instead of being encoded again, possibly only when the frame
+is written (ConnectionManager binds queued messages to the latest state).
+
+Game sockets may ask for binary MessagePack frames instead (`?format=msgpack`,
+needs the msgpack package). Map keys found in MSGPACK_KEYS are sent as their
+index in that list; the first frame of such a connection is a PROTOCOL
+message (plain MessagePack) carrying the list.
+"""
+import json
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # Optional: only faster
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed by ?format=msgpack clients
+    msgpack = None
+
+Payload = Union[str, bytes]
+
+# Keys replaced by their index in MessagePack frames (GameState, Player, Property, turn_state, messages)
+MSGPACK_KEYS = (
+    "type", "version", "game_state", "base_version", "patch", "op", "path", "value",
+    "id", "name", "group", "price", "rent", "owner_id", "houses", "is_mortgaged", "is_destroyed",
+    "is_monopoly", "destruction_turn", "isolation_turns", "mortgage_turn",
+    "user_id", "character", "money", "position", "properties", "is_jailed", "jail_turns", "color",
+    "avatar_url", "is_bot", "difficulty", "is_bankrupt", "ability_used_this_game", "ability_cooldown",
+    "skipped_turns",
+    "game_id", "host_id", "players", "player_order", "trades", "current_turn_index", "board", "pot",
+    "dice", "doubles_count", "game_status", "winner_id", "logs", "log_offset", "turn_number", "map_type",
+    "game_mode", "starting_money", "max_players", "turn_timer", "turn_expiry", "created_at", "started_at",
+    "finished_at", "turn_state",
+    "has_rolled", "is_doubles", "awaiting_buy_decision", "awaiting_payment", "awaiting_payment_amount",
+    "awaiting_payment_owner", "property_id", "auction_active", "auction_property_id", "auction_current_bid",
+    "auction_current_bidder", "auction_eligible_players", "auction_current_player_index", "auction_expiry",
+    "build_counts",
+    "player_id", "player_name", "message", "action", "actions", "landed_on", "chance_card", "amount",
+    "state", "your_id", "hand",
+)
+
+
+def _default(value: Any) -> Any:
+    """Types plain json cannot encode (what jsonable_encoder used to convert)."""
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value):
+        return asdict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> str:
+        return orjson.dumps(value, default=_default, option=_OPTIONS).decode("utf-8")
+else:
+    def dumps(value: Any) -> str:
+        return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_frame(message: dict, state_json: Optional[str] = None) -> str:
+    """Text frame of a message; `state_json` (already encoded) goes in as its game_state."""
+    if state_json is None:
+        return dumps(message)
+    return _splice(dumps({k: v for k, v in message.items() if k != "game_state"}), f'"game_state":{state_json}')
+
+
+def encode_head(message: dict) -> str:
+    """A message without its version and game_state, to be completed by with_state."""
+    return dumps({k: v for k, v in message.items() if k not in ("version", "game_state")})
+
+
+def with_state(head: str, version: int, state_json: str) -> str:
+    """Text frame of an encoded head carrying a given state version."""
+    return _splice(head, f'"version":{version},"game_state":{state_json}')
+
+
+def _splice(head: str, fields: str) -> str:
+    """Append encoded fields to an encoded JSON object."""
+    return f'{head[:-1]}{"," if len(head) > 2 else ""}{fields}}}'
+
+
+class JsonCodec:
+    """Text frames (the default)."""
+    name = "json"
+    binary = False
+
+    def encode(self, value: Any) -> str:
+        return dumps(value)
+
+    def frame(self, message: dict, state: Optional[str] = None) -> str:
+        return encode_frame(message, state)
+
+    def head(self, message: dict) -> str:
+        return encode_head(message)
+
+    def bind(self, head: str, version: int, state: str) -> str:
+        return with_state(head, version, state)
+
+
+class MsgpackCodec:
+    """Binary MessagePack frames with dictionary-coded keys."""
+    name = "msgpack"
+    binary = True
+
+    def __init__(self, keys=MSGPACK_KEYS):
+        self.keys = tuple(keys)
+        self.codes = {key: i for i, key in enumerate(self.keys)}
+        # Pre-encoded codes of the keys spliced into frames
+        self._version = msgpack.packb(self.codes["version"])
+        self._state = msgpack.packb(self.codes["game_state"])
+
+    def protocol(self) -> bytes:
+        """First frame of a connection: the key dictionary, with plain keys."""
+        return msgpack.packb({"type": "PROTOCOL", "format": self.name, "keys": list(self.keys)})
+
+    def _compact(self, value: Any) -> Any:
+        # Only dictionary codes are sent as integer keys (other keys become strings, as in JSON)
+        if isinstance(value, dict):
+            codes = self.codes
+            return {
+                codes.get(k, k) if isinstance(k, str) else str(k): self._compact(v)
+                for k, v in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [self._compact(v) for v in value]
+        return value
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(self._compact(value), default=_default, use_bin_type=True)
+
+    def frame(self, message: dict, state: Optional[bytes] = None) -> bytes:
+        if state is None:
+            return self.encode(message)
+        head = self.encode({k: v for k, v in message.items() if k != "game_state"})
+        return _splice_map(head, 1, self._state + state)
+
+    def head(self, message: dict) -> bytes:
+        return self.encode({k: v for k, v in message.items() if k not in ("version", "game_state")})
+
+    def bind(self, head: bytes, version: int, state: bytes) -> bytes:
+        return _splice_map(head, 2, self._version + msgpack.packb(version) + self._state + state)
+
+
+def _splice_map(head: bytes, count: int, entries: bytes) -> bytes:
+    """Append `count` encoded entries to an encoded MessagePack map."""
+    first = head[0]
+    if first & 0xF0 == 0x80:
+        size, offset = first & 0x0F, 1
+    elif first == 0xDE:
+        size, offset = int.from_bytes(head[1:3], "big"), 3
+    else:
+        size, offset = int.from_bytes(head[1:5], "big"), 5
+    size += count
+    if size < 16:
+        header = bytes((0x80 | size,))
+    elif size < 0x10000:
+        header = b"\xde" + size.to_bytes(2, "big")
+    else:
+        header = b"\xdf" + size.to_bytes(4, "big")
+    return header + head[offset:] + entries
+
+
+JSON_CODEC = JsonCodec()
+CODECS: Dict[str, Any] = {"json": JSON_CODEC}
+if msgpack is not None:
+    CODECS["msgpack"] = MsgpackCodec()
+
+
+def codec_for(name: Optional[str]):
+    """Codec a client asked for; JSON when unknown or not installed."""
+    return CODECS.get((name or "json").lower(), JSON_CODEC)
@@ -1,4 +1,5 @@
 import { useEffect, useState, useRef, useCallback } from 'react';
+import { applyStatePatch } from '../utils/statePatch';
 
 const useGameSocket = (gameId, playerId) => {
     const [gameState, setGameState] = useState(null);
@@ -7,6 +8,9 @@ const useGameSocket = (gameId, playerId) => {
     const socketRef = useRef(null);
     const reconnectTimeoutRef = useRef(null);
     const pingIntervalRef = useRef(null);
+    // Last applied state and its version (server sends patches against it)
+    const stateRef = useRef(null);
+    const versionRef = useRef(0);
 
     const connect = useCallback(() => {
         if (!gameId || !playerId) return;
@@ -14,7 +18,7 @@ const useGameSocket = (gameId, playerId) => {
         const token = localStorage.getItem('monopoly_token');
         const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
         const host = import.meta.env.DEV ? 'localhost:8080' : window.location.host;
-        const ws = new WebSocket(`${protocol}//${host}/ws/${gameId}?player_id=${playerId}&token=${token}`);
+        const ws = new WebSocket(`${protocol}//${host}/ws/${gameId}?player_id=${playerId}&token=${token}&delta=1`);
 
         socketRef.current = ws;
 
@@ -41,9 +45,29 @@ const useGameSocket = (gameId, playerId) => {
             console.log("WS Msg:", data);
 
             if (data.game_state) {
+                stateRef.current = data.game_state;
+                versionRef.current = data.version ?? data.game_state.version ?? 0;
                 setGameState(data.game_state);
+            } else if (data.patch) {
+                if (!stateRef.current || data.base_version !== versionRef.current) {
+                    // Missed a version - ask for a full snapshot
+                    ws.send(JSON.stringify({ action: 'SYNC' }));
+                } else {
+                    stateRef.current = applyStatePatch(stateRef.current, data.patch);
+                    versionRef.current = data.version;
+                    setGameState(stateRef.current);
+                }
+                data.game_state = stateRef.current;
+            } else if (data.version !== undefined) {
+                // State unchanged since the last version
+                if (data.version !== versionRef.current) {
+                    ws.send(JSON.stringify({ action: 'SYNC' }));
+                }
+                data.game_state = stateRef.current;
             }
 
+            if (data.type === 'STATE_PATCH') return; // Pure state update, no event
+
             if (data.type) {
                 setLastAction(data);
             }
@@ -0,0 +1,79 @@
+import { useEffect, useState, useRef } from 'react';
+
+// Waiting games pushed by the /ws/lobby change feed (instead of polling /api/games)
+const useLobbyFeed = (enabled) => {
+    const [games, setGames] = useState([]);
+    const [connected, setConnected] = useState(false);
+    const gamesRef = useRef(new Map());
+
+    useEffect(() => {
+        if (!enabled) return undefined;
+
+        let ws = null;
+        let pingInterval = null;
+        let reconnectTimeout = null;
+        let closed = false;
+
+        const publish = () => {
+            const list = [...gamesRef.current.values()];
+            list.sort((a, b) => (a.created_at || '').localeCompare(b.created_at || ''));
+            setGames(list);
+        };
+
+        const connect = () => {
+            const token = localStorage.getItem('monopoly_token');
+            if (!token) return;
+            const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+            const host = import.meta.env.DEV ? 'localhost:8080' : window.location.host;
+            ws = new WebSocket(`${protocol}//${host}/ws/lobby?token=${token}&status=waiting`);
+
+            ws.onopen = () => {
+                pingInterval = setInterval(() => {
+                    if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ action: 'PING' }));
+                }, 15000);
+            };
+
+            ws.onmessage = (event) => {
+                const data = JSON.parse(event.data);
+                if (data.type === 'LOBBY_SNAPSHOT') {
+                    gamesRef.current = new Map(data.games.map(g => [g.game_id, g]));
+                    setConnected(true);
+                    publish();
+                } else if (data.type === 'LOBBY_EVENTS') {
+                    for (const e of data.events) {
+                        if (e.op === 'add') {
+                            gamesRef.current.set(e.game.game_id, e.game);
+                        } else if (e.op === 'update') {
+                            const game = gamesRef.current.get(e.game_id);
+                            if (game) gamesRef.current.set(e.game_id, { ...game, ...e.changes });
+                        } else if (e.op === 'remove') {
+                            gamesRef.current.delete(e.game_id);
+                        }
+                    }
+                    publish();
+                }
+            };
+
+            ws.onclose = () => {
+                setConnected(false);
+                if (pingInterval) clearInterval(pingInterval);
+                if (!closed) reconnectTimeout = setTimeout(connect, 3000);
+            };
+
+            ws.onerror = () => ws.close();
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            if (ws) ws.close();
+            if (pingInterval) clearInterval(pingInterval);
+            if (reconnectTimeout) clearTimeout(reconnectTimeout);
+            setConnected(false);
+        };
+    }, [enabled]);
+
+    return { games, connected };
+};
+
+export default useLobbyFeed;
@@ -192,12 +192,14 @@ const GameRoom = () => {
     }, [gameState?.current_turn_index, gameState?.game_status]);
 
     // Log management - Update immediately to keep chat fresh, BUT delay roll messages if rolling
+    // Counts are absolute (log_offset + tail length): the server only keeps the last log entries in state
     const [releasedLogCount, setReleasedLogCount] = useState(0);
+    const logTotal = (state) => (state?.log_offset || 0) + state.logs.length;
 
     // Initial sync of releasedLogCount
     useEffect(() => {
         if (gameState?.logs && releasedLogCount === 0) {
-            setReleasedLogCount(gameState.logs.length);
+            setReleasedLogCount(logTotal(gameState));
         }
     }, [gameState?.logs]);
 
@@ -216,13 +218,14 @@ const GameRoom = () => {
     // Auto-sync logs when NOT in a roll sequence
     useEffect(() => {
         if (gameState?.logs && !showDice && !diceRolling && !isRolling) {
-            setReleasedLogCount(gameState.logs.length);
+            setReleasedLogCount(logTotal(gameState));
         }
     }, [gameState?.logs, showDice, diceRolling, isRolling]);
 
     const displayedLogs = React.useMemo(() => {
-        return (gameState?.logs || []).slice(0, releasedLogCount);
-    }, [gameState?.logs, releasedLogCount]);
+        if (!gameState?.logs) return [];
+        return gameState.logs.slice(0, Math.max(0, releasedLogCount - (gameState.log_offset || 0)));
+    }, [gameState?.logs, gameState?.log_offset, releasedLogCount]);
 
     // Animation States
     const [musicPlaying, setMusicPlaying] = useState(false);
@@ -756,9 +759,9 @@ const GameRoom = () => {
                     setTimeout(() => {
                         // Release logs now that dice have settled!
                         if (lastAction.game_state?.logs) {
-                            setReleasedLogCount(lastAction.game_state.logs.length);
+                            setReleasedLogCount(logTotal(lastAction.game_state));
                         } else if (gameState?.logs) {
-                            setReleasedLogCount(gameState.logs.length);
+                            setReleasedLogCount(logTotal(gameState));
                         }
 
                         // Trigger movement
@@ -8,6 +8,7 @@ import {
 } from 'lucide-react';
 import CharacterSelection from '../components/CharacterSelection';
 import TelegramLoginButton from '../components/TelegramLoginButton';
+import useLobbyFeed from '../hooks/useLobbyFeed';
 
 const WhoAmIAnimation = React.lazy(() => import('../components/WhoAmIAnimation'));
 
@@ -349,13 +350,21 @@ const Lobby = () => {
         }
     };
 
+    // Waiting games are pushed by the lobby feed; polling is the fallback while it is down
+    const lobbyFeed = useLobbyFeed(mode === 'menu' || mode === 'join');
+    const lobbyFeedRef = React.useRef(false);
+    lobbyFeedRef.current = lobbyFeed.connected;
+    useEffect(() => {
+        if (lobbyFeed.connected) setActiveGames(lobbyFeed.games);
+    }, [lobbyFeed.games, lobbyFeed.connected]);
+
     useEffect(() => {
         let interval;
         if (mode === 'menu' || mode === 'join') {
-            fetchActiveGames();
+            if (!lobbyFeedRef.current) fetchActiveGames();
             fetchMyGames(); // Added fetch
             interval = setInterval(() => {
-                fetchActiveGames();
+                if (!lobbyFeedRef.current) fetchActiveGames();
                 fetchMyGames();
             }, 5000);
         }
@@ -0,0 +1,39 @@
+// Applies JSON-Patch style operations (add / remove / replace) sent by the server.
+// Containers along each patched path are copied, untouched branches are shared,
+// so React sees new references only where the state actually changed.
+
+const decodeKey = (key) => key.replace(/~1/g, '/').replace(/~0/g, '~');
+
+const parsePath = (path) => (path === '' ? [] : path.slice(1).split('/').map(decodeKey));
+
+const copy = (value) => (Array.isArray(value) ? value.slice() : { ...value });
+
+const applyOp = (root, op) => {
+    const keys = parsePath(op.path);
+    if (keys.length === 0) {
+        return op.op === 'remove' ? null : op.value;
+    }
+
+    const newRoot = copy(root);
+    let node = newRoot;
+    for (let i = 0; i < keys.length - 1; i++) {
+        const child = copy(node[keys[i]]);
+        node[keys[i]] = child;
+        node = child;
+    }
+
+    const last = keys[keys.length - 1];
+    if (Array.isArray(node)) {
+        const index = last === '-' ? node.length : Number(last);
+        if (op.op === 'add') node.splice(index, 0, op.value);
+        else if (op.op === 'remove') node.splice(index, 1);
+        else node[index] = op.value;
+    } else if (op.op === 'remove') {
+        delete node[last];
+    } else {
+        node[last] = op.value;
+    }
+    return newRoot;
+};
+
+export const applyStatePatch = (state, patch) => patch.reduce(applyOp, state);